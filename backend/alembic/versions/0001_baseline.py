@@ -0,0 +1,32 @@
+"""Baseline schema
+
+Until migrations existed the schema was created by ``Base.metadata.create_all``
+at startup, so every deployment already has these tables. On an empty database
+this revision creates them; elsewhere it is a no-op (``checkfirst``).
+
+Revision ID: 0001
+Revises:
+Create Date: 2026-10-17 09:00:00
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+
+from app.db.base import Base
+import app.models  # noqa: F401
+
+
+# revision identifiers, used by Alembic.
+revision: str = "0001"
+down_revision: Union[str, None] = None
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    Base.metadata.create_all(bind=op.get_bind(), checkfirst=True)
+
+
+def downgrade() -> None:
+    pass
@@ -0,0 +1,104 @@
+"""Scan ingest schema: tool execution history, finding fingerprints, unique targets
+
+Catches up databases created before these were added to the models; on
+databases where ``create_all`` already made them, every step is skipped.
+
+Revision ID: 0002
+Revises: 0001
+Create Date: 2026-10-17 09:05:00
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+from app.db.indexes import has_index
+
+
+# revision identifiers, used by Alembic.
+revision: str = "0002"
+down_revision: Union[str, None] = "0001"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+TOOL_EXECUTION_INDEXES = [
+    ("ix_tool_executions_id", ["id"], False),
+    ("ix_tool_executions_execution_id", ["execution_id"], True),
+    ("ix_tool_executions_started_at", ["started_at"], False),
+    ("ix_tool_executions_tool_started", ["tool_name", "started_at"], False),
+    ("ix_tool_executions_engagement_started", ["engagement_id", "started_at"], False),
+    ("ix_tool_executions_status_started", ["status", "started_at"], False),
+]
+
+
+def _create_tool_executions() -> None:
+    op.create_table(
+        "tool_executions",
+        sa.Column("id", sa.Integer(), primary_key=True),
+        sa.Column("execution_id", sa.String(36), nullable=False),
+        sa.Column("tool_name", sa.String(100), nullable=False),
+        sa.Column("engagement_id", sa.Integer(), sa.ForeignKey("engagements.id"), nullable=True),
+        sa.Column("executed_by_id", sa.Integer(), sa.ForeignKey("users.id"), nullable=True),
+        sa.Column("command", sa.Text(), nullable=False),
+        sa.Column("status", sa.String(20), nullable=False),
+        sa.Column("return_code", sa.Integer(), nullable=True),
+        sa.Column("cached", sa.Boolean(), nullable=False),
+        sa.Column("started_at", sa.DateTime(), nullable=False),
+        sa.Column("duration_seconds", sa.Float(), nullable=False),
+        sa.Column("output_file", sa.String(500), nullable=True),
+        sa.Column("hash_sha256", sa.String(64), nullable=True),
+        sa.Column("hash_md5", sa.String(32), nullable=True),
+        sa.Column("stdout_bytes", sa.BigInteger(), nullable=False),
+        sa.Column("stderr_bytes", sa.BigInteger(), nullable=False),
+        sa.Column("output_truncated", sa.Boolean(), nullable=False),
+        sa.Column("stdout_preview", sa.Text(), nullable=True),
+        sa.Column("stderr_preview", sa.Text(), nullable=True),
+        sa.Column("created_at", sa.DateTime(), nullable=False),
+        sa.Column("updated_at", sa.DateTime(), nullable=False),
+    )
+
+
+def upgrade() -> None:
+    bind = op.get_bind()
+    inspector = sa.inspect(bind)
+    tables = set(inspector.get_table_names())
+    
+    if "tool_executions" not in tables:
+        _create_tool_executions()
+        inspector.clear_cache()
+    for name, columns, unique in TOOL_EXECUTION_INDEXES:
+        if not has_index(inspector, "tool_executions", name, columns, unique):
+            op.create_index(name, "tool_executions", columns, unique=unique)
+    
+    if "fingerprint" not in {c["name"] for c in inspector.get_columns("vulnerabilitys")}:
+        op.add_column("vulnerabilitys", sa.Column("fingerprint", sa.String(64), nullable=True))
+        inspector.clear_cache()
+    if not has_index(inspector, "vulnerabilitys", "ix_vulnerabilities_engagement_fingerprint",
+                     ["engagement_id", "fingerprint"]):
+        op.create_index(
+            "ix_vulnerabilities_engagement_fingerprint", "vulnerabilitys", ["engagement_id", "fingerprint"],
+        )
+    
+    if not has_index(inspector, "targets", "uq_targets_engagement_identifier",
+                     ["engagement_id", "identifier"], unique=True):
+        duplicates = bind.execute(sa.text(
+            "SELECT COUNT(*) FROM (SELECT engagement_id, identifier FROM targets "
+            "GROUP BY engagement_id, identifier HAVING COUNT(*) > 1) AS d"
+        )).scalar()
+        if duplicates:
+            raise RuntimeError(
+                f"{duplicates} (engagement_id, identifier) pairs occur more than once in targets; "
+                "merge the duplicate targets before creating uq_targets_engagement_identifier"
+            )
+        op.create_index(
+            "uq_targets_engagement_identifier", "targets", ["engagement_id", "identifier"], unique=True,
+        )
+
+
+def downgrade() -> None:
+    op.drop_index("uq_targets_engagement_identifier", table_name="targets")
+    op.drop_index("ix_vulnerabilities_engagement_fingerprint", table_name="vulnerabilitys")
+    op.drop_column("vulnerabilitys", "fingerprint")
+    op.drop_table("tool_executions")
@@ -0,0 +1,57 @@
+"""Indexes for the list and lookup queries
+
+Each index matches a query the API runs:
+
+- targets, vulnerabilities, workflow executions: per-engagement lists filtered
+  by status and ordered by creation time
+- vulnerabilities: per-engagement severity filter, CVE lookup
+- targets: identifier lookup; target services by target
+- evidence: per-engagement lists
+- audit logs: per-resource and per-user history, newest first, and time ranges
+
+Lookups by engagement alone use the leading column of the composites. On
+PostgreSQL the indexes are built ``CONCURRENTLY`` (see
+``app.db.indexes.create_indexes``).
+
+Revision ID: 0003
+Revises: 0002
+Create Date: 2026-10-17 09:10:00
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+
+from app.db.indexes import create_indexes
+
+
+# revision identifiers, used by Alembic.
+revision: str = "0003"
+down_revision: Union[str, None] = "0002"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+INDEXES = [
+    ("ix_targets_engagement_status_created", "targets", ["engagement_id", "status", "created_at"]),
+    ("ix_targets_identifier", "targets", ["identifier"]),
+    ("ix_target_services_target_id", "target_services", ["target_id"]),
+    ("ix_vulnerabilities_engagement_severity", "vulnerabilitys", ["engagement_id", "severity"]),
+    ("ix_vulnerabilities_engagement_status_created", "vulnerabilitys", ["engagement_id", "status", "created_at"]),
+    ("ix_vulnerabilities_cve_id", "vulnerabilitys", ["cve_id"]),
+    ("ix_evidence_engagement_created", "evidences", ["engagement_id", "created_at"]),
+    ("ix_workflow_executions_engagement_status_created", "workflow_executions",
+     ["engagement_id", "status", "created_at"]),
+    ("ix_audit_logs_resource_timestamp", "audit_logs", ["resource", "resource_id", "timestamp"]),
+    ("ix_audit_logs_user_timestamp", "audit_logs", ["user_id", "timestamp"]),
+    ("ix_audit_logs_timestamp", "audit_logs", ["timestamp"]),
+]
+
+
+def upgrade() -> None:
+    create_indexes(op, INDEXES)
+
+
+def downgrade() -> None:
+    for name, table, _ in reversed(INDEXES):
+        op.drop_index(name, table_name=table, if_exists=True)
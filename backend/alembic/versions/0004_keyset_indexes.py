@@ -0,0 +1,46 @@
+"""Indexes for keyset pagination
+
+List endpoints page newest first by ``(created_at, id)`` within their filter
+(``timestamp`` for audit logs, ``started_at`` for tool executions, which
+0003 and 0002 already cover). These indexes let each page be a range scan
+that starts at the cursor instead of sorting the whole engagement; ``id`` is
+included because rows from one bulk import share a ``created_at``.
+
+Revision ID: 0004
+Revises: 0003
+Create Date: 2026-10-17 11:30:00
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+
+from app.db.indexes import create_indexes
+
+
+# revision identifiers, used by Alembic.
+revision: str = "0004"
+down_revision: Union[str, None] = "0003"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+INDEXES = [
+    ("ix_targets_engagement_created", "targets", ["engagement_id", "created_at", "id"]),
+    ("ix_vulnerabilities_engagement_created", "vulnerabilitys", ["engagement_id", "created_at", "id"]),
+    ("ix_workflow_executions_engagement_created", "workflow_executions", ["engagement_id", "created_at", "id"]),
+    ("ix_approvals_engagement_created", "approvals", ["engagement_id", "created_at", "id"]),
+    ("ix_reports_engagement_created", "reports", ["engagement_id", "created_at", "id"]),
+    ("ix_engagements_created", "engagements", ["created_at", "id"]),
+    ("ix_engagements_status_created", "engagements", ["status", "created_at", "id"]),
+    ("ix_engagements_owner_created", "engagements", ["owner_id", "created_at", "id"]),
+]
+
+
+def upgrade() -> None:
+    create_indexes(op, INDEXES)
+
+
+def downgrade() -> None:
+    for name, table, _ in reversed(INDEXES):
+        op.drop_index(name, table_name=table, if_exists=True)
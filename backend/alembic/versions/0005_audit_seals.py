@@ -0,0 +1,57 @@
+"""Audit seals: Merkle roots of written audit log batches, chained
+
+Skipped where ``create_all`` already made the table. Audit logs written
+before this revision stay unsealed; ``scripts/verify_audit.py`` reports
+them as such.
+
+Revision ID: 0005
+Revises: 0004
+Create Date: 2026-10-17 14:10:00
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+from app.db.indexes import has_index
+
+
+# revision identifiers, used by Alembic.
+revision: str = "0005"
+down_revision: Union[str, None] = "0004"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+AUDIT_SEAL_INDEXES = [
+    ("ix_audit_seals_id", ["id"]),
+    ("ix_audit_seals_last_log_id", ["last_log_id"]),
+]
+
+
+def upgrade() -> None:
+    inspector = sa.inspect(op.get_bind())
+    
+    if "audit_seals" not in inspector.get_table_names():
+        op.create_table(
+            "audit_seals",
+            sa.Column("id", sa.Integer(), primary_key=True),
+            sa.Column("first_log_id", sa.Integer(), nullable=False),
+            sa.Column("last_log_id", sa.Integer(), nullable=False),
+            sa.Column("entry_count", sa.Integer(), nullable=False),
+            sa.Column("merkle_root", sa.String(64), nullable=False),
+            sa.Column("previous_hash", sa.String(64), nullable=False),
+            sa.Column("chain_hash", sa.String(64), nullable=False, unique=True),
+            sa.Column("sealed_at", sa.DateTime(), nullable=False),
+            sa.Column("created_at", sa.DateTime(), nullable=False),
+            sa.Column("updated_at", sa.DateTime(), nullable=False),
+        )
+        inspector.clear_cache()
+    for name, columns in AUDIT_SEAL_INDEXES:
+        if not has_index(inspector, "audit_seals", name, columns):
+            op.create_index(name, "audit_seals", columns)
+
+
+def downgrade() -> None:
+    op.drop_table("audit_seals")
@@ -0,0 +1,53 @@
+"""API key lookup prefix; stop storing API keys in clear
+
+Keys are now found by their first characters (``anptop_`` plus 8) through
+an index and checked against an HMAC-SHA256 digest. Existing keys get their
+prefix from the stored plaintext, which is then cleared; their bcrypt
+hashes stay valid and are replaced by digests the first time each key is
+used. Downgrading cannot restore the plaintext keys.
+
+Revision ID: 0006
+Revises: 0005
+Create Date: 2026-10-17 16:20:00
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+from app.db.indexes import has_index
+
+
+# revision identifiers, used by Alembic.
+revision: str = "0006"
+down_revision: Union[str, None] = "0005"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+# len("anptop_") + API_KEY_LOOKUP_CHARS, as in app.core.credentials.api_key_lookup
+PREFIX_LENGTH = 15
+
+
+def upgrade() -> None:
+    bind = op.get_bind()
+    inspector = sa.inspect(bind)
+    
+    if "api_key_prefix" not in {c["name"] for c in inspector.get_columns("users")}:
+        op.add_column("users", sa.Column("api_key_prefix", sa.String(32), nullable=True))
+        inspector.clear_cache()
+    if not has_index(inspector, "users", "ix_users_api_key_prefix", ["api_key_prefix"]):
+        op.create_index("ix_users_api_key_prefix", "users", ["api_key_prefix"])
+    
+    bind.execute(sa.text(
+        f"UPDATE users SET api_key_prefix = substr(api_key, 1, {PREFIX_LENGTH}) "
+        "WHERE api_key IS NOT NULL AND api_key_prefix IS NULL AND substr(api_key, 1, 7) = 'anptop_'"
+    ))
+    # With the prefix backfilled the plaintext is no longer needed by lookups
+    bind.execute(sa.text("UPDATE users SET api_key = NULL WHERE api_key IS NOT NULL"))
+
+
+def downgrade() -> None:
+    op.drop_index("ix_users_api_key_prefix", table_name="users")
+    op.drop_column("users", "api_key_prefix")
@@ -0,0 +1,50 @@
+"""Index engagement team members
+
+Engagement lists for users other than admins and leads now return the
+engagements they own or are on the team of, in SQL
+(``team_members @> ARRAY[user_id]``). On PostgreSQL a GIN index serves
+that containment test, built ``CONCURRENTLY`` so the table stays writable;
+other databases get a plain index.
+
+Revision ID: 0007
+Revises: 0006
+Create Date: 2026-10-17 18:40:00
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+from app.db.indexes import has_index
+
+
+# revision identifiers, used by Alembic.
+revision: str = "0007"
+down_revision: Union[str, None] = "0006"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    bind = op.get_bind()
+    inspector = sa.inspect(bind)
+    if "engagements" not in inspector.get_table_names():
+        return
+    if has_index(inspector, "engagements", "ix_engagements_team_members", ["team_members"]):
+        return
+    
+    if bind.dialect.name != "postgresql":
+        op.create_index("ix_engagements_team_members", "engagements", ["team_members"])
+        return
+    
+    # CREATE INDEX CONCURRENTLY cannot run inside a transaction
+    with op.get_context().autocommit_block():
+        op.create_index(
+            "ix_engagements_team_members", "engagements", ["team_members"],
+            postgresql_using="gin", postgresql_concurrently=True,
+        )
+
+
+def downgrade() -> None:
+    op.drop_index("ix_engagements_team_members", table_name="engagements", if_exists=True)
@@ -0,0 +1,66 @@
+"""Unique finding fingerprints per engagement
+
+``ix_vulnerabilities_engagement_fingerprint`` becomes unique so concurrent
+ingests of the same scan output cannot insert the same finding twice; the
+ingester upserts against it. Manual findings have no fingerprint and NULLs
+never conflict, so they are unaffected. On PostgreSQL the new index is built
+``CONCURRENTLY`` before the old one is dropped.
+
+Revision ID: 0008
+Revises: 0007
+Create Date: 2026-10-17 21:10:00
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = "0008"
+down_revision: Union[str, None] = "0007"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+INDEX = "ix_vulnerabilities_engagement_fingerprint"
+BUILDING = "uq_vulnerabilities_engagement_fingerprint_new"
+COLUMNS = ["engagement_id", "fingerprint"]
+
+
+def upgrade() -> None:
+    bind = op.get_bind()
+    inspector = sa.inspect(bind)
+    if "vulnerabilitys" not in inspector.get_table_names():
+        return
+    if any(index["name"] == INDEX and index["unique"] for index in inspector.get_indexes("vulnerabilitys")):
+        return
+
+    duplicates = bind.execute(sa.text(
+        "SELECT COUNT(*) FROM (SELECT engagement_id, fingerprint FROM vulnerabilitys "
+        "WHERE fingerprint IS NOT NULL GROUP BY engagement_id, fingerprint HAVING COUNT(*) > 1) AS d"
+    )).scalar()
+    if duplicates:
+        raise RuntimeError(
+            f"{duplicates} (engagement_id, fingerprint) pairs occur more than once in vulnerabilitys; "
+            f"merge the duplicate findings before making {INDEX} unique"
+        )
+
+    if bind.dialect.name != "postgresql":
+        op.drop_index(INDEX, table_name="vulnerabilitys", if_exists=True)
+        op.create_index(INDEX, "vulnerabilitys", COLUMNS, unique=True)
+        return
+
+    # CREATE INDEX CONCURRENTLY cannot run inside a transaction; a build left
+    # invalid by an interrupted upgrade is dropped first
+    with op.get_context().autocommit_block():
+        op.drop_index(BUILDING, table_name="vulnerabilitys", postgresql_concurrently=True, if_exists=True)
+        op.create_index(BUILDING, "vulnerabilitys", COLUMNS, unique=True, postgresql_concurrently=True)
+        op.drop_index(INDEX, table_name="vulnerabilitys", postgresql_concurrently=True, if_exists=True)
+    op.execute(f"ALTER INDEX {BUILDING} RENAME TO {INDEX}")
+
+
+def downgrade() -> None:
+    op.drop_index(INDEX, table_name="vulnerabilitys", if_exists=True)
+    op.create_index(INDEX, "vulnerabilitys", COLUMNS)
@@ -2,12 +2,14 @@
 ANPTOP Backend - Approval Endpoints
 """
 
-from typing import List
-from fastapi import APIRouter, Depends, HTTPException, Query
+from typing import List, Optional
+from fastapi import APIRouter, Depends, HTTPException, Query, Response
 from sqlalchemy.ext.asyncio import AsyncSession
 from pydantic import BaseModel, Field
 from datetime import datetime
 
+from app.api.pagination import list_options, page_response
+from app.db.query import ListOptions
 from app.db.session import get_db
 from app.models.user import User
 from app.models.approval import Approval, ApprovalStatus, ApprovalType
@@ -44,12 +46,19 @@ class ApprovalAction(BaseModel):
 
 @router.get("/", response_model=List[ApprovalResponse])
 async def list_approvals(
+    response: Response,
     engagement_id: int = Query(..., description="Engagement ID"),
+    options: ListOptions = Depends(list_options(Approval)),
+    status_filter: Optional[List[ApprovalStatus]] = Query(None),
+    approval_type: Optional[List[ApprovalType]] = Query(None),
     current_user: User = Depends(get_current_user),
     db: AsyncSession = Depends(get_db),
 ):
-    """List approvals for an engagement."""
-    return await Approval.get_by_engagement(db, engagement_id)
+    """List approvals for an engagement, newest first, paged by cursor."""
+    page = await Approval.get_by_engagement(
+        db, engagement_id, options, status=status_filter, approval_type=approval_type,
+    )
+    return page_response(response, page)
 
 
 @router.get("/pending", response_model=List[ApprovalResponse])
@@ -3,15 +3,18 @@ ANPTOP Backend - Audit Log Endpoints
 """
 
 from typing import List, Optional
-from fastapi import APIRouter, Depends, HTTPException, Query
+from fastapi import APIRouter, Depends, HTTPException, Query, Response
 from sqlalchemy.ext.asyncio import AsyncSession
 from pydantic import BaseModel
 from datetime import datetime
 
+from app.api.pagination import list_options, page_response
+from app.db.query import ListOptions
 from app.db.session import get_db
 from app.models.user import User
-from app.models.audit import AuditLog
+from app.models.evidence import AuditLog
 from app.core.security import get_current_user, check_permission
+from app.core.audit_chain import prove_entry, verify_chain, verify_custody
 
 
 router = APIRouter()
@@ -34,32 +37,119 @@ class AuditLogResponse(BaseModel):
         from_attributes = True
 
 
+class ProofStep(BaseModel):
+    """One sibling hash on the path from a leaf to its Merkle root."""
+    side: str
+    hash: str
+
+
+class AuditProofResponse(BaseModel):
+    """Inclusion proof for one sealed audit log entry."""
+    log_id: int
+    leaf_hash: str
+    proof: List[ProofStep]
+    merkle_root: str
+    seal_id: int
+    previous_hash: str
+    chain_hash: str
+    valid: bool
+
+
+class AuditChainResponse(BaseModel):
+    """Result of verifying the audit seal chain."""
+    valid: bool
+    seals: int
+    entries: int
+    unsealed: int
+    head: Optional[str] = None
+    broken_seal_id: Optional[int] = None
+    error: Optional[str] = None
+
+
+class CustodyVerificationResponse(BaseModel):
+    """Custody records of one evidence item checked against the audit chain."""
+    evidence_id: int
+    valid: bool
+    verified: List[int]
+    unsealed: List[int]
+    mismatched: List[int]
+
+
 @router.get("/", response_model=List[AuditLogResponse])
 async def list_audit_logs(
+    response: Response,
     engagement_id: int = Query(..., description="Engagement ID"),
-    skip: int = Query(0, ge=0),
-    limit: int = Query(100, ge=1, le=1000),
+    options: ListOptions = Depends(list_options(AuditLog)),
+    action: Optional[List[str]] = Query(None),
     current_user: User = Depends(get_current_user),
     db: AsyncSession = Depends(get_db),
 ):
-    """List audit logs."""
+    """List audit logs, newest first, paged by cursor."""
     if not check_permission(current_user, "audit:read"):
         raise HTTPException(status_code=403, detail="Permission denied")
     
     # Get audit logs for engagement-related resources
-    logs = await AuditLog.get_by_resource(db, "engagement", str(engagement_id))
-    return logs[offset:limit] if (offset := skip) else logs[:limit]
+    page = await AuditLog.get_by_resource(
+        db, "engagement", str(engagement_id), options, action=action,
+    )
+    return page_response(response, page)
 
 
 @router.get("/user/{user_id}", response_model=List[AuditLogResponse])
 async def get_user_audit_logs(
     user_id: int,
-    skip: int = 0,
-    limit: int = 100,
+    response: Response,
+    options: ListOptions = Depends(list_options(AuditLog)),
+    action: Optional[List[str]] = Query(None),
     current_user: User = Depends(get_current_user),
     db: AsyncSession = Depends(get_db),
 ):
     """Get audit logs for a specific user."""
     if current_user.role != User.Role.ADMIN:
         raise HTTPException(status_code=403, detail="Only admins can view user audit logs")
-    return await AuditLog.get_by_user(db, user_id, skip=skip, limit=limit)
+    page = await AuditLog.get_by_user(db, user_id, options, action=action)
+    return page_response(response, page)
+
+
+@router.get("/verify", response_model=AuditChainResponse)
+async def verify_audit_chain(
+    deep: bool = Query(False, description="Also re-hash every sealed entry (reads the whole audit log)"),
+    current_user: User = Depends(get_current_user),
+    db: AsyncSession = Depends(get_db),
+):
+    """
+    Verify the chain of audit seals.
+    
+    Without ``deep`` only the seal links are checked, one hash per batch.
+    """
+    if current_user.role != User.Role.ADMIN:
+        raise HTTPException(status_code=403, detail="Only admins can verify the audit chain")
+    report = await verify_chain(db, deep=deep)
+    return report.as_dict()
+
+
+@router.get("/verify/custody/{evidence_id}", response_model=CustodyVerificationResponse)
+async def verify_evidence_custody(
+    evidence_id: int,
+    current_user: User = Depends(get_current_user),
+    db: AsyncSession = Depends(get_db),
+):
+    """Check an evidence item's chain of custody against the sealed audit entries."""
+    if not check_permission(current_user, "audit:read"):
+        raise HTTPException(status_code=403, detail="Permission denied")
+    return await verify_custody(db, evidence_id)
+
+
+@router.get("/{log_id}/proof", response_model=AuditProofResponse)
+async def get_audit_proof(
+    log_id: int,
+    current_user: User = Depends(get_current_user),
+    db: AsyncSession = Depends(get_db),
+):
+    """Get the Merkle inclusion proof for an audit log entry."""
+    if not check_permission(current_user, "audit:read"):
+        raise HTTPException(status_code=403, detail="Permission denied")
+    proof = await prove_entry(db, log_id)
+    if proof is None:
+        raise HTTPException(status_code=404, detail="Audit entry not found or not sealed yet")
+    return proof
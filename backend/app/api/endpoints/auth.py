@@ -2,7 +2,7 @@
 ANPTOP Backend - Authentication Endpoints
 """
 
-from datetime import timedelta
+from datetime import datetime, timedelta
 from typing import Optional
 from fastapi import APIRouter, Depends, HTTPException, status, Security
 from fastapi.security import OAuth2PasswordRequestForm, SecurityScopes
@@ -11,12 +11,13 @@ from pydantic import BaseModel, EmailStr
 
 from app.db.session import get_db
 from app.core.security import (
-    verify_password,
-    get_password_hash,
+    verify_password_async,
+    get_password_hash_async,
     create_access_token,
     create_refresh_token,
     get_current_user,
     get_current_active_user,
+    get_current_user_record,
     generate_mfa_secret,
     get_mfa_uri,
     generate_mfa_qr_code,
@@ -26,6 +27,8 @@ from app.core.security import (
 )
 from app.models.user import User, UserRole
 from app.core.config import settings
+from app.core.credentials import api_key_lookup, verified_api_keys
+from app.core.principal_cache import principal_cache
 
 
 router = APIRouter()
@@ -114,7 +117,7 @@ async def login(
         )
     
     # Verify password
-    if not verify_password(form_data.password, user.hashed_password):
+    if not await verify_password_async(form_data.password, user.hashed_password):
         raise HTTPException(
             status_code=status.HTTP_401_UNAUTHORIZED,
             detail="Incorrect email or password",
@@ -188,7 +191,7 @@ async def refresh_token(
                 detail="Invalid token",
             )
         
-        user = await User.get_by_id(db, user_id)
+        user = await User.get_by_id(db, int(user_id))
         if not user or not user.is_active:
             raise HTTPException(
                 status_code=status.HTTP_401_UNAUTHORIZED,
@@ -258,7 +261,7 @@ async def register(
     user = User(
         email=user_data.email,
         username=user_data.username,
-        hashed_password=get_password_hash(user_data.password),
+        hashed_password=await get_password_hash_async(user_data.password),
         full_name=user_data.full_name,
         role=user_data.role,
         is_active=True,
@@ -302,7 +305,7 @@ async def setup_mfa(
 @router.post("/mfa/enable", response_model=MFAVerifyResponse)
 async def enable_mfa(
     token: str,
-    current_user: User = Depends(get_current_active_user),
+    current_user: User = Depends(get_current_user_record),
     db: AsyncSession = Depends(get_db),
 ):
     """
@@ -323,6 +326,7 @@ async def enable_mfa(
     # Enable MFA
     current_user.mfa_enabled = True
     await current_user.update(db)
+    await principal_cache.invalidate(current_user.id)
     
     return {
         "verified": True,
@@ -333,7 +337,7 @@ async def enable_mfa(
 @router.post("/mfa/disable", response_model=MFAVerifyResponse)
 async def disable_mfa(
     token: str,
-    current_user: User = Depends(get_current_active_user),
+    current_user: User = Depends(get_current_user_record),
     db: AsyncSession = Depends(get_db),
 ):
     """
@@ -356,6 +360,7 @@ async def disable_mfa(
     current_user.mfa_enabled = False
     current_user.mfa_secret = None
     await current_user.update(db)
+    await principal_cache.invalidate(current_user.id)
     
     return {
         "verified": True,
@@ -367,29 +372,31 @@ async def disable_mfa(
 async def change_password(
     old_password: str,
     new_password: str,
-    current_user: User = Depends(get_current_active_user),
+    current_user: User = Depends(get_current_user_record),
     db: AsyncSession = Depends(get_db),
 ):
     """
     Change user password.
     """
     # Verify old password
-    if not verify_password(old_password, current_user.hashed_password):
+    if not await verify_password_async(old_password, current_user.hashed_password):
         raise HTTPException(
             status_code=status.HTTP_400_BAD_REQUEST,
             detail="Incorrect password",
         )
     
     # Update password
-    current_user.hashed_password = get_password_hash(new_password)
+    current_user.hashed_password = await get_password_hash_async(new_password)
+    current_user.password_changed_at = datetime.utcnow()
     await current_user.update(db)
+    await principal_cache.invalidate(current_user.id)
     
     return {"message": "Password changed successfully"}
 
 
 @router.post("/api-key/generate")
 async def generate_api_key_endpoint(
-    current_user: User = Depends(get_current_active_user),
+    current_user: User = Depends(get_current_user_record),
     db: AsyncSession = Depends(get_db),
 ):
     """
@@ -403,7 +410,10 @@ async def generate_api_key_endpoint(
         )
     
     api_key = generate_api_key()
-    current_user.api_key = api_key
+    # The old key stops authenticating, so it must stop getting its own rate limit bucket too
+    verified_api_keys.discard(current_user.api_key_prefix)
+    current_user.api_key = None
+    current_user.api_key_prefix = api_key_lookup(api_key)
     current_user.api_key_hash = hash_api_key(api_key)
     await current_user.update(db)
     
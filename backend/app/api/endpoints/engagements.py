@@ -3,15 +3,19 @@ ANPTOP Backend - Engagement Endpoints
 """
 
 from typing import List, Optional
-from fastapi import APIRouter, Depends, HTTPException, status, Query
+from fastapi import APIRouter, Depends, HTTPException, status, Query, Response
 from sqlalchemy.ext.asyncio import AsyncSession
 from pydantic import BaseModel, Field
 from datetime import datetime
 
+from app.api.pagination import list_options, page_response
+from app.db.query import ListOptions
 from app.db.session import get_db
 from app.models.user import User
 from app.models.engagement import Engagement, EngagementStatus, EngagementType
 from app.core.security import get_current_user, audit_log
+from app.core.access import engagement_acl
+from app.core.scope import scope_cache
 
 
 router = APIRouter()
@@ -88,11 +92,24 @@ class EngagementResponse(BaseModel):
         from_attributes = True
 
 
+class ScopeCheckRequest(BaseModel):
+    """Bulk scope check schema."""
+    targets: List[str] = Field(..., max_length=1_000_000)
+
+
+class ScopeCheckResponse(BaseModel):
+    """Bulk scope check result schema."""
+    checked: int
+    in_scope: List[str]
+    out_of_scope: List[str]
+
+
 @router.get("/", response_model=List[EngagementResponse])
 async def list_engagements(
-    skip: int = Query(0, ge=0),
-    limit: int = Query(100, ge=1, le=1000),
-    status_filter: Optional[EngagementStatus] = None,
+    response: Response,
+    options: ListOptions = Depends(list_options(Engagement)),
+    status_filter: Optional[List[EngagementStatus]] = Query(None),
+    engagement_type: Optional[List[EngagementType]] = Query(None),
     current_user: User = Depends(get_current_user),
     db: AsyncSession = Depends(get_db),
 ):
@@ -103,12 +120,16 @@ async def list_engagements(
     """
     # Admins and leads see all engagements
     if current_user.role in [User.Role.ADMIN, User.Role.LEAD]:
-        engagements = await Engagement.get_all(db, skip=skip, limit=limit, status=status_filter)
+        page = await Engagement.get_all(
+            db, options, status=status_filter, engagement_type=engagement_type,
+        )
     else:
-        # Other users only see engagements they're part of
-        engagements = await Engagement.get_by_owner(db, current_user.id, skip=skip, limit=limit)
+        # Other users only see engagements they own or are on the team of
+        page = await Engagement.get_accessible(
+            db, current_user.id, options, status=status_filter, engagement_type=engagement_type,
+        )
     
-    return engagements
+    return page_response(response, page)
 
 
 @router.get("/{engagement_id}", response_model=EngagementResponse)
@@ -120,6 +141,7 @@ async def get_engagement(
     """
     Get engagement by ID.
     """
+    await engagement_acl.require(db, current_user, engagement_id, "engagements:read")
     engagement = await Engagement.get_by_id(db, engagement_id)
     
     if not engagement:
@@ -128,14 +150,6 @@ async def get_engagement(
             detail="Engagement not found",
         )
     
-    # Check access
-    if current_user.role not in [User.Role.ADMIN, User.Role.LEAD]:
-        if engagement.owner_id != current_user.id and current_user.id not in engagement.team_members:
-            raise HTTPException(
-                status_code=status.HTTP_403_FORBIDDEN,
-                detail="You don't have access to this engagement",
-            )
-    
     return engagement
 
 
@@ -204,6 +218,7 @@ async def update_engagement(
     
     Requires: admin, lead, or ownership.
     """
+    await engagement_acl.require(db, current_user, engagement_id, "engagements:update")
     engagement = await Engagement.get_by_id(db, engagement_id)
     
     if not engagement:
@@ -212,14 +227,6 @@ async def update_engagement(
             detail="Engagement not found",
         )
     
-    # Check permissions
-    if current_user.role not in [User.Role.ADMIN, User.Role.LEAD]:
-        if engagement.owner_id != current_user.id:
-            raise HTTPException(
-                status_code=status.HTTP_403_FORBIDDEN,
-                detail="You don't have permission to update this engagement",
-            )
-    
     # Update fields
     update_data = engagement_data.model_dump(exclude_unset=True)
     engagement = await engagement.update(db, **update_data)
@@ -262,6 +269,8 @@ async def delete_engagement(
         )
     
     await engagement.delete(db)
+    scope_cache.invalidate(engagement_id)
+    engagement_acl.invalidate(engagement_id)
     
     # Audit log
     await audit_log(
@@ -282,6 +291,7 @@ async def start_engagement(
     """
     Start an engagement (change status to active).
     """
+    await engagement_acl.require(db, current_user, engagement_id, "engagements:update")
     engagement = await Engagement.get_by_id(db, engagement_id)
     
     if not engagement:
@@ -312,6 +322,7 @@ async def complete_engagement(
     """
     Complete an engagement.
     """
+    await engagement_acl.require(db, current_user, engagement_id, "engagements:update")
     engagement = await Engagement.get_by_id(db, engagement_id)
     
     if not engagement:
@@ -325,3 +336,30 @@ async def complete_engagement(
     await engagement.update(db)
     
     return {"message": "Engagement completed successfully", "engagement": engagement}
+
+
+@router.post("/{engagement_id}/scope/check", response_model=ScopeCheckResponse)
+async def check_scope(
+    engagement_id: int,
+    request: ScopeCheckRequest,
+    current_user: User = Depends(get_current_user),
+    db: AsyncSession = Depends(get_db),
+):
+    """
+    Check many targets against the engagement scope and blacklist in one call.
+    """
+    await engagement_acl.require(db, current_user, engagement_id, "engagements:read")
+    engagement = await Engagement.get_by_id(db, engagement_id)
+    
+    if not engagement:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail="Engagement not found",
+        )
+    
+    results = engagement.scope_index().check_many(request.targets)
+    return ScopeCheckResponse(
+        checked=len(results),
+        in_scope=[t for t, ok in zip(request.targets, results) if ok],
+        out_of_scope=[t for t, ok in zip(request.targets, results) if not ok],
+    )
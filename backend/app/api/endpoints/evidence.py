@@ -2,16 +2,19 @@
 ANPTOP Backend - Evidence Endpoints
 """
 
-from typing import List
-from fastapi import APIRouter, Depends, HTTPException, UploadFile, File, Query
+from typing import List, Optional
+from fastapi import APIRouter, Depends, HTTPException, UploadFile, File, Query, Response
 from sqlalchemy.ext.asyncio import AsyncSession
 from pydantic import BaseModel
 from datetime import datetime
 
+from app.api.pagination import list_options, page_response
+from app.db.query import ListOptions
 from app.db.session import get_db
 from app.models.user import User
 from app.models.evidence import Evidence, EvidenceType, EvidenceChainOfCustody
-from app.core.security import get_current_user, hash_evidence
+from app.core.security import get_current_user, hash_evidence, audit_log
+from app.core.audit_chain import CUSTODY_RESOURCE, custody_details
 
 
 router = APIRouter()
@@ -39,14 +42,16 @@ class EvidenceResponse(BaseModel):
 
 @router.get("/", response_model=List[EvidenceResponse])
 async def list_evidence(
+    response: Response,
     engagement_id: int = Query(..., description="Engagement ID"),
-    skip: int = 0,
-    limit: int = 100,
+    options: ListOptions = Depends(list_options(Evidence)),
+    evidence_type: Optional[List[EvidenceType]] = Query(None),
     current_user: User = Depends(get_current_user),
     db: AsyncSession = Depends(get_db),
 ):
-    """List evidence for an engagement."""
-    return await Evidence.get_by_engagement(db, engagement_id, skip=skip, limit=limit)
+    """List evidence for an engagement, newest first, paged by cursor."""
+    page = await Evidence.get_by_engagement(db, engagement_id, options, evidence_type=evidence_type)
+    return page_response(response, page)
 
 
 @router.get("/{evidence_id}", response_model=EvidenceResponse)
@@ -130,4 +135,13 @@ async def add_custody_record(
     )
     
     await custody.save(db)
+    
+    # The audit chain seals a copy, so later edits to the record can be detected
+    await audit_log(
+        action=f"custody:{action}",
+        user_id=current_user.id,
+        resource=CUSTODY_RESOURCE,
+        resource_id=str(custody.id),
+        details=custody_details(custody),
+    )
     return {"message": "Custody record added"}
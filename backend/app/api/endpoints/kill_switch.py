@@ -0,0 +1,131 @@
+"""
+ANPTOP Backend - Kill Switch Endpoints
+"""
+
+from typing import Any, Dict, List, Optional
+from fastapi import APIRouter, Depends, HTTPException, status
+from sqlalchemy.ext.asyncio import AsyncSession
+from pydantic import BaseModel, Field
+
+from app.db.session import get_db
+from app.models.user import User
+from app.core.security import get_current_user, audit_log
+from app.core.kill_switch import kill_switch
+
+
+router = APIRouter()
+
+
+class KillSwitchStatus(BaseModel):
+    """Kill switch status schema."""
+    enabled: bool
+    active: bool
+    reason: Optional[str] = None
+    actor_id: Optional[int] = None
+    changed_at: Optional[str] = None
+    worker: str
+
+
+class KillSwitchActivate(BaseModel):
+    """Kill switch activation schema."""
+    reason: str = Field(..., min_length=1, max_length=500)
+
+
+class KillSwitchReportResponse(BaseModel):
+    """What an activation terminated, across workers."""
+    id: str
+    reason: str
+    workers_expected: int
+    workers_reported: List[str]
+    terminated: List[Dict[str, Any]]
+    elapsed_seconds: float
+    error: Optional[str] = None
+    complete: bool
+
+
+def _require_role(current_user: User, roles: List[User.Role]) -> None:
+    if current_user.role not in roles:
+        raise HTTPException(
+            status_code=status.HTTP_403_FORBIDDEN,
+            detail="You don't have permission to operate the kill switch",
+        )
+
+
+@router.get("/", response_model=KillSwitchStatus)
+async def get_kill_switch(current_user: User = Depends(get_current_user)):
+    """Get the kill switch position as this worker sees it."""
+    state = kill_switch.state
+    return KillSwitchStatus(
+        enabled=kill_switch.enabled,
+        active=kill_switch.active,
+        reason=state.reason or None,
+        actor_id=state.actor_id,
+        changed_at=state.changed_at,
+        worker=kill_switch.worker,
+    )
+
+
+@router.post("/activate", response_model=KillSwitchReportResponse)
+async def activate_kill_switch(
+    request: KillSwitchActivate,
+    current_user: User = Depends(get_current_user),
+    db: AsyncSession = Depends(get_db),
+):
+    """
+    Stop everything: refuse new requests on every worker and terminate running tools.
+    
+    Requires: admin or lead role.
+    """
+    _require_role(current_user, [User.Role.ADMIN, User.Role.LEAD])
+    if not kill_switch.enabled:
+        raise HTTPException(
+            status_code=status.HTTP_409_CONFLICT,
+            detail="The kill switch is disabled (ENABLE_KILL_SWITCH=false)",
+        )
+    
+    report = await kill_switch.activate(request.reason, current_user.id)
+    
+    await audit_log(
+        action="kill_switch:activate",
+        user_id=current_user.id,
+        resource="kill_switch",
+        details={
+            "activation_id": report.id,
+            "reason": report.reason,
+            "workers_expected": report.workers_expected,
+            "workers_reported": report.workers_reported,
+            "terminated": report.terminated,
+            "error": report.error,
+        },
+        db=db,
+    )
+    
+    return report.as_dict()
+
+
+@router.post("/deactivate", response_model=KillSwitchStatus)
+async def deactivate_kill_switch(
+    current_user: User = Depends(get_current_user),
+    db: AsyncSession = Depends(get_db),
+):
+    """
+    Resume operations on every worker.
+    
+    Requires: admin role.
+    """
+    _require_role(current_user, [User.Role.ADMIN])
+    if not await kill_switch.deactivate(current_user.id):
+        raise HTTPException(
+            status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+            detail="Released on this worker only; the kill switch broker is unreachable",
+        )
+    
+    await audit_log(
+        action="kill_switch:deactivate",
+        user_id=current_user.id,
+        resource="kill_switch",
+        details={},
+        db=db,
+    )
+    
+    return await get_kill_switch(current_user)
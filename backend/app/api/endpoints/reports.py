@@ -3,14 +3,16 @@ ANPTOP Backend - Report Endpoints
 """
 
 from typing import List, Optional
-from fastapi import APIRouter, Depends, HTTPException, Query
+from fastapi import APIRouter, Depends, HTTPException, Query, Response
 from sqlalchemy.ext.asyncio import AsyncSession
 from pydantic import BaseModel, Field
 from datetime import datetime
 
+from app.api.pagination import list_options, page_response
+from app.db.query import ListOptions
 from app.db.session import get_db
 from app.models.user import User
-from app.models.report import Report, ReportType
+from app.models.approval import Report, ReportType
 from app.models.engagement import Engagement
 from app.core.security import get_current_user, check_permission
 
@@ -51,14 +53,18 @@ class ReportResponse(BaseModel):
 
 @router.get("/", response_model=List[ReportResponse])
 async def list_reports(
+    response: Response,
     engagement_id: int = Query(..., description="Engagement ID"),
+    options: ListOptions = Depends(list_options(Report)),
+    report_type: Optional[List[ReportType]] = Query(None),
     current_user: User = Depends(get_current_user),
     db: AsyncSession = Depends(get_db),
 ):
-    """List reports for an engagement."""
+    """List reports for an engagement, newest first, paged by cursor."""
     if not check_permission(current_user, "reports:read"):
         raise HTTPException(status_code=403, detail="Permission denied")
-    return await Report.get_by_engagement(db, engagement_id)
+    page = await Report.get_by_engagement(db, engagement_id, options, report_type=report_type)
+    return page_response(response, page)
 
 
 @router.get("/{report_id}", response_model=ReportResponse)
@@ -2,17 +2,33 @@
 ANPTOP Backend - Target Endpoints
 """
 
+import asyncio
+import json
+import shutil
+import tempfile
 from typing import List, Optional
-from fastapi import APIRouter, Depends, HTTPException, status, Query
+from xml.etree.ElementTree import ParseError
+from fastapi import APIRouter, Depends, HTTPException, status, Query, Response, UploadFile, File
+from fastapi.responses import StreamingResponse
+from sqlalchemy.exc import IntegrityError
 from sqlalchemy.ext.asyncio import AsyncSession
 from pydantic import BaseModel, Field
 from datetime import datetime
 
-from app.db.session import get_db
+from app.api.pagination import list_options, page_response
+from app.db.query import ListOptions
+from app.db.session import get_db, async_session_factory
 from app.models.user import User
 from app.models.target import Target, TargetType, TargetStatus
 from app.models.engagement import Engagement
-from app.core.security import get_current_user, verify_scope_boundaries, audit_log
+from app.core.config import settings
+from app.core.access import engagement_acl
+from app.core.security import (
+    get_current_user, verify_scope_boundaries, scope_checker, scope_batch_checker, audit_log,
+)
+from app.core.scan_parsers import SCAN_FORMATS, parse_scan_output
+from app.core.scan_ingest import TargetIngester
+from app.core.target_import import IMPORT_FORMATS, TargetImporter, iter_import_rows
 
 
 router = APIRouter()
@@ -96,17 +112,33 @@ class TargetResponse(BaseModel):
         from_attributes = True
 
 
+class ScanIngestResponse(BaseModel):
+    """Result of ingesting scan output."""
+    hosts: int
+    ports: int
+    targets_created: int
+    targets_updated: int
+    services_created: int
+    services_updated: int
+    batches: int
+
+
 @router.get("/", response_model=List[TargetResponse])
 async def list_targets(
+    response: Response,
     engagement_id: int = Query(..., description="Engagement ID to filter targets"),
-    skip: int = Query(0, ge=0),
-    limit: int = Query(100, ge=1, le=1000),
-    status_filter: Optional[TargetStatus] = None,
+    options: ListOptions = Depends(list_options(Target)),
+    status_filter: Optional[List[TargetStatus]] = Query(None),
+    target_type: Optional[List[TargetType]] = Query(None),
+    is_in_scope: Optional[bool] = None,
+    tags: Optional[List[str]] = Query(None, description="Only targets carrying every one of these tags"),
     current_user: User = Depends(get_current_user),
     db: AsyncSession = Depends(get_db),
 ):
     """
-    List all targets for an engagement.
+    List targets for an engagement, newest first.
+    
+    Follow the X-Next-Cursor response header with ``cursor`` for the next page.
     """
     # Verify engagement exists and user has access
     engagement = await Engagement.get_by_id(db, engagement_id)
@@ -122,12 +154,16 @@ async def list_targets(
             detail="You don't have permission to view targets",
         )
     
-    targets = await Target.get_by_engagement(db, engagement_id, skip=skip, limit=limit)
-    
-    if status_filter:
-        targets = [t for t in targets if t.status == status_filter]
-    
-    return targets
+    page = await Target.get_by_engagement(
+        db,
+        engagement_id,
+        options,
+        status=status_filter,
+        target_type=target_type,
+        is_in_scope=is_in_scope,
+        tags=tags,
+    )
+    return page_response(response, page)
 
 
 @router.get("/{target_id}", response_model=TargetResponse)
@@ -188,14 +224,9 @@ async def create_target(
         engagement_id,
         target_data.identifier,
         engagement.target_scope,
+        engagement.blacklisted_ips,
     )
     
-    if not is_in_scope:
-        # Check if user wants to add out-of-scope target
-        if not target_data.identifier in engagement.blacklisted_ips:
-            # Log warning but allow
-            pass
-    
     # Create target
     target = Target(
         engagement_id=engagement_id,
@@ -219,7 +250,14 @@ async def create_target(
         tags=target_data.tags,
     )
     
-    await target.save(db)
+    try:
+        await target.save(db)
+    except IntegrityError:
+        await db.rollback()
+        raise HTTPException(
+            status_code=status.HTTP_409_CONFLICT,
+            detail="Target already exists in this engagement",
+        )
     
     # Audit log
     await audit_log(
@@ -233,6 +271,186 @@ async def create_target(
     return target
 
 
+@router.post("/ingest", response_model=ScanIngestResponse)
+async def ingest_scan_results(
+    engagement_id: int = Query(..., description="Engagement to add discovered hosts to"),
+    scan_format: Optional[str] = Query(
+        None, description=f"One of {', '.join(SCAN_FORMATS)}; detected from the content if omitted",
+    ),
+    execution_id: Optional[str] = Query(None, description="Ingest the output of a past tool execution"),
+    file: Optional[UploadFile] = File(None),
+    current_user: User = Depends(get_current_user),
+    db: AsyncSession = Depends(get_db),
+):
+    """
+    Ingest nmap XML, masscan JSON or rustscan output into targets and services.
+    
+    The output is either uploaded or taken from a tool execution's evidence
+    file. It is parsed as a stream and written in batched upserts, so hosts
+    already known to the engagement are merged rather than duplicated.
+    
+    Requires: targets:create permission.
+    """
+    if not current_user.has_permission("targets:create"):
+        raise HTTPException(
+            status_code=status.HTTP_403_FORBIDDEN,
+            detail="You don't have permission to add targets",
+        )
+    
+    if (file is None) == (execution_id is None):
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail="Provide either an uploaded file or an execution_id",
+        )
+    
+    await engagement_acl.require(db, current_user, engagement_id, "targets:create")
+    engagement = await Engagement.get_by_id(db, engagement_id)
+    if not engagement:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail="Engagement not found",
+        )
+    
+    if execution_id:
+        from app.models.tool_execution import ToolExecution
+        execution = await ToolExecution.get_by_execution_id(db, execution_id)
+        # Another engagement's executions are reported as missing
+        if not execution or not execution.output_file or execution.engagement_id != engagement_id:
+            raise HTTPException(
+                status_code=status.HTTP_404_NOT_FOUND,
+                detail="Execution output not found",
+            )
+        try:
+            stream = await asyncio.to_thread(open, execution.output_file, "rb")
+        except FileNotFoundError:
+            raise HTTPException(
+                status_code=status.HTTP_404_NOT_FOUND,
+                detail="Execution output not found",
+            )
+    else:
+        stream = file.file
+    
+    ingester = TargetIngester(
+        db,
+        engagement_id,
+        batch_size=settings.SCAN_INGEST_BATCH_SIZE,
+        scope_check=scope_checker(
+            engagement_id, engagement.target_scope or [], engagement.blacklisted_ips or [],
+        ),
+    )
+    try:
+        stats = await ingester.ingest(parse_scan_output(stream, scan_format))
+    except (ValueError, ParseError) as e:
+        raise HTTPException(
+            status_code=status.HTTP_422_UNPROCESSABLE_ENTITY,
+            detail=f"Could not parse scan output after {ingester.stats.hosts} hosts: {e}",
+        )
+    finally:
+        stream.close()
+    
+    # Audit log
+    await audit_log(
+        action="target:ingest",
+        user_id=current_user.id,
+        resource="target",
+        details={
+            "engagement_id": engagement_id,
+            "execution_id": execution_id,
+            "filename": file.filename if file else None,
+            **stats.as_dict(),
+        },
+        db=db,
+    )
+    
+    return stats.as_dict()
+
+
+@router.post("/import")
+async def import_targets(
+    engagement_id: int = Query(..., description="Engagement to import targets into"),
+    import_format: Optional[str] = Query(
+        None, description=f"One of {', '.join(IMPORT_FORMATS)}; detected from the content if omitted",
+    ),
+    skip_out_of_scope: bool = Query(False, description="Leave out-of-scope rows out instead of flagging them"),
+    file: UploadFile = File(...),
+    current_user: User = Depends(get_current_user),
+    db: AsyncSession = Depends(get_db),
+):
+    """
+    Bulk-import a target inventory (JSON array, NDJSON or CSV).
+    
+    Rows are scope-checked and merged in batches: identifiers new to the
+    engagement are created and known ones updated, with fields a row leaves
+    out kept as stored. CSV list cells (ports, protocols, technologies,
+    tags) are ``;``-separated. The response is NDJSON with one result per
+    row, streamed as each batch commits, followed by a summary line.
+    
+    Requires: targets:create permission.
+    """
+    if not current_user.has_permission("targets:create"):
+        raise HTTPException(
+            status_code=status.HTTP_403_FORBIDDEN,
+            detail="You don't have permission to add targets",
+        )
+    
+    if import_format is not None and import_format not in IMPORT_FORMATS:
+        raise HTTPException(
+            status_code=status.HTTP_422_UNPROCESSABLE_ENTITY,
+            detail=f"Unknown import format: {import_format}",
+        )
+    
+    await engagement_acl.require(db, current_user, engagement_id, "targets:create")
+    engagement = await Engagement.get_by_id(db, engagement_id)
+    if not engagement:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail="Engagement not found",
+        )
+    
+    # The upload is closed when this handler returns, before the response streams
+    spool = tempfile.TemporaryFile()
+    await asyncio.to_thread(shutil.copyfileobj, file.file, spool)
+    spool.seek(0)
+    scope_check = scope_batch_checker(
+        engagement_id, engagement.target_scope or [], engagement.blacklisted_ips or [],
+    )
+    filename = file.filename
+    user_id = current_user.id
+    
+    async def results():
+        # The request's session is closed before streaming starts too
+        async with async_session_factory() as session:
+            importer = TargetImporter(
+                session,
+                engagement_id,
+                batch_size=settings.TARGET_IMPORT_BATCH_SIZE,
+                scope_check=scope_check,
+                skip_out_of_scope=skip_out_of_scope,
+            )
+            try:
+                async for batch in importer.run(iter_import_rows(spool, import_format)):
+                    yield "".join(json.dumps(result) + "\n" for result in batch)
+            except ValueError as e:
+                yield json.dumps({
+                    "status": "error",
+                    "error": f"Import stopped after {importer.stats.rows} rows: {e}",
+                }) + "\n"
+            finally:
+                spool.close()
+            yield json.dumps({"summary": importer.stats.as_dict()}) + "\n"
+            
+            # Audit log
+            await audit_log(
+                action="target:import",
+                user_id=user_id,
+                resource="target",
+                details={"engagement_id": engagement_id, "filename": filename, **importer.stats.as_dict()},
+                db=session,
+            )
+    
+    return StreamingResponse(results(), media_type="application/x-ndjson")
+
+
 @router.put("/{target_id}", response_model=TargetResponse)
 async def update_target(
     target_id: int,
@@ -2,17 +2,29 @@
 ANPTOP Backend - Security Tools API Endpoints
 """
 
+import json
+import uuid
 from typing import List, Optional, Dict, Any
-from fastapi import APIRouter, Depends, HTTPException, status, Query
+from fastapi import APIRouter, Depends, HTTPException, status, Query, Request, Response, WebSocket, WebSocketDisconnect
+from fastapi.responses import StreamingResponse
 from sqlalchemy.ext.asyncio import AsyncSession
 from pydantic import BaseModel, Field
 from datetime import datetime
 
-from app.db.session import get_db
+from app.api.pagination import list_options, page_response
+from app.db.query import ListOptions
+from app.db.session import get_db, async_session_factory
 from app.models.user import User, UserRole
-from app.core.security import get_current_user, check_permission, audit_log
+from app.models.tool_execution import ToolExecution
+from app.core.security import get_current_user, check_permission, audit_log, decode_token
+from app.core.access import GLOBAL_ROLES, engagement_acl
+from app.core.principal_cache import principal_cache
 from app.core.tool_executor import tool_executor, ToolExecutor
-from app.core.tools_config import ToolCategory, OSType, ALL_SECURITY_TOOLS
+from app.core.tool_scheduler import SchedulerFull
+from app.core.tools_config import ToolCategory, OSType, ALL_SECURITY_TOOLS, CachedPayload, tool_manager
+from app.core.tool_catalog import CatalogError
+from app.core.target_planner import ShardPlan, plan_shards
+from app.core.config import settings
 
 
 router = APIRouter()
@@ -24,6 +36,8 @@ class ToolExecuteRequest(BaseModel):
     tool_name: str
     parameters: Dict[str, str] = Field(default_factory=dict)
     timeout: Optional[int] = None
+    engagement_id: Optional[int] = None
+    priority: Optional[int] = Field(default=None, ge=0, le=10)
 
 
 class ToolResponse(BaseModel):
@@ -36,6 +50,8 @@ class ToolResponse(BaseModel):
     risk_level: int
     requires_approval: bool
     description: str
+    available: Optional[bool] = None
+    version: Optional[str] = None
 
 
 class ToolCategoryResponse(BaseModel):
@@ -64,11 +80,164 @@ class ToolExecutionResponse(BaseModel):
     duration_seconds: float
     output_file: Optional[str] = None
     hash_sha256: Optional[str] = None
+    hash_md5: Optional[str] = None
+    cached: bool = False
     timestamp: datetime
 
 
+class ToolExecutionHandle(BaseModel):
+    """Handle for a tool execution running in the background."""
+    execution_id: str
+    tool_name: str
+    status: str
+    stream_url: str
+    websocket_url: str
+
+
+class ToolExecutionStatus(BaseModel):
+    """Live status of a running or recently finished execution."""
+    execution_id: str
+    tool_name: str
+    started_at: datetime
+    finished: bool
+    lines: int
+    subscribers: int
+    status: Optional[str] = None
+    return_code: Optional[int] = None
+    duration_seconds: Optional[float] = None
+    output_file: Optional[str] = None
+    hash_sha256: Optional[str] = None
+
+
+class ToolExecutionRecord(BaseModel):
+    """Persisted record of a past tool execution."""
+    execution_id: str
+    tool_name: str
+    engagement_id: Optional[int] = None
+    executed_by_id: Optional[int] = None
+    command: str
+    status: str
+    return_code: Optional[int] = None
+    cached: bool = False
+    started_at: datetime
+    duration_seconds: float
+    output_file: Optional[str] = None
+    hash_sha256: Optional[str] = None
+    hash_md5: Optional[str] = None
+    stdout_bytes: int = 0
+    stderr_bytes: int = 0
+    output_truncated: bool = False
+    
+    class Config:
+        from_attributes = True
+
+
+class ToolExecutionRecordDetail(ToolExecutionRecord):
+    """Execution record including the stored output previews."""
+    stdout_preview: Optional[str] = None
+    stderr_preview: Optional[str] = None
+
+
+class ShardedExecuteRequest(BaseModel):
+    """Sharded execution request schema: one tool run split across the engagement scope."""
+    tool_name: str
+    engagement_id: int
+    parameters: Dict[str, str] = Field(default_factory=dict)
+    target_param: str = "target"
+    shards: Optional[int] = Field(default=None, ge=1, le=1024)
+    max_hosts_per_shard: Optional[int] = Field(default=None, ge=1)
+    ports: Optional[str] = None
+    port_param: str = "ports"
+    port_shards: int = Field(default=1, ge=1, le=64)
+    timeout: Optional[int] = None
+    priority: Optional[int] = Field(default=None, ge=0, le=10)
+
+
+class ShardPlanResponse(BaseModel):
+    """Progress of a sharded execution."""
+    plan_id: str
+    tool_name: str
+    engagement_id: Optional[int] = None
+    shards: int
+    by_status: Dict[str, int]
+    shard_details: List[Dict[str, Any]] = Field(default_factory=list)
+
+
+# Seconds of silence before an SSE keep-alive comment is sent
+STREAM_HEARTBEAT_SECONDS = 15.0
+
+
+def _authorize_execution(tool_name: str, current_user: User):
+    """Resolve a tool and enforce approval, risk and kill-switch rules."""
+    tool = tool_executor.get_tool(tool_name)
+    
+    if not tool:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail=f"Tool '{tool_name}' not found",
+        )
+    
+    # Fail fast on a missing binary, before any approval round-trip
+    availability = tool_executor.probe.get(tool_name)
+    if availability is not None and not availability.available:
+        raise HTTPException(
+            status_code=status.HTTP_424_FAILED_DEPENDENCY,
+            detail=f"Tool '{tool_name}' is not available: {availability.reason}",
+        )
+    
+    # Check if tool requires approval
+    if tool.requires_approval:
+        if current_user.role not in [UserRole.ADMIN, UserRole.LEAD]:
+            raise HTTPException(
+                status_code=status.HTTP_403_FORBIDDEN,
+                detail=f"Tool '{tool_name}' requires approval before execution. "
+                       "Contact an admin or lead.",
+            )
+    
+    # Check risk level
+    if tool.risk_level >= 4:
+        if not check_permission(current_user, "workflows:approve"):
+            raise HTTPException(
+                status_code=status.HTTP_403_FORBIDDEN,
+                detail=f"Tool '{tool_name}' has high risk level ({tool.risk_level}). "
+                       "Approver role required.",
+            )
+    
+    # Check if kill switch is active
+    from app.core.security import kill_switch_active
+    if kill_switch_active():
+        raise HTTPException(
+            status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+            detail="Kill switch is active. All operations are paused.",
+        )
+    
+    return tool
+
+
+def _cached_response(request: Request, payload: CachedPayload) -> Response:
+    """Serve a pre-serialized payload, answering 304 when the client's ETag matches."""
+    headers = {"ETag": payload.etag, "Cache-Control": "private, no-cache"}
+    if_none_match = request.headers.get("if-none-match", "")
+    candidates = {tag.strip().removeprefix("W/") for tag in if_none_match.split(",")}
+    if payload.etag in candidates or "*" in candidates:
+        return Response(status_code=status.HTTP_304_NOT_MODIFIED, headers=headers)
+    return Response(content=payload.body, media_type="application/json", headers=headers)
+
+
+async def _get_stream_or_404(db, current_user: User, execution_id: str):
+    """The live stream of an execution the caller may see; others are reported as missing."""
+    stream = tool_executor.get_stream(execution_id)
+    if not stream or not await engagement_acl.can_view(db, current_user, stream.engagement_id, stream.user_id):
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail=f"Execution '{execution_id}' not found or expired",
+        )
+    return stream
+
+
 @router.get("/", response_model=List[ToolResponse])
 async def list_tools(
+    request: Request,
     category: Optional[ToolCategory] = None,
     os_type: Optional[OSType] = None,
     risk_level: Optional[int] = Query(None, ge=1, le=5),
@@ -81,58 +250,40 @@ async def list_tools(
     - category: Filter by tool category
     - os_type: Filter by operating system type
     - risk_level: Filter by risk level (1-5)
-    """
-    tools = tool_executor.list_available_tools()
-    
-    # Apply filters
-    if category:
-        tools = [t for t in tools if t["category"] == category.value]
-    if os_type:
-        tools = [t for t in tools if t["os_type"] == os_type.value]
-    if risk_level is not None:
-        tools = [t for t in tools if t["risk_level"] == risk_level]
     
-    return tools
+    ``available`` and ``version`` come from the binary probe (null until
+    a tool has been probed); stale results are refreshed in the background.
+    """
+    tool_executor.probe.refresh_if_stale()
+    payload = tool_manager.index.list_payload(category, os_type, risk_level)
+    return _cached_response(request, payload)
 
 
 @router.get("/summary", response_model=ToolsSummaryResponse)
 async def get_tools_summary(
+    request: Request,
     current_user: User = Depends(get_current_user),
 ):
     """
     Get summary statistics of all tools.
     """
-    return tool_executor.get_tools_summary()
+    return _cached_response(request, tool_manager.index.summary_payload)
 
 
 @router.get("/categories", response_model=List[ToolCategoryResponse])
 async def get_tools_by_category(
+    request: Request,
     current_user: User = Depends(get_current_user),
 ):
     """
     Get tools grouped by category.
     """
-    categories = []
-    for category in ToolCategory:
-        tools = tool_executor.get_tools_by_category(category)
-        categories.append({
-            "category": category.value,
-            "tool_count": len(tools),
-            "tools": [
-                {
-                    "name": t.name,
-                    "key": name,
-                    "risk_level": t.risk_level,
-                    "requires_approval": t.requires_approval,
-                }
-                for name, t in tools.items()
-            ],
-        })
-    return categories
+    return _cached_response(request, tool_manager.index.categories_payload)
 
 
 @router.get("/high-risk", response_model=List[Dict[str, Any]])
 async def get_high_risk_tools(
+    request: Request,
     current_user: User = Depends(get_current_user),
 ):
     """
@@ -146,11 +297,12 @@ async def get_high_risk_tools(
             detail="Only admins and leads can view high-risk tools",
         )
     
-    return tool_executor.get_high_risk_tools()
+    return _cached_response(request, tool_manager.index.high_risk_payload)
 
 
 @router.get("/approval-required", response_model=List[Dict[str, Any]])
 async def get_approval_required_tools(
+    request: Request,
     current_user: User = Depends(get_current_user),
 ):
     """
@@ -164,7 +316,408 @@ async def get_approval_required_tools(
             detail="Only admins and leads can view approval-required tools",
         )
     
-    return tool_executor.get_approval_required_tools()
+    return _cached_response(request, tool_manager.index.approval_required_payload)
+
+
+@router.get("/scheduler", response_model=Dict[str, Any])
+async def get_scheduler_stats(
+    current_user: User = Depends(get_current_user),
+):
+    """
+    Get execution slot usage, queue depth and result cache usage.
+    
+    Requires: admin or lead role.
+    """
+    if current_user.role not in [UserRole.ADMIN, UserRole.LEAD]:
+        raise HTTPException(
+            status_code=status.HTTP_403_FORBIDDEN,
+            detail="Only admins and leads can view scheduler status",
+        )
+    
+    return {
+        **tool_executor.scheduler.stats(),
+        "result_cache": tool_executor.result_cache.stats(),
+        "probe": tool_executor.probe.stats(),
+    }
+
+
+@router.post("/reload", response_model=Dict[str, Any])
+async def reload_tool_catalog(
+    current_user: User = Depends(get_current_user),
+    db: AsyncSession = Depends(get_db),
+):
+    """
+    Reload the tool catalog from disk without restarting.
+    
+    The running catalog is left untouched if the new one fails validation.
+    
+    Requires: admin role.
+    """
+    if current_user.role != UserRole.ADMIN:
+        raise HTTPException(
+            status_code=status.HTTP_403_FORBIDDEN,
+            detail="Only admins can reload the tool catalog",
+        )
+    
+    try:
+        catalog = tool_manager.reload()
+    except CatalogError as e:
+        raise HTTPException(
+            status_code=status.HTTP_422_UNPROCESSABLE_ENTITY,
+            detail=str(e),
+        )
+    tool_executor.probe.refresh()
+    # Cached results were produced by the previous tool definitions
+    tool_executor.result_cache.invalidate()
+    
+    summary = {
+        "total_tools": len(tool_manager.tools),
+        "fingerprint": catalog.fingerprint,
+        "from_cache": catalog.from_cache,
+    }
+    await audit_log(
+        action="tool:catalog_reload",
+        user_id=current_user.id,
+        resource="tool_catalog",
+        details=summary,
+        db=db,
+    )
+    return summary
+
+
+@router.get("/history", response_model=List[ToolExecutionRecord])
+async def list_tool_history(
+    response: Response,
+    tool_name: Optional[str] = None,
+    engagement_id: Optional[int] = None,
+    status_filter: Optional[str] = Query(None, alias="status"),
+    options: ListOptions = Depends(list_options(ToolExecution, default_limit=50, max_limit=500)),
+    current_user: User = Depends(get_current_user),
+    db: AsyncSession = Depends(get_db),
+):
+    """
+    Search past tool executions, newest first, paged by cursor.
+    
+    Admins and leads see every execution; others see their own and those in
+    engagements they own or are on the team of.
+    """
+    if engagement_id is not None:
+        await engagement_acl.require(db, current_user, engagement_id)
+    
+    page = await ToolExecution.search(
+        db,
+        options,
+        tool_name=tool_name,
+        engagement_id=engagement_id,
+        status=status_filter,
+        visible_to=None if current_user.role in GLOBAL_ROLES or engagement_id is not None else current_user.id,
+    )
+    return page_response(response, page)
+
+
+@router.get("/history/{execution_id}", response_model=ToolExecutionRecordDetail)
+async def get_tool_history_record(
+    execution_id: str,
+    current_user: User = Depends(get_current_user),
+    db: AsyncSession = Depends(get_db),
+):
+    """
+    Get a past tool execution with its output previews.
+    """
+    record = await ToolExecution.get_by_execution_id(db, execution_id)
+    # Executions the caller may not see are reported as missing
+    if not record or not await engagement_acl.can_view(
+        db, current_user, record.engagement_id, record.executed_by_id,
+    ):
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail=f"Execution '{execution_id}' not found",
+        )
+    return record
+
+
+@router.post("/executions", response_model=ToolExecutionHandle, status_code=status.HTTP_202_ACCEPTED)
+async def start_tool_execution(
+    request: ToolExecuteRequest,
+    current_user: User = Depends(get_current_user),
+    db: AsyncSession = Depends(get_db),
+):
+    """
+    Start a security tool in the background and return a handle.
+    
+    Output can be followed live through the returned stream (SSE) or
+    websocket URL while the tool runs.
+    """
+    if request.engagement_id is not None:
+        await engagement_acl.require(db, current_user, request.engagement_id)
+    tool = _authorize_execution(request.tool_name, current_user)
+    
+    try:
+        execution_id = await tool_executor.execute_tool_async(
+            tool_name=request.tool_name,
+            parameters=request.parameters,
+            timeout=request.timeout,
+            engagement_id=request.engagement_id,
+            priority=request.priority,
+            user_id=current_user.id,
+        )
+    except SchedulerFull as e:
+        raise HTTPException(
+            status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+            detail=str(e),
+        )
+    
+    # Audit log
+    await audit_log(
+        action="tool:execute",
+        user_id=current_user.id,
+        resource="tool_execution",
+        details={
+            "execution_id": execution_id,
+            "tool_name": request.tool_name,
+            "engagement_id": request.engagement_id,
+            "status": "queued",
+            "risk_level": tool.risk_level,
+        },
+        db=db,
+    )
+    
+    base_url = f"/api/v1/tools/executions/{execution_id}"
+    return {
+        "execution_id": execution_id,
+        "tool_name": request.tool_name,
+        "status": "queued",
+        "stream_url": f"{base_url}/stream",
+        "websocket_url": f"{base_url}/ws",
+    }
+
+
+@router.get("/executions/{execution_id}", response_model=ToolExecutionStatus)
+async def get_tool_execution(
+    execution_id: str,
+    current_user: User = Depends(get_current_user),
+    db: AsyncSession = Depends(get_db),
+):
+    """
+    Get the live status of a running or recently finished execution.
+    """
+    return (await _get_stream_or_404(db, current_user, execution_id)).to_dict()
+
+
+@router.get("/executions/{execution_id}/stream")
+async def stream_tool_execution(
+    execution_id: str,
+    current_user: User = Depends(get_current_user),
+    db: AsyncSession = Depends(get_db),
+):
+    """
+    Follow an execution's stdout/stderr as server-sent events.
+    
+    Each line is sent as a `stdout` or `stderr` event; an `end` event
+    carries the final status. Clients that fall behind receive a
+    `dropped` event instead of stalling the tool.
+    """
+    stream = await _get_stream_or_404(db, current_user, execution_id)
+    
+    async def event_source():
+        async for event in stream.subscribe(heartbeat=STREAM_HEARTBEAT_SECONDS):
+            if event["event"] == "heartbeat":
+                yield ": keep-alive\n\n"
+                continue
+            yield f"event: {event['event']}\ndata: {json.dumps(event, default=str)}\n\n"
+    
+    return StreamingResponse(
+        event_source(),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"},
+    )
+
+
+@router.websocket("/executions/{execution_id}/ws")
+async def websocket_tool_execution(
+    websocket: WebSocket,
+    execution_id: str,
+    token: str = Query(..., description="JWT access token"),
+):
+    """
+    Follow an execution's stdout/stderr over a websocket.
+    
+    Browsers cannot set headers on websocket requests, so the access
+    token is passed as a query parameter.
+    """
+    try:
+        user_id = int(decode_token(token)["sub"])
+        async with async_session_factory() as db:
+            user = await principal_cache.resolve(user_id, lambda: User.get_by_id(db, user_id))
+    except (HTTPException, KeyError, TypeError, ValueError):
+        user = None
+    if user is None or not user.is_active:
+        await websocket.close(code=4401)
+        return
+    
+    stream = tool_executor.get_stream(execution_id)
+    if stream:
+        async with async_session_factory() as db:
+            visible = await engagement_acl.can_view(db, user, stream.engagement_id, stream.user_id)
+    if not stream or not visible:
+        await websocket.close(code=4404)
+        return
+    
+    await websocket.accept()
+    try:
+        async for event in stream.subscribe(heartbeat=STREAM_HEARTBEAT_SECONDS):
+            await websocket.send_text(json.dumps(event, default=str))
+        await websocket.close()
+    except WebSocketDisconnect:
+        pass
+
+
+async def _load_plan_or_404(db, current_user: User, plan_id: str) -> ShardPlan:
+    """A sharded execution's plan, if the caller has access to its engagement."""
+    plan = await tool_executor.load_plan(plan_id)
+    if not plan or (plan.engagement_id is None and current_user.role not in GLOBAL_ROLES):
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail=f"Plan '{plan_id}' not found",
+        )
+    if plan.engagement_id is not None:
+        await engagement_acl.require(db, current_user, plan.engagement_id)
+    return plan
+
+
+def _plan_response(plan: ShardPlan) -> Dict[str, Any]:
+    return {
+        **plan.summary(),
+        "shard_details": [
+            {**shard.to_dict(), "hosts": shard.host_count, "targets": len(shard.ranges)}
+            for shard in plan.shards
+        ],
+    }
+
+
+@router.post("/executions/sharded", response_model=ShardPlanResponse, status_code=status.HTTP_202_ACCEPTED)
+async def start_sharded_execution(
+    request: ShardedExecuteRequest,
+    current_user: User = Depends(get_current_user),
+    db: AsyncSession = Depends(get_db),
+):
+    """
+    Split a tool run over the engagement scope (minus its blacklist) and run
+    the shards in parallel.
+    
+    Hosts are divided into balanced shards, optionally crossed with slices of
+    the port list when the tool's command takes the port parameter. Each shard
+    is a separate execution; progress can be polled and failed shards resumed.
+    """
+    await engagement_acl.require(db, current_user, request.engagement_id)
+    tool = _authorize_execution(request.tool_name, current_user)
+    
+    from app.models.engagement import Engagement
+    engagement = await Engagement.get_by_id(db, request.engagement_id)
+    if not engagement:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail="Engagement not found",
+        )
+    
+    port_param = request.port_param if f"{{{request.port_param}}}" in (tool.command_template or "") else None
+    try:
+        shards = plan_shards(
+            engagement.scope_index(),
+            shard_count=request.shards or settings.SCAN_SHARD_COUNT,
+            max_hosts=request.max_hosts_per_shard or settings.SCAN_SHARD_MAX_HOSTS,
+            ports=request.ports if port_param else None,
+            port_shards=request.port_shards,
+            max_shards=settings.SCAN_SHARD_MAX_SHARDS,
+        )
+    except ValueError as e:
+        raise HTTPException(
+            status_code=status.HTTP_422_UNPROCESSABLE_ENTITY,
+            detail=str(e),
+        )
+    if not shards:
+        raise HTTPException(
+            status_code=status.HTTP_422_UNPROCESSABLE_ENTITY,
+            detail="Engagement scope has no addresses to scan",
+        )
+    
+    parameters = dict(request.parameters)
+    if request.ports and port_param:
+        parameters.pop(port_param, None)
+    plan = ShardPlan(
+        plan_id=str(uuid.uuid4()),
+        tool_name=request.tool_name,
+        parameters=parameters,
+        shards=shards,
+        engagement_id=request.engagement_id,
+        target_param=request.target_param,
+        port_param=port_param,
+    )
+    tool_executor.execute_sharded_async(
+        plan, timeout=request.timeout, priority=request.priority, user_id=current_user.id,
+    )
+    
+    # Audit log
+    await audit_log(
+        action="tool:execute_sharded",
+        user_id=current_user.id,
+        resource="tool_execution",
+        details={
+            "plan_id": plan.plan_id,
+            "tool_name": request.tool_name,
+            "engagement_id": request.engagement_id,
+            "shards": len(shards),
+            "risk_level": tool.risk_level,
+        },
+        db=db,
+    )
+    
+    return _plan_response(plan)
+
+
+@router.get("/plans/{plan_id}", response_model=ShardPlanResponse)
+async def get_shard_plan(
+    plan_id: str,
+    current_user: User = Depends(get_current_user),
+    db: AsyncSession = Depends(get_db),
+):
+    """
+    Get the per-shard progress of a sharded execution.
+    """
+    plan = await _load_plan_or_404(db, current_user, plan_id)
+    return _plan_response(plan)
+
+
+@router.post("/plans/{plan_id}/resume", response_model=ShardPlanResponse, status_code=status.HTTP_202_ACCEPTED)
+async def resume_shard_plan(
+    plan_id: str,
+    timeout: Optional[int] = None,
+    current_user: User = Depends(get_current_user),
+    db: AsyncSession = Depends(get_db),
+):
+    """
+    Re-run the shards of a sharded execution that did not succeed.
+    """
+    plan = await _load_plan_or_404(db, current_user, plan_id)
+    _authorize_execution(plan.tool_name, current_user)
+    if tool_executor.is_plan_running(plan_id):
+        raise HTTPException(
+            status_code=status.HTTP_409_CONFLICT,
+            detail="Plan is still running",
+        )
+    
+    tool_executor.execute_sharded_async(plan, timeout=timeout, user_id=current_user.id)
+    
+    # Audit log
+    await audit_log(
+        action="tool:resume_sharded",
+        user_id=current_user.id,
+        resource="tool_execution",
+        details={"plan_id": plan_id, "pending": len(plan.pending)},
+        db=db,
+    )
+    
+    return _plan_response(plan)
 
 
 @router.get("/{tool_name}", response_model=ToolResponse)
@@ -197,6 +750,8 @@ async def get_tool_info(
         "dependencies": tool.dependencies,
         "timeout_seconds": tool.timeout_seconds,
         "output_format": tool.output_format,
+        "version": tool.version,
+        **tool_manager.availability.get(tool_name.lower(), {}),
     }
 
 
@@ -212,46 +767,29 @@ async def execute_tool(
     Requires appropriate permissions based on tool risk level.
     High-risk tools require admin or lead approval.
     """
-    tool = tool_executor.get_tool(request.tool_name)
-    
-    if not tool:
-        raise HTTPException(
-            status_code=status.HTTP_404_NOT_FOUND,
-            detail=f"Tool '{request.tool_name}' not found",
-        )
-    
-    # Check if tool requires approval
-    if tool.requires_approval:
-        if current_user.role not in [UserRole.ADMIN, UserRole.LEAD]:
-            raise HTTPException(
-                status_code=status.HTTP_403_FORBIDDEN,
-                detail=f"Tool '{request.tool_name}' requires approval before execution. "
-                       "Contact an admin or lead.",
-            )
-    
-    # Check risk level
-    if tool.risk_level >= 4:
-        if not check_permission(current_user, "workflows:approve"):
-            raise HTTPException(
-                status_code=status.HTTP_403_FORBIDDEN,
-                detail=f"Tool '{request.tool_name}' has high risk level ({tool.risk_level}). "
-                       "Approver role required.",
-            )
-    
-    # Check if kill switch is active
-    from app.core.security import kill_switch_active
-    if kill_switch_active():
-        raise HTTPException(
-            status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
-            detail="Kill switch is active. All operations are paused.",
-        )
+    if request.engagement_id is not None:
+        await engagement_acl.require(db, current_user, request.engagement_id)
+    tool = _authorize_execution(request.tool_name, current_user)
     
     # Execute tool
     result = await tool_executor.execute_tool(
         tool_name=request.tool_name,
         parameters=request.parameters,
         timeout=request.timeout,
+        engagement_id=request.engagement_id,
+        priority=request.priority,
+        user_id=current_user.id,
     )
+    if result.status == "rejected":
+        raise HTTPException(
+            status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+            detail=result.stderr,
+        )
+    if result.status == "unavailable":
+        raise HTTPException(
+            status_code=status.HTTP_424_FAILED_DEPENDENCY,
+            detail=result.stderr,
+        )
     
     # Audit log
     await audit_log(
@@ -260,16 +798,18 @@ async def execute_tool(
         resource="tool_execution",
         details={
             "tool_name": request.tool_name,
+            "engagement_id": request.engagement_id,
             "command": result.command,
             "status": result.status,
             "return_code": result.return_code,
+            "cached": result.cached,
             "risk_level": tool.risk_level,
         },
         db=db,
     )
     
     return {
-        "execution_id": str(uuid.uuid4()),
+        "execution_id": result.execution_id,
         "tool_name": result.tool_name,
         "command": result.command,
         "status": result.status,
@@ -277,9 +817,8 @@ async def execute_tool(
         "duration_seconds": result.duration_seconds,
         "output_file": result.output_file,
         "hash_sha256": result.hash_sha256,
+        "hash_md5": result.hash_md5,
+        "cached": result.cached,
         "timestamp": result.timestamp,
     }
 
-
-# Import uuid for execution_id
-import uuid
@@ -10,6 +10,7 @@ from datetime import datetime
 
 from app.db.session import get_db
 from app.models.user import User, UserRole
+from app.core.principal_cache import principal_cache
 from app.core.security import get_current_user, get_password_hash
 
 
@@ -118,6 +119,7 @@ async def update_user(
     
     update_data = user_data.model_dump(exclude_unset=True)
     user = await user.update(db, **update_data)
+    await principal_cache.invalidate(user_id)
     
     return user
 
@@ -149,3 +151,4 @@ async def deactivate_user(
     
     user.is_active = False
     await user.update(db)
+    await principal_cache.invalidate(user_id)
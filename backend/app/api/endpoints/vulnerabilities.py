@@ -2,16 +2,24 @@
 ANPTOP Backend - Vulnerability Endpoints
 """
 
+import asyncio
 from typing import List, Optional
-from fastapi import APIRouter, Depends, HTTPException, status, Query
+from xml.etree.ElementTree import ParseError
+from fastapi import APIRouter, Depends, HTTPException, status, Query, Response, UploadFile, File
 from sqlalchemy.ext.asyncio import AsyncSession
 from pydantic import BaseModel, Field
 from datetime import datetime
 
+from app.api.pagination import list_options, page_response
+from app.db.query import ListOptions
 from app.db.session import get_db
 from app.models.user import User
 from app.models.vulnerability import Vulnerability, Severity, VulnerabilityStatus
-from app.core.security import get_current_user, check_permission
+from app.core.config import settings
+from app.core.access import engagement_acl
+from app.core.security import get_current_user, check_permission, audit_log
+from app.core.scan_parsers import parse_nuclei_output
+from app.core.scan_ingest import VulnerabilityIngester
 
 
 router = APIRouter()
@@ -79,6 +87,7 @@ class VulnerabilityResponse(BaseModel):
     business_impact: Optional[str]
     likelihood: Optional[str]
     risk_rating: Optional[str]
+    fingerprint: Optional[str] = None
     created_at: datetime
     updated_at: datetime
     
@@ -88,20 +97,84 @@ class VulnerabilityResponse(BaseModel):
 
 @router.get("/", response_model=List[VulnerabilityResponse])
 async def list_vulnerabilities(
+    response: Response,
     engagement_id: int = Query(..., description="Engagement ID"),
-    skip: int = Query(0, ge=0),
-    limit: int = Query(100, ge=1, le=1000),
-    severity: Optional[Severity] = None,
+    options: ListOptions = Depends(list_options(Vulnerability)),
+    severity: Optional[List[Severity]] = Query(None),
+    status_filter: Optional[List[VulnerabilityStatus]] = Query(None),
     current_user: User = Depends(get_current_user),
     db: AsyncSession = Depends(get_db),
 ):
-    """List vulnerabilities for an engagement."""
+    """List vulnerabilities for an engagement, newest first, paged by cursor."""
     if not check_permission(current_user, "vulnerabilities:read"):
         raise HTTPException(status_code=403, detail="Permission denied")
     
-    if severity:
-        return await Vulnerability.get_by_severity(db, engagement_id, severity)
-    return await Vulnerability.get_by_engagement(db, engagement_id, skip=skip, limit=limit)
+    page = await Vulnerability.get_by_engagement(
+        db, engagement_id, options, severity=severity, status=status_filter,
+    )
+    return page_response(response, page)
+
+
+class FindingIngestResponse(BaseModel):
+    """Result of ingesting scanner findings."""
+    findings: int
+    vulnerabilities_created: int
+    vulnerabilities_updated: int
+    batches: int
+
+
+@router.post("/ingest/nuclei", response_model=FindingIngestResponse)
+async def ingest_nuclei_results(
+    engagement_id: int = Query(..., description="Engagement ID"),
+    execution_id: Optional[str] = Query(None, description="Ingest the output of a past nuclei execution"),
+    file: Optional[UploadFile] = File(None),
+    current_user: User = Depends(get_current_user),
+    db: AsyncSession = Depends(get_db),
+):
+    """
+    Ingest nuclei JSONL output as vulnerabilities.
+    
+    Findings are upserted in batches by fingerprint, so re-running a scan
+    updates existing vulnerabilities instead of duplicating them.
+    """
+    if not check_permission(current_user, "findings:create"):
+        raise HTTPException(status_code=403, detail="Permission denied")
+    if (file is None) == (execution_id is None):
+        raise HTTPException(status_code=400, detail="Provide either an uploaded file or an execution_id")
+    await engagement_acl.require(db, current_user, engagement_id, "findings:create")
+    
+    if execution_id:
+        from app.models.tool_execution import ToolExecution
+        execution = await ToolExecution.get_by_execution_id(db, execution_id)
+        # Another engagement's executions are reported as missing
+        if not execution or not execution.output_file or execution.engagement_id != engagement_id:
+            raise HTTPException(status_code=404, detail="Execution output not found")
+        try:
+            stream = await asyncio.to_thread(open, execution.output_file, "rb")
+        except FileNotFoundError:
+            raise HTTPException(status_code=404, detail="Execution output not found")
+    else:
+        stream = file.file
+    
+    ingester = VulnerabilityIngester(db, engagement_id, batch_size=settings.SCAN_INGEST_BATCH_SIZE)
+    try:
+        stats = await ingester.ingest(parse_nuclei_output(stream))
+    except (ValueError, ParseError) as e:
+        raise HTTPException(
+            status_code=422,
+            detail=f"Could not parse nuclei output after {ingester.stats.findings} findings: {e}",
+        )
+    finally:
+        stream.close()
+    
+    await audit_log(
+        action="vulnerability:ingest",
+        user_id=current_user.id,
+        resource="vulnerability",
+        details={"engagement_id": engagement_id, "execution_id": execution_id, **stats.as_dict()},
+        db=db,
+    )
+    return stats.as_dict()
 
 
 @router.get("/{vuln_id}", response_model=VulnerabilityResponse)
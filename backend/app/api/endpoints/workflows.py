@@ -3,11 +3,13 @@ ANPTOP Backend - Workflow Endpoints
 """
 
 from typing import List, Optional
-from fastapi import APIRouter, Depends, HTTPException, status, Query
+from fastapi import APIRouter, Depends, HTTPException, status, Query, Response
 from sqlalchemy.ext.asyncio import AsyncSession
 from pydantic import BaseModel, Field
 from datetime import datetime
 
+from app.api.pagination import list_options, page_response
+from app.db.query import ListOptions
 from app.db.session import get_db
 from app.models.user import User
 from app.models.workflow import Workflow, WorkflowType, WorkflowStatus, WorkflowExecution
@@ -74,21 +76,18 @@ class ExecuteWorkflowRequest(BaseModel):
 
 @router.get("/", response_model=List[WorkflowResponse])
 async def list_workflows(
-    skip: int = Query(0, ge=0),
-    limit: int = Query(100, ge=1, le=1000),
-    workflow_type: Optional[WorkflowType] = None,
+    response: Response,
+    options: ListOptions = Depends(list_options(Workflow)),
+    workflow_type: Optional[List[WorkflowType]] = Query(None),
+    category: Optional[str] = None,
     current_user: User = Depends(get_current_user),
     db: AsyncSession = Depends(get_db),
 ):
     """
-    List all available workflows.
+    List all available workflows, newest first, paged by cursor.
     """
-    if workflow_type:
-        workflows = await Workflow.get_by_type(db, workflow_type)
-    else:
-        workflows = await Workflow.get_all(db, skip=skip, limit=limit)
-    
-    return workflows
+    page = await Workflow.get_all(db, options, workflow_type=workflow_type, category=category)
+    return page_response(response, page)
 
 
 @router.get("/{workflow_id}", response_model=WorkflowResponse)
@@ -195,7 +194,7 @@ async def execute_workflow(
         
         # Trigger n8n workflow here
         # This would call n8n API to start the workflow
-        
+    
     else:
         execution.status = WorkflowStatus.QUEUED
         await execution.update(db)
@@ -238,14 +237,15 @@ async def get_execution(
 
 @router.get("/executions", response_model=List[WorkflowExecutionResponse])
 async def list_executions(
+    response: Response,
     engagement_id: int = Query(..., description="Engagement ID"),
-    skip: int = Query(0, ge=0),
-    limit: int = Query(100, ge=1, le=1000),
+    options: ListOptions = Depends(list_options(WorkflowExecution)),
+    status_filter: Optional[List[WorkflowStatus]] = Query(None),
     current_user: User = Depends(get_current_user),
     db: AsyncSession = Depends(get_db),
 ):
     """
-    List workflow executions for an engagement.
+    List workflow executions for an engagement, newest first, paged by cursor.
     """
     if not check_permission(current_user, "workflows:read"):
         raise HTTPException(
@@ -253,8 +253,8 @@ async def list_executions(
             detail="You don't have permission to view executions",
         )
     
-    executions = await WorkflowExecution.get_by_engagement(db, engagement_id, skip=skip, limit=limit)
-    return executions
+    page = await WorkflowExecution.get_by_engagement(db, engagement_id, options, status=status_filter)
+    return page_response(response, page)
 
 
 @router.post("/executions/{execution_id}/cancel")
@@ -0,0 +1,62 @@
+"""
+ANPTOP Backend - List Endpoint Pagination
+"""
+
+from datetime import datetime
+from typing import Any, Callable, List, Optional
+
+from fastapi import HTTPException, Query, Response
+
+from app.db.pagination import Page
+from app.db.query import ListOptions
+
+
+# The next page's cursor and the planner's row estimate travel in headers so
+# list responses stay plain JSON arrays
+NEXT_CURSOR_HEADER = "X-Next-Cursor"
+TOTAL_ESTIMATE_HEADER = "X-Total-Estimate"
+PAGE_HEADERS = [NEXT_CURSOR_HEADER, TOTAL_ESTIMATE_HEADER]
+
+
+def list_options(model, default_limit: int = 100, max_limit: int = 1000) -> Callable[..., ListOptions]:
+    """
+    Dependency for the paging, sorting and date-range parameters of a list
+    endpoint over ``model``. Bad sorts and cursors are rejected with a 400
+    before any query runs.
+    """
+    def dependency(
+        cursor: Optional[str] = Query(None, description=f"Cursor from the previous page's {NEXT_CURSOR_HEADER} header"),
+        limit: int = Query(default_limit, ge=1, le=max_limit),
+        skip: int = Query(0, ge=0, description="Offset paging; ignored when a cursor is given"),
+        sort: Optional[str] = Query(
+            None, description=f"One of {', '.join(model.__sortable__)}; prefix with '-' for descending",
+        ),
+        since: Optional[datetime] = Query(None, description=f"Only rows with {model.__page_order__} at or after this"),
+        until: Optional[datetime] = Query(None, description=f"Only rows with {model.__page_order__} before this"),
+        with_total: bool = Query(False, description=f"Report the planner's row estimate in {TOTAL_ESTIMATE_HEADER}"),
+    ) -> ListOptions:
+        options = ListOptions(
+            cursor=cursor or None,
+            limit=limit,
+            skip=skip,
+            sort=sort or None,
+            since=since,
+            until=until,
+            with_total=with_total,
+        )
+        try:
+            options.validate(model)
+        except ValueError as e:
+            raise HTTPException(status_code=400, detail=str(e))
+        return options
+    
+    return dependency
+
+
+def page_response(response: Response, page: Page) -> List[Any]:
+    """Put the page's cursor and estimate in headers and return its rows."""
+    if page.next_cursor:
+        response.headers[NEXT_CURSOR_HEADER] = page.next_cursor
+    if page.estimated_total is not None:
+        response.headers[TOTAL_ESTIMATE_HEADER] = str(page.estimated_total)
+    return page.items
@@ -3,7 +3,7 @@ ANPTOP Backend - API Router
 """
 
 from fastapi import APIRouter
-from app.api.endpoints import auth, users, engagements, targets, workflows, vulnerabilities, evidence, approvals, health
+from app.api.endpoints import auth, users, engagements, targets, workflows, vulnerabilities, evidence, approvals, health, kill_switch
 
 api_router = APIRouter()
 
@@ -17,3 +17,4 @@ api_router.include_router(vulnerabilities.router, prefix="/vulnerabilities", tag
 api_router.include_router(evidence.router, prefix="/evidence", tags=["Evidence"])
 api_router.include_router(approvals.router, prefix="/approvals", tags=["Approvals"])
 api_router.include_router(health.router, prefix="/health", tags=["Health"])
+api_router.include_router(kill_switch.router, prefix="/kill-switch", tags=["Kill Switch"])
@@ -0,0 +1,169 @@
+"""
+ANPTOP - Engagement Access Control
+Per-engagement permission masks, cached by team so access checks skip the engagements table
+"""
+
+import time
+from collections import OrderedDict
+from dataclasses import dataclass, field
+from typing import Any, Awaitable, Callable, Dict, FrozenSet, Optional, Set, Tuple
+
+from fastapi import HTTPException, status
+from sqlalchemy import select
+
+from app.core.config import settings
+from app.models.engagement import Engagement
+from app.models.user import (
+    ALL_PERMISSIONS, PERMISSION_BITS, UserRole, permission_mask, role_permission_mask,
+)
+
+
+# Roles that may act on every engagement, as their role allows
+GLOBAL_ROLES = frozenset({UserRole.ADMIN, UserRole.LEAD})
+
+# What owning an engagement adds to the owner's role, and what membership never grants
+OWNER_MASK = permission_mask("engagements:read", "engagements:update")
+MEMBER_EXCLUDED_MASK = permission_mask("engagements:update", "engagements:delete")
+
+
+@dataclass
+class Team:
+    """Who can act on one engagement, plus the masks already worked out for it."""
+    owner_id: int
+    members: FrozenSet[int]
+    expires: float
+    masks: Dict[Tuple[int, UserRole], int] = field(default_factory=dict)
+
+
+def engagement_mask(user_id: int, role: UserRole, owner_id: Optional[int], members: FrozenSet[int]) -> int:
+    """The permission bits ``user_id`` holds on an engagement with this owner and team."""
+    if role == UserRole.ADMIN:
+        return ALL_PERMISSIONS
+    mask = role_permission_mask(role)
+    if role in GLOBAL_ROLES:
+        return mask
+    if user_id == owner_id:
+        return mask | OWNER_MASK
+    if user_id in members:
+        return mask & ~MEMBER_EXCLUDED_MASK
+    return 0
+
+
+def mask_actions(mask: int) -> Set[str]:
+    """The permission names set in ``mask``."""
+    return {permission for permission, bit in PERMISSION_BITS.items() if mask & bit}
+
+
+async def load_team(db, engagement_id: int) -> Optional[Tuple[int, FrozenSet[int]]]:
+    """Owner and team members of an engagement, or None if it does not exist."""
+    table = Engagement.__table__
+    result = await db.execute(
+        select(table.c.owner_id, table.c.team_members).where(table.c.id == engagement_id)
+    )
+    row = result.first()
+    if row is None:
+        return None
+    return row.owner_id, frozenset(row.team_members or ())
+
+
+class EngagementACL:
+    """
+    Allowed actions per (user, engagement), cached by engagement.
+    
+    Each engagement's owner and team are read once (two columns, not the
+    row) and kept for ``ttl`` seconds; the mask each user gets from them is
+    worked out on first use and then answered from the entry. Engagement
+    updates that touch ``owner_id`` or ``team_members`` and deletes call
+    ``invalidate``, so the TTL only bounds how long another worker can act
+    on an old team.
+    """
+    
+    def __init__(
+        self,
+        ttl: float = 60,
+        max_entries: int = 4096,
+        load: Callable[[Any, int], Awaitable[Optional[Tuple[int, FrozenSet[int]]]]] = load_team,
+    ):
+        self.ttl = ttl
+        self.max_entries = max_entries
+        self.load = load
+        self._teams: "OrderedDict[int, Team]" = OrderedDict()
+        self._invalidations = 0
+    
+    async def team(self, db, engagement_id: int) -> Optional[Team]:
+        """The cached team of an engagement, loading it if needed; None if it does not exist."""
+        cached = self._teams.get(engagement_id)
+        now = time.monotonic()
+        if cached is not None and cached.expires > now:
+            self._teams.move_to_end(engagement_id)
+            return cached
+        
+        invalidations = self._invalidations
+        loaded = await self.load(db, engagement_id)
+        if loaded is None:
+            self._teams.pop(engagement_id, None)
+            return None
+        team = Team(owner_id=loaded[0], members=loaded[1], expires=now + self.ttl)
+        # Not cached if an invalidation ran while it loaded: it may predate the change
+        if self.ttl > 0 and invalidations == self._invalidations:
+            self._teams[engagement_id] = team
+            self._teams.move_to_end(engagement_id)
+            while len(self._teams) > self.max_entries:
+                self._teams.popitem(last=False)
+        return team
+    
+    async def mask(self, db, user, engagement_id: int) -> Optional[int]:
+        """The permission bits ``user`` holds on an engagement, or None if it does not exist."""
+        role = UserRole(user.role)
+        team = await self.team(db, engagement_id)
+        if team is None:
+            return None
+        key = (user.id, role)
+        mask = team.masks.get(key)
+        if mask is None:
+            mask = team.masks[key] = engagement_mask(user.id, role, team.owner_id, team.members)
+        return mask
+    
+    async def allowed(self, db, user, engagement_id: int) -> Set[str]:
+        """The actions ``user`` may take on an engagement (empty if it does not exist)."""
+        return mask_actions(await self.mask(db, user, engagement_id) or 0)
+    
+    async def can(self, db, user, engagement_id: int, permission: str) -> bool:
+        return bool((await self.mask(db, user, engagement_id) or 0) & PERMISSION_BITS.get(permission, 0))
+    
+    async def can_view(self, db, user, engagement_id: Optional[int], created_by_id: Optional[int]) -> bool:
+        """Whether ``user`` may see a record made by ``created_by_id`` in an engagement (or in none)."""
+        if UserRole(user.role) in GLOBAL_ROLES or user.id == created_by_id:
+            return True
+        return engagement_id is not None and await self.can(db, user, engagement_id, "engagements:read")
+    
+    async def require(self, db, user, engagement_id: int, permission: str = "engagements:read") -> None:
+        """Raise 404 if the engagement does not exist, 403 if ``user`` may not do ``permission`` on it."""
+        mask = await self.mask(db, user, engagement_id)
+        if mask is None:
+            raise HTTPException(
+                status_code=status.HTTP_404_NOT_FOUND,
+                detail="Engagement not found",
+            )
+        if not mask & PERMISSION_BITS.get(permission, 0):
+            raise HTTPException(
+                status_code=status.HTTP_403_FORBIDDEN,
+                detail="You don't have access to this engagement"
+                if permission == "engagements:read"
+                else "You don't have permission to do this on this engagement",
+            )
+    
+    def invalidate(self, engagement_id: Optional[int] = None) -> None:
+        """Drop one engagement's team and masks, or all of them."""
+        self._invalidations += 1
+        if engagement_id is None:
+            self._teams.clear()
+        else:
+            self._teams.pop(engagement_id, None)
+    
+    def __len__(self) -> int:
+        return len(self._teams)
+
+
+# Global engagement ACL cache
+engagement_acl = EngagementACL(ttl=settings.ACL_CACHE_TTL, max_entries=settings.ACL_CACHE_SIZE)
@@ -0,0 +1,287 @@
+"""
+ANPTOP - Audit Chain
+Seals each written batch of audit logs under a Merkle root and chains the roots
+"""
+
+import hashlib
+import json
+from dataclasses import asdict, dataclass
+from datetime import datetime
+from typing import Any, Dict, List, Mapping, Optional, Sequence, Tuple
+
+from sqlalchemy import func, insert, select, text
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.models.evidence import AuditLog, AuditSeal, EvidenceChainOfCustody
+
+
+# Hash of the (absent) seal before the first one
+GENESIS_HASH = "0" * 64
+
+# Audit log columns committed to by a leaf, in addition to its id
+SEALED_COLUMNS = (
+    "timestamp", "action", "user_id", "resource", "resource_id", "details",
+    "ip_address", "user_agent", "success", "error_message",
+)
+
+# Serialises sealing across workers on PostgreSQL (transaction-scoped advisory lock)
+SEAL_LOCK_KEY = 0x616E7074  # "anpt"
+
+# Custody records are written to the audit chain under this resource, with these fields
+CUSTODY_RESOURCE = "evidence_custody"
+CUSTODY_FIELDS = ("evidence_id", "action", "action_by", "hash_value", "notes")
+
+audit_logs = AuditLog.__table__
+audit_seals = AuditSeal.__table__
+custody_records = EvidenceChainOfCustody.__table__
+
+
+def _sha256(prefix: bytes, data: str) -> str:
+    return hashlib.sha256(prefix + data.encode()).hexdigest()
+
+
+def _canonical(value: Any) -> Any:
+    return value.isoformat() if isinstance(value, datetime) else value
+
+
+def leaf_hash(row: Mapping[str, Any]) -> str:
+    """Hash of one audit log row (its id and sealed columns)."""
+    payload = {column: _canonical(row[column]) for column in ("id",) + SEALED_COLUMNS}
+    # Leaves and inner nodes are domain-separated so neither can pass for the other
+    return _sha256(b"\x00", json.dumps(payload, sort_keys=True, separators=(",", ":"), default=str))
+
+
+def node_hash(left: str, right: str) -> str:
+    return _sha256(b"\x01", left + right)
+
+
+def merkle_levels(leaves: Sequence[str]) -> List[List[str]]:
+    """Every level of the tree from the leaves up; an odd last node is carried up unpaired."""
+    levels = [list(leaves)]
+    while len(levels[-1]) > 1:
+        level = levels[-1]
+        parents = [node_hash(level[i], level[i + 1]) for i in range(0, len(level) - 1, 2)]
+        if len(level) % 2:
+            parents.append(level[-1])
+        levels.append(parents)
+    return levels
+
+
+def merkle_root(leaves: Sequence[str]) -> str:
+    return merkle_levels(leaves)[-1][0] if leaves else GENESIS_HASH
+
+
+def merkle_proof(leaves: Sequence[str], index: int) -> List[Tuple[str, str]]:
+    """Sibling hashes from leaf ``index`` to the root, as ``(side, hash)`` pairs."""
+    proof = []
+    for level in merkle_levels(leaves)[:-1]:
+        sibling = index ^ 1
+        if sibling < len(level):
+            proof.append(("left" if sibling < index else "right", level[sibling]))
+        index //= 2
+    return proof
+
+
+def verify_proof(leaf: str, proof: Sequence[Tuple[str, str]], root: str) -> bool:
+    """Whether ``proof`` leads from ``leaf`` to ``root``: one hash per tree level."""
+    current = leaf
+    for side, sibling in proof:
+        current = node_hash(sibling, current) if side == "left" else node_hash(current, sibling)
+    return current == root
+
+
+def chain_hash(previous_hash: str, merkle_root: str, first_log_id: int, last_log_id: int, entry_count: int) -> str:
+    return _sha256(b"\x02", f"{previous_hash}:{merkle_root}:{first_log_id}:{last_log_id}:{entry_count}")
+
+
+async def _lock_chain(db: AsyncSession) -> None:
+    conn = await db.connection()
+    if conn.dialect.name == "postgresql":
+        await conn.execute(text("SELECT pg_advisory_xact_lock(:key)"), {"key": SEAL_LOCK_KEY})
+
+
+async def write_sealed_batch(db: AsyncSession, entries: List[Dict[str, Any]]) -> Dict[str, Any]:
+    """
+    Insert audit log rows and seal them, in the caller's transaction.
+    
+    Batches are serialised so each seal covers one contiguous id range and
+    chains to the seal committed just before it. Returns the seal row.
+    """
+    await _lock_chain(db)
+    result = await db.execute(
+        insert(audit_logs).returning(audit_logs.c.id, sort_by_parameter_order=True), entries,
+    )
+    rows = [dict(entry, id=log_id) for entry, log_id in zip(entries, result.scalars())]
+    previous = (await db.execute(
+        select(audit_seals.c.chain_hash).order_by(audit_seals.c.id.desc()).limit(1)
+    )).scalar() or GENESIS_HASH
+    
+    root = merkle_root([leaf_hash(row) for row in rows])
+    seal = {
+        "first_log_id": rows[0]["id"],
+        "last_log_id": rows[-1]["id"],
+        "entry_count": len(rows),
+        "merkle_root": root,
+        "previous_hash": previous,
+        "chain_hash": chain_hash(previous, root, rows[0]["id"], rows[-1]["id"], len(rows)),
+        "sealed_at": datetime.utcnow(),
+    }
+    seal["id"] = (await db.execute(insert(audit_seals).returning(audit_seals.c.id), seal)).scalar()
+    return seal
+
+
+async def _sealed_rows(db: AsyncSession, seal: Mapping[str, Any]) -> List[Mapping[str, Any]]:
+    result = await db.execute(
+        select(audit_logs)
+        .where(audit_logs.c.id.between(seal["first_log_id"], seal["last_log_id"]))
+        .order_by(audit_logs.c.id)
+    )
+    return result.mappings().all()
+
+
+@dataclass
+class ChainReport:
+    """Outcome of walking the seal chain."""
+    valid: bool = True
+    seals: int = 0
+    entries: int = 0
+    unsealed: int = 0
+    head: Optional[str] = None
+    broken_seal_id: Optional[int] = None
+    error: Optional[str] = None
+    
+    def as_dict(self) -> Dict[str, Any]:
+        return asdict(self)
+
+
+async def verify_chain(db: AsyncSession, deep: bool = False, page_size: int = 1000) -> ChainReport:
+    """
+    Walk the seals in order and check every chain link.
+    
+    The links alone cost one hash per sealed batch and never read the
+    audit rows. With ``deep`` each batch's Merkle root is also recomputed
+    from its rows, which catches edited, deleted or inserted rows but
+    reads the whole sealed log.
+    """
+    report = ChainReport()
+    previous, last_log_id, after = GENESIS_HASH, 0, 0
+    while True:
+        seals = (await db.execute(
+            select(audit_seals).where(audit_seals.c.id > after).order_by(audit_seals.c.id).limit(page_size)
+        )).mappings().all()
+        if not seals:
+            break
+        for seal in seals:
+            after = seal["id"]
+            problem = None
+            if seal["previous_hash"] != previous:
+                problem = "does not follow the previous seal"
+            elif seal["first_log_id"] <= last_log_id or seal["last_log_id"] < seal["first_log_id"]:
+                problem = "overlaps the previous seal's entries"
+            elif seal["chain_hash"] != chain_hash(
+                previous, seal["merkle_root"], seal["first_log_id"], seal["last_log_id"], seal["entry_count"],
+            ):
+                problem = "chain hash does not match its contents"
+            elif deep:
+                rows = await _sealed_rows(db, seal)
+                if len(rows) != seal["entry_count"]:
+                    problem = f"covers {len(rows)} entries, sealed with {seal['entry_count']}"
+                elif merkle_root([leaf_hash(row) for row in rows]) != seal["merkle_root"]:
+                    problem = "entries do not match the sealed Merkle root"
+            if problem:
+                report.valid = False
+                report.broken_seal_id = seal["id"]
+                report.error = f"Seal {seal['id']} {problem}"
+                return report
+            previous, last_log_id = seal["chain_hash"], seal["last_log_id"]
+            report.seals += 1
+            report.entries += seal["entry_count"]
+    report.head = previous if report.seals else None
+    report.unsealed = (await db.execute(
+        select(func.count()).select_from(audit_logs).where(audit_logs.c.id > last_log_id)
+    )).scalar()
+    return report
+
+
+async def prove_entry(db: AsyncSession, log_id: int) -> Optional[Dict[str, Any]]:
+    """
+    Inclusion proof for one audit log: its leaf hash, the sibling path to
+    its batch's Merkle root and the seal that root is chained under.
+    
+    Checking the proof takes one hash per tree level. Returns None if the
+    entry does not exist or has not been sealed yet.
+    """
+    seal = (await db.execute(
+        select(audit_seals).where(audit_seals.c.last_log_id >= log_id).order_by(audit_seals.c.last_log_id).limit(1)
+    )).mappings().first()
+    if seal is None or seal["first_log_id"] > log_id:
+        return None
+    rows = await _sealed_rows(db, seal)
+    ids = [row["id"] for row in rows]
+    if log_id not in ids:
+        return None
+    leaves = [leaf_hash(row) for row in rows]
+    index = ids.index(log_id)
+    proof = merkle_proof(leaves, index)
+    return {
+        "log_id": log_id,
+        "leaf_hash": leaves[index],
+        "proof": [{"side": side, "hash": sibling} for side, sibling in proof],
+        "merkle_root": seal["merkle_root"],
+        "seal_id": seal["id"],
+        "previous_hash": seal["previous_hash"],
+        "chain_hash": seal["chain_hash"],
+        "valid": verify_proof(leaves[index], proof, seal["merkle_root"]) and chain_hash(
+            seal["previous_hash"], seal["merkle_root"], seal["first_log_id"], seal["last_log_id"], seal["entry_count"],
+        ) == seal["chain_hash"],
+    }
+
+
+def custody_details(record: Any) -> Dict[str, Any]:
+    """The fields of a custody record (model or row) written to, and checked against, the audit chain."""
+    if isinstance(record, Mapping):
+        return {field: record[field] for field in CUSTODY_FIELDS}
+    return {field: getattr(record, field) for field in CUSTODY_FIELDS}
+
+
+async def verify_custody(db: AsyncSession, evidence_id: int) -> Dict[str, Any]:
+    """
+    Check an evidence item's custody records against their audit chain entries.
+    
+    A record is ``verified`` when its audit entry is sealed, proves into
+    its seal and still matches the record; ``unsealed`` ones are written
+    but not yet flushed; anything else is reported as a mismatch.
+    """
+    records = (await db.execute(
+        select(custody_records).where(custody_records.c.evidence_id == evidence_id).order_by(custody_records.c.id)
+    )).mappings().all()
+    entries = {
+        row["resource_id"]: row
+        for row in (await db.execute(
+            select(audit_logs)
+            .where(audit_logs.c.resource == CUSTODY_RESOURCE)
+            .where(audit_logs.c.resource_id.in_([str(record["id"]) for record in records]))
+            .order_by(audit_logs.c.id)
+        )).mappings()
+    }
+    
+    verified, unsealed, mismatched = [], [], []
+    for record in records:
+        entry = entries.get(str(record["id"]))
+        if entry is None or entry["details"] != custody_details(record):
+            mismatched.append(record["id"])
+            continue
+        proof = await prove_entry(db, entry["id"])
+        if proof is None:
+            unsealed.append(record["id"])
+        elif proof["valid"]:
+            verified.append(record["id"])
+        else:
+            mismatched.append(record["id"])
+    return {
+        "evidence_id": evidence_id,
+        "valid": not mismatched,
+        "verified": verified,
+        "unsealed": unsealed,
+        "mismatched": mismatched,
+    }
@@ -0,0 +1,249 @@
+"""
+ANPTOP - Audit Log Writer
+Queues audit entries and writes them to the audit_logs table in batches
+"""
+
+import asyncio
+import json
+import time
+from datetime import datetime
+from typing import Any, Callable, Dict, List, Optional
+
+from loguru import logger
+from prometheus_client import Counter, Gauge, Histogram
+from app.core.audit_chain import SEALED_COLUMNS, write_sealed_batch
+from app.core.config import settings
+from app.db.session import async_session_factory
+
+
+# Prometheus metrics (registered once per process)
+AUDIT_QUEUE_DEPTH = Gauge(
+    "anptop_audit_queue_depth",
+    "Audit entries waiting to be written",
+)
+AUDIT_ENTRIES = Counter(
+    "anptop_audit_entries_total",
+    "Audit entries by outcome (written, dropped, failed)",
+    ["outcome"],
+)
+AUDIT_BACKPRESSURE = Counter(
+    "anptop_audit_backpressure_total",
+    "Audit writes that had to wait for room in a full queue",
+)
+AUDIT_BACKPRESSURE_WAIT = Histogram(
+    "anptop_audit_backpressure_wait_seconds",
+    "Time audit writes spent waiting for room in the queue",
+    buckets=(0.001, 0.01, 0.05, 0.1, 0.5, 1, 5, 30),
+)
+AUDIT_BATCH_SIZE = Histogram(
+    "anptop_audit_batch_size",
+    "Rows per audit_logs insert",
+    buckets=(1, 10, 50, 100, 250, 500, 1000, 5000),
+)
+
+def audit_entry(action: str, **fields: Any) -> Dict[str, Any]:
+    """
+    An audit_logs row, stamped now rather than when its batch is written.
+    
+    Every entry carries the same keys so a batch is one multi-row INSERT,
+    and ``details`` is reduced to plain JSON so the row reads back exactly
+    as it was sealed.
+    """
+    entry = {column: fields.get(column) for column in SEALED_COLUMNS}
+    entry["action"] = action
+    entry["timestamp"] = entry["timestamp"] or datetime.utcnow()
+    entry["success"] = fields.get("success", True)
+    if entry["details"] is not None:
+        entry["details"] = json.loads(json.dumps(entry["details"], default=str))
+    return entry
+
+
+class AuditWriter:
+    """
+    Background writer for audit entries.
+    
+    Entries go onto a bounded queue and a single task inserts them in
+    batches of up to ``batch_size`` rows, or whatever has arrived once
+    ``flush_interval`` seconds have passed since the first entry of the
+    batch. ``write`` waits for room when the queue is full, so actions that
+    must be recorded slow their callers down rather than vanish; ``submit``
+    never waits and drops the entry instead, for high-volume request
+    logging. Both outcomes are counted in the metrics.
+    
+    Each batch is sealed under a Merkle root chained to the previous
+    batch's (see app.core.audit_chain) in the same transaction as its
+    insert. A failed insert is retried once; if it fails again the batch is logged
+    and counted as failed so one bad row cannot wedge the queue.
+    """
+    
+    def __init__(
+        self,
+        session_factory: Callable,
+        max_queue: int = 10000,
+        batch_size: int = 500,
+        flush_interval: float = 1.0,
+    ):
+        self.session_factory = session_factory
+        self.max_queue = max_queue
+        self.batch_size = batch_size
+        self.flush_interval = flush_interval
+        self._queue: Optional[asyncio.Queue] = None
+        self._task: Optional[asyncio.Task] = None
+        self._pending: List[Dict[str, Any]] = []
+        self._flushing: Optional[asyncio.Future] = None
+    
+    @property
+    def running(self) -> bool:
+        return self._task is not None and not self._task.done()
+    
+    @property
+    def queue_depth(self) -> int:
+        return len(self._pending) + (self._queue.qsize() if self._queue else 0)
+    
+    def start(self) -> None:
+        """Start the writer task on the running loop."""
+        if self.running:
+            return
+        self._queue = asyncio.Queue(maxsize=self.max_queue)
+        self._task = asyncio.create_task(self._run())
+    
+    def submit(self, entry: Dict[str, Any]) -> bool:
+        """Queue an entry without waiting; returns False if it was dropped."""
+        if not self.running:
+            AUDIT_ENTRIES.labels(outcome="dropped").inc()
+            return False
+        try:
+            self._queue.put_nowait(entry)
+        except asyncio.QueueFull:
+            AUDIT_ENTRIES.labels(outcome="dropped").inc()
+            return False
+        AUDIT_QUEUE_DEPTH.set(self._queue.qsize())
+        return True
+    
+    async def write(self, entry: Dict[str, Any]) -> None:
+        """
+        Queue an entry, waiting for room if the queue is full.
+        
+        When the writer is not running (scripts, tests without the app
+        lifespan) the entry is inserted directly instead.
+        """
+        if not self.running:
+            await self._insert([entry])
+            return
+        try:
+            self._queue.put_nowait(entry)
+        except asyncio.QueueFull:
+            AUDIT_BACKPRESSURE.inc()
+            started = time.monotonic()
+            await self._queue.put(entry)
+            AUDIT_BACKPRESSURE_WAIT.observe(time.monotonic() - started)
+        AUDIT_QUEUE_DEPTH.set(self._queue.qsize())
+    
+    async def _fill(self) -> None:
+        """Collect a batch into ``_pending``, waiting at most ``flush_interval`` after its first entry."""
+        self._pending.append(await self._queue.get())
+        deadline = time.monotonic() + self.flush_interval
+        while len(self._pending) < self.batch_size:
+            try:
+                self._pending.append(self._queue.get_nowait())
+                continue
+            except asyncio.QueueEmpty:
+                pass
+            remaining = deadline - time.monotonic()
+            if remaining <= 0:
+                break
+            # Not wait_for: on 3.11 it can swallow a cancel that races a completed get
+            getter = asyncio.ensure_future(self._queue.get())
+            try:
+                await asyncio.wait({getter}, timeout=remaining)
+            finally:
+                if getter.done() and not getter.cancelled():
+                    self._pending.append(getter.result())
+                else:
+                    getter.cancel()
+            if not getter.done():
+                break
+    
+    def _take(self) -> List[Dict[str, Any]]:
+        """The pending batch topped up from the queue without waiting."""
+        batch, self._pending = self._pending, []
+        while len(batch) < self.batch_size:
+            try:
+                batch.append(self._queue.get_nowait())
+            except asyncio.QueueEmpty:
+                break
+        AUDIT_QUEUE_DEPTH.set(self._queue.qsize())
+        return batch
+    
+    async def _run(self) -> None:
+        while True:
+            await self._fill()
+            # Shielded so a shutdown cancel never abandons a half-sent batch
+            self._flushing = asyncio.ensure_future(self._flush(self._take()))
+            await asyncio.shield(self._flushing)
+    
+    async def _insert(self, batch: List[Dict[str, Any]]) -> None:
+        async with self.session_factory() as db:
+            await write_sealed_batch(db, batch)
+            await db.commit()
+    
+    async def _flush(self, batch: List[Dict[str, Any]]) -> None:
+        for attempt in (1, 2):
+            try:
+                await self._insert(batch)
+            except Exception as e:
+                if attempt == 2:
+                    logger.error(f"Could not write {len(batch)} audit entries: {e}")
+                    AUDIT_ENTRIES.labels(outcome="failed").inc(len(batch))
+                    return
+                logger.warning(f"Audit batch insert failed, retrying: {e}")
+            else:
+                AUDIT_ENTRIES.labels(outcome="written").inc(len(batch))
+                AUDIT_BATCH_SIZE.observe(len(batch))
+                return
+    
+    async def close(self, timeout: float = 10.0) -> None:
+        """
+        Stop the writer and flush whatever is still queued.
+        
+        Entries left after ``timeout`` seconds are counted as dropped.
+        """
+        if self._task is None:
+            return
+        self._task.cancel()
+        try:
+            await self._task
+        except asyncio.CancelledError:
+            pass
+        self._task = None
+        
+        deadline = time.monotonic() + timeout
+        try:
+            if self._flushing is not None:
+                await asyncio.wait_for(asyncio.shield(self._flushing), timeout)
+            while self._pending or not self._queue.empty():
+                batch = self._take()
+                try:
+                    await asyncio.wait_for(self._flush(batch), max(deadline - time.monotonic(), 0))
+                except asyncio.TimeoutError:
+                    AUDIT_ENTRIES.labels(outcome="dropped").inc(len(batch))
+                    raise
+        except asyncio.TimeoutError:
+            pass
+        left = len(self._pending) + self._queue.qsize()
+        if left:
+            logger.error(f"Dropped {left} audit entries still queued at shutdown")
+            AUDIT_ENTRIES.labels(outcome="dropped").inc(left)
+        AUDIT_QUEUE_DEPTH.set(0)
+        self._queue = None
+        self._pending = []
+        self._flushing = None
+
+
+# Global audit writer, started and drained by the app lifespan
+audit_writer = AuditWriter(
+    async_session_factory,
+    max_queue=settings.AUDIT_QUEUE_SIZE,
+    batch_size=settings.AUDIT_BATCH_SIZE,
+    flush_interval=settings.AUDIT_FLUSH_INTERVAL,
+)
@@ -0,0 +1,90 @@
+"""
+ANPTOP - Compiled Tool Command Templates
+Turns command templates into argv token lists so tools can run without a shell
+"""
+
+import re
+import shlex
+from dataclasses import dataclass
+from typing import Any, Dict, List, Optional, Tuple
+
+
+PLACEHOLDER = re.compile(r"\{(\w+)\}")
+
+# Characters that form shell operators (pipes, redirection, sequencing)
+SHELL_OPERATOR_CHARS = frozenset("|&;<>()")
+
+
+def needs_shell(template: str) -> bool:
+    """Whether a template uses shell syntax outside of quotes."""
+    if "`" in template or "$(" in template:
+        return True
+    lexer = shlex.shlex(template, posix=False, punctuation_chars=True)
+    lexer.whitespace_split = True
+    try:
+        return any(token and set(token) <= SHELL_OPERATOR_CHARS for token in lexer)
+    except ValueError:
+        # Unbalanced quotes; let the shell report it as it always has
+        return True
+
+
+@dataclass(frozen=True)
+class PreparedCommand:
+    """A rendered command, ready to spawn."""
+    display: str
+    argv: Optional[List[str]] = None
+    shell: Optional[str] = None
+
+
+class CompiledCommand:
+    """
+    A command template split into argv tokens once, at registry load.
+    
+    Parameters are substituted inside each token, so a value containing
+    spaces or quotes stays a single argument. A list value fills a token
+    that is just its placeholder with one argument per item (and is
+    comma-joined inside a larger token). Templates that need pipes or
+    redirection keep running through ``/bin/sh``, with values shell-quoted.
+    """
+    
+    __slots__ = ("template", "shell", "tokens")
+    
+    def __init__(self, template: str):
+        self.template = template
+        self.shell = needs_shell(template)
+        self.tokens: Tuple[Tuple[str, bool], ...] = ()
+        if not self.shell:
+            self.tokens = tuple(
+                (token, bool(PLACEHOLDER.search(token)))
+                for token in shlex.split(template)
+            )
+    
+    @staticmethod
+    def _substitute(text: str, parameters: Dict[str, Any], quote: bool = False) -> str:
+        def value(match: "re.Match") -> str:
+            if match.group(1) not in parameters:
+                return match.group(0)
+            rendered = parameters[match.group(1)]
+            if isinstance(rendered, (list, tuple)):
+                items = [str(item) for item in rendered]
+                return " ".join(shlex.quote(item) for item in items) if quote else ",".join(items)
+            rendered = str(rendered)
+            return shlex.quote(rendered) if quote else rendered
+        return PLACEHOLDER.sub(value, text)
+    
+    def render(self, parameters: Dict[str, Any]) -> PreparedCommand:
+        """Substitute parameters and return the command to run."""
+        if self.shell:
+            command = self._substitute(self.template, parameters, quote=True)
+            return PreparedCommand(display=command, shell=command)
+        argv: List[str] = []
+        for token, has_placeholder in self.tokens:
+            if not has_placeholder:
+                argv.append(token)
+                continue
+            whole = PLACEHOLDER.fullmatch(token)
+            if whole and isinstance(parameters.get(whole.group(1)), (list, tuple)):
+                argv.extend(str(item) for item in parameters[whole.group(1)])
+            else:
+                argv.append(self._substitute(token, parameters))
+        return PreparedCommand(display=shlex.join(argv), argv=argv)
@@ -0,0 +1,145 @@
+"""
+ANPTOP - Credential Hashing
+Runs bcrypt off the event loop and checks API keys by lookup prefix and keyed digest
+"""
+
+import asyncio
+import hashlib
+import hmac
+import time
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Callable, Optional
+
+from passlib.context import CryptContext
+from prometheus_client import Histogram
+
+from app.core.config import settings
+
+
+# Prometheus metrics (registered once per process)
+PASSWORD_HASH_SECONDS = Histogram(
+    "anptop_password_hash_seconds",
+    "Time from queueing a password hash or verify to its result",
+    ["operation"],
+    buckets=(0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10),
+)
+
+# Password hashing context
+pwd_context = CryptContext(schemes=["bcrypt"], deprecated="auto")
+
+# API keys are "anptop_" followed by random characters; the first few are stored in clear to find the key
+API_KEY_PREFIX = "anptop_"
+API_KEY_LOOKUP_CHARS = 8
+API_KEY_MIN_LENGTH = len(API_KEY_PREFIX) + 32
+
+
+class PasswordHasher:
+    """
+    Password hashing on a bounded pool of worker threads.
+    
+    bcrypt is deliberately slow (a few hundred milliseconds per call) and
+    releases the GIL while it works, so running it on threads keeps the
+    event loop serving other requests. At most ``max_workers`` hashes run
+    at once; further calls wait their turn rather than adding CPU load.
+    """
+    
+    def __init__(self, context: CryptContext, max_workers: int = 4):
+        self.context = context
+        self.max_workers = max_workers
+        self._executor: Optional[ThreadPoolExecutor] = None
+    
+    @property
+    def executor(self) -> ThreadPoolExecutor:
+        if self._executor is None:
+            self._executor = ThreadPoolExecutor(max_workers=self.max_workers, thread_name_prefix="password-hash")
+        return self._executor
+    
+    async def _run(self, operation: str, fn: Callable[..., Any], *args: Any) -> Any:
+        started = time.monotonic()
+        try:
+            return await asyncio.get_running_loop().run_in_executor(self.executor, fn, *args)
+        finally:
+            PASSWORD_HASH_SECONDS.labels(operation=operation).observe(time.monotonic() - started)
+    
+    async def hash(self, password: str) -> str:
+        return await self._run("hash", self.context.hash, password)
+    
+    async def verify(self, password: str, hashed: str) -> bool:
+        return await self._run("verify", self.context.verify, password, hashed)
+    
+    def shutdown(self) -> None:
+        if self._executor is not None:
+            self._executor.shutdown(wait=False, cancel_futures=True)
+            self._executor = None
+
+
+def api_key_lookup(api_key: str) -> Optional[str]:
+    """The indexed lookup prefix of an API key, or None if it is not shaped like one."""
+    if not api_key.startswith(API_KEY_PREFIX) or len(api_key) < API_KEY_MIN_LENGTH:
+        return None
+    return api_key[:len(API_KEY_PREFIX) + API_KEY_LOOKUP_CHARS]
+
+
+def api_key_digest(api_key: str) -> str:
+    """
+    HMAC-SHA256 of an API key under the server's key.
+    
+    API keys are long and random, so unlike passwords they need no slow
+    hash: a keyed digest cannot be reversed or brute-forced without the
+    server key and costs microseconds to check.
+    """
+    key = (settings.API_KEY_HMAC_KEY or settings.SECRET_KEY).encode()
+    return hmac.new(key, api_key.encode(), hashlib.sha256).hexdigest()
+
+
+def is_legacy_api_key_hash(hashed: str) -> bool:
+    """Whether a stored API key hash predates digests (bcrypt, checked with the password hasher)."""
+    return hashed.startswith("$2")
+
+
+def verify_api_key_digest(api_key: str, digest: str) -> bool:
+    """Constant-time check of an API key against its stored digest."""
+    return hmac.compare_digest(api_key_digest(api_key), digest)
+
+
+class VerifiedKeyCache:
+    """
+    Digests of API keys that have authenticated, by lookup prefix.
+    
+    Lets request paths that must not touch the database (the rate limiter)
+    tell a real key from a forged one with the same shape: a key is only
+    recognised if its digest matches one that authenticated earlier.
+    """
+    
+    def __init__(self, max_entries: int = 10000):
+        self.max_entries = max_entries
+        self._digests: "OrderedDict[str, str]" = OrderedDict()
+    
+    def add(self, api_key: str) -> None:
+        prefix = api_key_lookup(api_key)
+        if prefix is None or self.max_entries <= 0:
+            return
+        self._digests[prefix] = api_key_digest(api_key)
+        self._digests.move_to_end(prefix)
+        while len(self._digests) > self.max_entries:
+            self._digests.popitem(last=False)
+    
+    def verify(self, api_key: str) -> Optional[str]:
+        """The key's lookup prefix if it authenticated before, else None."""
+        prefix = api_key_lookup(api_key)
+        digest = self._digests.get(prefix) if prefix else None
+        if digest is None or not verify_api_key_digest(api_key, digest):
+            return None
+        return prefix
+    
+    def discard(self, prefix: Optional[str]) -> None:
+        if prefix:
+            self._digests.pop(prefix, None)
+
+
+# Global password hasher
+password_hasher = PasswordHasher(pwd_context, max_workers=settings.PASSWORD_HASH_WORKERS)
+
+# Global cache of API keys known to be genuine
+verified_api_keys = VerifiedKeyCache(settings.AUTH_TOKEN_CACHE_SIZE)
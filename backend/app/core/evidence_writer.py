@@ -0,0 +1,71 @@
+"""
+ANPTOP - Evidence File Writer
+Writes evidence to disk while hashing it incrementally, off the event loop
+"""
+
+import asyncio
+import hashlib
+from typing import BinaryIO, Optional
+
+
+class EvidenceWriter:
+    """
+    Append-only evidence file whose digests are updated as bytes are written.
+    
+    Each chunk is written and fed to SHA-256 (and MD5 when requested) in a
+    worker thread, so the file is never re-read to be hashed and neither
+    the disk I/O nor the hashing blocks the event loop. Digests are
+    lowercase hex, the format stored in ``Evidence.sha256_hash`` and
+    ``Evidence.md5_hash``.
+    """
+    
+    def __init__(self, path: str, md5: bool = False):
+        self.path = path
+        self.size = 0
+        self._sha256 = hashlib.sha256()
+        self._md5 = hashlib.md5(usedforsecurity=False) if md5 else None
+        self._file: Optional[BinaryIO] = None
+    
+    async def __aenter__(self) -> "EvidenceWriter":
+        self._file = await asyncio.to_thread(open, self.path, "wb")
+        return self
+    
+    async def __aexit__(self, *exc) -> None:
+        await self.close()
+    
+    def _write_sync(self, data: bytes) -> None:
+        self._file.write(data)
+        self._sha256.update(data)
+        if self._md5 is not None:
+            self._md5.update(data)
+    
+    async def write(self, data: bytes) -> None:
+        """Append a chunk to the file and the running digests."""
+        if not data:
+            return
+        await asyncio.to_thread(self._write_sync, data)
+        self.size += len(data)
+    
+    async def copy_from(self, path: str, chunk_size: int) -> None:
+        """Append the contents of another file, chunk by chunk."""
+        def copy() -> int:
+            copied = 0
+            with open(path, "rb") as src:
+                for chunk in iter(lambda: src.read(chunk_size), b""):
+                    self._write_sync(chunk)
+                    copied += len(chunk)
+            return copied
+        self.size += await asyncio.to_thread(copy)
+    
+    async def close(self) -> None:
+        if self._file is not None:
+            await asyncio.to_thread(self._file.close)
+            self._file = None
+    
+    @property
+    def sha256(self) -> str:
+        return self._sha256.hexdigest()
+    
+    @property
+    def md5(self) -> Optional[str]:
+        return self._md5.hexdigest() if self._md5 is not None else None
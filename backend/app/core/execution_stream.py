@@ -0,0 +1,204 @@
+"""
+ANPTOP - Live Output Streams for Running Tool Executions
+Fans out stdout/stderr lines from the executor to any number of subscribers
+"""
+
+import asyncio
+from collections import deque
+from datetime import datetime
+from typing import Any, AsyncIterator, Deque, Dict, Optional, Set
+
+from loguru import logger
+
+
+# Longest partial line held back while waiting for a newline
+MAX_LINE_BYTES = 8192
+
+
+class OutputSubscriber:
+    """A single consumer of an execution stream with its own bounded buffer."""
+    
+    def __init__(self, buffer_size: int):
+        self.queue: asyncio.Queue = asyncio.Queue(maxsize=buffer_size)
+        self.dropped = 0
+    
+    def offer(self, event: Optional[Dict[str, Any]]) -> None:
+        """Queue an event, dropping the oldest one if the consumer lags."""
+        while True:
+            try:
+                self.queue.put_nowait(event)
+                return
+            except asyncio.QueueFull:
+                try:
+                    self.queue.get_nowait()
+                    self.dropped += 1
+                except asyncio.QueueEmpty:
+                    pass
+
+
+class ExecutionStream:
+    """
+    Line-oriented broadcast of one tool execution's output.
+    
+    The executor feeds raw chunks; complete lines are published to every
+    subscriber without ever awaiting them, so a slow client only loses its
+    own oldest lines and never stalls the pipe reader.
+    """
+    
+    def __init__(
+        self,
+        execution_id: str,
+        tool_name: str,
+        buffer_size: int = 1000,
+        backlog_lines: int = 200,
+        engagement_id: Optional[int] = None,
+        user_id: Optional[int] = None,
+    ):
+        self.execution_id = execution_id
+        self.tool_name = tool_name
+        self.engagement_id = engagement_id
+        self.user_id = user_id
+        self.buffer_size = buffer_size
+        self.started_at = datetime.utcnow()
+        self.finished = False
+        self.summary: Dict[str, Any] = {}
+        self.lines_published = 0
+        self._partial: Dict[str, bytes] = {"stdout": b"", "stderr": b""}
+        self._backlog: Deque[Dict[str, Any]] = deque(maxlen=backlog_lines)
+        self._subscribers: Set[OutputSubscriber] = set()
+    
+    @property
+    def subscriber_count(self) -> int:
+        return len(self._subscribers)
+    
+    def feed(self, stream: str, chunk: bytes) -> None:
+        """Split a raw chunk into lines and publish the complete ones."""
+        data = self._partial[stream] + chunk
+        *lines, rest = data.split(b"\n")
+        for line in lines:
+            self._publish(stream, line)
+        if len(rest) > MAX_LINE_BYTES:
+            self._publish(stream, rest)
+            rest = b""
+        self._partial[stream] = rest
+    
+    def close(self, **summary: Any) -> None:
+        """Flush partial lines, publish the end event and release subscribers."""
+        for stream, rest in self._partial.items():
+            if rest:
+                self._publish(stream, rest)
+        self._partial = {"stdout": b"", "stderr": b""}
+        self.finished = True
+        self.summary = summary
+        event = {"event": "end", "execution_id": self.execution_id, **summary}
+        self._backlog.append(event)
+        for subscriber in self._subscribers:
+            subscriber.offer(event)
+            subscriber.offer(None)
+    
+    def _publish(self, stream: str, line: bytes) -> None:
+        self.lines_published += 1
+        event = {
+            "event": stream,
+            "seq": self.lines_published,
+            "line": line.decode("utf-8", errors="replace").rstrip("\r"),
+        }
+        self._backlog.append(event)
+        for subscriber in self._subscribers:
+            subscriber.offer(event)
+    
+    async def subscribe(self, heartbeat: Optional[float] = None) -> AsyncIterator[Dict[str, Any]]:
+        """
+        Yield events until the execution ends.
+        
+        New subscribers first receive the recent backlog so a client that
+        attaches mid-run still sees context. With ``heartbeat`` set, a
+        heartbeat event is yielded whenever the stream is idle that long.
+        """
+        subscriber = OutputSubscriber(self.buffer_size)
+        for event in self._backlog:
+            subscriber.offer(event)
+        if self.finished:
+            subscriber.offer(None)
+        else:
+            self._subscribers.add(subscriber)
+        
+        try:
+            while True:
+                try:
+                    event = await asyncio.wait_for(subscriber.queue.get(), timeout=heartbeat)
+                except asyncio.TimeoutError:
+                    yield {"event": "heartbeat"}
+                    continue
+                if event is None:
+                    break
+                if subscriber.dropped:
+                    yield {"event": "dropped", "count": subscriber.dropped}
+                    subscriber.dropped = 0
+                yield event
+        finally:
+            self._subscribers.discard(subscriber)
+    
+    def to_dict(self) -> Dict[str, Any]:
+        """Describe the stream for status endpoints."""
+        return {
+            "execution_id": self.execution_id,
+            "tool_name": self.tool_name,
+            "started_at": self.started_at,
+            "finished": self.finished,
+            "lines": self.lines_published,
+            "subscribers": self.subscriber_count,
+            **self.summary,
+        }
+
+
+class ExecutionStreamRegistry:
+    """Live streams by execution ID, kept for a while after they finish."""
+    
+    def __init__(self, buffer_size: int, backlog_lines: int, retention_seconds: int):
+        self.buffer_size = buffer_size
+        self.backlog_lines = backlog_lines
+        self.retention_seconds = retention_seconds
+        self._streams: Dict[str, ExecutionStream] = {}
+    
+    def open(
+        self,
+        execution_id: str,
+        tool_name: str,
+        engagement_id: Optional[int] = None,
+        user_id: Optional[int] = None,
+    ) -> ExecutionStream:
+        """Create (or return) the stream for an execution."""
+        stream = self._streams.get(execution_id)
+        if stream is None:
+            stream = ExecutionStream(
+                execution_id,
+                tool_name,
+                buffer_size=self.buffer_size,
+                backlog_lines=self.backlog_lines,
+                engagement_id=engagement_id,
+                user_id=user_id,
+            )
+            self._streams[execution_id] = stream
+        return stream
+    
+    def get(self, execution_id: str) -> Optional[ExecutionStream]:
+        return self._streams.get(execution_id)
+    
+    def close(self, execution_id: str, **summary: Any) -> None:
+        """End a stream and schedule it for removal."""
+        stream = self._streams.get(execution_id)
+        if stream is None:
+            return
+        stream.close(**summary)
+        try:
+            asyncio.get_running_loop().call_later(
+                self.retention_seconds, self._streams.pop, execution_id, None
+            )
+        except RuntimeError:
+            self._streams.pop(execution_id, None)
+        logger.debug(f"Closed output stream for execution {execution_id}")
+    
+    def running(self) -> Dict[str, ExecutionStream]:
+        """Streams whose executions have not finished yet."""
+        return {k: v for k, v in self._streams.items() if not v.finished}
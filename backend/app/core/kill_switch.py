@@ -0,0 +1,372 @@
+"""
+ANPTOP - Kill Switch
+Cluster-wide emergency stop: state fanned out over pub/sub, running tools torn down in every worker
+"""
+
+import asyncio
+import json
+import os
+import socket
+import time
+import uuid
+from dataclasses import asdict, dataclass, field
+from datetime import datetime
+from typing import Any, Awaitable, Callable, Dict, List, Optional, Sequence
+
+from loguru import logger
+from prometheus_client import Counter, Gauge
+
+from app.core.config import settings
+
+try:
+    import redis.asyncio as redis_asyncio
+except ImportError:  # optional; only needed for KILL_SWITCH_BACKEND=redis
+    redis_asyncio = None
+
+
+# Prometheus metrics (registered once per process)
+KILL_SWITCH_ACTIVE = Gauge(
+    "anptop_kill_switch_active",
+    "Whether this worker has the kill switch engaged",
+)
+KILL_SWITCH_TERMINATED = Counter(
+    "anptop_kill_switch_terminated_total",
+    "Tool process groups terminated by the kill switch, by the signal that ended them",
+    ["signal"],
+)
+
+# Called on activation with the grace period; returns what it terminated
+Terminator = Callable[[float], Awaitable[List[Dict[str, Any]]]]
+
+
+@dataclass(frozen=True)
+class KillSwitchState:
+    """The switch position every worker converges on."""
+    active: bool
+    id: str = ""
+    reason: str = ""
+    actor_id: Optional[int] = None
+    changed_at: Optional[str] = None
+    
+    @classmethod
+    def from_dict(cls, data: Dict[str, Any]) -> "KillSwitchState":
+        return cls(**{name: data.get(name) for name in cls.__dataclass_fields__ if name in data})
+
+
+@dataclass
+class KillReport:
+    """What one activation stopped, across the workers that answered in time."""
+    id: str
+    reason: str
+    workers_expected: int
+    workers_reported: List[str] = field(default_factory=list)
+    terminated: List[Dict[str, Any]] = field(default_factory=list)
+    elapsed_seconds: float = 0.0
+    error: Optional[str] = None
+    
+    @property
+    def complete(self) -> bool:
+        return self.error is None and len(self.workers_reported) >= self.workers_expected
+    
+    def as_dict(self) -> Dict[str, Any]:
+        return dict(asdict(self), complete=self.complete)
+
+
+class MemoryBroker:
+    """Kill switch state and fan-out within this process; for single-worker deployments and tests."""
+    
+    def __init__(self):
+        self._state: Optional[Dict[str, Any]] = None
+        self._handlers: List[Callable[[Dict[str, Any]], Awaitable[None]]] = []
+        self._reports: Dict[str, asyncio.Queue] = {}
+        self._tasks: set = set()
+    
+    async def get_state(self) -> Optional[Dict[str, Any]]:
+        return self._state
+    
+    async def set_state(self, state: Dict[str, Any]) -> None:
+        self._state = state
+    
+    async def subscribe(self, handler: Callable[[Dict[str, Any]], Awaitable[None]]) -> None:
+        self._handlers.append(handler)
+    
+    async def publish(self, message: Dict[str, Any]) -> int:
+        """Deliver ``message`` to every subscriber; returns how many there are."""
+        for handler in self._handlers:
+            task = asyncio.create_task(handler(message))
+            self._tasks.add(task)
+            task.add_done_callback(self._tasks.discard)
+        return len(self._handlers)
+    
+    def _queue(self, activation_id: str) -> asyncio.Queue:
+        return self._reports.setdefault(activation_id, asyncio.Queue())
+    
+    async def report(self, activation_id: str, report: Dict[str, Any]) -> None:
+        self._queue(activation_id).put_nowait(report)
+    
+    async def collect(self, activation_id: str, expected: int, timeout: float) -> List[Dict[str, Any]]:
+        """Up to ``expected`` reports for an activation, waiting at most ``timeout`` seconds."""
+        queue = self._queue(activation_id)
+        deadline = time.monotonic() + timeout
+        reports = []
+        try:
+            while len(reports) < expected:
+                remaining = deadline - time.monotonic()
+                if remaining <= 0:
+                    break
+                try:
+                    reports.append(await asyncio.wait_for(queue.get(), timeout=remaining))
+                except asyncio.TimeoutError:
+                    break
+        finally:
+            self._reports.pop(activation_id, None)
+        return reports
+    
+    async def close(self) -> None:
+        self._handlers.clear()
+
+
+class RedisBroker:
+    """
+    Kill switch state in Redis, fanned out to every worker and replica.
+    
+    The position is stored under one key so a worker that starts, or
+    reconnects after missing messages, reads it back; changes are
+    announced on a channel. Each worker answers an activation by pushing
+    its report onto a per-activation list that the activating worker reads.
+    """
+    
+    STATE_KEY = "anptop:kill_switch:state"
+    CHANNEL = "anptop:kill_switch"
+    REPORTS_KEY = "anptop:kill_switch:reports:"
+    REPORTS_TTL = 300
+    
+    def __init__(self, redis: Any):
+        self.redis = redis
+        self._listener: Optional[asyncio.Task] = None
+    
+    async def get_state(self) -> Optional[Dict[str, Any]]:
+        data = await self.redis.get(self.STATE_KEY)
+        return json.loads(data) if data else None
+    
+    async def set_state(self, state: Dict[str, Any]) -> None:
+        await self.redis.set(self.STATE_KEY, json.dumps(state))
+    
+    async def subscribe(self, handler: Callable[[Dict[str, Any]], Awaitable[None]]) -> None:
+        pubsub = self.redis.pubsub()
+        await pubsub.subscribe(self.CHANNEL)
+        self._listener = asyncio.create_task(self._listen(pubsub, handler))
+    
+    async def _listen(self, pubsub: Any, handler: Callable[[Dict[str, Any]], Awaitable[None]]) -> None:
+        while True:
+            try:
+                async for message in pubsub.listen():
+                    if message.get("type") == "message":
+                        await handler(json.loads(message["data"]))
+            except asyncio.CancelledError:
+                await pubsub.aclose()
+                raise
+            except Exception as e:
+                logger.error(f"Kill switch subscription lost, resubscribing: {e}")
+                await asyncio.sleep(1)
+                try:
+                    pubsub = self.redis.pubsub()
+                    await pubsub.subscribe(self.CHANNEL)
+                    # Messages published while disconnected are gone; the stored state is not
+                    state = await self.get_state()
+                    if state is not None:
+                        await handler(dict(state, type="sync"))
+                except Exception as retry_error:
+                    logger.error(f"Kill switch resubscribe failed: {retry_error}")
+    
+    async def publish(self, message: Dict[str, Any]) -> int:
+        return int(await self.redis.publish(self.CHANNEL, json.dumps(message)))
+    
+    async def report(self, activation_id: str, report: Dict[str, Any]) -> None:
+        key = f"{self.REPORTS_KEY}{activation_id}"
+        await self.redis.rpush(key, json.dumps(report))
+        await self.redis.expire(key, self.REPORTS_TTL)
+    
+    async def collect(self, activation_id: str, expected: int, timeout: float) -> List[Dict[str, Any]]:
+        key = f"{self.REPORTS_KEY}{activation_id}"
+        deadline = time.monotonic() + timeout
+        reports = []
+        while len(reports) < expected:
+            remaining = deadline - time.monotonic()
+            if remaining <= 0:
+                break
+            popped = await self.redis.blpop([key], timeout=max(remaining, 0.01))
+            if popped is None:
+                break
+            reports.append(json.loads(popped[1]))
+        return reports
+    
+    async def close(self) -> None:
+        if self._listener is not None:
+            self._listener.cancel()
+            try:
+                await self._listener
+            except (asyncio.CancelledError, Exception):
+                pass
+            self._listener = None
+
+
+class KillSwitch:
+    """
+    An emergency stop shared by every worker.
+    
+    Requests check ``active``, a flag held in this process, so the check
+    costs no I/O. ``activate`` stores the new position with the broker and
+    announces it; each worker, this one included, then engages its flag
+    and runs its terminators, which send SIGTERM to every running tool's
+    process group and SIGKILL to those still alive after ``grace``
+    seconds. The activating worker waits up to ``report_timeout`` seconds
+    for every worker's list of what it terminated and returns them
+    together; workers that do not answer in time leave the report
+    incomplete. If the broker cannot be reached this worker still stops.
+    """
+    
+    def __init__(
+        self,
+        broker: Any,
+        enabled: bool = True,
+        grace: float = 3.0,
+        report_timeout: float = 10.0,
+        exempt_paths: Sequence[str] = (),
+    ):
+        self.broker = broker
+        self.enabled = enabled
+        self.grace = grace
+        self.report_timeout = report_timeout
+        self.exempt_paths = tuple(exempt_paths)
+        self.worker = f"{socket.gethostname()}:{os.getpid()}"
+        self.state = KillSwitchState(active=False)
+        self._terminators: List[Terminator] = []
+        self._handled: set = set()
+    
+    @property
+    def active(self) -> bool:
+        return self.enabled and self.state.active
+    
+    def blocks(self, path: str) -> bool:
+        """Whether a request for ``path`` is refused right now."""
+        return self.active and not (self.exempt_paths and path.startswith(self.exempt_paths))
+    
+    def add_terminator(self, terminator: Terminator) -> None:
+        self._terminators.append(terminator)
+    
+    async def start(self) -> None:
+        """Pick up the stored position and listen for changes."""
+        try:
+            state = await self.broker.get_state()
+            if state is not None:
+                self._apply(KillSwitchState.from_dict(state))
+            await self.broker.subscribe(self._on_message)
+        except Exception as e:
+            logger.error(f"Kill switch broker unavailable, this worker only follows local changes: {e}")
+            if not isinstance(self.broker, MemoryBroker):
+                self.broker = MemoryBroker()
+                await self.broker.subscribe(self._on_message)
+    
+    def _apply(self, state: KillSwitchState) -> None:
+        if state.active != self.state.active:
+            logger.warning(
+                f"🛑 Kill switch engaged: {state.reason or 'no reason given'}" if state.active
+                else "✅ Kill switch released"
+            )
+        self.state = state
+        KILL_SWITCH_ACTIVE.set(1 if state.active else 0)
+    
+    async def terminate(self) -> List[Dict[str, Any]]:
+        """Run every terminator and tag what they stopped with this worker."""
+        terminated = []
+        for terminator in self._terminators:
+            try:
+                stopped = await terminator(self.grace)
+            except Exception as e:
+                logger.error(f"Kill switch terminator failed: {e}")
+                continue
+            for entry in stopped:
+                KILL_SWITCH_TERMINATED.labels(signal=entry.get("signal", "unknown")).inc()
+                terminated.append(dict(entry, worker=self.worker))
+        return terminated
+    
+    async def _on_message(self, message: Dict[str, Any]) -> None:
+        state = KillSwitchState.from_dict(message)
+        self._apply(state)
+        if not state.active or message.get("type") != "activate" or state.id in self._handled:
+            return
+        self._handled.add(state.id)
+        terminated = await self.terminate()
+        try:
+            await self.broker.report(state.id, {"worker": self.worker, "terminated": terminated})
+        except Exception as e:
+            logger.error(f"Could not report kill switch terminations: {e}")
+    
+    async def activate(self, reason: str = "", actor_id: Optional[int] = None) -> KillReport:
+        """Engage the switch everywhere and return what was terminated."""
+        started = time.monotonic()
+        state = KillSwitchState(
+            active=True,
+            id=uuid.uuid4().hex,
+            reason=reason,
+            actor_id=actor_id,
+            changed_at=datetime.utcnow().isoformat(),
+        )
+        # Refuse new work here at once, before the broker round trip
+        self._apply(state)
+        report = KillReport(id=state.id, reason=reason, workers_expected=1)
+        
+        try:
+            await self.broker.set_state(asdict(state))
+            report.workers_expected = await self.broker.publish(dict(asdict(state), type="activate"))
+            replies = await self.broker.collect(state.id, report.workers_expected, self.report_timeout)
+        except Exception as e:
+            logger.error(f"Kill switch broadcast failed, stopping this worker only: {e}")
+            report.error = str(e)
+            self._handled.add(state.id)
+            replies = [{"worker": self.worker, "terminated": await self.terminate()}]
+        
+        for reply in replies:
+            report.workers_reported.append(reply["worker"])
+            report.terminated.extend(reply.get("terminated", []))
+        report.elapsed_seconds = round(time.monotonic() - started, 3)
+        if not report.complete:
+            logger.warning(
+                f"Kill switch {state.id}: {len(report.workers_reported)} of "
+                f"{report.workers_expected} workers reported"
+            )
+        return report
+    
+    async def deactivate(self, actor_id: Optional[int] = None) -> bool:
+        """Release the switch everywhere; False if only this worker could be released."""
+        state = KillSwitchState(active=False, actor_id=actor_id, changed_at=datetime.utcnow().isoformat())
+        self._apply(state)
+        try:
+            await self.broker.set_state(asdict(state))
+            await self.broker.publish(dict(asdict(state), type="deactivate"))
+        except Exception as e:
+            logger.error(f"Kill switch release not broadcast, other workers stay stopped: {e}")
+            return False
+        return True
+    
+    async def close(self) -> None:
+        await self.broker.close()
+
+
+def _broker():
+    if settings.KILL_SWITCH_BACKEND == "redis":
+        if redis_asyncio is not None:
+            return RedisBroker(redis_asyncio.from_url(settings.REDIS_URL))
+        logger.warning("KILL_SWITCH_BACKEND is redis but redis is not installed; the kill switch stops this process only")
+    return MemoryBroker()
+
+
+# Global kill switch
+kill_switch = KillSwitch(
+    _broker(),
+    enabled=settings.ENABLE_KILL_SWITCH,
+    grace=settings.KILL_SWITCH_GRACE_SECONDS,
+    report_timeout=settings.KILL_SWITCH_REPORT_TIMEOUT,
+    exempt_paths=settings.KILL_SWITCH_EXEMPT_PATHS,
+)
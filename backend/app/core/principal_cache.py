@@ -0,0 +1,225 @@
+"""
+ANPTOP - Principal Cache
+Caches who a bearer token belongs to, so authenticated requests skip the users table
+"""
+
+import json
+import time
+from collections import OrderedDict
+from dataclasses import asdict, dataclass
+from typing import Any, Awaitable, Callable, Dict, List, Optional, Tuple
+
+from loguru import logger
+
+from app.core.config import settings
+from app.models.user import ROLE_SCOPES, User, UserRole, role_has_permission
+
+try:
+    import redis.asyncio as redis_asyncio
+except ImportError:  # optional; principals are then cached per process only
+    redis_asyncio = None
+
+
+@dataclass(frozen=True)
+class Principal:
+    """
+    The parts of a user that authenticate and authorise a request.
+    
+    Stands in for the User row on the request path: it answers the same
+    ``id`` / ``role`` / ``get_scopes`` / ``has_permission`` questions, but
+    carries no credentials and is not attached to a session. Endpoints that
+    change the user itself load the row with ``get_current_user_record``.
+    """
+    id: int
+    username: str
+    email: str
+    full_name: str
+    role: UserRole
+    is_active: bool
+    is_superuser: bool
+    mfa_enabled: bool
+    scopes: Tuple[str, ...]
+    
+    @classmethod
+    def from_user(cls, user: User) -> "Principal":
+        return cls(
+            id=user.id,
+            username=user.username,
+            email=user.email,
+            full_name=user.full_name,
+            role=UserRole(user.role),
+            is_active=bool(user.is_active),
+            is_superuser=bool(user.is_superuser),
+            mfa_enabled=bool(user.mfa_enabled),
+            scopes=tuple(ROLE_SCOPES.get(UserRole(user.role), ())),
+        )
+    
+    @classmethod
+    def from_json(cls, data: str) -> "Principal":
+        fields = json.loads(data)
+        fields["role"] = UserRole(fields["role"])
+        fields["scopes"] = tuple(fields["scopes"])
+        return cls(**fields)
+    
+    def to_json(self) -> str:
+        return json.dumps(asdict(self))
+    
+    def get_scopes(self) -> List[str]:
+        return list(self.scopes)
+    
+    def has_permission(self, permission: str) -> bool:
+        return role_has_permission(self.role, permission)
+
+
+class PrincipalCache:
+    """
+    Resolved principals by user id, kept for ``ttl`` seconds.
+    
+    Entries live in process memory, or in Redis when a client is given so
+    that every worker sees an invalidation. Either way ``invalidate`` must
+    be called whenever a user's role, status or password changes; the TTL
+    only bounds how long a missed invalidation can go unnoticed. Redis
+    errors fall back to loading from the database.
+    """
+    
+    KEY_PREFIX = "anptop:principal:"
+    
+    def __init__(self, ttl: float = 60, max_entries: int = 10000, redis: Any = None):
+        self.ttl = ttl
+        self.max_entries = max_entries
+        self.redis = redis
+        self._entries: "OrderedDict[int, Tuple[float, Principal]]" = OrderedDict()
+        self._invalidations = 0
+    
+    @property
+    def enabled(self) -> bool:
+        return self.ttl > 0
+    
+    async def get(self, user_id: int) -> Optional[Principal]:
+        if self.redis is not None:
+            try:
+                data = await self.redis.get(f"{self.KEY_PREFIX}{user_id}")
+            except Exception as e:
+                logger.warning(f"Principal cache read failed: {e}")
+                return None
+            return Principal.from_json(data) if data else None
+        
+        cached = self._entries.get(user_id)
+        if cached is None:
+            return None
+        if cached[0] <= time.monotonic():
+            self._entries.pop(user_id, None)
+            return None
+        self._entries.move_to_end(user_id)
+        return cached[1]
+    
+    async def set(self, principal: Principal) -> None:
+        if self.redis is not None:
+            try:
+                await self.redis.set(f"{self.KEY_PREFIX}{principal.id}", principal.to_json(), ex=max(int(self.ttl), 1))
+            except Exception as e:
+                logger.warning(f"Principal cache write failed: {e}")
+            return
+        
+        self._entries[principal.id] = (time.monotonic() + self.ttl, principal)
+        self._entries.move_to_end(principal.id)
+        while len(self._entries) > self.max_entries:
+            self._entries.popitem(last=False)
+    
+    async def resolve(self, user_id: int, load: Callable[[], Awaitable[Optional[User]]]) -> Optional[Principal]:
+        """The cached principal for ``user_id``, or one built from ``load()`` and cached."""
+        if not self.enabled:
+            user = await load()
+            return Principal.from_user(user) if user is not None else None
+        
+        principal = await self.get(user_id)
+        if principal is not None:
+            return principal
+        invalidations = self._invalidations
+        user = await load()
+        if user is None:
+            return None
+        principal = Principal.from_user(user)
+        # Not cached if an invalidation ran while it loaded: it may predate the change
+        if invalidations == self._invalidations:
+            await self.set(principal)
+        return principal
+    
+    async def invalidate(self, user_id: Optional[int] = None) -> None:
+        """Drop one user's principal, or all of them."""
+        self._invalidations += 1
+        if user_id is None:
+            self._entries.clear()
+        else:
+            self._entries.pop(user_id, None)
+        if self.redis is None:
+            return
+        try:
+            if user_id is None:
+                keys = [key async for key in self.redis.scan_iter(match=f"{self.KEY_PREFIX}*")]
+                if keys:
+                    await self.redis.delete(*keys)
+            else:
+                await self.redis.delete(f"{self.KEY_PREFIX}{user_id}")
+        except Exception as e:
+            logger.error(f"Principal cache invalidation failed, entries expire in {self.ttl}s: {e}")
+    
+    def __len__(self) -> int:
+        return len(self._entries)
+
+
+class TokenCache:
+    """
+    Verified JWT payloads by token, each kept until the token expires.
+    
+    Signature checks are repeated on every request with the same token;
+    this remembers the outcome of a successful one. Rejected tokens are
+    never cached, and an entry is not returned past its ``exp`` claim.
+    """
+    
+    def __init__(self, max_entries: int = 10000):
+        self.max_entries = max_entries
+        self._entries: "OrderedDict[str, Tuple[float, Dict[str, Any]]]" = OrderedDict()
+    
+    def get(self, token: str) -> Optional[Dict[str, Any]]:
+        cached = self._entries.get(token)
+        if cached is None:
+            return None
+        if cached[0] <= time.time():
+            self._entries.pop(token, None)
+            return None
+        self._entries.move_to_end(token)
+        return dict(cached[1])
+    
+    def set(self, token: str, payload: Dict[str, Any]) -> None:
+        expires = payload.get("exp")
+        if self.max_entries <= 0 or not isinstance(expires, (int, float)):
+            return
+        self._entries[token] = (float(expires), dict(payload))
+        self._entries.move_to_end(token)
+        while len(self._entries) > self.max_entries:
+            self._entries.popitem(last=False)
+    
+    def clear(self) -> None:
+        self._entries.clear()
+    
+    def __len__(self) -> int:
+        return len(self._entries)
+
+
+def _principal_redis():
+    if not settings.AUTH_PRINCIPAL_CACHE_REDIS:
+        return None
+    if redis_asyncio is None:
+        logger.warning("AUTH_PRINCIPAL_CACHE_REDIS is set but redis is not installed; caching principals per process")
+        return None
+    return redis_asyncio.from_url(settings.REDIS_URL, decode_responses=True)
+
+
+# Global caches
+principal_cache = PrincipalCache(
+    ttl=settings.AUTH_PRINCIPAL_CACHE_TTL,
+    max_entries=settings.AUTH_PRINCIPAL_CACHE_SIZE,
+    redis=_principal_redis(),
+)
+token_cache = TokenCache(max_entries=settings.AUTH_TOKEN_CACHE_SIZE)
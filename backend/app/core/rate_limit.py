@@ -0,0 +1,334 @@
+"""
+ANPTOP - Rate Limiting
+GCRA request limits per user, API key and route, enforced as ASGI middleware
+"""
+
+import json
+import math
+import time
+from dataclasses import dataclass
+from typing import Any, Dict, List, Optional, Sequence, Tuple
+
+from loguru import logger
+from prometheus_client import Counter
+
+from app.core.config import settings
+from app.core.credentials import API_KEY_PREFIX, verified_api_keys
+from app.core.security import decode_token
+
+try:
+    import redis.asyncio as redis_asyncio
+except ImportError:  # optional; only needed for RATE_LIMIT_BACKEND=redis
+    redis_asyncio = None
+
+
+# Prometheus metrics (registered once per process)
+RATE_LIMITED = Counter(
+    "anptop_rate_limited_total",
+    "Requests rejected by the rate limiter, by caller kind (user, key, ip)",
+    ["kind"],
+)
+RATE_LIMIT_ERRORS = Counter(
+    "anptop_rate_limit_errors_total",
+    "Rate limit checks that failed and let the request through",
+)
+
+# Response headers clients (and CORS) need to see
+RATE_LIMIT_HEADERS = ["Retry-After", "X-RateLimit-Limit", "X-RateLimit-Remaining"]
+
+
+@dataclass(frozen=True)
+class Bucket:
+    """
+    One GCRA bucket: ``limit`` requests per ``window`` seconds, of which up
+    to ``burst`` may arrive at once.
+    
+    GCRA keeps a single timestamp per bucket, the theoretical arrival time
+    (TAT) of the next request; each request pushes it ``interval`` seconds
+    further and is refused if that would put it more than ``burst`` intervals
+    ahead of now.
+    """
+    key: str
+    limit: int
+    window: float
+    burst: int
+    
+    @property
+    def interval(self) -> float:
+        return self.window / self.limit
+    
+    @property
+    def tolerance(self) -> float:
+        return self.interval * self.burst
+
+
+class MemoryBackend:
+    """GCRA state in this process; for single-worker deployments and tests."""
+    
+    def __init__(self, max_keys: int = 100000):
+        self.max_keys = max_keys
+        self._tat: Dict[str, float] = {}
+    
+    async def acquire(self, buckets: Sequence[Bucket]) -> Tuple[float, int, int]:
+        """
+        Count one request against every bucket, or none if any is full.
+        
+        Returns ``(retry_after, remaining, index)``: seconds until the
+        request would be allowed (0 if it was), and the requests left in the
+        tightest bucket and its position in ``buckets``.
+        """
+        now = time.monotonic()
+        tats = [max(self._tat.get(bucket.key, now), now) + bucket.interval for bucket in buckets]
+        waits = [tat - bucket.tolerance - now for tat, bucket in zip(tats, buckets)]
+        longest = max(waits)
+        if longest > 0:
+            return longest, 0, waits.index(longest)
+        
+        for bucket, tat in zip(buckets, tats):
+            self._tat[bucket.key] = tat
+        if len(self._tat) > self.max_keys:
+            self._sweep(now)
+        # Nudged so float error never turns 2 requests left into 1.999...
+        left = [math.floor(-wait / bucket.interval + 1e-9) for wait, bucket in zip(waits, buckets)]
+        fewest = min(left)
+        return 0.0, fewest, left.index(fewest)
+    
+    def _sweep(self, now: float) -> None:
+        # A TAT in the past is the same as no entry at all
+        self._tat = {key: tat for key, tat in self._tat.items() if tat > now}
+    
+    async def reset(self) -> None:
+        self._tat.clear()
+
+
+# KEYS: bucket keys; ARGV: interval and tolerance (microseconds) per key.
+# Uses the server clock so every worker agrees on "now".
+GCRA_SCRIPT = """
+local t = redis.call('TIME')
+local now = tonumber(t[1]) * 1000000 + tonumber(t[2])
+local retry, remaining, index = 0, -1, 1
+local tats = {}
+for i = 1, #KEYS do
+  local interval = tonumber(ARGV[2 * i - 1])
+  local tolerance = tonumber(ARGV[2 * i])
+  local tat = tonumber(redis.call('GET', KEYS[i]) or now)
+  if tat < now then tat = now end
+  tat = tat + interval
+  local allow_at = tat - tolerance
+  if allow_at > now then
+    if allow_at - now > retry then retry, index = allow_at - now, i end
+  elseif retry == 0 then
+    local left = math.floor((now - allow_at) / interval)
+    if remaining < 0 or left < remaining then remaining, index = left, i end
+  end
+  tats[i] = tat
+end
+if retry > 0 then return {math.ceil(retry), 0, index - 1} end
+for i = 1, #KEYS do
+  redis.call('SET', KEYS[i], string.format('%d', tats[i]), 'PX', math.ceil((tats[i] - now) / 1000))
+end
+return {0, remaining, index - 1}
+"""
+
+
+class RedisBackend:
+    """GCRA state in Redis, shared by every worker; one script call per request."""
+    
+    def __init__(self, redis: Any):
+        self.redis = redis
+        self._script = redis.register_script(GCRA_SCRIPT)
+    
+    async def acquire(self, buckets: Sequence[Bucket]) -> Tuple[float, int, int]:
+        args: List[int] = []
+        for bucket in buckets:
+            args += [round(bucket.interval * 1e6), round(bucket.tolerance * 1e6)]
+        retry_after, remaining, index = await self._script(keys=[bucket.key for bucket in buckets], args=args)
+        return int(retry_after) / 1e6, int(remaining), int(index)
+    
+    async def reset(self) -> None:
+        keys = [key async for key in self.redis.scan_iter(match="anptop:rl:*")]
+        if keys:
+            await self.redis.delete(*keys)
+
+
+@dataclass(frozen=True)
+class Decision:
+    allowed: bool
+    limit: int
+    remaining: int
+    retry_after: float = 0.0
+
+
+class RateLimiter:
+    """
+    Request limits for callers identified by user, API key or address.
+    
+    Every caller gets the default bucket (``requests`` per ``window``;
+    ``api_key_requests`` for API keys, at most ``burst`` at once) and, on
+    paths listed in ``routes``, an additional bucket for that route. A
+    request is counted against all of its buckets or, if any is full,
+    against none.
+    
+    Callers are identified without touching the database: JWTs by their
+    subject (verification is memoized, see ``decode_token``), API keys
+    that have authenticated before by their lookup prefix, and everyone
+    else (forged keys included) by client address. If the backend fails
+    the request is let through and counted.
+    """
+    
+    def __init__(
+        self,
+        backend: Any,
+        requests: int = 100,
+        window: float = 60,
+        burst: int = 0,
+        api_key_requests: int = 0,
+        routes: Optional[Dict[str, int]] = None,
+        exempt_paths: Sequence[str] = (),
+        enabled: bool = True,
+    ):
+        self.backend = backend
+        self.requests = requests
+        self.window = window
+        self.burst = burst
+        self.api_key_requests = api_key_requests or requests
+        # Longest first, so nested routes take precedence
+        self.routes = sorted((routes or {}).items(), key=lambda route: -len(route[0]))
+        self.exempt_paths = tuple(exempt_paths)
+        self.enabled = enabled
+        self._failing = False
+    
+    def caller(self, scope: Dict[str, Any]) -> Tuple[str, str]:
+        """``(kind, id)`` of whoever made the request."""
+        for name, value in scope.get("headers", ()):
+            if name != b"authorization":
+                continue
+            scheme, _, token = value.decode("latin-1").partition(" ")
+            if scheme.lower() != "bearer" or not token:
+                break
+            if token.startswith(API_KEY_PREFIX):
+                # Only keys that authenticated before get their own bucket; a
+                # forged key falls back to the caller's address
+                prefix = verified_api_keys.verify(token)
+                if prefix:
+                    return "key", prefix
+                break
+            try:
+                payload = decode_token(token)
+            except Exception:
+                break
+            if payload.get("sub") is not None:
+                return "user", str(payload["sub"])
+            break
+        client = scope.get("client")
+        return "ip", client[0] if client else "unknown"
+    
+    def route(self, path: str) -> Optional[Tuple[str, int]]:
+        for route, limit in self.routes:
+            if path == route or path.startswith(route + "/"):
+                return route, limit
+        return None
+    
+    def buckets(self, kind: str, caller: str, path: str) -> List[Bucket]:
+        # The caller is the Redis hash tag, so one script call never spans cluster slots
+        base = f"anptop:rl:{{{kind}:{caller}}}"
+        limit = self.api_key_requests if kind == "key" else self.requests
+        buckets = [Bucket(base, limit, self.window, min(self.burst, limit) if self.burst else limit)]
+        route = self.route(path)
+        if route is not None:
+            buckets.append(Bucket(f"{base}:{route[0]}", route[1], self.window, route[1]))
+        return buckets
+    
+    def exempt(self, path: str) -> bool:
+        return path.startswith(self.exempt_paths) if self.exempt_paths else False
+    
+    async def check(self, scope: Dict[str, Any]) -> Optional[Decision]:
+        """The decision for one request, or None if it is not limited."""
+        path = scope.get("path", "")
+        if not self.enabled or self.exempt(path):
+            return None
+        kind, caller = self.caller(scope)
+        buckets = self.buckets(kind, caller, path)
+        try:
+            retry_after, remaining, index = await self.backend.acquire(buckets)
+        except Exception as e:
+            RATE_LIMIT_ERRORS.inc()
+            if not self._failing:
+                logger.warning(f"Rate limiter backend failed, letting requests through: {e}")
+                self._failing = True
+            return None
+        self._failing = False
+        if retry_after:
+            RATE_LIMITED.labels(kind=kind).inc()
+            return Decision(False, buckets[index].limit, 0, retry_after)
+        return Decision(True, buckets[index].limit, remaining)
+
+
+class RateLimitMiddleware:
+    """
+    Pure ASGI middleware applying a ``RateLimiter`` to HTTP requests.
+    
+    Refused requests get a 429 with ``Retry-After``; allowed ones carry
+    ``X-RateLimit-Limit`` / ``X-RateLimit-Remaining`` for their tightest
+    bucket.
+    """
+    
+    def __init__(self, app, limiter: "RateLimiter"):
+        self.app = app
+        self.limiter = limiter
+    
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            return await self.app(scope, receive, send)
+        decision = await self.limiter.check(scope)
+        if decision is None:
+            return await self.app(scope, receive, send)
+        
+        limit_headers = [
+            (b"x-ratelimit-limit", str(decision.limit).encode()),
+            (b"x-ratelimit-remaining", str(decision.remaining).encode()),
+        ]
+        if not decision.allowed:
+            body = json.dumps({
+                "detail": "Rate limit exceeded. Retry later.",
+                "code": "RATE_LIMITED",
+            }).encode()
+            await send({
+                "type": "http.response.start",
+                "status": 429,
+                "headers": [
+                    (b"content-type", b"application/json"),
+                    (b"content-length", str(len(body)).encode()),
+                    (b"retry-after", str(max(math.ceil(decision.retry_after), 1)).encode()),
+                ] + limit_headers,
+            })
+            await send({"type": "http.response.body", "body": body})
+            return
+        
+        async def send_with_headers(message):
+            if message["type"] == "http.response.start":
+                message = dict(message, headers=list(message.get("headers", [])) + limit_headers)
+            await send(message)
+        
+        await self.app(scope, receive, send_with_headers)
+
+
+def _backend():
+    if settings.RATE_LIMIT_BACKEND == "redis":
+        if redis_asyncio is not None:
+            return RedisBackend(redis_asyncio.from_url(settings.REDIS_URL))
+        logger.warning("RATE_LIMIT_BACKEND is redis but redis is not installed; limiting per process")
+    return MemoryBackend()
+
+
+# Global rate limiter
+rate_limiter = RateLimiter(
+    _backend(),
+    requests=settings.RATE_LIMIT_REQUESTS,
+    window=settings.RATE_LIMIT_WINDOW,
+    burst=settings.RATE_LIMIT_BURST,
+    api_key_requests=settings.RATE_LIMIT_API_KEY_REQUESTS,
+    routes=settings.RATE_LIMIT_ROUTES,
+    exempt_paths=settings.RATE_LIMIT_EXEMPT_PATHS,
+    enabled=settings.RATE_LIMIT_ENABLED,
+)
@@ -0,0 +1,193 @@
+"""
+ANPTOP - Tool Result Cache
+Reuses recent evidence of idempotent recon tools and coalesces identical runs
+"""
+
+import asyncio
+import os
+import shlex
+import time
+from collections import OrderedDict
+from dataclasses import dataclass
+from typing import Any, Awaitable, Callable, Dict, Optional, Tuple
+
+from loguru import logger
+from prometheus_client import Counter
+
+from app.core.tools_config import SecurityTool, ToolCategory
+
+
+# Read-only reconnaissance categories whose results may be reused
+CACHEABLE_CATEGORIES = frozenset({
+    ToolCategory.DISCOVERY,
+    ToolCategory.SCANNING,
+    ToolCategory.ENUMERATION,
+})
+
+# Highest risk level that is still considered side-effect free
+MAX_CACHEABLE_RISK = 2
+
+CACHE_EVENTS = Counter(
+    "anptop_tool_cache_events_total",
+    "Tool result cache lookups by outcome",
+    ["outcome"],
+)
+
+CacheKey = Tuple[str, Optional[int], str]
+
+
+def normalize_command(command: str) -> str:
+    """Canonical form of a rendered command (quoting and spacing ignored)."""
+    try:
+        return " ".join(shlex.split(command))
+    except ValueError:
+        return " ".join(command.split())
+
+
+@dataclass
+class _CacheEntry:
+    """A cached execution result and its accounting."""
+    result: Any
+    size_bytes: int
+    expires_at: float
+
+
+class ResultCache:
+    """
+    Byte-bounded LRU of successful tool results with single-flight runs.
+    
+    Entries are keyed on the tool key, the engagement and the normalized
+    command, so evidence is never shared across engagements. They expire
+    after the tool's ``cache_ttl_seconds`` and are evicted least recently
+    used first once the evidence they pin exceeds ``max_bytes``. While a
+    run for a key is in flight, identical requests await that same run
+    instead of spawning another process.
+    """
+    
+    def __init__(self, max_bytes: int, enabled: bool = True):
+        self.max_bytes = max_bytes
+        self.enabled = enabled
+        self.total_bytes = 0
+        self._entries: "OrderedDict[CacheKey, _CacheEntry]" = OrderedDict()
+        self._inflight: Dict[CacheKey, asyncio.Task] = {}
+    
+    def cacheable(self, tool: SecurityTool) -> bool:
+        """Whether results of this tool may be shared between requests."""
+        return (
+            self.enabled
+            and tool.cache_ttl_seconds > 0
+            and tool.category in CACHEABLE_CATEGORIES
+            and tool.risk_level <= MAX_CACHEABLE_RISK
+            and not tool.requires_approval
+        )
+    
+    @staticmethod
+    def key(tool_key: str, command: str, engagement_id: Optional[int] = None) -> CacheKey:
+        return (tool_key.lower(), engagement_id, normalize_command(command))
+    
+    def get(self, key: CacheKey) -> Optional[Any]:
+        """Return a fresh cached result, dropping stale or orphaned entries."""
+        entry = self._entries.get(key)
+        if entry is None:
+            return None
+        output_file = getattr(entry.result, "output_file", None)
+        if entry.expires_at <= time.monotonic() or (output_file and not os.path.exists(output_file)):
+            self._remove(key)
+            return None
+        self._entries.move_to_end(key)
+        return entry.result
+    
+    def put(self, key: CacheKey, result: Any, ttl_seconds: int) -> None:
+        """Store a result, evicting least recently used entries to fit."""
+        size = self._size_of(result)
+        if size > self.max_bytes:
+            return
+        if key in self._entries:
+            self._remove(key)
+        self._entries[key] = _CacheEntry(result, size, time.monotonic() + ttl_seconds)
+        self.total_bytes += size
+        while self.total_bytes > self.max_bytes:
+            evicted, entry = self._entries.popitem(last=False)
+            self.total_bytes -= entry.size_bytes
+            CACHE_EVENTS.labels(outcome="evicted").inc()
+            logger.debug(f"Evicted cached result for {evicted[0]}")
+    
+    async def fetch(
+        self,
+        tool_key: str,
+        command: str,
+        ttl_seconds: int,
+        run: Callable[[], Awaitable[Any]],
+        engagement_id: Optional[int] = None,
+    ) -> Tuple[Any, bool]:
+        """
+        Return a cached result or run the tool once for all concurrent callers.
+        
+        Only runs for the same ``engagement_id`` are shared.
+        
+        Returns:
+            Tuple of the result and whether it was shared rather than
+            produced by this caller's own run
+        """
+        key = self.key(tool_key, command, engagement_id)
+        
+        cached = self.get(key)
+        if cached is not None:
+            CACHE_EVENTS.labels(outcome="hit").inc()
+            return cached, True
+        
+        task = self._inflight.get(key)
+        if task is not None:
+            CACHE_EVENTS.labels(outcome="coalesced").inc()
+            return await asyncio.shield(task), True
+        
+        CACHE_EVENTS.labels(outcome="miss").inc()
+        task = asyncio.ensure_future(self._run_and_store(key, ttl_seconds, run))
+        self._inflight[key] = task
+        task.add_done_callback(lambda _: self._inflight.pop(key, None))
+        # Shielded so a caller giving up does not kill the run others await
+        return await asyncio.shield(task), False
+    
+    async def _run_and_store(
+        self,
+        key: CacheKey,
+        ttl_seconds: int,
+        run: Callable[[], Awaitable[Any]],
+    ) -> Any:
+        result = await run()
+        if getattr(result, "status", None) == "success":
+            self.put(key, result, ttl_seconds)
+        return result
+    
+    def invalidate(self, tool_key: Optional[str] = None) -> int:
+        """Drop cached results for one tool, or all of them."""
+        keys = [k for k in self._entries if tool_key is None or k[0] == tool_key.lower()]
+        for key in keys:
+            self._remove(key)
+        return len(keys)
+    
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "enabled": self.enabled,
+            "entries": len(self._entries),
+            "bytes": self.total_bytes,
+            "max_bytes": self.max_bytes,
+            "inflight": len(self._inflight),
+        }
+    
+    def _remove(self, key: CacheKey) -> None:
+        entry = self._entries.pop(key, None)
+        if entry is not None:
+            self.total_bytes -= entry.size_bytes
+    
+    @staticmethod
+    def _size_of(result: Any) -> int:
+        """Bytes pinned by a result: its evidence file plus in-memory previews."""
+        size = len(getattr(result, "stdout", "") or "") + len(getattr(result, "stderr", "") or "")
+        output_file = getattr(result, "output_file", None)
+        if output_file:
+            try:
+                size += os.path.getsize(output_file)
+            except OSError:
+                pass
+        return size
@@ -0,0 +1,445 @@
+"""
+ANPTOP - Scan Result Ingestion
+Bulk-upserts parsed scan output into targets, target services and vulnerabilities
+"""
+
+import asyncio
+from abc import ABC, abstractmethod
+from dataclasses import dataclass, asdict
+from datetime import datetime
+from typing import Any, Callable, Dict, Iterator, List, Optional, Tuple
+from urllib.parse import urlsplit
+
+from loguru import logger
+from sqlalchemy import bindparam, func, insert, select, update
+from sqlalchemy.dialects.postgresql import insert as pg_insert
+from sqlalchemy.dialects.sqlite import insert as sqlite_insert
+
+from app.core.scan_parsers import HostRecord, NucleiFinding, PortRecord
+from app.models.target import Target, TargetService, TargetStatus
+from app.models.vulnerability import Vulnerability, VulnerabilityStatus, Severity
+
+
+def _clip(value: Optional[str], column) -> Optional[str]:
+    """Truncate a value to the column's length."""
+    length = getattr(column.type, "length", None)
+    if value and length and len(value) > length:
+        return value[:length]
+    return value
+
+
+@dataclass
+class IngestStats:
+    """What a target ingestion run changed."""
+    hosts: int = 0
+    ports: int = 0
+    targets_created: int = 0
+    targets_updated: int = 0
+    services_created: int = 0
+    services_updated: int = 0
+    batches: int = 0
+    
+    def as_dict(self) -> Dict[str, int]:
+        return asdict(self)
+
+
+@dataclass
+class FindingIngestStats:
+    """What a vulnerability ingestion run changed."""
+    findings: int = 0
+    vulnerabilities_created: int = 0
+    vulnerabilities_updated: int = 0
+    batches: int = 0
+    
+    def as_dict(self) -> Dict[str, int]:
+        return asdict(self)
+
+
+class BatchIngester(ABC):
+    """
+    Pulls parsed records in bounded batches and writes each in one transaction.
+    
+    Records are pulled from the parser one batch at a time in a worker
+    thread, keeping memory flat and the event loop free while files are
+    parsed. Subclasses merge records into a batch and upsert it.
+    """
+    
+    def __init__(self, db, engagement_id: int, batch_size: int = 1000):
+        self.db = db
+        self.engagement_id = engagement_id
+        self.batch_size = batch_size
+        self.stats = None
+    
+    async def ingest(self, records: Iterator[Any]):
+        """Consume a record stream, committing once per batch."""
+        records = iter(records)
+        while True:
+            batch = await asyncio.to_thread(self._next_batch, records)
+            if not batch:
+                break
+            await self.write_batch(batch)
+        logger.info(f"Ingested into engagement {self.engagement_id}: {self.stats.as_dict()}")
+        return self.stats
+    
+    @abstractmethod
+    def _next_batch(self, records: Iterator[Any]) -> Dict[str, Any]:
+        """Pull the next batch from ``records``; empty when they are exhausted."""
+    
+    @abstractmethod
+    async def write_batch(self, batch: Dict[str, Any]) -> None:
+        """Write one batch and commit it."""
+
+
+class TargetIngester(BatchIngester):
+    """
+    Writes host records into ``targets`` and ``target_services`` in batches.
+    
+    Each batch costs a fixed number of statements regardless of its size:
+    one lookup and one multi-row insert or executemany update per table,
+    then a commit. Hosts already known to the engagement have their port
+    lists merged and fields filled in rather than being duplicated, so
+    re-running a scan is idempotent.
+    """
+    
+    def __init__(
+        self,
+        db,
+        engagement_id: int,
+        batch_size: int = 1000,
+        scope_check: Optional[Callable[[str], bool]] = None,
+    ):
+        super().__init__(db, engagement_id, batch_size)
+        self.scope_check = scope_check
+        self.stats = IngestStats()
+    
+    def _next_batch(self, records: Iterator[HostRecord]) -> Dict[str, HostRecord]:
+        """Pull records until the batch holds ``batch_size`` hosts and ports, merging repeats."""
+        batch: Dict[str, HostRecord] = {}
+        rows = 0
+        for record in records:
+            host = batch.get(record.address)
+            if host is None:
+                batch[record.address] = record
+            else:
+                host.ports.extend(record.ports)
+                host.hostname = host.hostname or record.hostname
+                host.operating_system = host.operating_system or record.operating_system
+                host.mac_address = host.mac_address or record.mac_address
+            rows += 1 + len(record.ports)
+            if rows >= self.batch_size:
+                break
+        return batch
+    
+    async def write_batch(self, hosts: Dict[str, HostRecord]) -> None:
+        """Upsert one batch of hosts and their services, then commit."""
+        target_ids = await self._upsert_targets(hosts)
+        await self._upsert_services(hosts, target_ids)
+        await self.db.commit()
+        self.stats.batches += 1
+        self.stats.hosts += len(hosts)
+        self.stats.ports += sum(len(h.ports) for h in hosts.values())
+    
+    async def _upsert_targets(self, hosts: Dict[str, HostRecord]) -> Dict[str, int]:
+        table = Target.__table__
+        c = table.c
+        now = datetime.utcnow()
+        existing = await self._existing_targets(list(hosts))
+        await self._merge_targets(existing, hosts, now)
+        
+        ids = {identifier: row.id for identifier, row in existing.items()}
+        new_rows = [
+            {
+                "engagement_id": self.engagement_id,
+                "identifier": _clip(identifier, c.identifier),
+                "hostname": _clip(host.hostname, c.hostname),
+                "operating_system": _clip(host.operating_system, c.operating_system),
+                "mac_address": _clip(host.mac_address, c.mac_address),
+                "ports": sorted({p.port for p in host.ports}),
+                "protocols": sorted({p.protocol for p in host.ports} or {"tcp"}),
+                "services": [],
+                "status": TargetStatus.DISCOVERED,
+                "is_alive": host.is_alive,
+                "is_in_scope": self.scope_check(identifier) if self.scope_check else True,
+                "created_at": now,
+                "updated_at": now,
+            }
+            for identifier, host in hosts.items() if identifier not in existing
+        ]
+        if not new_rows:
+            return ids
+        
+        # A concurrent ingest may have created some of these hosts since the
+        # lookup; the upsert on the unique (engagement_id, identifier) index
+        # hands back those rows, which keep their created_at, and they are
+        # then merged like any other known host
+        postgres = self.db.get_bind().dialect.name == "postgresql"
+        statement = (pg_insert if postgres else sqlite_insert)(table)
+        statement = statement.on_conflict_do_update(
+            index_elements=["engagement_id", "identifier"],
+            set_={"updated_at": statement.excluded.updated_at},
+        ).returning(c.id, c.identifier, c.created_at)
+        result = await self.db.execute(statement, new_rows)
+        raced = []
+        for row in result:
+            ids[row.identifier] = row.id
+            if row.created_at != now:
+                raced.append(row.identifier)
+        if raced:
+            await self._merge_targets(await self._existing_targets(raced), hosts, now)
+        self.stats.targets_created += len(new_rows) - len(raced)
+        return ids
+    
+    async def _existing_targets(self, identifiers: List[str]) -> Dict[str, Any]:
+        """The engagement's targets among the given identifiers, keyed by identifier."""
+        c = Target.__table__.c
+        result = await self.db.execute(
+            select(c.id, c.identifier, c.ports, c.protocols, c.status).where(
+                c.engagement_id == self.engagement_id,
+                c.identifier.in_(identifiers),
+            )
+        )
+        return {row.identifier: row for row in result}
+    
+    async def _merge_targets(self, existing: Dict[str, Any], hosts: Dict[str, HostRecord], now: datetime) -> None:
+        """Merge the batch's ports and details into targets that already exist."""
+        if not existing:
+            return
+        table = Target.__table__
+        c = table.c
+        updates = []
+        for identifier, row in existing.items():
+            host = hosts[identifier]
+            updates.append({
+                "b_id": row.id,
+                "b_ports": sorted(set(row.ports or []) | {p.port for p in host.ports}),
+                "b_protocols": sorted(set(row.protocols or []) | {p.protocol for p in host.ports}),
+                "b_hostname": _clip(host.hostname, c.hostname),
+                "b_os": _clip(host.operating_system, c.operating_system),
+                "b_mac": _clip(host.mac_address, c.mac_address),
+                "b_alive": host.is_alive,
+                "b_status": TargetStatus.DISCOVERED if row.status == TargetStatus.PENDING else row.status,
+                "b_now": now,
+            })
+        await self.db.execute(
+            update(table)
+            .where(c.id == bindparam("b_id"))
+            .values(
+                ports=bindparam("b_ports"),
+                protocols=bindparam("b_protocols"),
+                hostname=func.coalesce(bindparam("b_hostname"), c.hostname),
+                operating_system=func.coalesce(bindparam("b_os"), c.operating_system),
+                mac_address=func.coalesce(bindparam("b_mac"), c.mac_address),
+                is_alive=bindparam("b_alive"),
+                status=bindparam("b_status"),
+                updated_at=bindparam("b_now"),
+            ),
+            updates,
+        )
+        self.stats.targets_updated += len(updates)
+    
+    async def _upsert_services(self, hosts: Dict[str, HostRecord], target_ids: Dict[str, int]) -> None:
+        table = TargetService.__table__
+        c = table.c
+        now = datetime.utcnow()
+        
+        # Latest record per (target, port, protocol) within the batch
+        services: Dict[Tuple[int, int, str], PortRecord] = {}
+        for identifier, host in hosts.items():
+            for port in host.ports:
+                key = (target_ids[identifier], port.port, port.protocol)
+                previous = services.get(key)
+                if previous is None or port.name or port.product:
+                    services[key] = port
+        if not services:
+            return
+        
+        result = await self.db.execute(
+            select(c.id, c.target_id, c.port, c.protocol).where(
+                c.target_id.in_({key[0] for key in services})
+            )
+        )
+        existing = {(row.target_id, row.port, row.protocol): row.id for row in result}
+        
+        def values(port: PortRecord) -> Dict[str, Optional[str]]:
+            return {
+                "name": _clip(port.name, c.name),
+                "product": _clip(port.product, c.product),
+                "version": _clip(port.version, c.version),
+                "banner": port.banner,
+            }
+        
+        updates = [
+            {"b_id": existing[key], "b_now": now, **{f"b_{k}": v for k, v in values(port).items()}}
+            for key, port in services.items() if key in existing
+        ]
+        if updates:
+            await self.db.execute(
+                update(table)
+                .where(c.id == bindparam("b_id"))
+                .values(
+                    name=func.coalesce(bindparam("b_name"), c.name),
+                    product=func.coalesce(bindparam("b_product"), c.product),
+                    version=func.coalesce(bindparam("b_version"), c.version),
+                    banner=func.coalesce(bindparam("b_banner"), c.banner),
+                    updated_at=bindparam("b_now"),
+                ),
+                updates,
+            )
+            self.stats.services_updated += len(updates)
+        
+        new_rows = [
+            {
+                "target_id": key[0],
+                "port": key[1],
+                "protocol": key[2],
+                "cves": [],
+                "created_at": now,
+                "updated_at": now,
+                **values(port),
+            }
+            for key, port in services.items() if key not in existing
+        ]
+        if new_rows:
+            await self.db.execute(insert(table), new_rows)
+            self.stats.services_created += len(new_rows)
+
+
+# Finding fields a re-ingest refreshes; triage status and discovery details are kept
+UPSERT_COLUMNS = (
+    "name", "severity", "description", "remediation", "proof_of_concept", "cve_id", "cwe_id",
+    "cvss_score", "cvss_vector", "references", "affected_component",
+)
+
+
+class VulnerabilityIngester(BatchIngester):
+    """
+    Writes nuclei findings into ``vulnerabilities`` in batches.
+    
+    Findings are keyed by their fingerprint (template, host, matcher and
+    matched-at), so re-running a scan refreshes the existing rows instead
+    of duplicating them; the triage status of known findings is kept.
+    Findings are linked to the engagement's target for their host or IP
+    when one exists.
+    """
+    
+    def __init__(self, db, engagement_id: int, batch_size: int = 1000, tool_used: str = "nuclei"):
+        super().__init__(db, engagement_id, batch_size)
+        self.tool_used = tool_used
+        self.stats = FindingIngestStats()
+    
+    def _next_batch(self, records: Iterator[NucleiFinding]) -> Dict[str, NucleiFinding]:
+        """Pull up to ``batch_size`` findings; a repeated fingerprint keeps the latest."""
+        batch: Dict[str, NucleiFinding] = {}
+        for finding in records:
+            batch[finding.fingerprint] = finding
+            if len(batch) >= self.batch_size:
+                break
+        return batch
+    
+    async def write_batch(self, findings: Dict[str, NucleiFinding]) -> None:
+        """Upsert one batch of findings, then commit."""
+        table = Vulnerability.__table__
+        c = table.c
+        now = datetime.utcnow()
+        target_ids = await self._resolve_targets(findings.values())
+        
+        # Only for the created / updated counts; the upsert below decides
+        result = await self.db.execute(
+            select(c.fingerprint).where(
+                c.engagement_id == self.engagement_id,
+                c.fingerprint.in_(list(findings)),
+            )
+        )
+        existing = set(result.scalars())
+        
+        def values(finding: NucleiFinding) -> Dict[str, Any]:
+            return {
+                "name": _clip(finding.name, c.name),
+                "severity": _severity(finding.severity),
+                "description": finding.description or finding.name,
+                "remediation": finding.remediation,
+                "proof_of_concept": finding.proof_of_concept,
+                "cve_id": _clip(finding.cve_id and finding.cve_id.upper(), c.cve_id),
+                "cwe_id": _clip(finding.cwe_id and finding.cwe_id.upper(), c.cwe_id),
+                "cvss_score": finding.cvss_score,
+                "cvss_vector": _clip(finding.cvss_vector, c.cvss_vector),
+                "references": finding.references,
+                "affected_component": _clip(finding.matched_at or finding.host, c.affected_component),
+                "target_id": _target_for(finding, target_ids),
+            }
+        
+        rows = [
+            {
+                "engagement_id": self.engagement_id,
+                "fingerprint": fp,
+                "status": VulnerabilityStatus.OPEN,
+                "tool_used": self.tool_used,
+                "discovery_method": _clip(f"template {f.template_id}", c.discovery_method),
+                "created_at": now,
+                "updated_at": now,
+                **values(f),
+            }
+            for fp, f in findings.items()
+        ]
+        # One upsert on the unique (engagement_id, fingerprint) index, so a
+        # concurrent ingest of the same output updates rather than duplicates
+        postgres = self.db.get_bind().dialect.name == "postgresql"
+        statement = (pg_insert if postgres else sqlite_insert)(table)
+        excluded = statement.excluded
+        statement = statement.on_conflict_do_update(
+            index_elements=["engagement_id", "fingerprint"],
+            set_={
+                **{name: excluded[name] for name in UPSERT_COLUMNS},
+                "target_id": func.coalesce(excluded.target_id, c.target_id),
+                "updated_at": excluded.updated_at,
+            },
+        )
+        await self.db.execute(statement, rows)
+        self.stats.vulnerabilities_updated += len(existing)
+        self.stats.vulnerabilities_created += len(rows) - len(existing)
+        
+        await self.db.commit()
+        self.stats.batches += 1
+        self.stats.findings += len(findings)
+    
+    async def _resolve_targets(self, findings) -> Dict[str, int]:
+        """Map host names, URLs and IPs of the findings to target IDs."""
+        identifiers = set()
+        for finding in findings:
+            identifiers.update(_host_identifiers(finding))
+        if not identifiers:
+            return {}
+        c = Target.__table__.c
+        result = await self.db.execute(
+            select(c.id, c.identifier).where(
+                c.engagement_id == self.engagement_id,
+                c.identifier.in_(identifiers),
+            )
+        )
+        return {row.identifier: row.id for row in result}
+
+
+def _severity(value: str) -> Severity:
+    try:
+        return Severity(value)
+    except ValueError:
+        # nuclei also reports "unknown"
+        return Severity.INFO
+
+
+def _host_identifiers(finding: NucleiFinding) -> List[str]:
+    """Candidate target identifiers for a finding, most specific first."""
+    candidates = [finding.host]
+    host = finding.host
+    if "://" in host:
+        host = urlsplit(host).hostname or host
+    else:
+        host = host.rsplit(":", 1)[0] if host.count(":") == 1 else host
+    candidates.append(host)
+    if finding.ip:
+        candidates.append(finding.ip)
+    return candidates
+
+
+def _target_for(finding: NucleiFinding, target_ids: Dict[str, int]) -> Optional[int]:
+    return next((target_ids[i] for i in _host_identifiers(finding) if i in target_ids), None)
@@ -0,0 +1,322 @@
+"""
+ANPTOP - Streaming Scan Output Parsers
+Turns nmap/masscan/rustscan output into host records without loading whole files
+"""
+
+import hashlib
+import json
+import re
+from dataclasses import dataclass, field
+from typing import BinaryIO, Iterable, Iterator, List, Optional
+from xml.etree.ElementTree import XMLPullParser
+
+from loguru import logger
+
+
+# Formats understood by parse_scan_output
+SCAN_FORMATS = ("nmap_xml", "masscan_json", "rustscan")
+
+# Lines wrapping stdout in executor evidence files
+EVIDENCE_HEADER = b"# Command:"
+EVIDENCE_STDOUT = b"# STDOUT:"
+EVIDENCE_STDERR = b"# STDERR:"
+
+RUSTSCAN_OPEN = re.compile(r"^Open\s+\[?([0-9A-Fa-f:.]+?)\]?:(\d+)\s*$")
+RUSTSCAN_GREPPABLE = re.compile(r"^([0-9A-Fa-f:.]+)\s+->\s+\[([\d,\s]*)\]\s*$")
+
+
+@dataclass
+class PortRecord:
+    """An open port and whatever the scanner learned about its service."""
+    port: int
+    protocol: str = "tcp"
+    name: Optional[str] = None
+    product: Optional[str] = None
+    version: Optional[str] = None
+    banner: Optional[str] = None
+
+
+@dataclass
+class HostRecord:
+    """A scanned host; scanners may report the same host several times."""
+    address: str
+    hostname: Optional[str] = None
+    operating_system: Optional[str] = None
+    mac_address: Optional[str] = None
+    is_alive: bool = True
+    ports: List[PortRecord] = field(default_factory=list)
+
+
+def evidence_lines(stream: BinaryIO) -> Iterator[bytes]:
+    """
+    Yield the lines of a scan output file.
+    
+    Executor evidence files wrap the tool's stdout in a command header and a
+    stderr trailer; only the stdout section is yielded for those.
+    """
+    lines = iter(stream)
+    first = next(lines, b"")
+    if not first.startswith(EVIDENCE_HEADER):
+        yield first
+        yield from lines
+        return
+    for line in lines:
+        if line.rstrip(b"\r\n") == EVIDENCE_STDOUT:
+            break
+    for line in lines:
+        if line.rstrip(b"\r\n") == EVIDENCE_STDERR:
+            return
+        yield line
+
+
+def detect_format(lines: Iterable[bytes]) -> Optional[str]:
+    """Guess the scan format from the first non-blank line."""
+    for line in lines:
+        line = line.strip()
+        if not line:
+            continue
+        if line.startswith(b"<"):
+            return "nmap_xml"
+        if line.startswith((b"[", b"{")):
+            return "masscan_json"
+        return "rustscan"
+    return None
+
+
+def _first(values: Iterable[Optional[str]]) -> Optional[str]:
+    return next((v for v in values if v), None)
+
+
+def _nmap_host(element) -> Optional[HostRecord]:
+    address = None
+    mac = None
+    for addr in element.iter("address"):
+        if addr.get("addrtype") in ("ipv4", "ipv6") and address is None:
+            address = addr.get("addr")
+        elif addr.get("addrtype") == "mac":
+            mac = addr.get("addr")
+    if not address:
+        return None
+    
+    status = element.find("status")
+    host = HostRecord(
+        address=address,
+        mac_address=mac,
+        hostname=_first(h.get("name") for h in element.iter("hostname")),
+        operating_system=_first(m.get("name") for m in element.iter("osmatch")),
+        is_alive=status is None or status.get("state") == "up",
+    )
+    for port in element.iter("port"):
+        state = port.find("state")
+        if state is not None and state.get("state") != "open":
+            continue
+        service = port.find("service")
+        record = PortRecord(port=int(port.get("portid")), protocol=port.get("protocol", "tcp"))
+        if service is not None:
+            record.name = service.get("name")
+            record.product = service.get("product")
+            record.version = service.get("version")
+            record.banner = service.get("extrainfo") or service.get("banner")
+        host.ports.append(record)
+    if not host.is_alive and not host.ports:
+        return None
+    return host
+
+
+def parse_nmap_xml(lines: Iterable[bytes]) -> Iterator[HostRecord]:
+    """
+    Stream ``<host>`` elements out of nmap (or masscan ``-oX``) XML.
+    
+    Each host is dropped from the tree once parsed, so memory stays flat
+    however many hosts the file holds.
+    """
+    parser = XMLPullParser(events=("start", "end"))
+    root = None
+    for line in lines:
+        parser.feed(line)
+        for event, element in parser.read_events():
+            if event == "start":
+                if root is None:
+                    root = element
+                continue
+            if element.tag != "host":
+                continue
+            host = _nmap_host(element)
+            element.clear()
+            if root is not None and element in root:
+                root.remove(element)
+            if host is not None:
+                yield host
+    parser.close()
+
+
+def parse_masscan_json(lines: Iterable[bytes]) -> Iterator[HostRecord]:
+    """
+    Stream records out of masscan ``-oJ`` (one object per line inside a
+    JSON array) or ``-oD`` (NDJSON) output.
+    """
+    for line in lines:
+        line = line.strip().lstrip(b"[").rstrip(b"]").rstrip(b",").strip()
+        if not line:
+            continue
+        try:
+            record = json.loads(line)
+        except ValueError:
+            logger.debug(f"Skipping unparseable masscan line: {line[:80]!r}")
+            continue
+        if not isinstance(record, dict) or not record.get("ip"):
+            continue
+        host = HostRecord(address=record["ip"])
+        for port in record.get("ports", []):
+            if port.get("status", "open") != "open":
+                continue
+            service = port.get("service") or {}
+            host.ports.append(PortRecord(
+                port=int(port["port"]),
+                protocol=port.get("proto", "tcp"),
+                name=service.get("name"),
+                banner=service.get("banner"),
+            ))
+        yield host
+
+
+def parse_rustscan(lines: Iterable[bytes]) -> Iterator[HostRecord]:
+    """Parse rustscan ``Open ip:port`` lines and greppable ``ip -> [ports]`` lines."""
+    for raw in lines:
+        line = raw.decode("utf-8", errors="replace").strip()
+        match = RUSTSCAN_OPEN.match(line)
+        if match:
+            yield HostRecord(address=match.group(1), ports=[PortRecord(port=int(match.group(2)))])
+            continue
+        match = RUSTSCAN_GREPPABLE.match(line)
+        if match:
+            ports = [int(p) for p in match.group(2).replace(" ", "").split(",") if p]
+            yield HostRecord(address=match.group(1), ports=[PortRecord(port=p) for p in ports])
+
+
+@dataclass
+class NucleiFinding:
+    """One nuclei match, reduced to what a vulnerability record needs."""
+    template_id: str
+    host: str
+    name: str
+    severity: str = "info"
+    matcher_name: Optional[str] = None
+    matched_at: Optional[str] = None
+    ip: Optional[str] = None
+    description: Optional[str] = None
+    remediation: Optional[str] = None
+    cve_id: Optional[str] = None
+    cwe_id: Optional[str] = None
+    cvss_score: Optional[float] = None
+    cvss_vector: Optional[str] = None
+    references: List[str] = field(default_factory=list)
+    proof_of_concept: Optional[str] = None
+    
+    @property
+    def fingerprint(self) -> str:
+        """Stable identity of the finding across re-runs of the same scan."""
+        parts = (self.template_id, self.host, self.matcher_name or "", self.matched_at or "")
+        return hashlib.sha256("\x1f".join(parts).encode()).hexdigest()
+
+
+def _as_list(value) -> List[str]:
+    if not value:
+        return []
+    if isinstance(value, str):
+        return [value]
+    return [str(v) for v in value if v]
+
+
+def _nuclei_finding(record: dict) -> Optional[NucleiFinding]:
+    # nuclei v3 uses dashed keys; v2 used camelCase / bare names
+    template_id = record.get("template-id") or record.get("templateID")
+    host = record.get("host")
+    if not template_id or not host:
+        return None
+    info = record.get("info") or {}
+    classification = info.get("classification") or {}
+    matched_at = record.get("matched-at") or record.get("matched")
+    
+    evidence = record.get("curl-command")
+    if not evidence and record.get("extracted-results"):
+        evidence = "\n".join(_as_list(record["extracted-results"]))
+    
+    cvss_score = classification.get("cvss-score")
+    return NucleiFinding(
+        template_id=template_id,
+        host=host,
+        name=info.get("name") or template_id,
+        severity=str(info.get("severity") or "info").lower(),
+        matcher_name=record.get("matcher-name") or record.get("matcher_name"),
+        matched_at=matched_at,
+        ip=record.get("ip"),
+        description=(info.get("description") or "").strip() or None,
+        remediation=(info.get("remediation") or "").strip() or None,
+        cve_id=next(iter(_as_list(classification.get("cve-id"))), None),
+        cwe_id=next(iter(_as_list(classification.get("cwe-id"))), None),
+        cvss_score=float(cvss_score) if cvss_score not in (None, "") else None,
+        cvss_vector=classification.get("cvss-metrics") or None,
+        references=_as_list(info.get("reference")),
+        proof_of_concept=evidence,
+    )
+
+
+def parse_nuclei_jsonl(lines: Iterable[bytes]) -> Iterator[NucleiFinding]:
+    """Stream findings from nuclei ``-jsonl`` output, one JSON object per line."""
+    for line in lines:
+        line = line.strip()
+        if not line.startswith(b"{"):
+            continue
+        try:
+            record = json.loads(line)
+        except ValueError:
+            logger.debug(f"Skipping unparseable nuclei line: {line[:80]!r}")
+            continue
+        finding = _nuclei_finding(record) if isinstance(record, dict) else None
+        if finding is not None:
+            yield finding
+
+
+PARSERS = {
+    "nmap_xml": parse_nmap_xml,
+    "masscan_json": parse_masscan_json,
+    "rustscan": parse_rustscan,
+}
+
+
+def parse_scan_output(stream: BinaryIO, scan_format: Optional[str] = None) -> Iterator[HostRecord]:
+    """
+    Stream host records from a scan output file (raw, or an executor evidence file).
+    
+    Args:
+        stream: File opened in binary mode
+        scan_format: One of SCAN_FORMATS; sniffed from the content if omitted
+    
+    Raises:
+        ValueError: if the format is unknown or cannot be detected
+    """
+    lines = evidence_lines(stream)
+    if scan_format is None:
+        head: List[bytes] = []
+        for line in lines:
+            head.append(line)
+            if line.strip():
+                break
+        scan_format = detect_format(head)
+        lines = _chain(head, lines)
+        if scan_format is None:
+            raise ValueError("Could not detect the scan output format")
+    if scan_format not in PARSERS:
+        raise ValueError(f"Unknown scan output format: {scan_format}")
+    return PARSERS[scan_format](lines)
+
+
+def _chain(head: List[bytes], rest: Iterator[bytes]) -> Iterator[bytes]:
+    yield from head
+    yield from rest
+
+
+def parse_nuclei_output(stream: BinaryIO) -> Iterator[NucleiFinding]:
+    """Stream nuclei findings from a JSONL file (raw, or an executor evidence file)."""
+    return parse_nuclei_jsonl(evidence_lines(stream))
@@ -0,0 +1,323 @@
+"""
+ANPTOP - Engagement Scope Matching
+Compiles an engagement's scope and blacklist into an index answering "is this target in scope?"
+"""
+
+import ipaddress
+import socket
+from bisect import bisect_right
+from collections import OrderedDict
+from itertools import repeat
+from typing import Dict, Iterable, List, Optional, Sequence, Tuple, Union
+from urllib.parse import urlsplit
+
+from loguru import logger
+
+
+Interval = Tuple[int, int]
+IPNetwork = Union[ipaddress.IPv4Network, ipaddress.IPv6Network]
+
+# Trie node flags
+_EXACT = "\x00exact"        # the domain itself
+_SUBDOMAINS = "\x00sub"     # any name below the domain
+
+
+def merge_intervals(intervals: Iterable[Interval]) -> List[Interval]:
+    """Sort intervals and merge those that overlap or touch."""
+    merged: List[Interval] = []
+    for start, end in sorted(intervals):
+        if merged and start <= merged[-1][1] + 1:
+            if end > merged[-1][1]:
+                merged[-1] = (merged[-1][0], end)
+        else:
+            merged.append((start, end))
+    return merged
+
+
+def _subtract(allowed: List[Interval], denied: List[Interval]) -> List[Interval]:
+    """Remove ``denied`` from ``allowed``; both must be merged and sorted."""
+    result: List[Interval] = []
+    i = 0
+    for start, end in allowed:
+        while i < len(denied) and denied[i][1] < start:
+            i += 1
+        j = i
+        while j < len(denied) and denied[j][0] <= end:
+            if denied[j][0] > start:
+                result.append((start, denied[j][0] - 1))
+            start = max(start, denied[j][1] + 1)
+            j += 1
+        if start <= end:
+            result.append((start, end))
+    return result
+
+
+def _wildcard_network(entry: str) -> Optional[IPNetwork]:
+    """``10.0.*`` / ``10.0.*.*`` -> ``10.0.0.0/16``."""
+    octets = entry.split(".")
+    fixed = []
+    for octet in octets:
+        if octet == "*":
+            break
+        fixed.append(octet)
+    if len(octets) > 4 or any(o != "*" for o in octets[len(fixed):]):
+        return None
+    try:
+        return ipaddress.ip_network(".".join(fixed + ["0"] * (4 - len(fixed))) + f"/{8 * len(fixed)}")
+    except ValueError:
+        return None
+
+
+def parse_ip_entry(entry: str) -> Optional[Tuple[int, Interval]]:
+    """
+    Parse an address-like scope entry into ``(version, (first, last))``.
+    
+    Accepts single addresses, CIDR networks (host bits ignored), ``a-b``
+    ranges, last-octet ranges (``10.0.0.1-50``) and octet wildcards
+    (``10.0.*``). Returns None for anything that is not address-like.
+    """
+    entry = entry.strip()
+    if "*" in entry:
+        network = _wildcard_network(entry)
+        if network is None:
+            return None
+        return network.version, (int(network.network_address), int(network.broadcast_address))
+    if "/" in entry:
+        try:
+            network = ipaddress.ip_network(entry, strict=False)
+        except ValueError:
+            return None
+        return network.version, (int(network.network_address), int(network.broadcast_address))
+    if "-" in entry:
+        first, _, last = entry.partition("-")
+        try:
+            start = ipaddress.ip_address(first.strip())
+        except ValueError:
+            return None
+        last = last.strip()
+        if start.version == 4 and last.isdigit() and int(last) <= 255:
+            # 10.0.0.1-50
+            end_value = (int(start) & ~0xFF) | int(last)
+        else:
+            try:
+                end = ipaddress.ip_address(last)
+            except ValueError:
+                return None
+            if end.version != start.version:
+                return None
+            end_value = int(end)
+        if end_value < int(start):
+            return None
+        return start.version, (int(start), end_value)
+    try:
+        address = ipaddress.ip_address(entry)
+    except ValueError:
+        return None
+    return address.version, (int(address), int(address))
+
+
+def target_host(target: str) -> str:
+    """
+    The host part of a target: strips URL schemes, paths, ports and IPv6
+    brackets, and lower-cases names.
+    """
+    target = target.strip()
+    if "://" in target:
+        return (urlsplit(target).hostname or "").rstrip(".")
+    if target.startswith("["):
+        return target[1:].partition("]")[0]
+    if target.count(":") == 1 and "/" not in target:
+        target = target.partition(":")[0]
+    return target.rstrip(".").lower()
+
+
+class DomainTrie:
+    """Domain names keyed by reversed labels, so suffix lookups are one walk."""
+    
+    def __init__(self):
+        self._root: Dict[str, dict] = {}
+        self.size = 0
+    
+    def add(self, pattern: str) -> None:
+        """
+        Add ``example.com`` (the name only), ``*.example.com`` (names below
+        it) or ``.example.com`` (both).
+        """
+        pattern = pattern.strip().lower().rstrip(".")
+        flags = [_EXACT]
+        if pattern.startswith("*."):
+            pattern, flags = pattern[2:], [_SUBDOMAINS]
+        elif pattern.startswith("."):
+            pattern, flags = pattern[1:], [_EXACT, _SUBDOMAINS]
+        if not pattern:
+            return
+        node = self._root
+        for label in reversed(pattern.split(".")):
+            node = node.setdefault(label, {})
+        for flag in flags:
+            node[flag] = True
+        self.size += 1
+    
+    def matches(self, name: str) -> bool:
+        node = self._root
+        labels = name.lower().rstrip(".").split(".")
+        for depth, label in enumerate(reversed(labels), start=1):
+            node = node.get(label)
+            if node is None:
+                return False
+            if depth < len(labels) and _SUBDOMAINS in node:
+                return True
+        return _EXACT in node
+
+
+class ScopeIndex:
+    """
+    An engagement's scope minus its blacklist, compiled for lookups.
+    
+    Address entries become sorted, merged ``[first, last]`` intervals per
+    address family with the blacklist already subtracted, so an address is
+    checked with one bisect and a network with the same bisect plus a bound
+    check. Names go into a reversed-label trie. Blacklisted names always win.
+    """
+    
+    def __init__(self, scope: Sequence[str], blacklist: Sequence[str] = ()):
+        allowed: Dict[int, List[Interval]] = {4: [], 6: []}
+        denied: Dict[int, List[Interval]] = {4: [], 6: []}
+        self.domains = DomainTrie()
+        self.blocked_domains = DomainTrie()
+        self.invalid: List[str] = []
+        
+        for entries, intervals, domains in (
+            (scope, allowed, self.domains),
+            (blacklist, denied, self.blocked_domains),
+        ):
+            for entry in entries or ():
+                if not entry or not entry.strip():
+                    continue
+                parsed = parse_ip_entry(entry)
+                if parsed is not None:
+                    intervals[parsed[0]].append(parsed[1])
+                    continue
+                host = target_host(entry) if "://" in entry else entry.strip()
+                name = host[2:] if host.startswith("*.") else host.lstrip(".")
+                if name and all(c.isalnum() or c in "-._" for c in name):
+                    domains.add(host)
+                else:
+                    self.invalid.append(entry)
+        if self.invalid:
+            logger.warning(f"Ignoring unparseable scope entries: {self.invalid}")
+        
+        self._starts: Dict[int, List[int]] = {}
+        self._ends: Dict[int, List[int]] = {}
+        for version in (4, 6):
+            intervals = _subtract(merge_intervals(allowed[version]), merge_intervals(denied[version]))
+            self._starts[version] = [start for start, _ in intervals]
+            self._ends[version] = [end for _, end in intervals]
+    
+    def intervals(self, version: int = 4) -> List[Interval]:
+        """The in-scope address intervals of one family, sorted and disjoint."""
+        return list(zip(self._starts[version], self._ends[version]))
+    
+    def contains_range(self, version: int, first: int, last: int) -> bool:
+        """Whether every address in ``[first, last]`` is in scope."""
+        starts = self._starts[version]
+        i = bisect_right(starts, first) - 1
+        return i >= 0 and last <= self._ends[version][i]
+    
+    def contains_address(self, address: int, version: int = 4) -> bool:
+        starts = self._starts[version]
+        i = bisect_right(starts, address) - 1
+        return i >= 0 and address <= self._ends[version][i]
+    
+    def contains(self, target: str) -> bool:
+        """
+        Whether a target is in scope. Targets may be addresses, networks or
+        ranges (in scope only if wholly covered), host names, ``host:port``
+        or URLs.
+        """
+        host = target_host(target)
+        if not host:
+            return False
+        parsed = parse_ip_entry(host)
+        if parsed is not None:
+            version, (first, last) = parsed
+            return self.contains_range(version, first, last)
+        if self.blocked_domains.size and self.blocked_domains.matches(host):
+            return False
+        return self.domains.matches(host)
+    
+    def check_many(self, targets: Iterable[str]) -> List[bool]:
+        """
+        ``contains`` for many targets at once.
+        
+        Plain IPv4 addresses, the bulk of any scan, skip the generic parser:
+        they are packed with ``inet_pton`` and looked up by bisect directly.
+        """
+        starts, ends = self._starts[4], self._ends[4]
+        pton = socket.inet_pton
+        af_inet = socket.AF_INET
+        from_bytes = int.from_bytes
+        results = []
+        append = results.append
+        for target in targets:
+            try:
+                address = from_bytes(pton(af_inet, target), "big")
+            except (OSError, TypeError):
+                append(self.contains(target))
+                continue
+            i = bisect_right(starts, address) - 1
+            append(i >= 0 and address <= ends[i])
+        return results
+    
+    def check_addresses(self, addresses: Iterable[int], version: int = 4) -> List[bool]:
+        """
+        Membership of integer addresses (e.g. from a range generator).
+        
+        Bisection is mapped over the whole batch so the per-address work stays
+        in C; only the bound check runs per address in Python.
+        """
+        addresses = list(addresses)
+        starts, ends = self._starts[version], self._ends[version]
+        positions = map(bisect_right, repeat(starts, len(addresses)), addresses)
+        return [i > 0 and address <= ends[i - 1] for i, address in zip(positions, addresses)]
+
+
+class ScopeCache:
+    """
+    Compiled scope indexes per engagement.
+    
+    Entries are keyed on the scope and blacklist they were built from, so a
+    changed engagement never gets a stale index even if an invalidation is
+    missed; ``invalidate`` is still called on updates to free the old one.
+    """
+    
+    def __init__(self, max_entries: int = 1024):
+        self.max_entries = max_entries
+        self._entries: "OrderedDict[int, Tuple[tuple, ScopeIndex]]" = OrderedDict()
+    
+    def get(self, engagement_id: int, scope: Sequence[str], blacklist: Sequence[str] = ()) -> ScopeIndex:
+        key = (tuple(scope or ()), tuple(blacklist or ()))
+        cached = self._entries.get(engagement_id)
+        if cached is not None and cached[0] == key:
+            self._entries.move_to_end(engagement_id)
+            return cached[1]
+        index = ScopeIndex(*key)
+        self._entries[engagement_id] = (key, index)
+        self._entries.move_to_end(engagement_id)
+        while len(self._entries) > self.max_entries:
+            self._entries.popitem(last=False)
+        return index
+    
+    def invalidate(self, engagement_id: Optional[int] = None) -> None:
+        """Drop one engagement's index, or all of them."""
+        if engagement_id is None:
+            self._entries.clear()
+        else:
+            self._entries.pop(engagement_id, None)
+    
+    def __len__(self) -> int:
+        return len(self._entries)
+
+
+# Global scope cache
+scope_cache = ScopeCache()
@@ -4,8 +4,8 @@ ANPTOP Backend - Security Utilities
 
 import secrets
 from datetime import datetime, timedelta
-from typing import Optional, List
-from passlib.context import CryptContext
+from typing import Callable, Optional, List
+from loguru import logger
 from jose import JWTError, jwt
 from fastapi import Depends, HTTPException, status
 from fastapi.security import OAuth2PasswordBearer, SecurityScopes
@@ -16,12 +16,22 @@ import io
 import base64
 
 from app.core.config import settings
+from app.core.kill_switch import KillReport, kill_switch
+from app.core.scope import scope_cache
 from app.db.session import get_db
-from app.models.user import User, UserRole
-
+from app.models.user import PERMISSION_BITS, User, UserRole, compile_role_masks
+from app.core.principal_cache import Principal, principal_cache, token_cache
+from app.core.credentials import (
+    API_KEY_PREFIX,
+    api_key_digest,
+    api_key_lookup,
+    is_legacy_api_key_hash,
+    password_hasher,
+    pwd_context,
+    verified_api_keys,
+    verify_api_key_digest,
+)
 
-# Password hashing context
-pwd_context = CryptContext(schemes=["bcrypt"], deprecated="auto")
 
 # OAuth2 scheme with scopes
 oauth2_scheme = OAuth2PasswordBearer(
@@ -48,6 +58,16 @@ def get_password_hash(password: str) -> str:
     return pwd_context.hash(password)
 
 
+async def verify_password_async(plain_password: str, hashed_password: str) -> bool:
+    """Verify a password against a hash without blocking the event loop."""
+    return await password_hasher.verify(plain_password, hashed_password)
+
+
+async def get_password_hash_async(password: str) -> str:
+    """Hash a password without blocking the event loop."""
+    return await password_hasher.hash(password)
+
+
 def create_access_token(
     data: dict,
     expires_delta: Optional[timedelta] = None,
@@ -63,6 +83,10 @@ def create_access_token(
     
     to_encode.update({"exp": expire, "type": "access"})
     
+    # JWT subjects must be strings
+    if "sub" in to_encode:
+        to_encode["sub"] = str(to_encode["sub"])
+    
     if scopes:
         to_encode.update({"scopes": scopes})
     
@@ -80,6 +104,8 @@ def create_refresh_token(data: dict) -> str:
     to_encode = data.copy()
     expire = datetime.utcnow() + timedelta(days=settings.REFRESH_TOKEN_EXPIRE_DAYS)
     to_encode.update({"exp": expire, "type": "refresh"})
+    if "sub" in to_encode:
+        to_encode["sub"] = str(to_encode["sub"])
     
     encoded_jwt = jwt.encode(
         to_encode,
@@ -91,13 +117,22 @@ def create_refresh_token(data: dict) -> str:
 
 
 def decode_token(token: str) -> dict:
-    """Decode and validate a JWT token."""
+    """
+    Decode and validate a JWT token.
+    
+    Verified payloads are remembered until the token expires, so repeat
+    requests with the same token skip the signature check.
+    """
+    payload = token_cache.get(token)
+    if payload is not None:
+        return payload
     try:
         payload = jwt.decode(
             token,
             settings.JWT_SECRET_KEY,
             algorithms=[settings.ALGORITHM],
         )
+        token_cache.set(token, payload)
         return payload
     except JWTError as e:
         raise HTTPException(
@@ -111,27 +146,36 @@ async def get_current_user(
     security_scopes: SecurityScopes,
     token: str = Depends(oauth2_scheme),
     db: AsyncSession = Depends(get_db),
-) -> User:
-    """Get the current authenticated user from JWT token."""
+) -> Principal:
+    """
+    Get the current authenticated user from JWT token or API key.
+    
+    Returns the user's cached ``Principal`` (see app.core.principal_cache);
+    the database is only read when it is not cached. API users may send
+    their API key as the bearer token instead of a JWT.
+    """
     credentials_exception = HTTPException(
         status_code=status.HTTP_401_UNAUTHORIZED,
         detail="Could not validate credentials",
         headers={"WWW-Authenticate": f"Bearer {security_scopes.scope_str}"},
     )
     
-    try:
-        payload = decode_token(token)
-        user_id: int = payload.get("sub")
-        token_scopes: List[str] = payload.get("scopes", [])
+    if token.startswith(API_KEY_PREFIX):
+        # API clients send their key in place of a JWT
+        api_user = await authenticate_api_key(db, token)
+        user = Principal.from_user(api_user) if api_user is not None else None
+        token_scopes: List[str] = []
+    else:
+        try:
+            payload = decode_token(token)
+            user_id = int(payload["sub"])
+            token_scopes = payload.get("scopes", [])
         
-        if user_id is None:
+        except (HTTPException, KeyError, TypeError, ValueError):
             raise credentials_exception
         
-    except HTTPException:
-        raise credentials_exception
-    
-    # Get user from database
-    user = await User.get_by_id(db, user_id)
+        # Get user from cache or database
+        user = await principal_cache.resolve(user_id, lambda: User.get_by_id(db, user_id))
     
     if user is None:
         raise credentials_exception
@@ -156,8 +200,8 @@ async def get_current_user(
 
 
 async def get_current_active_user(
-    current_user: User = Depends(get_current_user),
-) -> User:
+    current_user: Principal = Depends(get_current_user),
+) -> Principal:
     """Get current active user."""
     if not current_user.is_active:
         raise HTTPException(
@@ -167,6 +211,22 @@ async def get_current_active_user(
     return current_user
 
 
+async def get_current_user_record(
+    current_user: Principal = Depends(get_current_active_user),
+    db: AsyncSession = Depends(get_db),
+) -> User:
+    """Get the current user's database row, for endpoints that change it."""
+    user = await User.get_by_id(db, current_user.id)
+    if user is None or not user.is_active:
+        await principal_cache.invalidate(current_user.id)
+        raise HTTPException(
+            status_code=status.HTTP_401_UNAUTHORIZED,
+            detail="Could not validate credentials",
+            headers={"WWW-Authenticate": "Bearer"},
+        )
+    return user
+
+
 def generate_mfa_secret() -> str:
     """Generate a new MFA secret."""
     return pyotp.random_base32()
@@ -204,53 +264,62 @@ def verify_mfa_token(secret: str, token: str) -> bool:
     return totp.verify(token, valid_window=1)
 
 
-# Kill switch implementation
-_kill_switch_active = False
+# Kill switch (state shared by every worker, see app.core.kill_switch)
+async def activate_kill_switch(reason: str = "", actor_id: Optional[int] = None) -> KillReport:
+    """Activate the kill switch - stops all operations and terminates running tools."""
+    return await kill_switch.activate(reason, actor_id)
 
 
-def activate_kill_switch() -> None:
-    """Activate the kill switch - stops all operations."""
-    global _kill_switch_active
-    _kill_switch_active = True
-
-
-def deactivate_kill_switch() -> None:
+async def deactivate_kill_switch(actor_id: Optional[int] = None) -> bool:
     """Deactivate the kill switch."""
-    global _kill_switch_active
-    _kill_switch_active = False
+    return await kill_switch.deactivate(actor_id)
 
 
 def kill_switch_active() -> bool:
-    """Check if kill switch is active."""
-    if not settings.ENABLE_KILL_SWITCH:
-        return False
-    return _kill_switch_active
+    """Check if kill switch is active (a local flag; no I/O)."""
+    return kill_switch.active
 
 
 # Scope validation
+def scope_checker(
+    engagement_id: int,
+    target_scope: List[str],
+    blacklisted_ips: Optional[List[str]] = None,
+) -> Callable[[str], bool]:
+    """A scope predicate for one engagement, backed by its cached scope index."""
+    if not settings.SCOPE_VALIDATION:
+        return lambda target: True
+    return scope_cache.get(engagement_id, target_scope, blacklisted_ips or []).contains
+
+
+def scope_batch_checker(
+    engagement_id: int,
+    target_scope: List[str],
+    blacklisted_ips: Optional[List[str]] = None,
+) -> Callable[[List[str]], List[bool]]:
+    """Like ``scope_checker``, for checking many targets in one call."""
+    if not settings.SCOPE_VALIDATION:
+        return lambda targets: [True] * len(targets)
+    return scope_cache.get(engagement_id, target_scope, blacklisted_ips or []).check_many
+
+
 def verify_scope_boundaries(
     engagement_id: int,
     target_ip: str,
     target_scope: List[str],
+    blacklisted_ips: Optional[List[str]] = None,
 ) -> bool:
-    """Verify that a target is within engagement scope."""
-    if not settings.SCOPE_VALIDATION:
-        return True
-    
-    # Simple scope validation - check if target IP matches any scope pattern
-    # In production, implement more sophisticated scope checking
-    for scope_pattern in target_scope:
-        if target_ip == scope_pattern or target_ip.startswith(scope_pattern.rstrip("*")):
-            return True
+    """
+    Verify that a target is within engagement scope.
     
-    return False
+    Scope entries may be addresses, CIDR networks, ranges, octet wildcards or
+    domain names; blacklisted entries are excluded even when the scope covers them.
+    """
+    return scope_checker(engagement_id, target_scope, blacklisted_ips)(target_ip)
 
 
 # Audit logging
-import asyncio
-from app.models.evidence import AuditLog
-
-_audit_logs = []
+from app.core.audit_writer import audit_entry, audit_writer
 
 
 async def audit_log(
@@ -259,115 +328,126 @@ async def audit_log(
     resource: Optional[str] = None,
     details: Optional[dict] = None,
     db: AsyncSession = None,
+    resource_id: Optional[str] = None,
 ) -> None:
-    """Create an audit log entry."""
-    log_entry = {
-        "timestamp": datetime.utcnow().isoformat(),
-        "action": action,
-        "user_id": user_id,
-        "resource": resource,
-        "details": details,
-    }
-    
-    # Log to console
-    print(f"[AUDIT] {log_entry}")
+    """
+    Create an audit log entry.
     
-    # Store in memory for now (in production, use database)
-    _audit_logs.append(log_entry)
-    
-    # Optionally save to database
-    if db:
-        try:
-            audit = AuditLog(
-                action=action,
-                user_id=user_id,
-                resource=resource,
-                details=details,
-            )
-            db.add(audit)
-            await db.commit()
-        except Exception as e:
-            print(f"[AUDIT ERROR] Failed to save audit log: {e}")
+    The entry is queued for the background audit writer, waiting for room
+    if its queue is full, and is committed independently of ``db`` (kept
+    for callers that still pass their session).
+    """
+    try:
+        await audit_writer.write(audit_entry(
+            action,
+            user_id=user_id,
+            resource=resource,
+            resource_id=resource_id,
+            details=details,
+        ))
+    except Exception as e:
+        logger.error(f"Failed to save audit log: {e}")
 
 
 def generate_api_key() -> str:
     """Generate a secure API key."""
-    return f"anptop_{secrets.token_urlsafe(32)}"
+    return f"{API_KEY_PREFIX}{secrets.token_urlsafe(32)}"
 
 
 def hash_api_key(api_key: str) -> str:
-    """Hash an API key for storage."""
-    return get_password_hash(api_key)
+    """Digest an API key for storage."""
+    return api_key_digest(api_key)
 
 
 def verify_api_key(api_key: str, hashed_key: str) -> bool:
-    """Verify an API key against a hash."""
-    return verify_password(api_key, hashed_key)
+    """Verify an API key against its stored digest."""
+    return verify_api_key_digest(api_key, hashed_key)
 
 
-# Role-based permission checking
-def check_permission(user: User, permission: str) -> bool:
-    """Check if user has a specific permission."""
-    role_permissions = {
-        UserRole.ADMIN: ["*"],  # All permissions
-        UserRole.LEAD: [
-            "engagements:create",
-            "engagements:read",
-            "engagements:update",
-            "engagements:delete",
-            "targets:create",
-            "targets:read",
-            "targets:update",
-            "targets:delete",
-            "workflows:execute",
-            "workflows:approve",
-            "reports:create",
-            "reports:read",
-            "reports:export",
-        ],
-        UserRole.SENIOR: [
-            "engagements:read",
-            "targets:create",
-            "targets:read",
-            "targets:update",
-            "workflows:execute",
-            "workflows:approve",
-            "reports:create",
-            "reports:read",
-            "reports:export",
-        ],
-        UserRole.TESTER: [
-            "engagements:read",
-            "targets:read",
-            "workflows:execute",
-            "reports:read",
-        ],
-        UserRole.ANALYST: [
-            "engagements:read",
-            "reports:create",
-            "reports:read",
-            "reports:export",
-        ],
-        UserRole.VIEWER: [
-            "engagements:read",
-            "reports:read",
-        ],
-        UserRole.API: [
-            "engagements:read",
-            "targets:read",
-            "workflows:execute",
-            "reports:read",
-        ],
-    }
-    
-    user_permissions = role_permissions.get(user.role, [])
+async def authenticate_api_key(db: AsyncSession, api_key: str) -> Optional[User]:
+    """
+    Find the API user an API key belongs to.
     
-    # Admin has all permissions
-    if "*" in user_permissions:
+    The key's prefix selects the candidate row through an index and its
+    digest is compared in constant time. Keys still stored as bcrypt
+    hashes are checked off the event loop once and re-stored as digests,
+    clearing any plaintext copy of the key left from before digests.
+    """
+    prefix = api_key_lookup(api_key)
+    if prefix is None:
+        return None
+    for user in await User.get_by_api_key_prefix(db, prefix):
+        if user.role != UserRole.API or not user.api_key_hash:
+            continue
+        if is_legacy_api_key_hash(user.api_key_hash):
+            if await password_hasher.verify(api_key, user.api_key_hash):
+                verified_api_keys.add(api_key)
+                return await user.update(db, api_key=None, api_key_hash=hash_api_key(api_key))
+        elif verify_api_key(api_key, user.api_key_hash):
+            verified_api_keys.add(api_key)
+            return user
+    return None
+
+
+# Role-based permission checking (admins have all permissions)
+ENDPOINT_ROLE_PERMISSIONS = {
+    UserRole.LEAD: [
+        "engagements:create",
+        "engagements:read",
+        "engagements:update",
+        "engagements:delete",
+        "targets:create",
+        "targets:read",
+        "targets:update",
+        "targets:delete",
+        "workflows:execute",
+        "workflows:approve",
+        "reports:create",
+        "reports:read",
+        "reports:export",
+    ],
+    UserRole.SENIOR: [
+        "engagements:read",
+        "targets:create",
+        "targets:read",
+        "targets:update",
+        "workflows:execute",
+        "workflows:approve",
+        "reports:create",
+        "reports:read",
+        "reports:export",
+    ],
+    UserRole.TESTER: [
+        "engagements:read",
+        "targets:read",
+        "workflows:execute",
+        "reports:read",
+    ],
+    UserRole.ANALYST: [
+        "engagements:read",
+        "reports:create",
+        "reports:read",
+        "reports:export",
+    ],
+    UserRole.VIEWER: [
+        "engagements:read",
+        "reports:read",
+    ],
+    UserRole.API: [
+        "engagements:read",
+        "targets:read",
+        "workflows:execute",
+        "reports:read",
+    ],
+}
+ENDPOINT_PERMISSION_MASKS = compile_role_masks(ENDPOINT_ROLE_PERMISSIONS)
+
+
+def check_permission(user: User, permission: str) -> bool:
+    """Check if user has a specific permission (one bit test against the role's compiled mask)."""
+    if user.role == UserRole.ADMIN:
         return True
-    
-    # Check specific permission
-    return permission in user_permissions
+    return bool(ENDPOINT_PERMISSION_MASKS.get(user.role, 0) & PERMISSION_BITS.get(permission, 0))
 
 
 # Crypto utilities
@@ -0,0 +1,400 @@
+"""
+ANPTOP - Bulk Target Import
+Merges target inventories (JSON, NDJSON or CSV) into an engagement through a staging table
+"""
+
+import asyncio
+import codecs
+import csv
+import io
+import json
+from dataclasses import dataclass, asdict
+from typing import Any, AsyncIterator, BinaryIO, Callable, Dict, Iterator, List, Optional, Tuple
+
+from loguru import logger
+from pydantic import BaseModel, ConfigDict, Field, ValidationError, field_validator, model_validator
+from sqlalchemy import (
+    JSON, Boolean, Column, Integer, MetaData, String, Table, and_, cast, delete, exists, func,
+    insert, literal, select, true, update,
+)
+from sqlalchemy.dialects.postgresql import insert as pg_insert
+from sqlalchemy.dialects.sqlite import insert as sqlite_insert
+from sqlalchemy.schema import CreateTable
+
+from app.models.target import Target, TargetType
+
+
+IMPORT_FORMATS = ("json", "ndjson", "csv")
+
+# List columns are ``;``-separated inside a CSV cell
+CSV_LIST_SEPARATOR = ";"
+
+# Columns an import row may set; everything else takes the column default
+IMPORT_COLUMNS = (
+    "identifier", "target_type", "hostname", "operating_system", "mac_address",
+    "ports", "protocols", "technologies", "tags",
+    "cloud_provider", "cloud_account_id", "cloud_region", "cloud_resource_id",
+    "web_framework", "target_metadata", "notes",
+)
+LIST_COLUMNS = ("ports", "protocols", "technologies", "tags")
+
+
+class TargetImportRow(BaseModel):
+    """One row of a target inventory; fields left out keep existing values on merge."""
+    model_config = ConfigDict(extra="ignore", str_strip_whitespace=True)
+    
+    identifier: str = Field(..., min_length=1, max_length=255)
+    target_type: TargetType = TargetType.HOST
+    hostname: Optional[str] = Field(None, max_length=255)
+    operating_system: Optional[str] = Field(None, max_length=255)
+    mac_address: Optional[str] = Field(None, max_length=50)
+    ports: Optional[List[int]] = None
+    protocols: Optional[List[str]] = None
+    technologies: Optional[List[str]] = None
+    tags: Optional[List[str]] = None
+    cloud_provider: Optional[str] = Field(None, max_length=50)
+    cloud_account_id: Optional[str] = Field(None, max_length=255)
+    cloud_region: Optional[str] = Field(None, max_length=100)
+    cloud_resource_id: Optional[str] = Field(None, max_length=255)
+    web_framework: Optional[str] = Field(None, max_length=100)
+    target_metadata: Optional[dict] = None
+    notes: Optional[str] = None
+    
+    @model_validator(mode="before")
+    @classmethod
+    def _drop_blank_fields(cls, data):
+        # Empty CSV cells mean "not given", so defaults and stored values apply
+        if isinstance(data, dict):
+            return {k: v for k, v in data.items() if not (isinstance(v, str) and not v.strip())}
+        return data
+    
+    @field_validator(*LIST_COLUMNS, mode="before")
+    @classmethod
+    def _split_lists(cls, value):
+        if isinstance(value, str):
+            return [item.strip() for item in value.split(CSV_LIST_SEPARATOR) if item.strip()]
+        return value
+    
+    @field_validator("target_metadata", mode="before")
+    @classmethod
+    def _parse_metadata(cls, value):
+        if isinstance(value, str):
+            return json.loads(value)
+        return value
+
+
+def _json_array_items(text: io.TextIOBase, chunk_size: int = 1 << 16) -> Iterator[Any]:
+    """Yield the elements of a top-level JSON array without loading the whole document."""
+    decoder = json.JSONDecoder()
+    buffer = ""
+    opened = False
+    while True:
+        chunk = text.read(chunk_size)
+        buffer += chunk
+        pos = 0
+        while True:
+            while pos < len(buffer) and (buffer[pos].isspace() or (opened and buffer[pos] == ",")):
+                pos += 1
+            if pos >= len(buffer):
+                break
+            if not opened:
+                if buffer[pos] != "[":
+                    raise ValueError("Expected a JSON array")
+                opened = True
+                pos += 1
+                continue
+            if buffer[pos] == "]":
+                return
+            try:
+                item, pos = decoder.raw_decode(buffer, pos)
+            except ValueError:
+                if not chunk:
+                    raise ValueError(f"Malformed JSON near: {buffer[pos:pos + 80]!r}")
+                break
+            yield item
+        buffer = buffer[pos:]
+        if not chunk:
+            if opened:
+                raise ValueError("Unterminated JSON array")
+            return
+
+
+def detect_import_format(head: bytes) -> str:
+    """Guess the inventory format from its first non-blank byte."""
+    head = head.lstrip(codecs.BOM_UTF8).lstrip()
+    if head.startswith(b"["):
+        return "json"
+    if head.startswith(b"{"):
+        return "ndjson"
+    return "csv"
+
+
+def iter_import_rows(stream: BinaryIO, import_format: Optional[str] = None) -> Iterator[Tuple[int, Any]]:
+    """
+    Stream ``(row_number, record)`` pairs from an inventory file.
+    
+    A record is a dict, or the ValueError that made the row unreadable.
+    Row numbers start at 1 (for CSV, the first line after the header).
+    
+    Raises:
+        ValueError: if the format is unknown, or a JSON array is malformed
+    """
+    if import_format is None:
+        head = stream.read(4096)
+        stream.seek(0)
+        import_format = detect_import_format(head)
+    if import_format not in IMPORT_FORMATS:
+        raise ValueError(f"Unknown import format: {import_format}")
+    
+    text = io.TextIOWrapper(stream, encoding="utf-8-sig", errors="replace", newline="")
+    if import_format == "json":
+        for number, item in enumerate(_json_array_items(text), start=1):
+            yield number, item
+    elif import_format == "ndjson":
+        number = 0
+        for line in text:
+            if not line.strip():
+                continue
+            number += 1
+            try:
+                yield number, json.loads(line)
+            except ValueError as e:
+                yield number, ValueError(f"Invalid JSON: {e}")
+    else:
+        for number, record in enumerate(csv.DictReader(text), start=1):
+            yield number, {k.strip(): v for k, v in record.items() if k}
+    text.detach()
+
+
+@dataclass
+class ImportStats:
+    """What a bulk target import changed."""
+    rows: int = 0
+    created: int = 0
+    updated: int = 0
+    duplicates: int = 0
+    invalid: int = 0
+    out_of_scope: int = 0
+    batches: int = 0
+    
+    def as_dict(self) -> Dict[str, int]:
+        return asdict(self)
+
+
+def _staging_table() -> Table:
+    """Per-connection temporary table the import rows are loaded into before merging."""
+    targets = Target.__table__
+    columns = [
+        Column("engagement_id", Integer, nullable=False),
+        Column("is_in_scope", Boolean, nullable=False),
+    ]
+    for name in IMPORT_COLUMNS:
+        column_type = String(32) if name == "target_type" else targets.c[name].type
+        if isinstance(column_type, JSON):
+            # Fields a row leaves out must stage as SQL NULL for the merge's COALESCE
+            column_type = JSON(none_as_null=True)
+        columns.append(Column(name, column_type, nullable=name != "identifier"))
+    return Table("target_import_staging", MetaData(), *columns, prefixes=["TEMPORARY"])
+
+
+STAGING = _staging_table()
+
+
+def _default(column) -> Any:
+    """A column's Python-side default (Core INSERT ... SELECT does not apply them)."""
+    default = column.default
+    if default is None or not (default.is_scalar or default.is_callable):
+        return None
+    return default.arg(None) if default.is_callable else default.arg
+
+
+class TargetImporter:
+    """
+    Merges inventory rows into an engagement's targets in batches.
+    
+    Each batch is validated and scope-checked in Python, bulk-loaded into a
+    temporary staging table (``COPY`` on PostgreSQL, ``executemany``
+    elsewhere) and merged into ``targets`` with two set-based statements:
+    an ``UPDATE ... FROM`` for identifiers the engagement already has, then
+    an ``INSERT ... SELECT`` guarded by ``ON CONFLICT (engagement_id,
+    identifier) DO NOTHING`` for the rest. Fields a row leaves out keep
+    their stored values. Results are yielded per row as each batch commits.
+    """
+    
+    def __init__(
+        self,
+        db,
+        engagement_id: int,
+        batch_size: int = 5000,
+        scope_check: Optional[Callable[[List[str]], List[bool]]] = None,
+        skip_out_of_scope: bool = False,
+    ):
+        self.db = db
+        self.engagement_id = engagement_id
+        self.batch_size = batch_size
+        self.scope_check = scope_check
+        self.skip_out_of_scope = skip_out_of_scope
+        self.stats = ImportStats()
+    
+    async def run(self, rows: Iterator[Tuple[int, Any]]) -> AsyncIterator[List[Dict[str, Any]]]:
+        """Consume ``iter_import_rows`` output, yielding the per-row results of each committed batch."""
+        rows = iter(rows)
+        while True:
+            batch = await asyncio.to_thread(self._next_batch, rows)
+            if not batch:
+                break
+            yield await self.write_batch(batch)
+        logger.info(f"Imported targets into engagement {self.engagement_id}: {self.stats.as_dict()}")
+    
+    def _next_batch(self, rows: Iterator[Tuple[int, Any]]) -> List[Tuple[int, Any]]:
+        batch = []
+        for row in rows:
+            batch.append(row)
+            if len(batch) >= self.batch_size:
+                break
+        return batch
+    
+    def _validate(self, batch: List[Tuple[int, Any]]) -> Tuple[Dict[str, Tuple[int, TargetImportRow]], List[Dict[str, Any]]]:
+        """Validate rows, keeping the last row per identifier."""
+        results: List[Dict[str, Any]] = []
+        valid: Dict[str, Tuple[int, TargetImportRow]] = {}
+        for number, record in batch:
+            self.stats.rows += 1
+            try:
+                if isinstance(record, Exception):
+                    raise record
+                if not isinstance(record, dict):
+                    raise ValueError("Row is not an object")
+                row = TargetImportRow.model_validate(record)
+            except (ValidationError, ValueError) as e:
+                self.stats.invalid += 1
+                detail = "; ".join(
+                    f"{'.'.join(map(str, err['loc']))}: {err['msg']}" for err in e.errors()
+                ) if isinstance(e, ValidationError) else str(e)
+                results.append({"row": number, "status": "invalid", "error": detail})
+                continue
+            previous = valid.pop(row.identifier, None)
+            if previous is not None:
+                self.stats.duplicates += 1
+                results.append({"row": previous[0], "identifier": row.identifier, "status": "duplicate"})
+            valid[row.identifier] = (number, row)
+        return valid, results
+    
+    def _staging_rows(self, rows: Dict[str, Tuple[int, TargetImportRow]], scope: Dict[str, bool], copy: bool) -> List[Dict[str, Any]]:
+        staged = []
+        for identifier, (_, row) in rows.items():
+            values = row.model_dump(include=set(IMPORT_COLUMNS))
+            values["target_type"] = row.target_type.name
+            if copy and values["target_metadata"] is not None:
+                values["target_metadata"] = json.dumps(values["target_metadata"])
+            values["engagement_id"] = self.engagement_id
+            values["is_in_scope"] = scope[identifier]
+            staged.append(values)
+        return staged
+    
+    async def _load_staging(self, rows: List[Dict[str, Any]], postgres: bool) -> None:
+        # Temporary tables belong to a connection, which may change between batches
+        await self.db.execute(CreateTable(STAGING, if_not_exists=True))
+        if postgres:
+            connection = await self.db.connection()
+            raw = await connection.get_raw_connection()
+            names = [c.name for c in STAGING.columns]
+            await raw.driver_connection.copy_records_to_table(
+                STAGING.name,
+                records=[tuple(row[name] for name in names) for row in rows],
+                columns=names,
+            )
+        else:
+            await self.db.execute(insert(STAGING), rows)
+    
+    def _merge_update(self):
+        targets = Target.__table__
+        values = {
+            name: func.coalesce(STAGING.c[name], targets.c[name])
+            for name in IMPORT_COLUMNS if name not in ("identifier", "target_type")
+        }
+        values["target_type"] = cast(STAGING.c.target_type, targets.c.target_type.type)
+        values["is_in_scope"] = STAGING.c.is_in_scope
+        return (
+            update(targets)
+            .where(and_(
+                targets.c.engagement_id == STAGING.c.engagement_id,
+                targets.c.identifier == STAGING.c.identifier,
+            ))
+            .values(values)
+            .returning(targets.c.identifier)
+        )
+    
+    def _merge_insert(self, postgres: bool):
+        targets = Target.__table__
+        columns, expressions = [], []
+        for column in targets.columns:
+            if column.primary_key:
+                continue
+            default = _default(column)
+            if column.name == "target_type":
+                expression = cast(STAGING.c.target_type, column.type)
+            elif column.name in STAGING.c:
+                expression = STAGING.c[column.name]
+                if default is not None:
+                    expression = func.coalesce(expression, literal(default, column.type))
+            elif default is not None:
+                expression = literal(default, column.type)
+            else:
+                continue
+            columns.append(column.name)
+            expressions.append(expression.label(column.name))
+        
+        existing = exists().where(and_(
+            targets.c.engagement_id == STAGING.c.engagement_id,
+            targets.c.identifier == STAGING.c.identifier,
+        ))
+        rows = select(*expressions).where(true()).where(~existing)
+        dialect_insert = pg_insert if postgres else sqlite_insert
+        return (
+            dialect_insert(targets)
+            .from_select(columns, rows)
+            .on_conflict_do_nothing(index_elements=["engagement_id", "identifier"])
+            .returning(targets.c.identifier)
+        )
+    
+    async def write_batch(self, batch: List[Tuple[int, Any]]) -> List[Dict[str, Any]]:
+        """Validate, scope-check and merge one batch in a single transaction."""
+        self.stats.batches += 1
+        valid, results = self._validate(batch)
+        
+        identifiers = list(valid)
+        checks = self.scope_check(identifiers) if self.scope_check else [True] * len(identifiers)
+        scope = dict(zip(identifiers, checks))
+        if self.skip_out_of_scope:
+            for identifier in [i for i in identifiers if not scope[i]]:
+                number, _ = valid.pop(identifier)
+                self.stats.out_of_scope += 1
+                results.append({"row": number, "identifier": identifier, "status": "out_of_scope"})
+        if not valid:
+            return sorted(results, key=lambda r: r["row"])
+        
+        postgres = self.db.get_bind().dialect.name == "postgresql"
+        await self._load_staging(self._staging_rows(valid, scope, copy=postgres), postgres)
+        updated = set((await self.db.execute(self._merge_update())).scalars())
+        created = set((await self.db.execute(self._merge_insert(postgres))).scalars())
+        await self.db.execute(delete(STAGING))
+        await self.db.commit()
+        
+        self.stats.updated += len(updated)
+        self.stats.created += len(created)
+        for identifier, (number, _) in valid.items():
+            if identifier in created:
+                outcome = "created"
+            elif identifier in updated:
+                outcome = "updated"
+            else:
+                # Inserted by a concurrent import between our two statements
+                outcome = "conflict"
+            results.append({
+                "row": number,
+                "identifier": identifier,
+                "status": outcome,
+                "in_scope": scope[identifier],
+            })
+        return sorted(results, key=lambda r: r["row"])
@@ -0,0 +1,257 @@
+"""
+ANPTOP - Target Planning
+Expands an engagement scope lazily and splits it into balanced shards for parallel scans
+"""
+
+import ipaddress
+from dataclasses import dataclass, field
+from typing import Any, Dict, Iterator, List, Optional
+
+from app.core.scope import Interval, ScopeIndex, merge_intervals
+
+
+ADDRESS_TYPES = {4: ipaddress.IPv4Address, 6: ipaddress.IPv6Address}
+
+MAX_PORT = 65535
+
+
+def _span(intervals: List[Interval]) -> int:
+    return sum(end - start + 1 for start, end in intervals)
+
+
+def iter_scope_hosts(index: ScopeIndex, version: int = 4) -> Iterator[str]:
+    """
+    Yield every in-scope address of one family, blacklist excluded, in order.
+    
+    Addresses are produced from the index's intervals one at a time, so a /8
+    costs the same memory as a /32.
+    """
+    address = ADDRESS_TYPES[version]
+    for start, end in index.intervals(version):
+        for value in range(start, end + 1):
+            yield str(address(value))
+
+
+def parse_ports(spec: Optional[str]) -> List[Interval]:
+    """
+    Parse a port list such as ``22,80,8000-8100`` (or ``-`` for all ports)
+    into merged intervals.
+    
+    Raises:
+        ValueError: if a port is out of range or the spec is malformed
+    """
+    if not spec or not spec.strip():
+        return []
+    if spec.strip() == "-":
+        return [(1, MAX_PORT)]
+    intervals = []
+    for part in spec.split(","):
+        part = part.strip()
+        if not part:
+            continue
+        first, dash, last = part.partition("-")
+        start = int(first) if first else 1
+        end = int(last) if last else (MAX_PORT if dash else start)
+        if not 0 <= start <= end <= MAX_PORT:
+            raise ValueError(f"Invalid port range: {part}")
+        intervals.append((start, end))
+    return merge_intervals(intervals)
+
+
+def split_intervals(intervals: List[Interval], parts: int) -> List[List[Interval]]:
+    """
+    Cut sorted intervals into ``parts`` runs whose sizes differ by at most one.
+    
+    Only interval boundaries are computed; nothing is enumerated.
+    """
+    total = _span(intervals)
+    parts = max(1, min(parts, total))
+    if not total:
+        return []
+    chunks: List[List[Interval]] = []
+    current: List[Interval] = []
+    filled = 0
+    boundary = total // parts
+    for start, end in intervals:
+        while start <= end:
+            take = min(end - start + 1, boundary - filled)
+            current.append((start, start + take - 1))
+            filled += take
+            start += take
+            if filled == boundary:
+                chunks.append(current)
+                current = []
+                boundary = total * (len(chunks) + 1) // parts
+    return chunks
+
+
+@dataclass
+class TargetShard:
+    """A slice of the scope (and optionally of the port range) for one tool run."""
+    number: int
+    version: int
+    ranges: List[Interval]
+    ports: List[Interval] = field(default_factory=list)
+    status: str = "pending"
+    execution_id: Optional[str] = None
+    attempts: int = 0
+    
+    @property
+    def host_count(self) -> int:
+        return _span(self.ranges)
+    
+    @property
+    def port_count(self) -> int:
+        return _span(self.ports)
+    
+    @property
+    def port_spec(self) -> str:
+        """Ports in the ``22,8000-8100`` form nmap and masscan accept."""
+        return ",".join(str(s) if s == e else f"{s}-{e}" for s, e in self.ports)
+    
+    def networks(self) -> List[str]:
+        """The shard's addresses as the fewest CIDR blocks that cover them exactly."""
+        address = ADDRESS_TYPES[self.version]
+        return [
+            str(network)
+            for start, end in self.ranges
+            for network in ipaddress.summarize_address_range(address(start), address(end))
+        ]
+    
+    def hosts(self) -> Iterator[str]:
+        address = ADDRESS_TYPES[self.version]
+        for start, end in self.ranges:
+            for value in range(start, end + 1):
+                yield str(address(value))
+    
+    def to_dict(self) -> Dict[str, Any]:
+        return {
+            "number": self.number,
+            "version": self.version,
+            "ranges": [list(r) for r in self.ranges],
+            "ports": [list(p) for p in self.ports],
+            "status": self.status,
+            "execution_id": self.execution_id,
+            "attempts": self.attempts,
+        }
+    
+    @classmethod
+    def from_dict(cls, data: Dict[str, Any]) -> "TargetShard":
+        return cls(
+            number=data["number"],
+            version=data["version"],
+            ranges=[tuple(r) for r in data["ranges"]],
+            ports=[tuple(p) for p in data.get("ports", [])],
+            status=data.get("status", "pending"),
+            execution_id=data.get("execution_id"),
+            attempts=data.get("attempts", 0),
+        )
+
+
+@dataclass
+class ShardPlan:
+    """A tool run split into shards, with per-shard progress for resuming."""
+    plan_id: str
+    tool_name: str
+    parameters: Dict[str, str]
+    shards: List[TargetShard]
+    engagement_id: Optional[int] = None
+    target_param: str = "target"
+    port_param: Optional[str] = None
+    
+    @property
+    def pending(self) -> List[TargetShard]:
+        """Shards that have not completed successfully yet."""
+        return [shard for shard in self.shards if shard.status != "success"]
+    
+    def shard_parameters(self, shard: TargetShard) -> Dict[str, Any]:
+        """Tool parameters for one shard; the target parameter becomes a list of networks."""
+        parameters: Dict[str, Any] = {**self.parameters, self.target_param: shard.networks()}
+        if self.port_param and shard.ports:
+            parameters[self.port_param] = shard.port_spec
+        return parameters
+    
+    def summary(self) -> Dict[str, Any]:
+        counts: Dict[str, int] = {}
+        for shard in self.shards:
+            counts[shard.status] = counts.get(shard.status, 0) + 1
+        return {
+            "plan_id": self.plan_id,
+            "tool_name": self.tool_name,
+            "engagement_id": self.engagement_id,
+            "shards": len(self.shards),
+            "by_status": counts,
+        }
+    
+    def to_dict(self) -> Dict[str, Any]:
+        return {
+            "plan_id": self.plan_id,
+            "tool_name": self.tool_name,
+            "parameters": self.parameters,
+            "engagement_id": self.engagement_id,
+            "target_param": self.target_param,
+            "port_param": self.port_param,
+            "shards": [shard.to_dict() for shard in self.shards],
+        }
+    
+    @classmethod
+    def from_dict(cls, data: Dict[str, Any]) -> "ShardPlan":
+        return cls(
+            plan_id=data["plan_id"],
+            tool_name=data["tool_name"],
+            parameters=data.get("parameters", {}),
+            shards=[TargetShard.from_dict(s) for s in data["shards"]],
+            engagement_id=data.get("engagement_id"),
+            target_param=data.get("target_param", "target"),
+            port_param=data.get("port_param"),
+        )
+
+
+def plan_shards(
+    index: ScopeIndex,
+    shard_count: int,
+    max_hosts: Optional[int] = None,
+    ports: Optional[str] = None,
+    port_shards: int = 1,
+    version: int = 4,
+    max_shards: Optional[int] = None,
+) -> List[TargetShard]:
+    """
+    Split the in-scope addresses of one family into balanced shards.
+    
+    Hosts are divided into at least ``shard_count`` runs of near-equal size
+    (more if ``max_hosts`` caps a shard), and each run is crossed with
+    ``port_shards`` near-equal slices of ``ports``. Host names are not
+    sharded; wildcard entries cannot be enumerated.
+    
+    Args:
+        index: Compiled scope (blacklist already removed)
+        shard_count: Minimum number of host shards
+        max_hosts: Upper bound on hosts per shard
+        ports: Port list to slice (``None`` leaves ports to the tool)
+        port_shards: Number of port slices per host shard
+        version: Address family to plan
+        max_shards: Upper bound on the number of shards in the plan
+    
+    Raises:
+        ValueError: if the port list is malformed or the plan would exceed
+            ``max_shards``
+    """
+    intervals = index.intervals(version)
+    total = _span(intervals)
+    parts = max(1, shard_count)
+    if max_hosts:
+        parts = max(parts, -(-total // max_hosts))
+    port_slices = split_intervals(parse_ports(ports), port_shards) if ports else [[]]
+    count = min(parts, total) * len(port_slices)
+    if max_shards and count > max_shards:
+        raise ValueError(
+            f"Plan would have {count} shards, more than the limit of {max_shards}; "
+            "allow more hosts per shard or use fewer port shards"
+        )
+    
+    shards = []
+    for ranges in split_intervals(intervals, parts):
+        for port_ranges in port_slices:
+            shards.append(TargetShard(number=len(shards), version=version, ranges=ranges, ports=port_ranges))
+    return shards
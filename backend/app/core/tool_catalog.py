@@ -0,0 +1,213 @@
+"""
+ANPTOP - Security Tool Catalog Loader
+Loads the YAML tool catalog, merges overlays and keeps a compiled JSON cache
+"""
+
+import hashlib
+import json
+import os
+import stat
+import tempfile
+from pathlib import Path
+from typing import Any, Dict, List, Optional, Tuple, Type
+
+import yaml
+from loguru import logger
+from pydantic import BaseModel, ValidationError
+
+
+# Bump when the cache layout changes so stale caches are ignored
+CACHE_FORMAT = 1
+
+MERGE_MODES = ("add_missing", "override")
+
+
+class CatalogError(Exception):
+    """Raised when a catalog file cannot be read or fails validation."""
+
+
+class ToolCatalog:
+    """A validated tool catalog: tools grouped by section, in file order."""
+    
+    def __init__(self, sections: Dict[str, Dict[str, BaseModel]], fingerprint: str, from_cache: bool):
+        self.sections = sections
+        self.fingerprint = fingerprint
+        self.from_cache = from_cache
+    
+    @property
+    def tools(self) -> Dict[str, BaseModel]:
+        """All tools across sections, keyed by tool key."""
+        return {key: tool for section in self.sections.values() for key, tool in section.items()}
+
+
+def _read_yaml(path: Path) -> Tuple[Dict[str, Any], bytes]:
+    try:
+        raw = path.read_bytes()
+    except OSError as e:
+        raise CatalogError(f"Cannot read tool catalog {path}: {e}")
+    try:
+        data = yaml.safe_load(raw) or {}
+    except yaml.YAMLError as e:
+        raise CatalogError(f"Invalid YAML in tool catalog {path}: {e}")
+    if not isinstance(data.get("sections", {}), dict):
+        raise CatalogError(f"'sections' in {path} must be a mapping")
+    return data, raw
+
+
+def _fingerprint(paths: List[Path]) -> Optional[str]:
+    """Hash the raw bytes of the source files, or None if one is unreadable."""
+    digest = hashlib.sha256()
+    for path in paths:
+        try:
+            digest.update(path.read_bytes())
+        except OSError:
+            return None
+    return digest.hexdigest()
+
+
+def _read_sources(path: Path) -> Tuple[Dict[str, Dict[str, Any]], List[str], str]:
+    """Read a catalog and its merge overlays into raw sections, overlay names and a fingerprint."""
+    digest = hashlib.sha256()
+    data, raw = _read_yaml(path)
+    digest.update(raw)
+    overlays: List[str] = []
+    sections: Dict[str, Dict[str, Any]] = {
+        name: dict(tools or {}) for name, tools in data.get("sections", {}).items()
+    }
+    
+    for overlay in data.get("merge", []) or []:
+        mode = overlay.get("mode", "add_missing")
+        if mode not in MERGE_MODES:
+            raise CatalogError(f"Unknown merge mode '{mode}' in {path}")
+        overlays.append(overlay["file"])
+        overlay_data, overlay_raw = _read_yaml(path.parent / overlay["file"])
+        digest.update(overlay_raw)
+        existing = {key for tools in sections.values() for key in tools}
+        for name, tools in overlay_data.get("sections", {}).items():
+            section = sections.setdefault(name, {})
+            for key, fields in (tools or {}).items():
+                if mode == "add_missing" and key in existing:
+                    continue
+                if mode == "override":
+                    for other in sections.values():
+                        other.pop(key, None)
+                section[key] = fields
+    
+    return sections, overlays, digest.hexdigest()
+
+
+def _schema_key(model: Type[BaseModel]) -> str:
+    """Identify the model's field layout, so a changed model invalidates the cache."""
+    return json.dumps(
+        {name: str(field.annotation) for name, field in model.model_fields.items()},
+        sort_keys=True,
+    )
+
+
+def _private(st: os.stat_result) -> bool:
+    """Whether a file belongs to this process's user and only it can write to it."""
+    return st.st_uid == os.getuid() and not st.st_mode & (stat.S_IWGRP | stat.S_IWOTH)
+
+
+def _load_cache(cache_path: Path, path: Path, model: Type[BaseModel]) -> Optional[ToolCatalog]:
+    """
+    Build tools from the compiled cache without parsing YAML or merging overlays.
+    
+    The cache is used only if it and its directory belong to this user and
+    are not writable by anyone else, the source files it was compiled from
+    still hash to the stored fingerprint and the model's fields are
+    unchanged. Entries are validated like freshly parsed ones.
+    """
+    try:
+        directory = os.stat(cache_path.parent)
+        fd = os.open(cache_path, os.O_RDONLY | os.O_NOFOLLOW)
+    except OSError:
+        return None
+    with os.fdopen(fd, "rb") as f:
+        if not (_private(directory) and _private(os.fstat(f.fileno()))):
+            logger.warning(f"Ignoring tool catalog cache {cache_path}: writable by another user")
+            return None
+        try:
+            cached = json.load(f)
+        except (OSError, ValueError):
+            return None
+    if cached.get("format") != CACHE_FORMAT or cached.get("schema") != _schema_key(model):
+        return None
+    sources = [path] + [path.parent / name for name in cached.get("overlays", [])]
+    fingerprint = _fingerprint(sources)
+    if fingerprint is None or cached.get("fingerprint") != fingerprint:
+        return None
+    
+    sections: Dict[str, Dict[str, BaseModel]] = {}
+    try:
+        for name, tools in cached["sections"].items():
+            section = sections[name] = {}
+            for key, fields in tools.items():
+                section[key] = model.model_validate(fields)
+    except (ValidationError, AttributeError, KeyError, TypeError) as e:
+        logger.warning(f"Ignoring tool catalog cache {cache_path}: {e}")
+        return None
+    return ToolCatalog(sections, fingerprint, from_cache=True)
+
+
+def _write_cache(
+    cache_path: Path,
+    fingerprint: str,
+    overlays: List[str],
+    model: Type[BaseModel],
+    sections: Dict[str, Dict[str, BaseModel]],
+) -> None:
+    """Write the compiled cache atomically (readers never see a partial file)."""
+    payload = {
+        "format": CACHE_FORMAT,
+        "fingerprint": fingerprint,
+        "overlays": overlays,
+        "schema": _schema_key(model),
+        "sections": {
+            name: {key: tool.model_dump(mode="json") for key, tool in tools.items()}
+            for name, tools in sections.items()
+        },
+    }
+    try:
+        cache_path.parent.mkdir(mode=0o700, parents=True, exist_ok=True)
+        fd, tmp_path = tempfile.mkstemp(dir=cache_path.parent, prefix=".tool_catalog.")
+        with os.fdopen(fd, "w") as f:
+            json.dump(payload, f, separators=(",", ":"))
+        os.replace(tmp_path, cache_path)
+    except OSError as e:
+        logger.debug(f"Could not write tool catalog cache {cache_path}: {e}")
+
+
+def load_catalog(path: str, model: Type[BaseModel], cache_path: Optional[str] = None) -> ToolCatalog:
+    """
+    Load the tool catalog at ``path`` (with its merge overlays).
+    
+    When ``cache_path`` holds a trusted compiled cache for the same source
+    files and model layout, tools are built from it without reading the
+    YAML; otherwise the sources are parsed and the cache is rewritten.
+    
+    Raises:
+        CatalogError: if a file is unreadable or a tool fails validation
+    """
+    if cache_path:
+        catalog = _load_cache(Path(cache_path), Path(path), model)
+        if catalog is not None:
+            return catalog
+    
+    raw_sections, overlays, fingerprint = _read_sources(Path(path))
+    sections = {}
+    errors: List[str] = []
+    for name, tools in raw_sections.items():
+        section = sections[name] = {}
+        for key, fields in tools.items():
+            try:
+                section[key] = model(**(fields or {}))
+            except Exception as e:
+                errors.append(f"{name}.{key}: {e}")
+    if errors:
+        raise CatalogError("Invalid tool catalog entries:\n" + "\n".join(errors))
+    
+    if cache_path:
+        _write_cache(Path(cache_path), fingerprint, overlays, model, sections)
+    logger.debug(f"Compiled tool catalog {path} ({sum(len(s) for s in sections.values())} tools)")
+    return ToolCatalog(sections, fingerprint, from_cache=False)
@@ -7,9 +7,11 @@ import asyncio
 import subprocess
 import json
 import os
+import signal
 import uuid
-import hashlib
-from typing import Dict, Any, Optional, List
+from collections import deque
+from contextlib import AsyncExitStack
+from typing import Callable, Dict, Any, Deque, Mapping, Optional, List, Set, Tuple
 from datetime import datetime
 from pathlib import Path
 import aiofiles
@@ -17,6 +19,15 @@ import pydantic
 from loguru import logger
 
 from app.core.config import settings
+from app.db.session import async_session_factory
+from app.core.evidence_writer import EvidenceWriter
+from app.core.kill_switch import kill_switch
+from app.core.execution_stream import ExecutionStream, ExecutionStreamRegistry
+from app.core.tool_scheduler import ToolScheduler, SchedulerFull
+from app.core.result_cache import ResultCache
+from app.core.tool_probe import ToolProbe
+from app.core.command_template import PreparedCommand
+from app.core.target_planner import ShardPlan, TargetShard
 from app.core.tools_config import (
     ALL_SECURITY_TOOLS,
     SecurityTool,
@@ -29,6 +40,7 @@ from app.core.tools_config import (
 
 class ToolExecutionResult(pydantic.BaseModel):
     """Result of tool execution."""
+    execution_id: Optional[str] = None
     tool_name: str
     command: str
     return_code: int
@@ -38,7 +50,50 @@ class ToolExecutionResult(pydantic.BaseModel):
     status: str
     output_file: Optional[str] = None
     hash_sha256: Optional[str] = None
-    timestamp: datetime = datetime.utcnow()
+    hash_md5: Optional[str] = None
+    stdout_bytes: int = 0
+    stderr_bytes: int = 0
+    output_truncated: bool = False
+    cached: bool = False
+    engagement_id: Optional[int] = None
+    user_id: Optional[int] = None
+    timestamp: datetime = pydantic.Field(default_factory=datetime.utcnow)
+
+
+class OutputPreview:
+    """Bounded head/tail preview of a stream that may be far larger."""
+    
+    def __init__(self, limit: int):
+        self.head_limit = limit // 2
+        self.tail_limit = limit - self.head_limit
+        self.head = bytearray()
+        self.tail = bytearray()
+        self.total_bytes = 0
+    
+    def feed(self, chunk: bytes) -> None:
+        """Account for a chunk, keeping only the first and last bytes."""
+        self.total_bytes += len(chunk)
+        room = self.head_limit - len(self.head)
+        if room > 0:
+            self.head += chunk[:room]
+            chunk = chunk[room:]
+        if chunk:
+            self.tail += chunk
+            if len(self.tail) > self.tail_limit:
+                del self.tail[:len(self.tail) - self.tail_limit]
+    
+    @property
+    def truncated(self) -> bool:
+        return self.total_bytes > len(self.head) + len(self.tail)
+    
+    def text(self) -> str:
+        """Decode the preview, marking the omitted middle if any."""
+        head = self.head.decode("utf-8", errors="replace")
+        tail = self.tail.decode("utf-8", errors="replace")
+        if self.truncated:
+            omitted = self.total_bytes - len(self.head) - len(self.tail)
+            return f"{head}\n... [{omitted} bytes truncated] ...\n{tail}"
+        return head + tail
 
 
 class ToolExecutor:
@@ -46,9 +101,140 @@ class ToolExecutor:
     
     def __init__(self):
         self.tools = ALL_SECURITY_TOOLS
-        self.execution_history: List[ToolExecutionResult] = []
+        # Recent results only; the full history is in the tool_executions table
+        self.execution_history: Deque[ToolExecutionResult] = deque(
+            maxlen=settings.TOOL_HISTORY_BUFFER_SIZE
+        )
+        self.persist_history = settings.TOOL_HISTORY_PERSIST
         self.base_output_dir = Path(settings.EVIDENCE_STORAGE_PATH)
         self.base_output_dir.mkdir(parents=True, exist_ok=True)
+        self.chunk_size = settings.TOOL_OUTPUT_CHUNK_SIZE
+        self.preview_bytes = settings.TOOL_OUTPUT_PREVIEW_BYTES
+        self.hash_md5 = settings.TOOL_EVIDENCE_MD5
+        self._tasks: Set[asyncio.Task] = set()
+        self._running_plans: Set[str] = set()
+        # Spawned and not yet reaped, by execution id; each leads its own process group
+        self._processes: Dict[str, Tuple[str, asyncio.subprocess.Process]] = {}
+        self._killed: Set[str] = set()
+        self.scheduler = ToolScheduler(
+            max_concurrent=settings.TOOL_MAX_CONCURRENT,
+            category_limits=settings.TOOL_CATEGORY_LIMITS,
+            default_category_limit=settings.TOOL_DEFAULT_CATEGORY_LIMIT,
+            tool_limits=settings.TOOL_LIMITS,
+            default_tool_limit=settings.TOOL_DEFAULT_TOOL_LIMIT,
+            max_queue=settings.TOOL_MAX_QUEUE,
+        )
+        self.result_cache = ResultCache(
+            max_bytes=settings.TOOL_RESULT_CACHE_MAX_BYTES,
+            enabled=settings.TOOL_RESULT_CACHE_ENABLED,
+        )
+        self.probe = ToolProbe(
+            ttl_seconds=settings.TOOL_PROBE_TTL_SECONDS,
+            concurrency=settings.TOOL_PROBE_CONCURRENCY,
+            detect_versions=settings.TOOL_PROBE_VERSIONS,
+            version_timeout=settings.TOOL_PROBE_VERSION_TIMEOUT,
+            enabled=settings.TOOL_PROBE_ENABLED,
+        )
+        self.streams = ExecutionStreamRegistry(
+            buffer_size=settings.TOOL_STREAM_SUBSCRIBER_BUFFER,
+            backlog_lines=settings.TOOL_STREAM_BACKLOG_LINES,
+            retention_seconds=settings.TOOL_STREAM_RETENTION_SECONDS,
+        )
+    
+    async def _pump(
+        self,
+        stream: asyncio.StreamReader,
+        sink,
+        preview: OutputPreview,
+        live: ExecutionStream,
+        name: str,
+    ) -> None:
+        """Copy a process pipe to disk chunk by chunk, feeding preview and live tail."""
+        while True:
+            chunk = await stream.read(self.chunk_size)
+            if not chunk:
+                break
+            preview.feed(chunk)
+            live.feed(name, chunk)
+            await sink.write(chunk)
+    
+    def _finish(
+        self,
+        result: ToolExecutionResult,
+        engagement_id: Optional[int] = None,
+        user_id: Optional[int] = None,
+    ) -> ToolExecutionResult:
+        """Record a result and end its live stream."""
+        result.engagement_id = engagement_id
+        result.user_id = user_id
+        self.execution_history.append(result)
+        if self.persist_history:
+            task = asyncio.create_task(self._persist(result))
+            self._tasks.add(task)
+            task.add_done_callback(self._tasks.discard)
+        self.streams.close(
+            result.execution_id,
+            status=result.status,
+            return_code=result.return_code,
+            duration_seconds=result.duration_seconds,
+            output_file=result.output_file,
+            hash_sha256=result.hash_sha256,
+        )
+        return result
+    
+    async def _persist(self, result: ToolExecutionResult) -> None:
+        """Write a result to the tool_executions table."""
+        from app.models.tool_execution import ToolExecution
+        try:
+            async with async_session_factory() as db:
+                await ToolExecution.record(db, result)
+        except Exception as e:
+            logger.warning(f"Could not persist execution {result.execution_id}: {e}")
+    
+    @staticmethod
+    def _signal_group(process: asyncio.subprocess.Process, sig: int) -> None:
+        """Signal the tool and everything it spawned (its session's process group)."""
+        try:
+            os.killpg(process.pid, sig)
+        except ProcessLookupError:
+            pass
+    
+    async def terminate_all(self, grace: float = 3.0) -> List[Dict[str, Any]]:
+        """
+        Stop every running tool: SIGTERM to each process group, then SIGKILL
+        to groups whose leader is still alive after ``grace`` seconds.
+        
+        Returns one entry per process group with the signal that ended it.
+        """
+        running = [
+            (execution_id, tool_name, process)
+            for execution_id, (tool_name, process) in list(self._processes.items())
+            if process.returncode is None
+        ]
+        if not running:
+            return []
+        
+        for execution_id, _, process in running:
+            self._killed.add(execution_id)
+            self._signal_group(process, signal.SIGTERM)
+        waits = {asyncio.ensure_future(process.wait()): execution_id for _, _, process in running}
+        _, pending = await asyncio.wait(waits, timeout=grace)
+        stubborn = {waits[task] for task in pending}
+        for task in pending:
+            task.cancel()
+        
+        terminated = []
+        for execution_id, tool_name, process in running:
+            if execution_id in stubborn:
+                self._signal_group(process, signal.SIGKILL)
+            terminated.append({
+                "execution_id": execution_id,
+                "tool": tool_name,
+                "pid": process.pid,
+                "signal": "SIGKILL" if execution_id in stubborn else "SIGTERM",
+            })
+            logger.warning(f"Kill switch terminated {tool_name} ({execution_id}, pgid {process.pid})")
+        return terminated
     
     async def execute_tool(
         self,
@@ -56,48 +242,180 @@ class ToolExecutor:
         parameters: Dict[str, str],
         timeout: Optional[int] = None,
         capture_output: bool = True,
+        execution_id: Optional[str] = None,
+        engagement_id: Optional[int] = None,
+        priority: Optional[int] = None,
+        user_id: Optional[int] = None,
+        on_start: Optional[Callable[[], None]] = None,
     ) -> ToolExecutionResult:
         """
         Execute a security tool with given parameters.
         
+        Output is streamed straight from the process pipes into the
+        evidence file; only a bounded head/tail preview of stdout and
+        stderr is kept in memory and returned on the result. Lines are
+        also published to the execution's live stream as they arrive.
+        
+        The process only starts once the scheduler grants a slot, so
+        callers may wait here while other executions hold the budget.
+        For cacheable recon tools a recent identical run (or one still in
+        flight) is reused instead, returning its evidence file and hash
+        with ``cached`` set. Tools whose executable the probe cannot find
+        return ``status="unavailable"`` without being queued.
+        
         Args:
             tool_name: Name of the tool to execute
             parameters: Dictionary of parameters for command substitution
             timeout: Optional timeout in seconds
             capture_output: Whether to capture stdout/stderr
-            
+            execution_id: Optional ID (also the evidence directory name)
+            engagement_id: Engagement the run belongs to, for fair sharing and result reuse
+            priority: Queue priority (lower runs first, defaults to risk level)
+            user_id: User who requested the run, for the history record
+            on_start: Called once the run holds a scheduler slot, just before
+                the process is spawned
+        
         Returns:
             ToolExecutionResult with execution details
         """
-        tool = tool_manager.get_tool(tool_name)
-        
-        if not tool:
-            return ToolExecutionResult(
-                tool_name=tool_name,
-                command="",
-                return_code=-1,
-                stdout="",
-                stderr=f"Tool '{tool_name}' not found",
-                duration_seconds=0,
-                status="failed",
+        execution_id = execution_id or str(uuid.uuid4())
+        live = self.streams.open(execution_id, tool_name, engagement_id=engagement_id, user_id=user_id)
+        # A run that raises or is cancelled (client gone, scheduler error)
+        # never reaches _finish; its stream is still ended so subscribers
+        # get an end event instead of waiting forever
+        status = "failed"
+        try:
+            tool = tool_manager.get_tool(tool_name)
+            
+            if not tool:
+                return self._finish(ToolExecutionResult(
+                    execution_id=execution_id,
+                    tool_name=tool_name,
+                    command="",
+                    return_code=-1,
+                    stdout="",
+                    stderr=f"Tool '{tool_name}' not found",
+                    duration_seconds=0,
+                    status="failed",
+                ), engagement_id, user_id)
+            
+            # Build command
+            prepared = tool_manager.prepare_command(tool_name, parameters)
+            command = prepared.display if prepared else ""
+            
+            if not command:
+                return self._finish(ToolExecutionResult(
+                    execution_id=execution_id,
+                    tool_name=tool_name,
+                    command="",
+                    return_code=-1,
+                    stdout="",
+                    stderr=f"Cannot build command for tool '{tool_name}'",
+                    duration_seconds=0,
+                    status="failed",
+                ), engagement_id, user_id)
+            
+            # Refuse tools whose binary is missing before queueing or spawning
+            availability = await self.probe.check(tool_name, tool)
+            if not availability.available:
+                logger.warning(f"Tool {tool_name} unavailable: {availability.reason}")
+                return self._finish(ToolExecutionResult(
+                    execution_id=execution_id,
+                    tool_name=tool_name,
+                    command=command,
+                    return_code=-1,
+                    stdout="",
+                    stderr=f"Tool '{tool_name}' is not available: {availability.reason}",
+                    duration_seconds=0,
+                    status="unavailable",
+                ), engagement_id, user_id)
+            
+            async def run() -> ToolExecutionResult:
+                return await self._scheduled_run(
+                    execution_id, tool_name, tool, prepared, timeout,
+                    capture_output, live, engagement_id, priority, on_start,
+                )
+            
+            # _run refuses to spawn while the kill switch is engaged; a cached
+            # result must not be handed out either
+            if kill_switch.active:
+                return self._finish(ToolExecutionResult(
+                    execution_id=execution_id,
+                    tool_name=tool_name,
+                    command=command,
+                    return_code=-1,
+                    stdout="",
+                    stderr="Kill switch is active. All operations are paused.",
+                    duration_seconds=0,
+                    status="killed",
+                ), engagement_id, user_id)
+            
+            if not self.result_cache.cacheable(tool):
+                return self._finish(await run(), engagement_id, user_id)
+            
+            result, shared = await self.result_cache.fetch(
+                tool_name, command, tool.cache_ttl_seconds, run, engagement_id=engagement_id,
             )
-        
-        # Build command
-        command = tool_manager.build_command(tool_name, parameters)
-        
-        if not command:
+            if shared:
+                logger.info(f"Reusing {result.execution_id} evidence for {tool_name}")
+                result = result.model_copy(update={"execution_id": execution_id, "cached": True})
+            return self._finish(result, engagement_id, user_id)
+        except asyncio.CancelledError:
+            status = "cancelled"
+            raise
+        finally:
+            if not live.finished:
+                self.streams.close(execution_id, status=status)
+    
+    async def _scheduled_run(
+        self,
+        execution_id: str,
+        tool_name: str,
+        tool: SecurityTool,
+        prepared: PreparedCommand,
+        timeout: Optional[int],
+        capture_output: bool,
+        live: ExecutionStream,
+        engagement_id: Optional[int],
+        priority: Optional[int],
+        on_start: Optional[Callable[[], None]] = None,
+    ) -> ToolExecutionResult:
+        """Wait for an execution slot, then run the tool."""
+        try:
+            async with self.scheduler.slot(
+                tool_name.lower(), tool, engagement_id=engagement_id, priority=priority
+            ):
+                if on_start is not None:
+                    on_start()
+                return await self._run(
+                    execution_id, tool_name, tool, prepared, timeout, capture_output, live
+                )
+        except SchedulerFull as e:
+            logger.warning(f"Tool {tool_name} rejected: {e}")
             return ToolExecutionResult(
+                execution_id=execution_id,
                 tool_name=tool_name,
-                command="",
+                command=prepared.display,
                 return_code=-1,
                 stdout="",
-                stderr=f"Cannot build command for tool '{tool_name}'",
+                stderr=str(e),
                 duration_seconds=0,
-                status="failed",
+                status="rejected",
             )
-        
+    
+    async def _run(
+        self,
+        execution_id: str,
+        tool_name: str,
+        tool: SecurityTool,
+        prepared: PreparedCommand,
+        timeout: Optional[int],
+        capture_output: bool,
+        live: ExecutionStream,
+    ) -> ToolExecutionResult:
+        """Spawn the tool and stream its output into the evidence file."""
+        command = prepared.display
         # Create output directory for this execution
-        execution_id = str(uuid.uuid4())
         output_dir = self.base_output_dir / execution_id
         output_dir.mkdir(parents=True, exist_ok=True)
         
@@ -109,121 +427,322 @@ class ToolExecutor:
         logger.debug(f"Command: {command}")
         
         start_time = datetime.utcnow()
+        stdout_preview = OutputPreview(self.preview_bytes)
+        stderr_preview = OutputPreview(self.preview_bytes)
+        output_file = None
+        hash_sha256 = None
+        hash_md5 = None
+        
+        if kill_switch.active:
+            return ToolExecutionResult(
+                execution_id=execution_id,
+                tool_name=tool_name,
+                command=command,
+                return_code=-1,
+                stdout="",
+                stderr="Kill switch is active. All operations are paused.",
+                duration_seconds=0,
+                status="killed",
+            )
         
+        process = None
         try:
-            # Execute command
-            process = await asyncio.create_subprocess_shell(
-                command,
-                stdout=asyncio.subprocess.PIPE if capture_output else asyncio.subprocess.DEVNULL,
-                stderr=asyncio.subprocess.PIPE if capture_output else asyncio.subprocess.DEVNULL,
-                cwd=str(output_dir),
-                limit=10 * 1024 * 1024,  # 10MB output limit
+            # Execute command; a new session makes the tool lead a process group
+            # that timeouts and the kill switch can signal as a whole
+            pipe = asyncio.subprocess.PIPE if capture_output else asyncio.subprocess.DEVNULL
+            spawn_options = dict(
+                stdout=pipe, stderr=pipe, cwd=str(output_dir), limit=self.chunk_size, start_new_session=True,
             )
-            
-            try:
-                stdout, stderr = await asyncio.wait_for(
-                    process.communicate(),
-                    timeout=timeout,
-                )
-            except asyncio.TimeoutError:
-                process.kill()
-                return_code = -1
-                stdout = b"Command timed out"
-                stderr = b"Process killed due to timeout"
-                logger.warning(f"Tool {tool_name} timed out after {timeout}s")
+            if prepared.shell is not None:
+                # Only templates with pipes or redirection pay for /bin/sh
+                process = await asyncio.create_subprocess_shell(prepared.shell, **spawn_options)
             else:
-                return_code = process.returncode
-                stdout = stdout.decode("utf-8", errors="replace")
-                stderr = stderr.decode("utf-8", errors="replace")
-            
-            duration = (datetime.utcnow() - start_time).total_seconds()
+                process = await asyncio.create_subprocess_exec(*prepared.argv, **spawn_options)
+            self._processes[execution_id] = (tool_name, process)
             
-            # Save output to file
-            output_file = None
-            hash_sha256 = None
-            if capture_output and (stdout or stderr):
-                output_file = str(output_dir / f"{tool_name}_output.txt")
-                content = f"# Command: {command}\n"
-                content += f"# Return Code: {return_code}\n"
-                content += f"# Duration: {duration:.2f}s\n"
-                content += f"# Timestamp: {start_time.isoformat()}\n"
-                content += f"# STDOUT:\n{stdout}\n"
-                content += f"# STDERR:\n{stderr}\n"
+            timed_out = False
+            async with AsyncExitStack() as files:
+                if capture_output:
+                    # stdout is hashed and written to the evidence file as it
+                    # arrives; stderr is spooled next to it and appended once
+                    # the process exits.
+                    output_file = str(output_dir / f"{tool_name}_output.txt")
+                    stderr_spool = output_dir / f"{tool_name}_stderr.part"
+                    out = await files.enter_async_context(
+                        EvidenceWriter(output_file, md5=self.hash_md5)
+                    )
+                    err = await files.enter_async_context(aiofiles.open(stderr_spool, "wb"))
+                    await out.write(
+                        f"# Command: {command}\n"
+                        f"# Timestamp: {start_time.isoformat()}\n"
+                        f"# STDOUT:\n".encode()
+                    )
+                    pumps = asyncio.gather(
+                        self._pump(process.stdout, out, stdout_preview, live, "stdout"),
+                        self._pump(process.stderr, err, stderr_preview, live, "stderr"),
+                    )
+                    try:
+                        await asyncio.wait_for(asyncio.shield(pumps), timeout=timeout)
+                    except asyncio.TimeoutError:
+                        timed_out = True
+                        self._signal_group(process, signal.SIGKILL)
+                        # Drain what is left; give up if a grandchild holds the pipes
+                        try:
+                            await asyncio.wait_for(pumps, timeout=5)
+                        except asyncio.TimeoutError:
+                            pass
+                    await process.wait()
+                else:
+                    try:
+                        await asyncio.wait_for(process.wait(), timeout=timeout)
+                    except asyncio.TimeoutError:
+                        timed_out = True
+                        self._signal_group(process, signal.SIGKILL)
+                        await process.wait()
                 
-                async with aiofiles.open(output_file, "w") as f:
-                    await f.write(content)
+                killed = execution_id in self._killed
+                if killed:
+                    return_code = process.returncode
+                    stderr_preview.feed(b"\nProcess terminated by kill switch")
+                elif timed_out:
+                    return_code = -1
+                    stderr_preview.feed(b"\nProcess killed due to timeout")
+                    logger.warning(f"Tool {tool_name} timed out after {timeout}s")
+                else:
+                    return_code = process.returncode
                 
-                # Calculate hash
-                hash_sha256 = hashlib.sha256(content.encode()).hexdigest()
+                duration = (datetime.utcnow() - start_time).total_seconds()
+                
+                if output_file:
+                    await err.close()
+                    await out.write(b"\n# STDERR:\n")
+                    await out.copy_from(str(stderr_spool), self.chunk_size)
+                    trailer = f"\n# Return Code: {return_code}\n# Duration: {duration:.2f}s\n"
+                    if killed:
+                        trailer += "# Terminated by kill switch\n"
+                    elif timed_out:
+                        trailer += f"# Timed out after {timeout}s\n"
+                    await out.write(trailer.encode())
+                    stderr_spool.unlink(missing_ok=True)
+                    hash_sha256, hash_md5 = out.sha256, out.md5
             
             result = ToolExecutionResult(
+                execution_id=execution_id,
                 tool_name=tool_name,
                 command=command,
                 return_code=return_code,
-                stdout=stdout,
-                stderr=stderr,
+                stdout=stdout_preview.text(),
+                stderr=stderr_preview.text(),
                 duration_seconds=duration,
-                status="success" if return_code == 0 else "failed",
+                status="killed" if killed else "success" if return_code == 0 else "failed",
                 output_file=output_file,
                 hash_sha256=hash_sha256,
+                hash_md5=hash_md5,
+                stdout_bytes=stdout_preview.total_bytes,
+                stderr_bytes=stderr_preview.total_bytes,
+                output_truncated=stdout_preview.truncated or stderr_preview.truncated,
             )
             
-            self.execution_history.append(result)
-            
             logger.info(
                 f"Tool {tool_name} completed with status={result.status}, "
                 f"duration={duration:.2f}s, return_code={return_code}"
             )
             
             return result
-            
+        
         except Exception as e:
             duration = (datetime.utcnow() - start_time).total_seconds()
             logger.error(f"Tool {tool_name} execution failed: {str(e)}")
             
             result = ToolExecutionResult(
+                execution_id=execution_id,
                 tool_name=tool_name,
                 command=command,
                 return_code=-1,
-                stdout="",
+                stdout=stdout_preview.text(),
                 stderr=str(e),
                 duration_seconds=duration,
                 status="error",
+                output_file=output_file,
             )
             
-            self.execution_history.append(result)
             return result
+        
+        finally:
+            # Errors and cancellation must not leave the tool running untracked
+            if process is not None and process.returncode is None:
+                self._signal_group(process, signal.SIGKILL)
+                await process.wait()
+            self._processes.pop(execution_id, None)
+            self._killed.discard(execution_id)
     
     async def execute_tool_async(
         self,
         tool_name: str,
         parameters: Dict[str, str],
         callback=None,
+        timeout: Optional[int] = None,
+        engagement_id: Optional[int] = None,
+        priority: Optional[int] = None,
+        user_id: Optional[int] = None,
     ) -> str:
         """
         Execute a tool asynchronously and call callback with result.
         
+        The execution's live stream is opened before the task starts, so
+        callers can subscribe to it as soon as they have the ID. The task
+        itself queues in the scheduler until a slot is free.
+        
         Returns:
             Execution ID for tracking
+        
+        Raises:
+            SchedulerFull: if the execution queue is already at capacity
         """
+        if self.scheduler.is_full():
+            raise SchedulerFull(f"Execution queue is full ({self.scheduler.max_queue} waiting)")
+        
         execution_id = str(uuid.uuid4())
+        self.streams.open(execution_id, tool_name, engagement_id=engagement_id, user_id=user_id)
         
         async def run_and_callback():
-            result = await self.execute_tool(tool_name, parameters)
+            result = await self.execute_tool(
+                tool_name,
+                parameters,
+                timeout=timeout,
+                execution_id=execution_id,
+                engagement_id=engagement_id,
+                priority=priority,
+                user_id=user_id,
+            )
             if callback:
                 callback(result)
             return result
         
-        # Schedule execution
-        asyncio.create_task(run_and_callback())
+        # Schedule execution, holding a reference until it completes
+        task = asyncio.create_task(run_and_callback())
+        self._tasks.add(task)
+        task.add_done_callback(self._tasks.discard)
         
         return execution_id
     
+    def _plan_path(self, plan_id: str) -> Path:
+        return self.base_output_dir / "shard_plans" / f"{plan_id}.json"
+    
+    async def _save_plan(self, plan: ShardPlan) -> None:
+        """Write a plan's manifest atomically, so a crash never leaves half a file."""
+        path = self._plan_path(plan.plan_id)
+        path.parent.mkdir(parents=True, exist_ok=True)
+        partial = path.with_suffix(".part")
+        async with aiofiles.open(partial, "w") as f:
+            await f.write(json.dumps(plan.to_dict()))
+        os.replace(partial, path)
+    
+    async def load_plan(self, plan_id: str) -> Optional[ShardPlan]:
+        """Load a sharded run's manifest, with the progress of each shard."""
+        path = self._plan_path(plan_id)
+        if not path.is_file():
+            return None
+        async with aiofiles.open(path) as f:
+            return ShardPlan.from_dict(json.loads(await f.read()))
+    
+    async def execute_sharded(
+        self,
+        plan: ShardPlan,
+        timeout: Optional[int] = None,
+        priority: Optional[int] = None,
+        user_id: Optional[int] = None,
+    ) -> ShardPlan:
+        """
+        Run every pending shard of a plan as its own execution.
+        
+        At most as many shards as the scheduler queue has room for are
+        submitted at once, so a large plan never overflows the queue; the
+        rest wait here. A shard is marked ``running`` once it holds a slot.
+        The manifest is rewritten at most every ``SCAN_SHARD_SAVE_INTERVAL``
+        seconds while the plan runs, and once at the end; calling this again
+        with the loaded plan re-runs only the shards that did not succeed.
+        """
+        changed = asyncio.Event()
+        
+        async def save_periodically() -> None:
+            while True:
+                await changed.wait()
+                changed.clear()
+                await self._save_plan(plan)
+                await asyncio.sleep(settings.SCAN_SHARD_SAVE_INTERVAL)
+        
+        def started(shard: TargetShard) -> None:
+            shard.status = "running"
+            changed.set()
+        
+        async def run_shards(queue: Deque[TargetShard]) -> None:
+            while queue:
+                shard = queue.popleft()
+                shard.execution_id = str(uuid.uuid4())
+                shard.status = "queued"
+                shard.attempts += 1
+                changed.set()
+                result = await self.execute_tool(
+                    plan.tool_name,
+                    plan.shard_parameters(shard),
+                    timeout=timeout,
+                    execution_id=shard.execution_id,
+                    engagement_id=plan.engagement_id,
+                    priority=priority,
+                    user_id=user_id,
+                    on_start=lambda shard=shard: started(shard),
+                )
+                shard.status = result.status
+                changed.set()
+        
+        pending = deque(plan.pending)
+        room = self.scheduler.max_queue - self.scheduler.queue_depth
+        workers = max(1, min(len(pending), room))
+        logger.info(
+            f"Running {len(pending)} of {len(plan.shards)} shards of plan {plan.plan_id} "
+            f"({plan.tool_name}), {workers} at a time"
+        )
+        self._running_plans.add(plan.plan_id)
+        saver = None
+        try:
+            await self._save_plan(plan)
+            saver = asyncio.ensure_future(save_periodically())
+            await asyncio.gather(*(run_shards(pending) for _ in range(workers)))
+        finally:
+            if saver is not None:
+                saver.cancel()
+                await asyncio.gather(saver, return_exceptions=True)
+            await self._save_plan(plan)
+            self._running_plans.discard(plan.plan_id)
+        return plan
+    
+    def is_plan_running(self, plan_id: str) -> bool:
+        return plan_id in self._running_plans
+    
+    def execute_sharded_async(
+        self,
+        plan: ShardPlan,
+        timeout: Optional[int] = None,
+        priority: Optional[int] = None,
+        user_id: Optional[int] = None,
+    ) -> str:
+        """Start a sharded run in the background and return its plan ID."""
+        self._running_plans.add(plan.plan_id)
+        task = asyncio.create_task(self.execute_sharded(plan, timeout, priority, user_id))
+        self._tasks.add(task)
+        task.add_done_callback(self._tasks.discard)
+        return plan.plan_id
+    
+    def get_stream(self, execution_id: str) -> Optional[ExecutionStream]:
+        """Get the live output stream of a running or recent execution."""
+        return self.streams.get(execution_id)
+    
     def get_tool(self, tool_name: str) -> Optional[SecurityTool]:
         """Get tool configuration."""
         return tool_manager.get_tool(tool_name)
     
-    def get_tools_by_category(self, category: ToolCategory) -> Dict[str, SecurityTool]:
+    def get_tools_by_category(self, category: ToolCategory) -> Mapping[str, SecurityTool]:
         """Get all tools in a category."""
         return tool_manager.get_tools_by_category(category)
     
@@ -233,45 +752,15 @@ class ToolExecutor:
     
     def list_available_tools(self) -> List[Dict[str, Any]]:
         """List all available tools with their status."""
-        tools_list = []
-        for name, tool in self.tools.items():
-            tools_list.append({
-                "name": tool.name,
-                "key": name,
-                "category": tool.category.value,
-                "os_type": tool.os_type.value,
-                "status": tool.status.value,
-                "risk_level": tool.risk_level,
-                "requires_approval": tool.requires_approval,
-                "description": tool.description,
-            })
-        return tools_list
+        return [dict(item) for item in tool_manager.index.tool_items.values()]
     
     def get_high_risk_tools(self) -> List[Dict[str, Any]]:
         """Get all high-risk tools."""
-        tools = []
-        for name, tool in self.tools.items():
-            if tool.risk_level >= 4:
-                tools.append({
-                    "name": tool.name,
-                    "key": name,
-                    "risk_level": tool.risk_level,
-                    "requires_approval": tool.requires_approval,
-                })
-        return tools
+        return [dict(item) for item in tool_manager.index.high_risk_items]
     
     def get_approval_required_tools(self) -> List[Dict[str, Any]]:
         """Get all tools requiring approval."""
-        tools = []
-        for name, tool in self.tools.items():
-            if tool.requires_approval:
-                tools.append({
-                    "name": tool.name,
-                    "key": name,
-                    "risk_level": tool.risk_level,
-                    "category": tool.category.value,
-                })
-        return tools
+        return [dict(item) for item in tool_manager.index.approval_required_items]
 
 
 # Global executor instance
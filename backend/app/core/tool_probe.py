@@ -0,0 +1,282 @@
+"""
+ANPTOP - Tool Availability Probe
+Resolves each tool's executable (and version) so missing binaries are known before a run
+"""
+
+import asyncio
+import os
+import re
+import shlex
+import shutil
+import signal
+import time
+from dataclasses import dataclass, field
+from typing import Any, Dict, Mapping, Optional, Tuple
+
+from loguru import logger
+
+from app.core.tools_config import SecurityTool, tool_manager
+
+
+# Launchers whose first script argument is the actual tool
+INTERPRETERS = frozenset({
+    "python", "python3", "java", "ruby", "perl", "node", "bash", "sh", "powershell", "pwsh",
+})
+SCRIPT_SUFFIXES = (".py", ".jar", ".rb", ".pl", ".js", ".ps1", ".sh")
+
+VERSION_PATTERN = re.compile(r"\d+(?:\.\d+)+[\w.+-]*")
+
+
+def command_requirements(tool: SecurityTool) -> Tuple[Optional[str], Optional[str]]:
+    """
+    The executable a tool's command needs, and the script it runs if launched
+    through an interpreter (``python3 sqlmap.py``).
+    """
+    if tool.path:
+        return tool.path, None
+    if not tool.command_template:
+        return None, None
+    compiled = tool_manager.compile_command(tool)
+    if compiled.shell:
+        try:
+            tokens = shlex.split(compiled.template)
+        except ValueError:
+            tokens = compiled.template.split()
+    else:
+        tokens = [token for token, _ in compiled.tokens]
+    
+    # Skip leading VAR=value assignments
+    while tokens and "=" in tokens[0] and not tokens[0].startswith("="):
+        tokens = tokens[1:]
+    if not tokens or "{" in tokens[0]:
+        return None, None
+    
+    executable, script = tokens[0], None
+    if os.path.basename(executable) in INTERPRETERS:
+        script = next(
+            (t for t in tokens[1:] if t.endswith(SCRIPT_SUFFIXES) and "{" not in t),
+            None,
+        )
+    return executable, script
+
+
+@dataclass
+class ProbeResult:
+    """Whether a tool can be run here, as last observed."""
+    available: bool
+    executable: Optional[str] = None
+    path: Optional[str] = None
+    version: Optional[str] = None
+    reason: Optional[str] = None
+    checked_at: float = field(default_factory=time.monotonic)
+    
+    def to_dict(self) -> Dict[str, Any]:
+        return {
+            "available": self.available,
+            "executable": self.executable,
+            "path": self.path,
+            "version": self.version,
+            "reason": self.reason,
+        }
+
+
+@dataclass
+class _Binary:
+    path: Optional[str]
+    version: Optional[str]
+    checked_at: float
+
+
+class ToolProbe:
+    """
+    Resolves tool executables with a bounded number of probes in flight.
+    
+    Executables are resolved on ``PATH`` (and optionally asked for
+    ``--version``) once per TTL; tools sharing an executable share the
+    lookup. Results are published to the tool manager so listings show
+    real availability, and the executor consults them before spawning.
+    """
+    
+    def __init__(
+        self,
+        ttl_seconds: int,
+        concurrency: int,
+        detect_versions: bool = False,
+        version_timeout: float = 5.0,
+        enabled: bool = True,
+    ):
+        self.ttl_seconds = ttl_seconds
+        self.detect_versions = detect_versions
+        self.version_timeout = version_timeout
+        self.enabled = enabled
+        self._semaphore = asyncio.Semaphore(max(1, concurrency))
+        self._binaries: Dict[str, _Binary] = {}
+        self._results: Dict[str, ProbeResult] = {}
+        self._refresh: Optional[asyncio.Task] = None
+    
+    def _fresh(self, checked_at: float) -> bool:
+        return time.monotonic() - checked_at < self.ttl_seconds
+    
+    def get(self, tool_key: str) -> Optional[ProbeResult]:
+        """The cached result for a tool, if it is still within its TTL."""
+        result = self._results.get(tool_key.lower())
+        if result is None or not self._fresh(result.checked_at):
+            return None
+        return result
+    
+    async def check(self, tool_key: str, tool: SecurityTool) -> ProbeResult:
+        """Availability of one tool, resolving its executable if the cache is stale."""
+        tool_key = tool_key.lower()
+        if not self.enabled:
+            return ProbeResult(available=True)
+        cached = self.get(tool_key)
+        if cached is not None:
+            return cached
+        
+        executable, script = command_requirements(tool)
+        if executable:
+            # Versions are left to the background refresh; this is on the run path
+            await self._probe_binary(executable, detect_version=False)
+        result = self._result_for(tool, executable, script)
+        previous = self._results.get(tool_key)
+        self._results[tool_key] = result
+        if previous is None or previous.available != result.available:
+            self._publish()
+        return result
+    
+    async def probe_all(self, tools: Optional[Mapping[str, SecurityTool]] = None) -> Dict[str, ProbeResult]:
+        """Probe every tool in the registry concurrently and publish the results."""
+        tools = dict(tools if tools is not None else tool_manager.tools)
+        requirements = {key: command_requirements(tool) for key, tool in tools.items()}
+        executables = {exe for exe, _ in requirements.values() if exe}
+        
+        started = time.monotonic()
+        await asyncio.gather(*(
+            self._probe_binary(exe, detect_version=self.detect_versions, force=True)
+            for exe in executables
+        ))
+        self._results = {
+            key.lower(): self._result_for(tools[key], exe, script)
+            for key, (exe, script) in requirements.items()
+        }
+        self._publish()
+        
+        missing = sum(1 for r in self._results.values() if not r.available)
+        logger.info(
+            f"Probed {len(executables)} executables for {len(tools)} tools "
+            f"in {time.monotonic() - started:.1f}s ({missing} tools unavailable)"
+        )
+        return self._results
+    
+    def refresh(self) -> Optional[asyncio.Task]:
+        """Start a background probe of all tools, unless one is already running."""
+        if not self.enabled:
+            return None
+        if self._refresh is None or self._refresh.done():
+            self._refresh = asyncio.create_task(self._run_refresh())
+        return self._refresh
+    
+    def refresh_if_stale(self) -> Optional[asyncio.Task]:
+        """Start a background probe if any result has outlived its TTL."""
+        if not self._results or any(not self._fresh(r.checked_at) for r in self._results.values()):
+            return self.refresh()
+        return None
+    
+    async def close(self) -> None:
+        if self._refresh is not None and not self._refresh.done():
+            self._refresh.cancel()
+            try:
+                await self._refresh
+            except asyncio.CancelledError:
+                pass
+    
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "enabled": self.enabled,
+            "tools": len(self._results),
+            "unavailable": sorted(k for k, r in self._results.items() if not r.available),
+            "executables": len(self._binaries),
+        }
+    
+    async def _run_refresh(self) -> None:
+        try:
+            await self.probe_all()
+        except Exception as e:
+            logger.warning(f"Tool availability probe failed: {e}")
+    
+    async def _probe_binary(self, executable: str, detect_version: bool, force: bool = False) -> _Binary:
+        cached = self._binaries.get(executable)
+        if cached is not None and not force and self._fresh(cached.checked_at):
+            return cached
+        async with self._semaphore:
+            path = await asyncio.to_thread(shutil.which, executable)
+            version = None
+            if path and detect_version:
+                version = await self._read_version(path)
+            elif path and cached is not None and cached.path == path:
+                version = cached.version
+        binary = self._binaries[executable] = _Binary(path, version, time.monotonic())
+        return binary
+    
+    async def _read_version(self, path: str) -> Optional[str]:
+        """
+        Run ``<path> --version`` and pull a version number from its output.
+        
+        Some tools ignore the flag and start working instead, possibly
+        spawning children, so the command runs in its own process group and
+        the whole group is killed on timeout.
+        """
+        try:
+            process = await asyncio.create_subprocess_exec(
+                path, "--version",
+                stdin=asyncio.subprocess.DEVNULL,
+                stdout=asyncio.subprocess.PIPE,
+                stderr=asyncio.subprocess.STDOUT,
+                start_new_session=True,
+            )
+        except OSError:
+            return None
+        try:
+            output, _ = await asyncio.wait_for(process.communicate(), timeout=self.version_timeout)
+        except asyncio.TimeoutError:
+            try:
+                os.killpg(process.pid, signal.SIGKILL)
+            except ProcessLookupError:
+                pass
+            await process.wait()
+            return None
+        match = VERSION_PATTERN.search(output[:4096].decode("utf-8", errors="replace"))
+        return match.group(0) if match else None
+    
+    def _result_for(self, tool: SecurityTool, executable: Optional[str], script: Optional[str]) -> ProbeResult:
+        if not executable:
+            # Nothing to resolve (no template, or the executable is a parameter)
+            return ProbeResult(available=True, version=tool.version)
+        binary = self._binaries.get(executable)
+        if binary is None or binary.path is None:
+            return ProbeResult(
+                available=False,
+                executable=executable,
+                reason=f"executable '{executable}' not found",
+            )
+        launcher = os.path.basename(executable) in INTERPRETERS
+        if script and os.path.isabs(script) and not os.path.isfile(script):
+            return ProbeResult(
+                available=False,
+                executable=executable,
+                path=binary.path,
+                reason=f"script '{script}' not found",
+            )
+        return ProbeResult(
+            available=True,
+            executable=executable,
+            path=binary.path,
+            # An interpreter's version says nothing about the script it runs
+            version=(None if launcher else binary.version) or tool.version,
+        )
+    
+    def _publish(self) -> None:
+        tool_manager.set_availability({
+            key: {"available": result.available, "version": result.version}
+            for key, result in self._results.items()
+        })
@@ -0,0 +1,216 @@
+"""
+ANPTOP - Tool Execution Scheduler
+Bounds how many tool processes run at once, globally, per category and per tool
+"""
+
+import asyncio
+import itertools
+import time
+from collections import defaultdict
+from contextlib import asynccontextmanager
+from dataclasses import dataclass, field
+from typing import AsyncIterator, Dict, List, Optional
+
+from loguru import logger
+from prometheus_client import Gauge, Histogram
+
+from app.core.tools_config import SecurityTool, ToolCategory
+
+
+# Prometheus metrics (registered once per process)
+QUEUE_DEPTH = Gauge(
+    "anptop_tool_queue_depth",
+    "Tool executions waiting for a slot",
+    ["category"],
+)
+RUNNING = Gauge(
+    "anptop_tool_running",
+    "Tool executions currently holding a slot",
+    ["category"],
+)
+QUEUE_WAIT = Histogram(
+    "anptop_tool_queue_wait_seconds",
+    "Time tool executions spend queued before starting",
+    ["category"],
+    buckets=(0.01, 0.1, 0.5, 1, 5, 15, 30, 60, 120, 300, 600, 1800),
+)
+
+
+class SchedulerFull(Exception):
+    """Raised when the execution queue has reached its configured depth."""
+
+
+@dataclass
+class _Waiter:
+    """A queued request for an execution slot."""
+    priority: int
+    seq: int
+    tool_key: str
+    category: ToolCategory
+    engagement: Optional[int]
+    future: asyncio.Future
+    enqueued_at: float = field(default_factory=time.monotonic)
+
+
+class ToolScheduler:
+    """
+    Admission control for tool processes.
+    
+    A slot is granted only while the global budget, the tool's category
+    limit and the tool's own limit all have room. Among eligible waiters
+    the lowest priority value wins (by default the tool's risk level, so
+    cheap recon is not stuck behind long exploitation runs); ties go to the
+    engagement with the fewest running executions, then to arrival order,
+    so one busy engagement cannot monopolise the scanners.
+    """
+    
+    def __init__(
+        self,
+        max_concurrent: int,
+        category_limits: Dict[str, int],
+        default_category_limit: int,
+        tool_limits: Dict[str, int],
+        default_tool_limit: int,
+        max_queue: int,
+    ):
+        self.max_concurrent = max_concurrent
+        self.category_limits = category_limits
+        self.default_category_limit = default_category_limit
+        self.tool_limits = tool_limits
+        self.default_tool_limit = default_tool_limit
+        self.max_queue = max_queue
+        
+        self._waiters: List[_Waiter] = []
+        self._seq = itertools.count()
+        self._running_total = 0
+        self._running_by_category: Dict[ToolCategory, int] = defaultdict(int)
+        self._running_by_tool: Dict[str, int] = defaultdict(int)
+        self._running_by_engagement: Dict[Optional[int], int] = defaultdict(int)
+    
+    def category_limit(self, category: ToolCategory) -> int:
+        return self.category_limits.get(category.value, self.default_category_limit)
+    
+    def tool_limit(self, tool_key: str) -> int:
+        return self.tool_limits.get(tool_key, self.default_tool_limit)
+    
+    @property
+    def queue_depth(self) -> int:
+        return len(self._waiters)
+    
+    def is_full(self) -> bool:
+        return len(self._waiters) >= self.max_queue
+    
+    @asynccontextmanager
+    async def slot(
+        self,
+        tool_key: str,
+        tool: SecurityTool,
+        engagement_id: Optional[int] = None,
+        priority: Optional[int] = None,
+    ) -> AsyncIterator[float]:
+        """
+        Wait for an execution slot and hold it for the duration of the block.
+        
+        Yields the number of seconds spent queued.
+        
+        Raises:
+            SchedulerFull: if the queue is already at its maximum depth
+        """
+        if self.is_full():
+            raise SchedulerFull(f"Execution queue is full ({self.max_queue} waiting)")
+        
+        waiter = _Waiter(
+            priority=tool.risk_level if priority is None else priority,
+            seq=next(self._seq),
+            tool_key=tool_key,
+            category=tool.category,
+            engagement=engagement_id,
+            future=asyncio.get_running_loop().create_future(),
+        )
+        self._waiters.append(waiter)
+        QUEUE_DEPTH.labels(category=tool.category.value).inc()
+        self._dispatch()
+        
+        try:
+            await waiter.future
+        except asyncio.CancelledError:
+            if waiter in self._waiters:
+                self._waiters.remove(waiter)
+                QUEUE_DEPTH.labels(category=tool.category.value).dec()
+            elif waiter.future.done() and not waiter.future.cancelled():
+                # Granted just before the cancellation landed
+                self._release(waiter)
+            raise
+        
+        waited = time.monotonic() - waiter.enqueued_at
+        QUEUE_WAIT.labels(category=tool.category.value).observe(waited)
+        if waited >= 1:
+            logger.debug(f"Tool {tool_key} waited {waited:.2f}s for an execution slot")
+        
+        try:
+            yield waited
+        finally:
+            self._release(waiter)
+    
+    def _eligible(self, waiter: _Waiter) -> bool:
+        return (
+            self._running_by_category[waiter.category] < self.category_limit(waiter.category)
+            and self._running_by_tool[waiter.tool_key] < self.tool_limit(waiter.tool_key)
+        )
+    
+    def _dispatch(self) -> None:
+        """Grant slots to the best eligible waiters while budget remains."""
+        while self._waiters and self._running_total < self.max_concurrent:
+            eligible = [w for w in self._waiters if self._eligible(w)]
+            if not eligible:
+                return
+            waiter = min(
+                eligible,
+                key=lambda w: (w.priority, self._running_by_engagement[w.engagement], w.seq),
+            )
+            self._waiters.remove(waiter)
+            QUEUE_DEPTH.labels(category=waiter.category.value).dec()
+            if waiter.future.cancelled():
+                continue
+            self._acquire(waiter)
+            waiter.future.set_result(None)
+    
+    def _acquire(self, waiter: _Waiter) -> None:
+        self._running_total += 1
+        self._running_by_category[waiter.category] += 1
+        self._running_by_tool[waiter.tool_key] += 1
+        self._running_by_engagement[waiter.engagement] += 1
+        RUNNING.labels(category=waiter.category.value).inc()
+    
+    def _release(self, waiter: _Waiter) -> None:
+        self._running_total -= 1
+        self._running_by_category[waiter.category] -= 1
+        self._running_by_tool[waiter.tool_key] -= 1
+        self._running_by_engagement[waiter.engagement] -= 1
+        if not self._running_by_engagement[waiter.engagement]:
+            del self._running_by_engagement[waiter.engagement]
+        RUNNING.labels(category=waiter.category.value).dec()
+        self._dispatch()
+    
+    def stats(self) -> Dict[str, object]:
+        """Snapshot of queue and slot usage."""
+        now = time.monotonic()
+        queued_by_category: Dict[str, int] = defaultdict(int)
+        for waiter in self._waiters:
+            queued_by_category[waiter.category.value] += 1
+        return {
+            "max_concurrent": self.max_concurrent,
+            "running": self._running_total,
+            "queued": len(self._waiters),
+            "max_queue": self.max_queue,
+            "oldest_wait_seconds": max(
+                (now - w.enqueued_at for w in self._waiters), default=0.0
+            ),
+            "running_by_category": {
+                c.value: n for c, n in self._running_by_category.items() if n
+            },
+            "queued_by_category": dict(queued_by_category),
+            "running_by_engagement": {
+                str(e): n for e, n in self._running_by_engagement.items()
+            },
+        }
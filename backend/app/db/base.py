@@ -19,6 +19,11 @@ class Base(DeclarativeBase):
     
     created_at = Column(DateTime, default=datetime.utcnow, nullable=False)
     updated_at = Column(DateTime, default=datetime.utcnow, onupdate=datetime.utcnow, nullable=False)
+    
+    # List pages default to this column, newest first (see app.db.query);
+    # __sortable__ lists the NOT NULL columns a client may sort by instead
+    __page_order__ = "created_at"
+    __sortable__ = ("created_at", "updated_at")
 
 
 class TimestampMixin:
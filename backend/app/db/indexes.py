@@ -0,0 +1,119 @@
+"""
+ANPTOP Backend - Database Index Checks
+Compares the indexes the models declare with the ones the database actually has
+"""
+
+from typing import List, Optional, Sequence, Tuple
+
+from sqlalchemy import Index, MetaData, inspect, text
+from sqlalchemy.engine import Connection
+from sqlalchemy.engine.reflection import Inspector
+
+from app.db.base import Base
+
+
+def has_index(
+    inspector: Inspector,
+    table: str,
+    name: str,
+    columns: Sequence[str],
+    unique: bool = False,
+) -> bool:
+    """
+    Whether ``table`` already has index ``name``, or an equivalent one.
+    
+    An index under another name counts if its leading columns are
+    ``columns`` (a wider index serves the same lookups); a unique index is
+    only satisfied by a unique index or constraint on exactly those columns.
+    """
+    columns = tuple(columns)
+    existing = [
+        (index["name"], tuple(index["column_names"]), bool(index["unique"]))
+        for index in inspector.get_indexes(table)
+    ]
+    existing += [
+        (constraint["name"], tuple(constraint["column_names"]), True)
+        for constraint in inspector.get_unique_constraints(table)
+    ]
+    for index_name, index_columns, index_unique in existing:
+        if index_name == name:
+            return True
+        if unique:
+            if index_unique and index_columns == columns:
+                return True
+        elif index_columns[:len(columns)] == columns:
+            return True
+    return False
+
+
+def _invalid_postgres_indexes(connection: Connection) -> set:
+    return set(connection.execute(text(
+        "SELECT c.relname FROM pg_index i JOIN pg_class c ON c.oid = i.indexrelid WHERE NOT i.indisvalid"
+    )).scalars())
+
+
+def create_indexes(op, indexes: Sequence[Tuple[str, str, List[str]]]) -> None:
+    """
+    Create the ``(name, table, columns)`` indexes a migration adds, skipping
+    those already present and tables that do not exist.
+    
+    On PostgreSQL the indexes are built ``CONCURRENTLY`` so large tables stay
+    writable during the upgrade; an invalid index left by an interrupted
+    build is dropped and rebuilt.
+    """
+    bind = op.get_bind()
+    postgres = bind.dialect.name == "postgresql"
+    inspector = inspect(bind)
+    tables = set(inspector.get_table_names())
+    invalid = _invalid_postgres_indexes(bind) if postgres else set()
+    
+    pending = []
+    for name, table, columns in indexes:
+        if table not in tables:
+            continue
+        if name in invalid:
+            pending.append((name, table, columns, True))
+        elif not has_index(inspector, table, name, columns):
+            pending.append((name, table, columns, False))
+    if not pending:
+        return
+    
+    if not postgres:
+        for name, table, columns, _ in pending:
+            op.create_index(name, table, columns)
+        return
+    
+    # CREATE INDEX CONCURRENTLY cannot run inside a transaction
+    with op.get_context().autocommit_block():
+        for name, table, columns, rebuild in pending:
+            if rebuild:
+                op.drop_index(name, table_name=table, postgresql_concurrently=True, if_exists=True)
+            op.create_index(name, table, columns, postgresql_concurrently=True)
+
+
+def missing_indexes(connection: Connection, metadata: Optional[MetaData] = None) -> List[Index]:
+    """
+    Declared indexes that the connected database lacks.
+    
+    Tables that do not exist yet are skipped; ``create_all`` or a migration
+    creates them with their indexes. Run with ``AsyncConnection.run_sync``.
+    """
+    metadata = metadata if metadata is not None else Base.metadata
+    inspector = inspect(connection)
+    tables = set(inspector.get_table_names())
+    missing = []
+    for table in sorted(metadata.tables.values(), key=lambda t: t.name):
+        if table.name not in tables:
+            continue
+        for index in sorted(table.indexes, key=lambda i: i.name or ""):
+            columns = [column.name for column in index.columns]
+            if not has_index(inspector, table.name, index.name, columns, bool(index.unique)):
+                missing.append(index)
+    return missing
+
+
+def describe_index(index: Index) -> str:
+    """``table(col, ...)`` for log messages."""
+    columns = ", ".join(column.name for column in index.columns)
+    unique = "unique " if index.unique else ""
+    return f"{unique}{index.name} on {index.table.name}({columns})"
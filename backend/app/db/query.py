@@ -0,0 +1,129 @@
+"""
+ANPTOP Backend - List Queries
+Compiles a list request's filters, sort and page into a single SELECT
+"""
+
+from dataclasses import dataclass
+from datetime import datetime
+from typing import Any, Iterable, Optional, Tuple
+
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.db.pagination import Page, cursor_position, paginate
+
+
+@dataclass
+class ListOptions:
+    """
+    The parts of a list request every model shares.
+    
+    ``sort`` names a column from the model's ``__sortable__``, prefixed with
+    ``-`` for descending; the default is the model's ``__page_order__``,
+    newest first. ``since``/``until`` bound that same default column.
+    """
+    cursor: Optional[str] = None
+    limit: int = 100
+    skip: int = 0
+    sort: Optional[str] = None
+    since: Optional[datetime] = None
+    until: Optional[datetime] = None
+    with_total: bool = False
+    
+    def validate(self, model) -> None:
+        """
+        Raises:
+            ValueError: if the sort is not allowed or the cursor does not fit it
+        """
+        column, descending = sort_column(model, self.sort)
+        if self.cursor:
+            cursor_position(self.cursor, column, descending)
+
+
+def _range(column, since: Optional[datetime], until: Optional[datetime]) -> list:
+    criteria = []
+    if since is not None:
+        criteria.append(column >= since)
+    if until is not None:
+        criteria.append(column < until)
+    return criteria
+
+
+def sort_column(model, sort: Optional[str] = None) -> Tuple[Any, bool]:
+    """
+    Resolve ``sort`` to ``(column, descending)``.
+    
+    Raises:
+        ValueError: if the column is not one of the model's sortable columns
+    """
+    if not sort:
+        return getattr(model, model.__page_order__), True
+    descending = sort.startswith("-")
+    name = sort.lstrip("-+")
+    if name not in model.__sortable__:
+        raise ValueError(f"Cannot sort by '{name}'; sortable: {', '.join(model.__sortable__)}")
+    return getattr(model, name), descending
+
+
+class ListQuery:
+    """
+    Filters for one model, collected and then run as one paginated SELECT.
+    
+    Filters given as None are skipped, so optional query parameters can be
+    passed straight through::
+    
+        await ListQuery(Target).where(engagement_id=1, status=status).tagged(tags).page(db, options)
+    """
+    
+    def __init__(self, model):
+        self.model = model
+        self.criteria = []
+    
+    def where(self, *criteria, **equals) -> "ListQuery":
+        """Add SQL criteria, and ``column=value`` (or ``column=[values]``) equality filters."""
+        self.criteria.extend(criteria)
+        for name, value in equals.items():
+            if value is None:
+                continue
+            column = getattr(self.model, name)
+            if isinstance(value, (list, tuple, set, frozenset)):
+                if value:
+                    self.criteria.append(column.in_(list(value)))
+            else:
+                self.criteria.append(column == value)
+        return self
+    
+    def tagged(self, tags: Optional[Iterable[str]], column: str = "tags") -> "ListQuery":
+        """Rows carrying every one of ``tags`` (PostgreSQL array containment)."""
+        if tags:
+            self.criteria.append(getattr(self.model, column).contains(list(tags)))
+        return self
+    
+    def between(self, column, since: Optional[datetime] = None, until: Optional[datetime] = None) -> "ListQuery":
+        """``since <= column < until``, either bound optional."""
+        self.criteria.extend(_range(column, since, until))
+        return self
+    
+    def statement(self, options: ListOptions):
+        """The filtered SELECT, before sorting and paging."""
+        column = getattr(self.model, self.model.__page_order__)
+        return select(self.model).where(*self.criteria, *_range(column, options.since, options.until))
+    
+    async def page(self, db: AsyncSession, options: Optional[ListOptions] = None) -> Page:
+        """
+        Raises:
+            ValueError: if the sort or cursor is invalid
+        """
+        options = options or ListOptions()
+        column, descending = sort_column(self.model, options.sort)
+        return await paginate(
+            db,
+            self.statement(options),
+            column,
+            self.model.id,
+            cursor=options.cursor,
+            limit=options.limit,
+            skip=options.skip,
+            with_total=options.with_total,
+            descending=descending,
+        )
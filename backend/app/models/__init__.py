@@ -7,12 +7,13 @@ from app.models.engagement import Engagement, EngagementStatus, EngagementType
 from app.models.target import Target, TargetType, TargetStatus, TargetService
 from app.models.workflow import Workflow, WorkflowType, WorkflowStatus, WorkflowExecution
 from app.models.vulnerability import Vulnerability, VulnerabilityStatus, Severity, Finding
-from app.models.evidence import Evidence, EvidenceType, EvidenceChainOfCustody, AuditLog
+from app.models.evidence import Evidence, EvidenceType, EvidenceChainOfCustody, AuditLog, AuditSeal
 from app.models.approval import Approval, ApprovalStatus, ApprovalType, Report, ReportType
 from app.models.cve import CVE, CVEKeystones
 from app.models.cloud import CloudProvider, CloudFinding, CloudAsset
 from app.models.kubernetes import KubernetesCluster, KubernetesFinding, KubernetesPod
 from app.models.payment import PaymentGateway, PaymentFinding, PCIScanResult, CardDataExposure
+from app.models.tool_execution import ToolExecution
 from app.models.social_engineering import PhishingCampaign, PhishingResult, PhishingTemplate, SocialEngineeringFinding, TargetList
 
 __all__ = [
@@ -37,6 +38,7 @@ __all__ = [
     "EvidenceType",
     "EvidenceChainOfCustody",
     "AuditLog",
+    "AuditSeal",
     "Approval",
     "ApprovalStatus",
     "ApprovalType",
@@ -59,4 +61,5 @@ __all__ = [
     "PhishingTemplate",
     "SocialEngineeringFinding",
     "TargetList",
+    "ToolExecution",
 ]
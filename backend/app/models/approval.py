@@ -5,9 +5,11 @@ ANPTOP Backend - Approval and Report Models
 from datetime import datetime
 from enum import Enum as PyEnum
 from typing import List, Optional
-from sqlalchemy import Column, Integer, String, Text, DateTime, Enum, ForeignKey, JSON, Boolean
+from sqlalchemy import Column, Integer, String, Text, DateTime, Enum, ForeignKey, JSON, Boolean, Index
 from sqlalchemy.orm import relationship
 from app.db.base import Base, TimestampMixin
+from app.db.pagination import Page
+from app.db.query import ListOptions, ListQuery
 
 
 class ApprovalStatus(str, PyEnum):
@@ -32,6 +34,11 @@ class ApprovalType(str, PyEnum):
 class Approval(Base, TimestampMixin):
     """Approval request model for gated operations."""
     
+    __table_args__ = (
+        Index("ix_approvals_engagement_created", "engagement_id", "created_at", "id"),
+    )
+    __sortable__ = ("created_at", "updated_at", "priority", "status")
+    
     id = Column(Integer, primary_key=True, index=True)
     engagement_id = Column(Integer, ForeignKey("engagements.id"), nullable=False)
     
@@ -88,13 +95,20 @@ class Approval(Base, TimestampMixin):
         return result.scalars().all()
     
     @classmethod
-    async def get_by_engagement(cls, db, engagement_id: int) -> List["Approval"]:
-        """Get all approvals for an engagement."""
-        from sqlalchemy import select
-        result = await db.execute(
-            select(cls).where(cls.engagement_id == engagement_id).order_by(cls.created_at.desc())
+    async def get_by_engagement(
+        cls,
+        db,
+        engagement_id: int,
+        options: ListOptions = None,
+        status: Optional[List[ApprovalStatus]] = None,
+        approval_type: Optional[List[ApprovalType]] = None,
+    ) -> Page:
+        """Get a page of approvals for an engagement, filtered in SQL."""
+        return await (
+            ListQuery(cls)
+            .where(engagement_id=engagement_id, status=status, approval_type=approval_type)
+            .page(db, options)
         )
-        return result.scalars().all()
     
     async def save(self, db) -> "Approval":
         """Save the approval."""
@@ -143,6 +157,10 @@ class ReportType(str, PyEnum):
 class Report(Base, TimestampMixin):
     """Report model."""
     
+    __table_args__ = (
+        Index("ix_reports_engagement_created", "engagement_id", "created_at", "id"),
+    )
+    
     id = Column(Integer, primary_key=True, index=True)
     engagement_id = Column(Integer, ForeignKey("engagements.id"), nullable=False)
     
@@ -190,13 +208,11 @@ class Report(Base, TimestampMixin):
         return result.scalar_one_or_none()
     
     @classmethod
-    async def get_by_engagement(cls, db, engagement_id: int) -> List["Report"]:
-        """Get all reports for an engagement."""
-        from sqlalchemy import select
-        result = await db.execute(
-            select(cls).where(cls.engagement_id == engagement_id).order_by(cls.created_at.desc())
-        )
-        return result.scalars().all()
+    async def get_by_engagement(
+        cls, db, engagement_id: int, options: ListOptions = None, report_type: Optional[List[ReportType]] = None,
+    ) -> Page:
+        """Get a page of reports for an engagement, filtered in SQL."""
+        return await ListQuery(cls).where(engagement_id=engagement_id, report_type=report_type).page(db, options)
     
     @classmethod
     async def get_final_reports(cls, db, engagement_id: int) -> List["Report"]:
@@ -5,10 +5,12 @@ ANPTOP Backend - Engagement Model
 from datetime import datetime
 from enum import Enum as PyEnum
 from typing import List, Optional
-from sqlalchemy import Column, Integer, String, Text, DateTime, Enum, ForeignKey, JSON, Boolean
+from sqlalchemy import Column, Integer, String, Text, DateTime, Enum, ForeignKey, JSON, Boolean, Index, or_
 from sqlalchemy.orm import relationship
 from sqlalchemy.dialects.postgresql import ARRAY
 from app.db.base import Base, TimestampMixin
+from app.db.pagination import Page
+from app.db.query import ListOptions, ListQuery
 
 
 class EngagementStatus(str, PyEnum):
@@ -37,6 +39,14 @@ class EngagementType(str, PyEnum):
 class Engagement(Base, TimestampMixin):
     """Penetration testing engagement model."""
     
+    __table_args__ = (
+        Index("ix_engagements_created", "created_at", "id"),
+        Index("ix_engagements_status_created", "status", "created_at", "id"),
+        Index("ix_engagements_owner_created", "owner_id", "created_at", "id"),
+        Index("ix_engagements_team_members", "team_members", postgresql_using="gin"),
+    )
+    __sortable__ = ("created_at", "updated_at", "name", "status")
+    
     id = Column(Integer, primary_key=True, index=True)
     
     # Basic information
@@ -106,23 +116,37 @@ class Engagement(Base, TimestampMixin):
         return result.scalar_one_or_none()
     
     @classmethod
-    async def get_all(cls, db, skip: int = 0, limit: int = 100, status: str = None) -> List["Engagement"]:
-        """Get all engagements with optional status filter."""
-        from sqlalchemy import select
-        query = select(cls).offset(skip).limit(limit)
-        if status:
-            query = query.where(cls.status == status)
-        result = await db.execute(query)
-        return result.scalars().all()
+    async def get_all(
+        cls, db, options: ListOptions = None, status: Optional[List[EngagementStatus]] = None,
+        engagement_type: Optional[List[EngagementType]] = None,
+    ) -> Page:
+        """Get a page of engagements, filtered in SQL."""
+        return await ListQuery(cls).where(status=status, engagement_type=engagement_type).page(db, options)
     
     @classmethod
-    async def get_by_owner(cls, db, owner_id: int, skip: int = 0, limit: int = 100) -> List["Engagement"]:
-        """Get engagements by owner ID."""
-        from sqlalchemy import select
-        result = await db.execute(
-            select(cls).where(cls.owner_id == owner_id).offset(skip).limit(limit)
+    async def get_by_owner(
+        cls, db, owner_id: int, options: ListOptions = None, status: Optional[List[EngagementStatus]] = None,
+        engagement_type: Optional[List[EngagementType]] = None,
+    ) -> Page:
+        """Get a page of engagements by owner ID, filtered in SQL."""
+        return await (
+            ListQuery(cls)
+            .where(owner_id=owner_id, status=status, engagement_type=engagement_type)
+            .page(db, options)
+        )
+    
+    @classmethod
+    async def get_accessible(
+        cls, db, user_id: int, options: ListOptions = None, status: Optional[List[EngagementStatus]] = None,
+        engagement_type: Optional[List[EngagementType]] = None,
+    ) -> Page:
+        """Get a page of engagements the user owns or is a team member of, filtered in SQL."""
+        return await (
+            ListQuery(cls)
+            .where(or_(cls.owner_id == user_id, cls.team_members.contains([user_id])))
+            .where(status=status, engagement_type=engagement_type)
+            .page(db, options)
         )
-        return result.scalars().all()
     
     async def save(self, db) -> "Engagement":
         """Save the engagement."""
@@ -138,6 +162,12 @@ class Engagement(Base, TimestampMixin):
                 setattr(self, key, value)
         await db.commit()
         await db.refresh(self)
+        if "target_scope" in kwargs or "blacklisted_ips" in kwargs:
+            from app.core.scope import scope_cache
+            scope_cache.invalidate(self.id)
+        if "owner_id" in kwargs or "team_members" in kwargs:
+            from app.core.access import engagement_acl
+            engagement_acl.invalidate(self.id)
         return self
     
     async def add_target(self, db, target) -> None:
@@ -152,13 +182,11 @@ class Engagement(Base, TimestampMixin):
         db.add(finding)
         await db.commit()
     
+    def scope_index(self):
+        """The compiled scope of this engagement (scope minus blacklist)."""
+        from app.core.scope import scope_cache
+        return scope_cache.get(self.id, self.target_scope or [], self.blacklisted_ips or [])
+    
     def is_target_in_scope(self, target_ip: str) -> bool:
-        """Check if a target IP is within the engagement scope."""
-        if target_ip in self.blacklisted_ips:
-            return False
-        
-        for scope_pattern in self.target_scope:
-            if target_ip == scope_pattern or target_ip.startswith(scope_pattern.rstrip("*")):
-                return True
-        
-        return False
+        """Check if a target (address, network, host name or URL) is within the engagement scope."""
+        return self.scope_index().contains(target_ip)
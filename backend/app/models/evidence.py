@@ -5,9 +5,11 @@ ANPTOP Backend - Evidence and Audit Models
 from datetime import datetime
 from enum import Enum as PyEnum
 from typing import List, Optional
-from sqlalchemy import Column, Integer, String, Text, DateTime, Enum, ForeignKey, JSON, LargeBinary, Boolean
+from sqlalchemy import Column, Integer, String, Text, DateTime, Enum, ForeignKey, JSON, LargeBinary, Boolean, Index
 from sqlalchemy.orm import relationship
 from app.db.base import Base, TimestampMixin
+from app.db.pagination import Page
+from app.db.query import ListOptions, ListQuery
 
 
 class EvidenceType(str, PyEnum):
@@ -45,11 +47,23 @@ class EvidenceChainOfCustody(Base, TimestampMixin):
     
     # Relationships
     evidence = relationship("Evidence", back_populates="chain_of_custody")
+    
+    async def save(self, db) -> "EvidenceChainOfCustody":
+        """Save the custody record."""
+        db.add(self)
+        await db.commit()
+        await db.refresh(self)
+        return self
 
 
 class Evidence(Base, TimestampMixin):
     """Evidence model for collected artifacts."""
     
+    __table_args__ = (
+        Index("ix_evidence_engagement_created", "engagement_id", "created_at"),
+    )
+    __sortable__ = ("created_at", "updated_at", "collected_at", "evidence_type")
+    
     id = Column(Integer, primary_key=True, index=True)
     engagement_id = Column(Integer, ForeignKey("engagements.id"), nullable=False)
     target_id = Column(Integer, ForeignKey("targets.id"), nullable=True)
@@ -105,13 +119,20 @@ class Evidence(Base, TimestampMixin):
         return result.scalar_one_or_none()
     
     @classmethod
-    async def get_by_engagement(cls, db, engagement_id: int, skip: int = 0, limit: int = 100) -> List["Evidence"]:
-        """Get all evidence for an engagement."""
-        from sqlalchemy import select
-        result = await db.execute(
-            select(cls).where(cls.engagement_id == engagement_id).offset(skip).limit(limit)
+    async def get_by_engagement(
+        cls,
+        db,
+        engagement_id: int,
+        options: ListOptions = None,
+        evidence_type: Optional[List[EvidenceType]] = None,
+        target_id: Optional[int] = None,
+    ) -> Page:
+        """Get a page of evidence for an engagement, filtered in SQL."""
+        return await (
+            ListQuery(cls)
+            .where(engagement_id=engagement_id, evidence_type=evidence_type, target_id=target_id)
+            .page(db, options)
         )
-        return result.scalars().all()
     
     @classmethod
     async def get_by_target(cls, db, target_id: int) -> List["Evidence"]:
@@ -152,6 +173,14 @@ class Evidence(Base, TimestampMixin):
 class AuditLog(Base):
     """Audit log model for tracking all actions."""
     
+    __table_args__ = (
+        Index("ix_audit_logs_resource_timestamp", "resource", "resource_id", "timestamp"),
+        Index("ix_audit_logs_user_timestamp", "user_id", "timestamp"),
+        Index("ix_audit_logs_timestamp", "timestamp"),
+    )
+    __page_order__ = "timestamp"
+    __sortable__ = ("timestamp", "action")
+    
     id = Column(Integer, primary_key=True, index=True)
     user_id = Column(Integer, ForeignKey("users.id"), nullable=True)
     
@@ -183,26 +212,49 @@ class AuditLog(Base):
         return result.scalar_one_or_none()
     
     @classmethod
-    async def get_by_user(cls, db, user_id: int, skip: int = 0, limit: int = 100) -> List["AuditLog"]:
-        """Get audit logs for a user."""
-        from sqlalchemy import select
-        result = await db.execute(
-            select(cls).where(cls.user_id == user_id).order_by(cls.timestamp.desc()).offset(skip).limit(limit)
-        )
-        return result.scalars().all()
+    async def get_by_user(
+        cls, db, user_id: int, options: ListOptions = None, action: Optional[List[str]] = None,
+    ) -> Page:
+        """Get a page of audit logs for a user."""
+        return await ListQuery(cls).where(user_id=user_id, action=action).page(db, options)
     
     @classmethod
-    async def get_by_resource(cls, db, resource: str, resource_id: str = None) -> List["AuditLog"]:
-        """Get audit logs for a specific resource."""
-        from sqlalchemy import select
-        query = select(cls).where(cls.resource == resource)
-        if resource_id:
-            query = query.where(cls.resource_id == resource_id)
-        result = await db.execute(query.order_by(cls.timestamp.desc()))
-        return result.scalars().all()
+    async def get_by_resource(
+        cls, db, resource: str, resource_id: str = None, options: ListOptions = None,
+        action: Optional[List[str]] = None,
+    ) -> Page:
+        """Get a page of audit logs for a specific resource."""
+        return await (
+            ListQuery(cls)
+            .where(resource=resource, resource_id=resource_id or None, action=action)
+            .page(db, options)
+        )
     
     async def save(self, db) -> "AuditLog":
         """Save the audit log."""
         db.add(self)
         await db.commit()
         return self
+
+
+class AuditSeal(Base, TimestampMixin):
+    """
+    Merkle root over one flushed batch of audit logs, chained to the seal before it.
+    
+    ``chain_hash`` commits to the previous seal's chain hash, this batch's
+    root and its id range, so rewriting any sealed row, or dropping or
+    reordering a batch, breaks every chain hash after it.
+    """
+    
+    __table_args__ = (
+        Index("ix_audit_seals_last_log_id", "last_log_id"),
+    )
+    
+    id = Column(Integer, primary_key=True, index=True)
+    first_log_id = Column(Integer, nullable=False)
+    last_log_id = Column(Integer, nullable=False)
+    entry_count = Column(Integer, nullable=False)
+    merkle_root = Column(String(64), nullable=False)
+    previous_hash = Column(String(64), nullable=False)
+    chain_hash = Column(String(64), unique=True, nullable=False)
+    sealed_at = Column(DateTime, default=datetime.utcnow, nullable=False)
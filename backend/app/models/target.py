@@ -5,10 +5,12 @@ ANPTOP Backend - Target Model
 from datetime import datetime
 from enum import Enum as PyEnum
 from typing import List, Optional
-from sqlalchemy import Column, Integer, String, Text, DateTime, Enum, ForeignKey, JSON, Boolean
+from sqlalchemy import Column, Integer, String, Text, DateTime, Enum, ForeignKey, JSON, Boolean, Index
 from sqlalchemy.orm import relationship
 from sqlalchemy.dialects.postgresql import ARRAY
 from app.db.base import Base, TimestampMixin
+from app.db.pagination import Page
+from app.db.query import ListOptions, ListQuery
 
 
 class TargetType(str, PyEnum):
@@ -43,6 +45,14 @@ class TargetStatus(str, PyEnum):
 class Target(Base, TimestampMixin):
     """Target model for engagement targets."""
     
+    __table_args__ = (
+        Index("uq_targets_engagement_identifier", "engagement_id", "identifier", unique=True),
+        Index("ix_targets_engagement_status_created", "engagement_id", "status", "created_at"),
+        Index("ix_targets_identifier", "identifier"),
+        Index("ix_targets_engagement_created", "engagement_id", "created_at", "id"),
+    )
+    __sortable__ = ("created_at", "updated_at", "identifier", "status", "target_type")
+    
     id = Column(Integer, primary_key=True, index=True)
     engagement_id = Column(Integer, ForeignKey("engagements.id"), nullable=False)
     
@@ -105,13 +115,23 @@ class Target(Base, TimestampMixin):
         return result.scalar_one_or_none()
     
     @classmethod
-    async def get_by_engagement(cls, db, engagement_id: int, skip: int = 0, limit: int = 100) -> List["Target"]:
-        """Get all targets for an engagement."""
-        from sqlalchemy import select
-        result = await db.execute(
-            select(cls).where(cls.engagement_id == engagement_id).offset(skip).limit(limit)
+    async def get_by_engagement(
+        cls,
+        db,
+        engagement_id: int,
+        options: ListOptions = None,
+        status: Optional[List[TargetStatus]] = None,
+        target_type: Optional[List[TargetType]] = None,
+        is_in_scope: Optional[bool] = None,
+        tags: Optional[List[str]] = None,
+    ) -> Page:
+        """Get a page of targets for an engagement, filtered in SQL."""
+        return await (
+            ListQuery(cls)
+            .where(engagement_id=engagement_id, status=status, target_type=target_type, is_in_scope=is_in_scope)
+            .tagged(tags)
+            .page(db, options)
         )
-        return result.scalars().all()
     
     @classmethod
     async def get_by_identifier(cls, db, identifier: str) -> Optional["Target"]:
@@ -150,6 +170,10 @@ class Target(Base, TimestampMixin):
 class TargetService(Base):
     """Service running on a target."""
     
+    __table_args__ = (
+        Index("ix_target_services_target_id", "target_id"),
+    )
+    
     id = Column(Integer, primary_key=True, index=True)
     target_id = Column(Integer, ForeignKey("targets.id"), nullable=False)
     
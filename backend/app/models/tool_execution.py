@@ -0,0 +1,111 @@
+"""
+ANPTOP Backend - Tool Execution History Model
+"""
+
+from datetime import datetime
+from typing import List, Optional
+from sqlalchemy import Column, Integer, BigInteger, String, Text, DateTime, Float, Boolean, ForeignKey, Index
+from app.db.base import Base, TimestampMixin
+from app.db.pagination import Page
+from app.db.query import ListOptions, ListQuery
+
+
+class ToolExecution(Base, TimestampMixin):
+    """Record of a single security tool run (output itself lives in the evidence file)."""
+    
+    __table_args__ = (
+        Index("ix_tool_executions_tool_started", "tool_name", "started_at"),
+        Index("ix_tool_executions_engagement_started", "engagement_id", "started_at"),
+        Index("ix_tool_executions_status_started", "status", "started_at"),
+    )
+    __page_order__ = "started_at"
+    __sortable__ = ("started_at", "duration_seconds", "tool_name", "status")
+    
+    id = Column(Integer, primary_key=True, index=True)
+    execution_id = Column(String(36), unique=True, index=True, nullable=False)
+    tool_name = Column(String(100), nullable=False)
+    engagement_id = Column(Integer, ForeignKey("engagements.id"), nullable=True)
+    executed_by_id = Column(Integer, ForeignKey("users.id"), nullable=True)
+    
+    # Execution info
+    command = Column(Text, nullable=False)
+    status = Column(String(20), nullable=False)
+    return_code = Column(Integer, nullable=True)
+    cached = Column(Boolean, default=False, nullable=False)
+    
+    # Timing
+    started_at = Column(DateTime, default=datetime.utcnow, index=True, nullable=False)
+    duration_seconds = Column(Float, default=0, nullable=False)
+    
+    # Output (bounded previews; full output is in output_file)
+    output_file = Column(String(500), nullable=True)
+    hash_sha256 = Column(String(64), nullable=True)
+    hash_md5 = Column(String(32), nullable=True)
+    stdout_bytes = Column(BigInteger, default=0, nullable=False)
+    stderr_bytes = Column(BigInteger, default=0, nullable=False)
+    output_truncated = Column(Boolean, default=False, nullable=False)
+    stdout_preview = Column(Text, nullable=True)
+    stderr_preview = Column(Text, nullable=True)
+    
+    @classmethod
+    async def get_by_execution_id(cls, db, execution_id: str) -> Optional["ToolExecution"]:
+        """Get an execution record by its execution ID."""
+        from sqlalchemy import select
+        result = await db.execute(select(cls).where(cls.execution_id == execution_id))
+        return result.scalar_one_or_none()
+    
+    @classmethod
+    async def search(
+        cls,
+        db,
+        options: ListOptions = None,
+        tool_name: Optional[str] = None,
+        engagement_id: Optional[int] = None,
+        status: Optional[List[str]] = None,
+        visible_to: Optional[int] = None,
+    ) -> Page:
+        """
+        Find a page of past executions; ``options.since``/``until`` bound ``started_at``.
+        
+        With ``visible_to``, only that user's own executions and those in
+        engagements they own or are on the team of are returned.
+        """
+        query = ListQuery(cls).where(
+            tool_name=tool_name.lower() if tool_name else None, engagement_id=engagement_id, status=status,
+        )
+        if visible_to is not None:
+            from sqlalchemy import or_, select
+            from app.models.engagement import Engagement
+            accessible = select(Engagement.id).where(
+                or_(Engagement.owner_id == visible_to, Engagement.team_members.contains([visible_to]))
+            )
+            query = query.where(or_(cls.executed_by_id == visible_to, cls.engagement_id.in_(accessible)))
+        return await query.page(db, options)
+    
+    @classmethod
+    async def record(cls, db, result, preview_limit: int = 4096) -> None:
+        """Persist a ToolExecutionResult without the bulk of its output."""
+        from sqlalchemy import insert
+        await db.execute(insert(cls).values(
+            execution_id=result.execution_id,
+            tool_name=result.tool_name.lower(),
+            engagement_id=result.engagement_id,
+            executed_by_id=result.user_id,
+            command=result.command,
+            status=result.status,
+            return_code=result.return_code,
+            cached=result.cached,
+            started_at=result.timestamp,
+            duration_seconds=result.duration_seconds,
+            output_file=result.output_file,
+            hash_sha256=result.hash_sha256,
+            hash_md5=result.hash_md5,
+            stdout_bytes=result.stdout_bytes,
+            stderr_bytes=result.stderr_bytes,
+            output_truncated=result.output_truncated,
+            stdout_preview=result.stdout[:preview_limit],
+            stderr_preview=result.stderr[:preview_limit],
+            created_at=datetime.utcnow(),
+            updated_at=datetime.utcnow(),
+        ))
+        await db.commit()
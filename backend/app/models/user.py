@@ -21,9 +21,90 @@ class UserRole(str, PyEnum):
     API = "api"
 
 
+# OAuth2 scopes granted to each role
+ROLE_SCOPES = {
+    UserRole.ADMIN: ["admin", "lead", "senior", "tester", "analyst", "viewer", "api"],
+    UserRole.LEAD: ["lead", "senior", "tester", "analyst", "viewer"],
+    UserRole.SENIOR: ["senior", "tester", "analyst", "viewer"],
+    UserRole.TESTER: ["tester", "analyst"],
+    UserRole.ANALYST: ["analyst"],
+    UserRole.VIEWER: ["viewer"],
+    UserRole.API: ["api"],
+}
+
+# Role-based permissions (admins have all permissions)
+ROLE_PERMISSIONS = {
+    UserRole.LEAD: [
+        "engagements:create", "engagements:read", "engagements:update", "engagements:delete",
+        "targets:create", "targets:read", "targets:update", "targets:delete",
+        "workflows:execute", "workflows:approve", "workflows:create", "workflows:read",
+        "reports:create", "reports:read", "reports:export", "reports:delete",
+        "users:read", "users:create",
+    ],
+    UserRole.SENIOR: [
+        "engagements:read", "targets:read", "targets:create", "targets:update",
+        "workflows:execute", "workflows:approve", "workflows:read",
+        "reports:create", "reports:read", "reports:export",
+    ],
+    UserRole.TESTER: [
+        "engagements:read", "targets:read", "workflows:execute", "reports:read",
+    ],
+    UserRole.ANALYST: [
+        "engagements:read", "reports:create", "reports:read", "reports:export",
+        "findings:create", "findings:read", "findings:update",
+    ],
+    UserRole.VIEWER: [
+        "engagements:read", "reports:read",
+    ],
+    UserRole.API: [
+        "engagements:read", "targets:read", "workflows:execute", "reports:read",
+    ],
+}
+
+
+# Permissions compiled once: one bit per permission, one mask per role
+PERMISSION_BITS = {
+    permission: 1 << bit
+    for bit, permission in enumerate(sorted({p for permissions in ROLE_PERMISSIONS.values() for p in permissions}))
+}
+ALL_PERMISSIONS = (1 << len(PERMISSION_BITS)) - 1
+
+
+def permission_mask(*permissions: str) -> int:
+    """The bits of ``permissions``; names no role grants have no bit and add nothing."""
+    mask = 0
+    for permission in permissions:
+        mask |= PERMISSION_BITS.get(permission, 0)
+    return mask
+
+
+def compile_role_masks(role_permissions: dict) -> dict:
+    """One permission mask per role from a role -> permission names table; admins get every bit."""
+    return {
+        role: ALL_PERMISSIONS if role == UserRole.ADMIN else permission_mask(*role_permissions.get(role, []))
+        for role in UserRole
+    }
+
+
+ROLE_PERMISSION_MASKS = compile_role_masks(ROLE_PERMISSIONS)
+
+
+def role_permission_mask(role: UserRole) -> int:
+    return ROLE_PERMISSION_MASKS.get(role, 0)
+
+
+def role_has_permission(role: UserRole, permission: str) -> bool:
+    """Check if a role grants a specific permission."""
+    if role == UserRole.ADMIN:
+        return True
+    return bool(ROLE_PERMISSION_MASKS.get(role, 0) & PERMISSION_BITS.get(permission, 0))
+
+
 class User(Base, TimestampMixin):
     """User model for authentication and authorization."""
     
+    Role = UserRole
+    
     id = Column(Integer, primary_key=True, index=True)
     email = Column(String(255), unique=True, index=True, nullable=False)
     username = Column(String(100), unique=True, index=True, nullable=False)
@@ -42,8 +123,9 @@ class User(Base, TimestampMixin):
     password_reset_token = Column(String(255), nullable=True)
     password_reset_expires = Column(DateTime, nullable=True)
     
-    # API Key (for API users)
-    api_key = Column(String(255), nullable=True)
+    # API Key (for API users): looked up by prefix, checked against a keyed digest
+    api_key = Column(String(255), nullable=True)  # no longer stored; cleared by migration 0006
+    api_key_prefix = Column(String(32), nullable=True, index=True)
     api_key_hash = Column(String(255), nullable=True)
     
     # Relationships
@@ -54,54 +136,11 @@ class User(Base, TimestampMixin):
     
     def get_scopes(self) -> List[str]:
         """Get list of scopes based on user role."""
-        scopes = {
-            UserRole.ADMIN: ["admin", "lead", "senior", "tester", "analyst", "viewer", "api"],
-            UserRole.LEAD: ["lead", "senior", "tester", "analyst", "viewer"],
-            UserRole.SENIOR: ["senior", "tester", "analyst", "viewer"],
-            UserRole.TESTER: ["tester", "analyst"],
-            UserRole.ANALYST: ["analyst"],
-            UserRole.VIEWER: ["viewer"],
-            UserRole.API: ["api"],
-        }
-        return scopes.get(self.role, [])
+        return list(ROLE_SCOPES.get(self.role, []))
     
     def has_permission(self, permission: str) -> bool:
         """Check if user has a specific permission."""
-        # Admins have all permissions
-        if self.role == UserRole.ADMIN:
-            return True
-        
-        # Define role-based permissions
-        role_permissions = {
-            UserRole.LEAD: [
-                "engagements:create", "engagements:read", "engagements:update", "engagements:delete",
-                "targets:create", "targets:read", "targets:update", "targets:delete",
-                "workflows:execute", "workflows:approve", "workflows:create", "workflows:read",
-                "reports:create", "reports:read", "reports:export", "reports:delete",
-                "users:read", "users:create",
-            ],
-            UserRole.SENIOR: [
-                "engagements:read", "targets:read", "targets:create", "targets:update",
-                "workflows:execute", "workflows:approve", "workflows:read",
-                "reports:create", "reports:read", "reports:export",
-            ],
-            UserRole.TESTER: [
-                "engagements:read", "targets:read", "workflows:execute", "reports:read",
-            ],
-            UserRole.ANALYST: [
-                "engagements:read", "reports:create", "reports:read", "reports:export",
-                "findings:create", "findings:read", "findings:update",
-            ],
-            UserRole.VIEWER: [
-                "engagements:read", "reports:read",
-            ],
-            UserRole.API: [
-                "engagements:read", "targets:read", "workflows:execute", "reports:read",
-            ],
-        }
-        
-        user_permissions = role_permissions.get(self.role, [])
-        return permission in user_permissions or "*" in user_permissions
+        return role_has_permission(self.role, permission)
     
     # CRUD operations
     @classmethod
@@ -125,6 +164,13 @@ class User(Base, TimestampMixin):
         result = await db.execute(select(cls).where(cls.username == username))
         return result.scalar_one_or_none()
     
+    @classmethod
+    async def get_by_api_key_prefix(cls, db, prefix: str) -> List["User"]:
+        """Get users whose API key starts with ``prefix`` (normally at most one)."""
+        from sqlalchemy import select
+        result = await db.execute(select(cls).where(cls.api_key_prefix == prefix))
+        return result.scalars().all()
+    
     @classmethod
     async def get_all(cls, db, skip: int = 0, limit: int = 100) -> List["User"]:
         """Get all users with pagination."""
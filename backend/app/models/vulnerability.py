@@ -5,9 +5,11 @@ ANPTOP Backend - Vulnerability and Finding Models
 from datetime import datetime
 from enum import Enum as PyEnum
 from typing import List, Optional
-from sqlalchemy import Column, Integer, String, Text, DateTime, Enum, ForeignKey, JSON, Float, Boolean
+from sqlalchemy import Column, Integer, String, Text, DateTime, Enum, ForeignKey, JSON, Float, Boolean, Index
 from sqlalchemy.orm import relationship
 from app.db.base import Base, TimestampMixin
+from app.db.pagination import Page
+from app.db.query import ListOptions, ListQuery
 
 
 class Severity(str, PyEnum):
@@ -33,6 +35,15 @@ class VulnerabilityStatus(str, PyEnum):
 class Vulnerability(Base, TimestampMixin):
     """Vulnerability model."""
     
+    __table_args__ = (
+        Index("ix_vulnerabilities_engagement_fingerprint", "engagement_id", "fingerprint", unique=True),
+        Index("ix_vulnerabilities_engagement_severity", "engagement_id", "severity"),
+        Index("ix_vulnerabilities_engagement_status_created", "engagement_id", "status", "created_at"),
+        Index("ix_vulnerabilities_cve_id", "cve_id"),
+        Index("ix_vulnerabilities_engagement_created", "engagement_id", "created_at", "id"),
+    )
+    __sortable__ = ("created_at", "updated_at", "severity", "status", "name")
+    
     id = Column(Integer, primary_key=True, index=True)
     target_id = Column(Integer, ForeignKey("targets.id"), nullable=True)
     engagement_id = Column(Integer, ForeignKey("engagements.id"), nullable=False)
@@ -70,6 +81,7 @@ class Vulnerability(Base, TimestampMixin):
     discovered_by = Column(String(255), nullable=True)
     discovery_method = Column(String(255), nullable=True)
     tool_used = Column(String(255), nullable=True)
+    fingerprint = Column(String(64), nullable=True)  # scanner finding identity, for re-run upserts
     
     # Business impact
     business_impact = Column(Text, nullable=True)
@@ -91,25 +103,26 @@ class Vulnerability(Base, TimestampMixin):
         return result.scalar_one_or_none()
     
     @classmethod
-    async def get_by_engagement(cls, db, engagement_id: int, skip: int = 0, limit: int = 100) -> List["Vulnerability"]:
-        """Get all vulnerabilities for an engagement."""
-        from sqlalchemy import select
-        result = await db.execute(
-            select(cls).where(cls.engagement_id == engagement_id).offset(skip).limit(limit)
+    async def get_by_engagement(
+        cls,
+        db,
+        engagement_id: int,
+        options: ListOptions = None,
+        severity: Optional[List[Severity]] = None,
+        status: Optional[List[VulnerabilityStatus]] = None,
+        target_id: Optional[int] = None,
+    ) -> Page:
+        """Get a page of vulnerabilities for an engagement, filtered in SQL."""
+        return await (
+            ListQuery(cls)
+            .where(engagement_id=engagement_id, severity=severity, status=status, target_id=target_id)
+            .page(db, options)
         )
-        return result.scalars().all()
     
     @classmethod
-    async def get_by_severity(cls, db, engagement_id: int, severity: Severity) -> List["Vulnerability"]:
-        """Get vulnerabilities by severity."""
-        from sqlalchemy import select
-        result = await db.execute(
-            select(cls).where(
-                cls.engagement_id == engagement_id,
-                cls.severity == severity
-            )
-        )
-        return result.scalars().all()
+    async def get_by_severity(cls, db, engagement_id: int, severity: Severity, options: ListOptions = None) -> Page:
+        """Get a page of vulnerabilities by severity."""
+        return await cls.get_by_engagement(db, engagement_id, options, severity=severity)
     
     @classmethod
     async def get_by_cve(cls, db, cve_id: str) -> Optional["Vulnerability"]:
@@ -5,9 +5,11 @@ ANPTOP Backend - Workflow Model
 from datetime import datetime
 from enum import Enum as PyEnum
 from typing import List, Optional
-from sqlalchemy import Column, Integer, String, Text, DateTime, Enum, ForeignKey, JSON, Boolean
+from sqlalchemy import Column, Integer, String, Text, DateTime, Enum, ForeignKey, JSON, Boolean, Index
 from sqlalchemy.orm import relationship
 from app.db.base import Base, TimestampMixin
+from app.db.pagination import Page
+from app.db.query import ListOptions, ListQuery
 
 
 class WorkflowType(str, PyEnum):
@@ -44,6 +46,8 @@ class WorkflowStatus(str, PyEnum):
 class Workflow(Base, TimestampMixin):
     """Workflow definition model."""
     
+    __sortable__ = ("created_at", "updated_at", "name", "workflow_type")
+    
     id = Column(Integer, primary_key=True, index=True)
     n8n_workflow_id = Column(String(255), nullable=True)  # n8n workflow ID
     
@@ -91,11 +95,20 @@ class Workflow(Base, TimestampMixin):
         return result.scalars().all()
     
     @classmethod
-    async def get_all(cls, db, skip: int = 0, limit: int = 100) -> List["Workflow"]:
-        """Get all workflows."""
-        from sqlalchemy import select
-        result = await db.execute(select(cls).offset(skip).limit(limit))
-        return result.scalars().all()
+    async def get_all(
+        cls,
+        db,
+        options: ListOptions = None,
+        workflow_type: Optional[List[WorkflowType]] = None,
+        is_active: Optional[bool] = None,
+        category: Optional[str] = None,
+    ) -> Page:
+        """Get a page of workflows, filtered in SQL."""
+        return await (
+            ListQuery(cls)
+            .where(workflow_type=workflow_type, is_active=is_active, category=category)
+            .page(db, options)
+        )
     
     @classmethod
     async def get_active(cls, db) -> List["Workflow"]:
@@ -124,6 +137,12 @@ class Workflow(Base, TimestampMixin):
 class WorkflowExecution(Base, TimestampMixin):
     """Workflow execution tracking model."""
     
+    __table_args__ = (
+        Index("ix_workflow_executions_engagement_status_created", "engagement_id", "status", "created_at"),
+        Index("ix_workflow_executions_engagement_created", "engagement_id", "created_at", "id"),
+    )
+    __sortable__ = ("created_at", "updated_at", "status")
+    
     id = Column(Integer, primary_key=True, index=True)
     workflow_id = Column(Integer, ForeignKey("workflows.id"), nullable=False)
     engagement_id = Column(Integer, ForeignKey("engagements.id"), nullable=False)
@@ -167,13 +186,20 @@ class WorkflowExecution(Base, TimestampMixin):
         return result.scalar_one_or_none()
     
     @classmethod
-    async def get_by_engagement(cls, db, engagement_id: int, skip: int = 0, limit: int = 100) -> List["WorkflowExecution"]:
-        """Get all executions for an engagement."""
-        from sqlalchemy import select
-        result = await db.execute(
-            select(cls).where(cls.engagement_id == engagement_id).offset(skip).limit(limit)
+    async def get_by_engagement(
+        cls,
+        db,
+        engagement_id: int,
+        options: ListOptions = None,
+        status: Optional[List[WorkflowStatus]] = None,
+        workflow_id: Optional[int] = None,
+    ) -> Page:
+        """Get a page of executions for an engagement, filtered in SQL."""
+        return await (
+            ListQuery(cls)
+            .where(engagement_id=engagement_id, status=status, workflow_id=workflow_id)
+            .page(db, options)
         )
-        return result.scalars().all()
     
     @classmethod
     async def get_pending_approvals(cls, db, required_role: str) -> List["WorkflowExecution"]:
@@ -14,11 +14,16 @@ from prometheus_client import generate_latest, CONTENT_TYPE_LATEST
 
 from app.core.config import settings
 from app.api.router import api_router
+from app.api.pagination import PAGE_HEADERS
 from app.db.session import engine, Base
+from app.db.indexes import missing_indexes, describe_index
+from app.core.tool_executor import tool_executor
+from app.core.audit_writer import audit_entry, audit_writer
+from app.core.credentials import password_hasher
+from app.core.kill_switch import kill_switch
+from app.core.rate_limit import RATE_LIMIT_HEADERS, RateLimitMiddleware, rate_limiter
 from app.core.security import (
     verify_scope_boundaries,
-    kill_switch_active,
-    audit_log
 )
 
 # Configure logging
@@ -46,12 +51,33 @@ async def lifespan(app: FastAPI) -> AsyncGenerator:
         await conn.run_sync(Base.metadata.create_all)
     
     logger.info("✅ Database tables created")
+    
+    # create_all never adds indexes to existing tables; those come from migrations
+    if settings.DATABASE_INDEX_CHECK:
+        async with engine.connect() as conn:
+            missing = await conn.run_sync(missing_indexes)
+        for index in missing:
+            logger.warning(f"⚠️ Missing database index: {describe_index(index)}")
+        if missing:
+            logger.warning("⚠️ Run 'alembic upgrade head' to create missing indexes")
+    
+    # Resolve tool binaries in the background so startup is not held up
+    tool_executor.probe.refresh()
+    audit_writer.start()
+    # Follow the cluster-wide kill switch; activations tear down this worker's tools
+    kill_switch.add_terminator(tool_executor.terminate_all)
+    await kill_switch.start()
     logger.info("✅ ANPTOP Backend started successfully")
     
     yield
     
     # Shutdown
     logger.info("👋 Shutting down ANPTOP Backend...")
+    await kill_switch.close()
+    await tool_executor.probe.close()
+    # Drain queued audit entries before the engine goes away
+    await audit_writer.close(timeout=settings.AUDIT_SHUTDOWN_TIMEOUT)
+    password_hasher.shutdown()
     await engine.dispose()
     logger.info("✅ Cleanup complete")
 
@@ -89,6 +115,9 @@ app = FastAPI(
     lifespan=lifespan,
 )
 
+# Rate limiting middleware (added before CORS so 429s still carry CORS headers)
+app.add_middleware(RateLimitMiddleware, limiter=rate_limiter)
+
 # CORS middleware
 app.add_middleware(
     CORSMiddleware,
@@ -96,6 +125,7 @@ app.add_middleware(
     allow_credentials=True,
     allow_methods=["*"],
     allow_headers=["*"],
+    expose_headers=PAGE_HEADERS + RATE_LIMIT_HEADERS,
 )
 
 
@@ -117,8 +147,8 @@ async def global_exception_handler(request: Request, exc: Exception) -> JSONResp
 # Kill switch middleware
 @app.middleware("http")
 async def kill_switch_middleware(request: Request, call_next):
-    """Check if kill switch is active."""
-    if kill_switch_active():
+    """Refuse requests while the kill switch is active (a local flag; no I/O per request)."""
+    if kill_switch.blocks(request.url.path):
         logger.warning("🛑 Kill switch is active - blocking request")
         return JSONResponse(
             status_code=503,
@@ -165,9 +195,9 @@ async def audit_middleware(request: Request, call_next):
     # Log response status
     logger.info(f"📝 Response: {response.status_code}")
     
-    # Audit log
-    await audit_log(
-        action=f"{request.method} {request.url.path}",
+    # Audit log; queued without waiting, and dropped (and counted) if the writer is saturated
+    audit_writer.submit(audit_entry(
+        f"{request.method} {request.url.path}",
         user_id=None,  # Will be set by auth middleware
         resource=request.url.path,
         details={
@@ -175,7 +205,9 @@ async def audit_middleware(request: Request, call_next):
             "path": request.url.path,
             "status_code": response.status_code,
         },
-    )
+        ip_address=request.client.host if request.client else None,
+        user_agent=(request.headers.get("user-agent") or "")[:500] or None,
+    ))
     
     return response
 
@@ -0,0 +1,83 @@
+#!/usr/bin/env python3
+"""
+ANPTOP Audit Chain Verification
+Checks the sealed audit log chain, proves single entries and custody records
+"""
+
+import asyncio
+import json
+import logging
+import sys
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from app.core.config import settings  # noqa: E402  (must load before the models)
+from app.core.audit_chain import prove_entry, verify_chain, verify_custody  # noqa: E402
+from app.db.session import async_session_factory, engine  # noqa: E402
+
+# Configure logging
+logging.basicConfig(
+    level=logging.INFO,
+    format='%(asctime)s - %(levelname)s - %(message)s'
+)
+logger = logging.getLogger(__name__)
+
+
+async def run(args) -> bool:
+    """Run the requested check and print its result; returns whether it passed."""
+    async with async_session_factory() as db:
+        if args.entry is not None:
+            result = await prove_entry(db, args.entry)
+            if result is None:
+                logger.error(f"Audit entry {args.entry} not found or not sealed yet")
+                return False
+            ok = result["valid"]
+        elif args.custody is not None:
+            result = await verify_custody(db, args.custody)
+            ok = result["valid"]
+        else:
+            report = await verify_chain(db, deep=args.deep)
+            result, ok = report.as_dict(), report.valid
+    
+    if args.json:
+        print(json.dumps(result, indent=2))
+    elif args.entry is not None:
+        print(f"Entry {args.entry}: {'VALID' if ok else 'INVALID'} "
+              f"({len(result['proof'])} proof hashes, seal {result['seal_id']}, root {result['merkle_root']})")
+    elif args.custody is not None:
+        print(f"Evidence {args.custody} custody: {'VALID' if ok else 'INVALID'} - "
+              f"{len(result['verified'])} verified, {len(result['unsealed'])} unsealed, "
+              f"mismatched: {result['mismatched'] or 'none'}")
+    else:
+        print(f"Audit chain: {'VALID' if ok else 'BROKEN'} - {result['seals']} seals, "
+              f"{result['entries']} sealed entries, {result['unsealed']} unsealed")
+        if result["head"]:
+            print(f"Head: {result['head']}")
+        if result["error"]:
+            print(f"Error: {result['error']}")
+    return ok
+
+
+async def main():
+    """CLI entry point"""
+    import argparse
+    
+    parser = argparse.ArgumentParser(description='ANPTOP Audit Chain Verification')
+    target = parser.add_mutually_exclusive_group()
+    target.add_argument('--entry', type=int, metavar='LOG_ID', help='Prove a single audit log entry')
+    target.add_argument('--custody', type=int, metavar='EVIDENCE_ID', help="Verify an evidence item's custody records")
+    parser.add_argument('--deep', action='store_true', help='Re-hash every sealed entry, not just the seal links')
+    parser.add_argument('--json', action='store_true', help='Print the full result as JSON')
+    args = parser.parse_args()
+    
+    logger.info(f"Verifying audit chain in {settings.DATABASE_URL.rsplit('@', 1)[-1]}")
+    try:
+        ok = await run(args)
+    finally:
+        await engine.dispose()
+    sys.exit(0 if ok else 1)
+
+
+if __name__ == '__main__':
+    asyncio.run(main())
@@ -0,0 +1,191 @@
+"""
+ANPTOP Backend - Tests for Permission Masks and the Engagement ACL Cache
+"""
+
+import pytest
+import sys
+import os
+from types import SimpleNamespace
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from fastapi import HTTPException, Response
+
+from app.core.access import EngagementACL, engagement_mask, mask_actions
+from app.core.security import ENDPOINT_ROLE_PERMISSIONS, check_permission
+from app.models.user import PERMISSION_BITS, ROLE_PERMISSIONS, UserRole, role_has_permission
+
+
+def user(user_id: int, role: UserRole):
+    return SimpleNamespace(id=user_id, role=role)
+
+
+class Teams:
+    """An engagement loader over a dict, counting loads."""
+    
+    def __init__(self, teams):
+        self.teams = teams
+        self.loads = 0
+    
+    async def __call__(self, db, engagement_id):
+        self.loads += 1
+        team = self.teams.get(engagement_id)
+        return (team[0], frozenset(team[1])) if team else None
+
+
+class TestPermissionMasks:
+    """Test suite for compiled role permissions."""
+    
+    def test_masks_match_role_permissions(self):
+        for role in UserRole:
+            for permission in PERMISSION_BITS:
+                expected = role == UserRole.ADMIN or permission in ROLE_PERMISSIONS.get(role, [])
+                assert role_has_permission(role, permission) == expected
+                expected = role == UserRole.ADMIN or permission in ENDPOINT_ROLE_PERMISSIONS.get(role, [])
+                assert check_permission(user(1, role), permission) == expected
+        assert role_has_permission(UserRole.ADMIN, "audit:read")
+        assert check_permission(user(1, UserRole.ADMIN), "audit:read")
+        assert not check_permission(user(1, UserRole.ANALYST), "findings:read")
+        assert not check_permission(user(1, UserRole.LEAD), "users:read")
+        assert not role_has_permission(UserRole.LEAD, "audit:read")
+    
+    def test_engagement_masks(self):
+        team = (1, frozenset({2}))
+        owner = engagement_mask(1, UserRole.SENIOR, *team)
+        member = engagement_mask(2, UserRole.SENIOR, *team)
+        assert {"engagements:read", "engagements:update", "workflows:approve"} <= mask_actions(owner)
+        assert "engagements:update" not in mask_actions(member)
+        assert "workflows:approve" in mask_actions(member)
+        assert engagement_mask(3, UserRole.SENIOR, *team) == 0
+        assert "engagements:delete" in mask_actions(engagement_mask(3, UserRole.LEAD, *team))
+        assert mask_actions(engagement_mask(3, UserRole.ADMIN, *team)) == set(PERMISSION_BITS)
+
+
+class TestEngagementACL:
+    """Test suite for the per-engagement ACL cache."""
+    
+    async def test_team_loaded_once(self):
+        teams = Teams({7: (1, [2])})
+        acl = EngagementACL(load=teams)
+        for user_id in (1, 2, 3, 1, 2):
+            await acl.mask(None, user(user_id, UserRole.TESTER), 7)
+        assert teams.loads == 1
+        assert await acl.can(None, user(2, UserRole.TESTER), 7, "workflows:execute")
+        assert not await acl.can(None, user(3, UserRole.TESTER), 7, "engagements:read")
+    
+    async def test_invalidate_on_team_change(self):
+        teams = Teams({7: (1, [2])})
+        acl = EngagementACL(load=teams)
+        assert await acl.allowed(None, user(3, UserRole.VIEWER), 7) == set()
+        teams.teams[7] = (1, [2, 3])
+        assert await acl.allowed(None, user(3, UserRole.VIEWER), 7) == set()
+        acl.invalidate(7)
+        assert await acl.allowed(None, user(3, UserRole.VIEWER), 7) == {"engagements:read", "reports:read"}
+        assert teams.loads == 2
+    
+    async def test_require(self):
+        acl = EngagementACL(load=Teams({7: (1, [2])}))
+        await acl.require(None, user(1, UserRole.TESTER), 7, "engagements:update")
+        with pytest.raises(HTTPException) as denied:
+            await acl.require(None, user(2, UserRole.TESTER), 7, "engagements:update")
+        assert denied.value.status_code == 403
+        with pytest.raises(HTTPException) as missing:
+            await acl.require(None, user(1, UserRole.ADMIN), 8)
+        assert missing.value.status_code == 404
+        assert len(acl) == 1
+    
+    async def test_expires(self):
+        teams = Teams({7: (1, [])})
+        acl = EngagementACL(ttl=0, load=teams)
+        await acl.mask(None, user(1, UserRole.TESTER), 7)
+        await acl.mask(None, user(1, UserRole.TESTER), 7)
+        assert teams.loads == 2 and len(acl) == 0
+    
+    async def test_endpoints_require_engagement_access(self, monkeypatch):
+        from app.api.endpoints import targets, tools
+        acl = EngagementACL(load=Teams({7: (1, [2])}))
+        monkeypatch.setattr(tools, "engagement_acl", acl)
+        monkeypatch.setattr(targets, "engagement_acl", acl)
+        outsider = SimpleNamespace(id=3, role=UserRole.SENIOR, has_permission=lambda permission: True)
+        request = tools.ToolExecuteRequest(tool_name="nmap", engagement_id=7)
+        calls = [
+            tools.start_tool_execution(request, current_user=outsider, db=None),
+            tools.execute_tool(request, current_user=outsider, db=None),
+            tools.list_tool_history(Response(), engagement_id=7, options=None, current_user=outsider, db=None),
+            targets.import_targets(engagement_id=7, import_format=None, file=None, current_user=outsider, db=None),
+        ]
+        for call in calls:
+            with pytest.raises(HTTPException) as denied:
+                await call
+            assert denied.value.status_code == 403
+    
+    async def test_can_view(self):
+        acl = EngagementACL(load=Teams({7: (1, [2])}))
+        assert await acl.can_view(None, user(2, UserRole.VIEWER), 7, 1)
+        assert await acl.can_view(None, user(3, UserRole.TESTER), 7, 3)
+        assert await acl.can_view(None, user(3, UserRole.LEAD), None, 1)
+        assert not await acl.can_view(None, user(3, UserRole.TESTER), 7, 1)
+        assert not await acl.can_view(None, user(3, UserRole.TESTER), None, 1)
+    
+    async def test_tool_history_is_limited_to_visible_executions(self, monkeypatch):
+        from app.api.endpoints import tools
+        from app.models.tool_execution import ToolExecution
+        acl = EngagementACL(load=Teams({7: (1, [2])}))
+        monkeypatch.setattr(tools, "engagement_acl", acl)
+        searches = []
+        
+        async def search(db, options, **filters):
+            searches.append(filters["visible_to"])
+            return None
+        
+        async def get_by_execution_id(db, execution_id):
+            return SimpleNamespace(execution_id=execution_id, engagement_id=7, executed_by_id=1)
+        
+        monkeypatch.setattr(ToolExecution, "search", search)
+        monkeypatch.setattr(ToolExecution, "get_by_execution_id", get_by_execution_id)
+        monkeypatch.setattr(tools, "page_response", lambda response, page: page)
+        for caller in (user(3, UserRole.TESTER), user(4, UserRole.ADMIN)):
+            await tools.list_tool_history(
+                Response(), tool_name=None, engagement_id=None, status_filter=None, options=None,
+                current_user=caller, db=None,
+            )
+        assert searches == [3, None]
+        
+        assert await tools.get_tool_history_record("e", current_user=user(2, UserRole.TESTER), db=None)
+        with pytest.raises(HTTPException) as missing:
+            await tools.get_tool_history_record("e", current_user=user(3, UserRole.TESTER), db=None)
+        assert missing.value.status_code == 404
+    
+    async def test_live_streams_are_limited_to_visible_executions(self, monkeypatch):
+        from app.api.endpoints import tools
+        monkeypatch.setattr(tools, "engagement_acl", EngagementACL(load=Teams({7: (1, [2])})))
+        tools.tool_executor.streams.open("acl-test", "nmap", engagement_id=7, user_id=1)
+        try:
+            status = await tools.get_tool_execution("acl-test", current_user=user(2, UserRole.TESTER), db=None)
+            assert status["execution_id"] == "acl-test"
+            for call in (tools.get_tool_execution, tools.stream_tool_execution):
+                with pytest.raises(HTTPException) as missing:
+                    await call("acl-test", current_user=user(3, UserRole.TESTER), db=None)
+                assert missing.value.status_code == 404
+        finally:
+            tools.tool_executor.streams.close("acl-test")
+    
+    async def test_shard_plans_require_engagement_access(self, monkeypatch):
+        from app.api.endpoints import tools
+        monkeypatch.setattr(tools, "engagement_acl", EngagementACL(load=Teams({7: (1, [2])})))
+        plans = {"p7": SimpleNamespace(engagement_id=7), "none": SimpleNamespace(engagement_id=None)}
+        
+        async def load_plan(plan_id):
+            return plans.get(plan_id)
+        
+        monkeypatch.setattr(tools.tool_executor, "load_plan", load_plan)
+        monkeypatch.setattr(tools, "_plan_response", lambda plan: plan)
+        assert await tools.get_shard_plan("p7", current_user=user(2, UserRole.TESTER), db=None) is plans["p7"]
+        assert await tools.get_shard_plan("none", current_user=user(3, UserRole.LEAD), db=None) is plans["none"]
+        for call, plan_id, status_code in [
+            (tools.get_shard_plan, "p7", 403),
+            (tools.resume_shard_plan, "p7", 403),
+            (tools.get_shard_plan, "none", 404),
+        ]:
+            with pytest.raises(HTTPException) as denied:
+                await call(plan_id, current_user=user(3, UserRole.TESTER), db=None)
+            assert denied.value.status_code == status_code
@@ -0,0 +1,136 @@
+"""
+ANPTOP Backend - Tests for the Sealed Audit Chain
+"""
+
+import pytest
+import sys
+import os
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from sqlalchemy import text, update
+from sqlalchemy.ext.asyncio import create_async_engine, async_sessionmaker
+
+from app.core.audit_chain import (
+    CUSTODY_RESOURCE, audit_logs, audit_seals, custody_details, leaf_hash, merkle_proof, merkle_root,
+    prove_entry, verify_chain, verify_custody, verify_proof, write_sealed_batch,
+)
+from app.core.audit_writer import audit_entry
+
+
+@pytest.fixture
+async def db():
+    engine = create_async_engine("sqlite+aiosqlite:///:memory:")
+    async with engine.begin() as conn:
+        for table in (audit_logs, audit_seals):
+            await conn.run_sync(table.create)
+        # The model's foreign key points at a table name that does not exist
+        await conn.execute(text(
+            "CREATE TABLE evidence_chain_of_custodys (id INTEGER PRIMARY KEY, evidence_id INTEGER, "
+            "action TEXT, action_by INTEGER, action_at DATETIME, location TEXT, notes TEXT, "
+            "hash_value TEXT, created_at DATETIME, updated_at DATETIME)"
+        ))
+    async with async_sessionmaker(engine, expire_on_commit=False)() as session:
+        yield session
+    await engine.dispose()
+
+
+async def seal(db, count: int, **fields):
+    result = await write_sealed_batch(db, [audit_entry("GET /", details={"n": n}, **fields) for n in range(count)])
+    await db.commit()
+    return result
+
+
+class TestMerkleTree:
+    """Test suite for roots and inclusion proofs."""
+    
+    def test_every_leaf_proves(self):
+        """Every leaf of trees of odd and even sizes proves into the root in log2(n) steps."""
+        for size in range(1, 12):
+            leaves = [leaf_hash({"id": i, **audit_entry("x")}) for i in range(size)]
+            root = merkle_root(leaves)
+            for index, leaf in enumerate(leaves):
+                proof = merkle_proof(leaves, index)
+                assert len(proof) <= (size - 1).bit_length()
+                assert verify_proof(leaf, proof, root)
+            assert not verify_proof(leaves[0], merkle_proof(leaves, 0), "0" * 64)
+    
+    def test_leaf_covers_row_content(self):
+        """Changing any sealed column, or the id, changes the leaf."""
+        row = {"id": 7, **audit_entry("login", user_id=1, details={"ok": True})}
+        for change in ({"id": 8}, {"user_id": 2}, {"details": {"ok": False}}, {"success": False}):
+            assert leaf_hash(row) != leaf_hash({**row, **change})
+
+
+class TestAuditChain:
+    """Test suite for sealing and verifying batches."""
+    
+    async def test_chain_verifies(self, db):
+        """Sealed batches chain from genesis; later rows count as unsealed."""
+        first = await seal(db, 5)
+        second = await seal(db, 3)
+        assert second["previous_hash"] == first["chain_hash"]
+        assert (second["first_log_id"], second["last_log_id"]) == (6, 8)
+        await db.execute(audit_logs.insert().values(**audit_entry("unsealed")))
+        await db.commit()
+        
+        report = await verify_chain(db, deep=True)
+        assert report.valid
+        assert (report.seals, report.entries, report.unsealed) == (2, 8, 1)
+        assert report.head == second["chain_hash"]
+    
+    async def test_edited_row_breaks_deep_check(self, db):
+        """Editing a sealed row passes the link check but fails the deep one at its batch."""
+        await seal(db, 5)
+        second = await seal(db, 5)
+        await db.execute(update(audit_logs).where(audit_logs.c.id == 7).values(action="DELETE /"))
+        await db.commit()
+        assert (await verify_chain(db)).valid
+        report = await verify_chain(db, deep=True)
+        assert not report.valid
+        assert report.broken_seal_id == second["id"]
+    
+    async def test_rewritten_seal_breaks_links(self, db):
+        """Replacing a batch root is caught without reading any audit rows."""
+        first = await seal(db, 4)
+        await seal(db, 4)
+        await db.execute(update(audit_seals).where(audit_seals.c.id == first["id"]).values(merkle_root="f" * 64))
+        await db.commit()
+        report = await verify_chain(db)
+        assert not report.valid
+        assert report.broken_seal_id == first["id"]
+    
+    async def test_prove_entry(self, db):
+        """A sealed entry has a proof into its seal; unknown and unsealed entries have none."""
+        await seal(db, 9)
+        proof = await prove_entry(db, 4)
+        assert proof["valid"]
+        assert len(proof["proof"]) == 4
+        assert await prove_entry(db, 10) is None
+        
+        await db.execute(update(audit_logs).where(audit_logs.c.id == 4).values(user_id=99))
+        await db.commit()
+        assert not (await prove_entry(db, 4))["valid"]
+    
+    async def test_custody_records(self, db):
+        """Custody records are checked against their sealed audit entries."""
+        await db.execute(text(
+            "INSERT INTO evidence_chain_of_custodys (id, evidence_id, action, action_by, hash_value, notes) "
+            "VALUES (1, 3, 'collected', 1, 'abc', NULL), (2, 3, 'transferred', 2, 'abc', 'to vault'), "
+            "(3, 3, 'viewed', 1, 'abc', NULL)"
+        ))
+        records = [
+            {"id": 1, "evidence_id": 3, "action": "collected", "action_by": 1, "hash_value": "abc", "notes": None},
+            {"id": 2, "evidence_id": 3, "action": "transferred", "action_by": 2, "hash_value": "abc", "notes": "to vault"},
+        ]
+        await write_sealed_batch(db, [
+            audit_entry(f"custody:{r['action']}", resource=CUSTODY_RESOURCE, resource_id=str(r["id"]),
+                        details=custody_details(r))
+            for r in records
+        ])
+        await db.commit()
+        result = await verify_custody(db, 3)
+        assert (result["verified"], result["mismatched"]) == ([1, 2], [3])
+        
+        await db.execute(text("UPDATE evidence_chain_of_custodys SET hash_value = 'def' WHERE id = 2"))
+        await db.commit()
+        assert (await verify_custody(db, 3))["mismatched"] == [2, 3]
@@ -0,0 +1,107 @@
+"""
+ANPTOP Backend - Tests for the Batched Audit Writer
+"""
+
+import asyncio
+import pytest
+import sys
+import os
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from sqlalchemy import func, select
+from sqlalchemy.ext.asyncio import create_async_engine, async_sessionmaker
+
+from app.core.audit_writer import AuditWriter, AUDIT_BACKPRESSURE, AUDIT_ENTRIES, audit_entry
+from app.models.evidence import AuditLog, AuditSeal
+
+
+def counted(outcome: str) -> float:
+    return AUDIT_ENTRIES.labels(outcome=outcome)._value.get()
+
+
+class CountingSessions:
+    """Session factory that records the size of every insert."""
+    
+    def __init__(self, engine):
+        self.factory = async_sessionmaker(engine, expire_on_commit=False)
+        self.batches = []
+    
+    def __call__(self):
+        session = self.factory()
+        execute = session.execute
+        
+        async def recording_execute(statement, params=None, **kwargs):
+            if isinstance(params, list):
+                self.batches.append(len(params))
+            return await execute(statement, params, **kwargs)
+        
+        session.execute = recording_execute
+        return session
+
+
+@pytest.fixture
+async def sessions():
+    engine = create_async_engine("sqlite+aiosqlite:///:memory:")
+    async with engine.begin() as conn:
+        for table in (AuditLog.__table__, AuditSeal.__table__):
+            await conn.run_sync(table.create)
+    yield CountingSessions(engine)
+    await engine.dispose()
+
+
+async def stored(sessions) -> int:
+    async with sessions.factory() as db:
+        return (await db.execute(select(func.count()).select_from(AuditLog))).scalar()
+
+
+class TestAuditWriter:
+    """Test suite for queued, batched audit inserts."""
+    
+    async def test_batches_by_size_and_flushes_on_close(self, sessions):
+        """Full batches are written as one insert each; the remainder is flushed on close."""
+        writer = AuditWriter(sessions, max_queue=100, batch_size=10, flush_interval=30)
+        writer.start()
+        for i in range(25):
+            await writer.write(audit_entry("GET /", details={"n": i}))
+        while sum(sessions.batches) < 20:
+            await asyncio.sleep(0.01)
+        await writer.close()
+        assert sessions.batches == [10, 10, 5]
+        assert await stored(sessions) == 25
+    
+    async def test_flushes_on_interval(self, sessions):
+        """A partial batch is written once the flush interval passes."""
+        writer = AuditWriter(sessions, batch_size=100, flush_interval=0.05)
+        writer.start()
+        await writer.write(audit_entry("login", user_id=1))
+        await asyncio.sleep(0.3)
+        assert sessions.batches == [1]
+        await writer.close()
+    
+    async def test_submit_drops_when_full(self, sessions):
+        """Non-blocking submits are dropped and counted once the queue is full."""
+        writer = AuditWriter(sessions, max_queue=3, batch_size=100, flush_interval=30)
+        writer.start()
+        dropped = counted("dropped")
+        results = [writer.submit(audit_entry("GET /")) for _ in range(5)]
+        assert results == [True, True, True, False, False]
+        assert counted("dropped") == dropped + 2
+        await writer.close()
+        assert await stored(sessions) == 3
+    
+    async def test_write_waits_when_full(self, sessions):
+        """Blocking writes wait for room instead of dropping, and count the wait."""
+        writer = AuditWriter(sessions, max_queue=1, batch_size=100, flush_interval=0.01)
+        writer.start()
+        waited = AUDIT_BACKPRESSURE._value.get()
+        for _ in range(3):
+            await writer.write(audit_entry("approval:grant"))
+        assert AUDIT_BACKPRESSURE._value.get() > waited
+        await writer.close()
+        assert await stored(sessions) == 3
+    
+    async def test_writes_directly_when_not_running(self, sessions):
+        """Without a running writer, entries are inserted straight away."""
+        writer = AuditWriter(sessions)
+        await writer.write(audit_entry("startup"))
+        assert await stored(sessions) == 1
@@ -0,0 +1,133 @@
+"""
+ANPTOP Backend - Tests for Password Hashing and API Key Verification
+"""
+
+import asyncio
+import pytest
+import sys
+import os
+import time
+from types import SimpleNamespace
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from fastapi.security import SecurityScopes
+from passlib.context import CryptContext
+
+from app.core import security
+from app.core.credentials import PasswordHasher, api_key_digest, api_key_lookup, verify_api_key_digest
+from app.models.user import UserRole
+
+
+class SlowContext:
+    """A hashing context that holds its thread like bcrypt does."""
+    
+    def __init__(self, seconds: float):
+        self.seconds = seconds
+    
+    def hash(self, password):
+        time.sleep(self.seconds)
+        return f"$2b$slow${password}"
+    
+    def verify(self, password, hashed):
+        time.sleep(self.seconds)
+        return hashed == f"$2b$slow${password}"
+
+
+def api_user(api_key: str, role: UserRole = UserRole.API, hashed: str = None):
+    async def update(db, **fields):
+        user.__dict__.update(fields)
+        return user
+    user = SimpleNamespace(
+        id=5, username="svc", email="svc@example.com", full_name="Service", role=role,
+        is_active=True, is_superuser=False, mfa_enabled=False,
+        api_key_prefix=api_key_lookup(api_key), api_key_hash=hashed or api_key_digest(api_key), update=update,
+    )
+    return user
+
+
+async def _async(value):
+    return value
+
+
+class TestPasswordHasher:
+    """Test suite for off-loop password hashing."""
+    
+    async def test_hash_and_verify(self):
+        hasher = PasswordHasher(CryptContext(schemes=["pbkdf2_sha256"]), max_workers=2)
+        hashed = await hasher.hash("correct horse")
+        assert await hasher.verify("correct horse", hashed)
+        assert not await hasher.verify("wrong horse", hashed)
+        hasher.shutdown()
+    
+    async def test_runs_off_loop_within_bound(self):
+        """The loop keeps running while hashes do, and no more than max_workers run at once."""
+        hasher = PasswordHasher(SlowContext(0.1), max_workers=2)
+        ticks = 0
+        
+        async def ticker():
+            nonlocal ticks
+            while True:
+                ticks += 1
+                await asyncio.sleep(0.01)
+        
+        ticking = asyncio.ensure_future(ticker())
+        started = time.monotonic()
+        results = await asyncio.gather(*(hasher.verify("pw", "$2b$slow$pw") for _ in range(4)))
+        elapsed = time.monotonic() - started
+        ticking.cancel()
+        hasher.shutdown()
+        assert results == [True] * 4
+        assert elapsed >= 0.2
+        assert ticks >= 10
+
+
+class TestApiKeys:
+    """Test suite for API key lookup and verification."""
+    
+    def test_lookup_and_digest(self):
+        key = security.generate_api_key()
+        assert api_key_lookup(key) == key[:15]
+        assert api_key_lookup("anptop_short") is None
+        assert api_key_lookup("eyJhbGciOiJIUzI1NiJ9." + "x" * 40) is None
+        digest = api_key_digest(key)
+        assert len(digest) == 64
+        assert verify_api_key_digest(key, digest)
+        assert not verify_api_key_digest(key[:-1] + ("a" if key[-1] != "a" else "b"), digest)
+    
+    async def test_authenticate_by_prefix(self, monkeypatch):
+        """Only an API user whose digest matches the full key is returned."""
+        key = security.generate_api_key()
+        other = key[:15] + "x" * (len(key) - 15)
+        candidates = [api_user(other), api_user(key, role=UserRole.TESTER), api_user(key)]
+        lookups = []
+        
+        async def by_prefix(cls, db, prefix):
+            lookups.append(prefix)
+            return candidates
+        
+        monkeypatch.setattr(security.User, "get_by_api_key_prefix", classmethod(by_prefix))
+        assert await security.authenticate_api_key(None, key) is candidates[2]
+        assert await security.authenticate_api_key(None, key + "x") is None
+        assert await security.authenticate_api_key(None, "anptop_tooshort") is None
+        assert lookups == [key[:15], key[:15]]
+    
+    async def test_legacy_hash_is_upgraded(self, monkeypatch):
+        """A bcrypt-hashed key is verified on the hasher once and re-stored as a digest, dropping its plaintext."""
+        key = security.generate_api_key()
+        user = api_user(key, hashed=f"$2b$slow${key}")
+        user.api_key = key
+        monkeypatch.setattr(security.User, "get_by_api_key_prefix", classmethod(lambda cls, db, prefix: _async([user])))
+        monkeypatch.setattr(security, "password_hasher", PasswordHasher(SlowContext(0)))
+        assert await security.authenticate_api_key(None, key) is user
+        assert user.api_key_hash == api_key_digest(key)
+        assert user.api_key is None
+    
+    async def test_api_key_as_bearer_token(self, monkeypatch):
+        key = security.generate_api_key()
+        user = api_user(key)
+        monkeypatch.setattr(security.User, "get_by_api_key_prefix", classmethod(lambda cls, db, prefix: _async([user])))
+        principal = await security.get_current_user(SecurityScopes(["api"]), key, db=None)
+        assert (principal.id, principal.role) == (5, UserRole.API)
+        with pytest.raises(security.HTTPException) as rejected:
+            await security.get_current_user(SecurityScopes(), key[:-1] + "!", db=None)
+        assert rejected.value.status_code == 401
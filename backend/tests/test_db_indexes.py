@@ -0,0 +1,71 @@
+"""
+ANPTOP Backend - Tests for Database Index Checks
+"""
+
+import pytest
+import sys
+import os
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from sqlalchemy import Column, Index, Integer, MetaData, String, Table, create_engine, inspect, text
+
+from app.db.indexes import has_index, missing_indexes, describe_index
+from app.models.evidence import AuditLog
+from app.models.target import Target
+from app.models.vulnerability import Vulnerability
+
+
+def index_columns(model):
+    return {index.name: [c.name for c in index.columns] for index in model.__table__.indexes}
+
+
+@pytest.fixture
+def metadata():
+    metadata = MetaData()
+    Table(
+        "items", metadata,
+        Column("id", Integer, primary_key=True),
+        Column("owner_id", Integer),
+        Column("status", String(20)),
+        Column("name", String(50)),
+        Index("ix_items_owner_status", "owner_id", "status"),
+        Index("uq_items_owner_name", "owner_id", "name", unique=True),
+    )
+    return metadata
+
+
+class TestIndexCheck:
+    """Test suite for comparing declared and actual indexes."""
+    
+    def test_model_indexes_match_queries(self):
+        """The list and lookup queries have matching composite indexes."""
+        assert index_columns(Vulnerability)["ix_vulnerabilities_engagement_severity"] == ["engagement_id", "severity"]
+        assert index_columns(Target)["ix_targets_engagement_status_created"] == ["engagement_id", "status", "created_at"]
+        assert index_columns(AuditLog)["ix_audit_logs_resource_timestamp"] == ["resource", "resource_id", "timestamp"]
+    
+    def test_reports_missing_indexes(self, metadata):
+        """Indexes absent from an existing table are reported; absent tables are skipped."""
+        engine = create_engine("sqlite://")
+        with engine.begin() as conn:
+            conn.execute(text("CREATE TABLE items (id INTEGER PRIMARY KEY, owner_id INTEGER, status TEXT, name TEXT)"))
+            missing = missing_indexes(conn, metadata)
+        assert [index.name for index in missing] == ["ix_items_owner_status", "uq_items_owner_name"]
+        assert describe_index(missing[1]) == "unique uq_items_owner_name on items(owner_id, name)"
+        
+        engine = create_engine("sqlite://")
+        with engine.connect() as conn:
+            assert missing_indexes(conn, metadata) == []
+        metadata.create_all(engine)
+        with engine.connect() as conn:
+            assert missing_indexes(conn, metadata) == []
+    
+    def test_equivalent_indexes_count(self):
+        """A wider index under another name covers a prefix; unique needs an exact unique match."""
+        engine = create_engine("sqlite://")
+        with engine.begin() as conn:
+            conn.execute(text("CREATE TABLE items (owner_id INTEGER, status TEXT, name TEXT)"))
+            conn.execute(text("CREATE INDEX legacy ON items (owner_id, status, name)"))
+            inspector = inspect(conn)
+            assert has_index(inspector, "items", "ix_items_owner_status", ["owner_id", "status"])
+            assert not has_index(inspector, "items", "ix_items_status", ["status"])
+            assert not has_index(inspector, "items", "uq_items_owner_name", ["owner_id", "status", "name"], unique=True)
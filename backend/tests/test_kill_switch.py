@@ -0,0 +1,167 @@
+"""
+ANPTOP Backend - Tests for the Cluster-Wide Kill Switch
+"""
+
+import asyncio
+import os
+import signal
+import sys
+import time
+import pytest
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from app.core.config import settings
+from app.core.kill_switch import KillSwitch, MemoryBroker
+from app.core.tools_config import SecurityTool, ToolCategory, tool_manager
+from app.core.tool_executor import ToolExecutor
+
+
+def worker(broker, name, terminated=None, **options):
+    """A kill switch as one worker would run it, with a fake terminator."""
+    switch = KillSwitch(broker, **options)
+    switch.worker = name
+    
+    async def terminate(grace):
+        return list(terminated or [])
+    
+    switch.add_terminator(terminate)
+    return switch
+
+
+def alive(pid: int) -> bool:
+    """Whether ``pid`` is running; a killed orphan may linger as a zombie until init reaps it."""
+    try:
+        os.kill(pid, 0)
+    except ProcessLookupError:
+        return False
+    if not os.path.exists("/proc/self/stat"):
+        return True
+    try:
+        with open(f"/proc/{pid}/stat") as stat:
+            return stat.read().rpartition(")")[2].split()[0] != "Z"
+    except FileNotFoundError:
+        return False
+
+
+@pytest.fixture
+def executor(tmp_path, monkeypatch):
+    monkeypatch.setattr(settings, "EVIDENCE_STORAGE_PATH", str(tmp_path))
+    monkeypatch.setattr(settings, "TOOL_HISTORY_PERSIST", False)
+    return ToolExecutor()
+
+
+@pytest.fixture
+def sleeper_tool(tmp_path, monkeypatch):
+    """A tool that ignores SIGTERM and starts a grandchild, recording its pid."""
+    tool = SecurityTool(
+        name="Sleeper",
+        category=ToolCategory.DISCOVERY,
+        description="Test tool",
+        command_template=(
+            "python3 -c \"import signal, subprocess, sys; signal.signal(signal.SIGTERM, signal.SIG_IGN); "
+            "child = subprocess.Popen(['sleep', '30']); open(sys.argv[1], 'w').write(str(child.pid)); "
+            "child.wait()\" {pidfile}"
+        ),
+        timeout_seconds=60,
+    )
+    monkeypatch.setitem(tool_manager.tools, "sleeper_test", tool)
+    return "sleeper_test"
+
+
+class TestKillSwitch:
+    """Test suite for activation fan-out and reporting."""
+    
+    async def test_activation_reaches_every_worker(self):
+        broker = MemoryBroker()
+        first = worker(broker, "a", [{"execution_id": "1", "signal": "SIGTERM"}], exempt_paths=["/api/v1/kill-switch"])
+        second = worker(broker, "b", [{"execution_id": "2", "signal": "SIGKILL"}])
+        for switch in (first, second):
+            await switch.start()
+        
+        report = await first.activate("scope breach", actor_id=1)
+        assert first.active and second.active
+        assert report.complete and sorted(report.workers_reported) == ["a", "b"]
+        assert sorted((t["worker"], t["execution_id"]) for t in report.terminated) == [("a", "1"), ("b", "2")]
+        assert first.blocks("/api/v1/engagements")
+        assert not first.blocks("/api/v1/kill-switch/deactivate")
+        
+        assert await second.deactivate(actor_id=1)
+        await asyncio.sleep(0)
+        assert not first.active and not second.active
+    
+    async def test_late_worker_picks_up_state(self):
+        broker = MemoryBroker()
+        first = worker(broker, "a")
+        await first.start()
+        await first.activate("stop")
+        late = worker(broker, "c")
+        await late.start()
+        assert late.active and late.state.reason == "stop"
+    
+    async def test_silent_worker_leaves_report_incomplete(self):
+        broker = MemoryBroker()
+        first = worker(broker, "a", report_timeout=0.1)
+        await first.start()
+        
+        async def silent(message):
+            pass
+        
+        await broker.subscribe(silent)
+        started = time.monotonic()
+        report = await first.activate("stop")
+        assert time.monotonic() - started < 1
+        assert report.workers_expected == 2 and report.workers_reported == ["a"]
+        assert not report.complete
+    
+    async def test_broker_failure_stops_this_worker(self):
+        class Broken(MemoryBroker):
+            async def publish(self, message):
+                raise ConnectionError("redis down")
+        
+        switch = worker(Broken(), "a", [{"execution_id": "1", "signal": "SIGTERM"}])
+        await switch.start()
+        report = await switch.activate("stop")
+        assert switch.active
+        assert report.error and not report.complete
+        assert [t["execution_id"] for t in report.terminated] == ["1"]
+    
+    async def test_disabled(self):
+        switch = worker(MemoryBroker(), "a", enabled=False)
+        await switch.start()
+        await switch.activate("stop")
+        assert not switch.active and not switch.blocks("/api/v1/engagements")
+
+
+class TestProcessTeardown:
+    """Test suite for terminating running tools."""
+    
+    async def test_terminate_all_kills_process_group(self, executor, sleeper_tool, tmp_path):
+        """A tool ignoring SIGTERM is killed after the grace period, grandchildren included."""
+        pidfile = tmp_path / "grandchild.pid"
+        running = asyncio.ensure_future(executor.execute_tool(sleeper_tool, {"pidfile": str(pidfile)}))
+        for _ in range(100):
+            if executor._processes and pidfile.exists() and pidfile.read_text().strip():
+                break
+            await asyncio.sleep(0.05)
+        grandchild = int(pidfile.read_text())
+        
+        terminated = await executor.terminate_all(grace=0.2)
+        result = await asyncio.wait_for(running, timeout=5)
+        assert [(t["tool"], t["signal"]) for t in terminated] == [(sleeper_tool, "SIGKILL")]
+        assert result.status == "killed"
+        assert result.return_code == -signal.SIGKILL
+        for _ in range(50):
+            if not alive(grandchild):
+                break
+            await asyncio.sleep(0.02)
+        assert not alive(grandchild)
+        assert executor._processes == {}
+    
+    async def test_no_spawn_while_active(self, executor, sleeper_tool, tmp_path, monkeypatch):
+        switch = worker(MemoryBroker(), "a")
+        await switch.start()
+        await switch.activate("stop")
+        monkeypatch.setattr(sys.modules["app.core.tool_executor"], "kill_switch", switch)
+        result = await executor.execute_tool(sleeper_tool, {"pidfile": str(tmp_path / "pid")})
+        assert result.status == "killed"
+        assert not (tmp_path / "pid").exists()
@@ -0,0 +1,140 @@
+"""
+ANPTOP Backend - Tests for Keyset Pagination
+"""
+
+import pytest
+import sys
+import os
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from datetime import datetime, timedelta
+from fastapi import HTTPException, Response
+from sqlalchemy import Column, DateTime, Integer, String, select
+from sqlalchemy.ext.asyncio import create_async_engine, async_sessionmaker
+from sqlalchemy.orm import DeclarativeBase
+
+from app.api.pagination import NEXT_CURSOR_HEADER, list_options, page_response
+from app.db.pagination import Page, cursor_position, decode_cursor, encode_cursor, paginate
+from app.db.query import ListOptions, ListQuery
+
+
+class _Base(DeclarativeBase):
+    pass
+
+
+class Row(_Base):
+    __tablename__ = "rows"
+    __page_order__ = "created_at"
+    __sortable__ = ("created_at", "name")
+    id = Column(Integer, primary_key=True)
+    group_id = Column(Integer, nullable=False)
+    name = Column(String(10), nullable=False)
+    created_at = Column(DateTime, nullable=False)
+
+
+@pytest.fixture
+async def db():
+    engine = create_async_engine("sqlite+aiosqlite:///:memory:")
+    async with engine.begin() as conn:
+        await conn.run_sync(_Base.metadata.create_all)
+    start = datetime(2024, 1, 1)
+    async with async_sessionmaker(engine, expire_on_commit=False)() as session:
+        # Rows 1-10 share a timestamp, as a bulk import would
+        session.add_all([
+            Row(
+                id=i,
+                group_id=i % 2,
+                name=f"row-{i % 5}",
+                created_at=start if i <= 10 else start + timedelta(minutes=i),
+            )
+            for i in range(1, 26)
+        ])
+        await session.commit()
+        yield session
+    await engine.dispose()
+
+
+class TestCursor:
+    """Test suite for cursor encoding."""
+    
+    def test_round_trip(self):
+        """A cursor decodes to the position it was made from."""
+        position = datetime(2024, 5, 1, 12, 30, 15, 123456)
+        cursor = encode_cursor("-created_at", position, 42)
+        assert decode_cursor(cursor) == ("-created_at", position.isoformat(), 42)
+        assert cursor_position(cursor, Row.created_at) == (position, 42)
+    
+    def test_malformed(self):
+        """Garbage cursors, and cursors from another sort, are rejected with a 400 before querying."""
+        options = list_options(Row)
+        good = encode_cursor("-created_at", datetime(2024, 1, 1), 1)
+        for cursor in ("not-a-cursor", good[:-3], "W10"):
+            with pytest.raises(ValueError):
+                decode_cursor(cursor)
+        for cursor, sort in [("not-a-cursor", None), (good, "name"), (good, "-name"), (None, "group_id")]:
+            with pytest.raises(HTTPException) as exc:
+                options(cursor=cursor, limit=10, skip=0, sort=sort, since=None, until=None, with_total=False)
+            assert exc.value.status_code == 400
+        assert options(cursor=good, limit=10, skip=0, sort=None, since=None, until=None, with_total=False).cursor == good
+
+
+class TestPaginate:
+    """Test suite for keyset pages."""
+    
+    async def test_walks_every_row_once(self, db):
+        """Following cursors visits every row once, newest first, across timestamp ties."""
+        seen, cursor = [], None
+        while True:
+            page = await paginate(db, select(Row), Row.created_at, Row.id, cursor=cursor, limit=4)
+            seen += [row.id for row in page.items]
+            if not page.next_cursor:
+                break
+            cursor = page.next_cursor
+        assert seen == list(range(25, 0, -1))
+    
+    async def test_filters_and_last_page(self, db):
+        """Filters apply before paging; an exactly full last page has no cursor."""
+        page = await paginate(db, select(Row).where(Row.group_id == 0), Row.created_at, Row.id, limit=12)
+        assert [row.id for row in page.items] == list(range(24, 0, -2))
+        assert page.next_cursor is None
+    
+    async def test_offset_and_estimate(self, db):
+        """Offsets still work without a cursor; SQLite has no planner estimate."""
+        page = await paginate(db, select(Row), Row.created_at, Row.id, skip=20, limit=10, with_total=True)
+        assert [row.id for row in page.items] == [5, 4, 3, 2, 1]
+        assert page.estimated_total is None
+    
+    def test_headers(self):
+        """The next cursor and estimate travel in response headers."""
+        response = Response()
+        assert page_response(response, Page(items=[1, 2], next_cursor="abc", estimated_total=90)) == [1, 2]
+        assert response.headers[NEXT_CURSOR_HEADER] == "abc"
+        assert response.headers["X-Total-Estimate"] == "90"
+
+
+class TestListQuery:
+    """Test suite for filtered, sorted list queries."""
+    
+    async def test_filters_before_limit(self, db):
+        """Equality, IN and range filters run in SQL, so a page is always full."""
+        options = ListOptions(limit=3, since=datetime(2024, 1, 1, 0, 15))
+        page = await ListQuery(Row).where(group_id=1, name=["row-0", "row-2"], id=None).page(db, options)
+        assert [row.id for row in page.items] == [25, 17, 15]
+        assert page.next_cursor is None
+    
+    async def test_sort_walk(self, db):
+        """Ascending sorts on another column walk every row once, ties broken by id."""
+        options, seen = ListOptions(limit=4, sort="name"), []
+        while True:
+            page = await ListQuery(Row).page(db, options)
+            seen += [(row.name, row.id) for row in page.items]
+            if not page.next_cursor:
+                break
+            options = ListOptions(limit=4, sort="name", cursor=page.next_cursor)
+        assert seen == sorted((f"row-{i % 5}", i) for i in range(1, 26))
+    
+    async def test_cursor_for_other_sort(self, db):
+        """A cursor only resumes the sort it was issued for."""
+        page = await ListQuery(Row).page(db, ListOptions(limit=2))
+        with pytest.raises(ValueError):
+            await ListQuery(Row).page(db, ListOptions(limit=2, sort="created_at", cursor=page.next_cursor))
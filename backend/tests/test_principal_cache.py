@@ -0,0 +1,169 @@
+"""
+ANPTOP Backend - Tests for Principal and Token Caching
+"""
+
+import asyncio
+import pytest
+import sys
+import os
+import time
+from types import SimpleNamespace
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from fastapi.security import SecurityScopes
+
+from app.core import security
+from app.core.principal_cache import Principal, PrincipalCache, TokenCache
+from app.models.user import UserRole
+
+
+def make_user(user_id: int = 1, role: UserRole = UserRole.TESTER, is_active: bool = True):
+    return SimpleNamespace(
+        id=user_id, username=f"user{user_id}", email=f"user{user_id}@example.com", full_name="Test User",
+        role=role, is_active=is_active, is_superuser=False, mfa_enabled=False,
+    )
+
+
+class Loader:
+    """Counts loads of a user whose row can be changed between them."""
+    
+    def __init__(self, user=None, delay: float = 0):
+        self.user = user or make_user()
+        self.delay = delay
+        self.calls = 0
+    
+    async def __call__(self):
+        self.calls += 1
+        user = self.user
+        if self.delay:
+            await asyncio.sleep(self.delay)
+        return user
+
+
+class FakeRedis:
+    """The subset of the redis client the cache uses, with expiry ignored."""
+    
+    def __init__(self):
+        self.data = {}
+    
+    async def get(self, key):
+        return self.data.get(key)
+    
+    async def set(self, key, value, ex=None):
+        self.data[key] = value
+    
+    async def delete(self, *keys):
+        for key in keys:
+            self.data.pop(key, None)
+
+
+class TestPrincipalCache:
+    """Test suite for cached principal resolution."""
+    
+    async def test_resolves_once_until_invalidated(self):
+        """Principals are served from the cache until the user is invalidated."""
+        cache = PrincipalCache(ttl=60)
+        load = Loader()
+        first = await cache.resolve(1, load)
+        assert await cache.resolve(1, load) == first
+        assert load.calls == 1
+        assert first.get_scopes() == ["tester", "analyst"]
+        assert first.has_permission("workflows:execute") and not first.has_permission("users:create")
+        
+        load.user = make_user(is_active=False)
+        await cache.invalidate(1)
+        assert (await cache.resolve(1, load)).is_active is False
+        assert load.calls == 2
+    
+    async def test_entries_expire(self):
+        """Entries are reloaded once the TTL has passed."""
+        cache = PrincipalCache(ttl=0.05)
+        load = Loader()
+        await cache.resolve(1, load)
+        await asyncio.sleep(0.1)
+        await cache.resolve(1, load)
+        assert load.calls == 2
+    
+    async def test_invalidation_during_load_is_not_cached(self):
+        """A principal loaded across an invalidation is used once but not kept."""
+        cache = PrincipalCache(ttl=60)
+        load = Loader(make_user(role=UserRole.ADMIN), delay=0.05)
+        resolving = asyncio.ensure_future(cache.resolve(1, load))
+        await asyncio.sleep(0.01)
+        await cache.invalidate(1)
+        assert (await resolving).role == UserRole.ADMIN
+        assert await cache.get(1) is None
+    
+    async def test_disabled_always_loads(self):
+        cache = PrincipalCache(ttl=0)
+        load = Loader()
+        await cache.resolve(1, load)
+        await cache.resolve(1, load)
+        assert load.calls == 2 and len(cache) == 0
+    
+    async def test_redis_backend(self):
+        """With Redis, principals round-trip through it and invalidation deletes them."""
+        redis = FakeRedis()
+        cache = PrincipalCache(ttl=60, redis=redis)
+        load = Loader(make_user(7, UserRole.LEAD))
+        principal = await cache.resolve(7, load)
+        assert Principal.from_json(redis.data["anptop:principal:7"]) == principal
+        assert await cache.resolve(7, load) == principal
+        assert load.calls == 1
+        await cache.invalidate(7)
+        assert redis.data == {}
+    
+    
+    async def test_get_current_user_uses_cache(self, monkeypatch):
+        """Requests resolve the user once; a deactivation takes effect once invalidated."""
+        load = Loader()
+        monkeypatch.setattr(security.User, "get_by_id", classmethod(lambda cls, db, user_id: load()))
+        monkeypatch.setattr(security, "principal_cache", PrincipalCache(ttl=60))
+        token = security.create_access_token({"sub": 1})
+        for _ in range(3):
+            user = await security.get_current_user(SecurityScopes(["tester"]), token, db=None)
+            assert user.id == 1
+        assert load.calls == 1
+        
+        with pytest.raises(security.HTTPException) as missing_scope:
+            await security.get_current_user(SecurityScopes(["admin"]), token, db=None)
+        assert missing_scope.value.status_code == 403
+        
+        load.user = make_user(is_active=False)
+        await security.principal_cache.invalidate(1)
+        with pytest.raises(security.HTTPException) as disabled:
+            await security.get_current_user(SecurityScopes(), token, db=None)
+        assert disabled.value.status_code == 403
+
+
+class TestTokenCache:
+    """Test suite for memoized token verification."""
+    
+    def test_entries_live_until_exp(self):
+        cache = TokenCache()
+        cache.set("live", {"sub": 1, "exp": time.time() + 60})
+        cache.set("expired", {"sub": 2, "exp": time.time() - 1})
+        cache.set("no-exp", {"sub": 3})
+        assert cache.get("live")["sub"] == 1
+        assert cache.get("expired") is None
+        assert cache.get("no-exp") is None
+        assert len(cache) == 1
+    
+    def test_decode_token_verifies_once(self, monkeypatch):
+        """A token's signature is checked once; tampered tokens still fail."""
+        calls = []
+        decode = security.jwt.decode
+        
+        def counting_decode(*args, **kwargs):
+            calls.append(args[0])
+            return decode(*args, **kwargs)
+        
+        monkeypatch.setattr(security.jwt, "decode", counting_decode)
+        monkeypatch.setattr(security, "token_cache", TokenCache())
+        token = security.create_access_token({"sub": "1"})
+        assert security.decode_token(token)["sub"] == "1"
+        assert security.decode_token(token)["sub"] == "1"
+        assert len(calls) == 1
+        
+        with pytest.raises(security.HTTPException):
+            security.decode_token(token[:-2] + ("AA" if token[-2:] != "AA" else "BB"))
@@ -0,0 +1,139 @@
+"""
+ANPTOP Backend - Tests for the GCRA Rate Limiter
+"""
+
+import asyncio
+import json
+import pytest
+import sys
+import os
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from app.core.credentials import verified_api_keys
+from app.core.rate_limit import Bucket, MemoryBackend, RateLimiter, RateLimitMiddleware
+from app.core.security import create_access_token, generate_api_key
+
+
+def request(path: str = "/api/v1/engagements", token: str = None, client: str = "10.0.0.1"):
+    headers = [(b"host", b"testserver")]
+    if token:
+        headers.append((b"authorization", f"Bearer {token}".encode()))
+    return {"type": "http", "method": "GET", "path": path, "headers": headers, "client": (client, 50000)}
+
+
+async def call(app, scope):
+    """Run one request through an ASGI app; returns (status, headers, body)."""
+    messages = []
+    
+    async def receive():
+        return {"type": "http.request", "body": b""}
+    
+    async def send(message):
+        messages.append(message)
+    
+    await app(scope, receive, send)
+    start = messages[0]
+    body = b"".join(m.get("body", b"") for m in messages[1:])
+    return start["status"], {k.decode(): v.decode() for k, v in start["headers"]}, body
+
+
+async def ok_app(scope, receive, send):
+    await send({"type": "http.response.start", "status": 200, "headers": [(b"content-type", b"text/plain")]})
+    await send({"type": "http.response.body", "body": b"ok"})
+
+
+class TestMemoryBackend:
+    """Test suite for in-process GCRA buckets."""
+    
+    async def test_burst_then_steady_rate(self):
+        """A full burst is allowed at once, then one request per interval."""
+        backend = MemoryBackend()
+        bucket = Bucket("k", limit=5, window=0.5, burst=3)
+        results = [await backend.acquire([bucket]) for _ in range(4)]
+        assert [r[1] for r in results[:3]] == [2, 1, 0]
+        retry_after = results[3][0]
+        assert 0 < retry_after <= 0.1
+        await asyncio.sleep(retry_after + 0.01)
+        assert (await backend.acquire([bucket]))[0] == 0
+    
+    async def test_all_or_nothing(self):
+        """A request refused by one bucket is not counted against the others."""
+        backend = MemoryBackend()
+        default = Bucket("caller", limit=10, window=60, burst=10)
+        route = Bucket("caller:route", limit=1, window=60, burst=1)
+        assert (await backend.acquire([default, route]))[0] == 0
+        retry_after, _, index = await backend.acquire([default, route])
+        assert retry_after > 0 and index == 1
+        assert (await backend.acquire([default]))[1] == 8
+    
+    async def test_sweeps_expired_keys(self):
+        backend = MemoryBackend(max_keys=1)
+        for key in ("a", "b", "c"):
+            await backend.acquire([Bucket(key, limit=1000, window=0.001, burst=1)])
+        await asyncio.sleep(0.01)
+        await backend.acquire([Bucket("d", limit=1, window=60, burst=1)])
+        assert set(backend._tat) == {"d"}
+
+
+class TestRateLimiter:
+    """Test suite for caller identification and limits."""
+    
+    def test_identifies_callers(self):
+        limiter = RateLimiter(MemoryBackend())
+        api_key = generate_api_key()
+        assert limiter.caller(request(token=create_access_token({"sub": 42}))) == ("user", "42")
+        assert limiter.caller(request(token=api_key)) == ("ip", "10.0.0.1")
+        verified_api_keys.add(api_key)
+        assert limiter.caller(request(token=api_key)) == ("key", api_key[:15])
+        assert limiter.caller(request(token="not-a-jwt")) == ("ip", "10.0.0.1")
+        assert limiter.caller(request()) == ("ip", "10.0.0.1")
+    
+    async def test_route_limits_apply_per_caller(self):
+        limiter = RateLimiter(MemoryBackend(), requests=100, window=60, routes={"/api/v1/tools/execute": 2})
+        alice = create_access_token({"sub": 1})
+        bob = create_access_token({"sub": 2})
+        results = [await limiter.check(request("/api/v1/tools/execute", alice)) for _ in range(3)]
+        assert [d.allowed for d in results] == [True, True, False]
+        assert results[2].limit == 2 and results[2].retry_after > 0
+        assert (await limiter.check(request("/api/v1/tools/execute", bob))).allowed
+        assert (await limiter.check(request("/api/v1/engagements", alice))).allowed
+    
+    async def test_forged_keys_share_the_address_bucket(self):
+        """Made-up keys, or a known prefix without the key, cannot open fresh buckets."""
+        limiter = RateLimiter(MemoryBackend(), requests=2, window=60)
+        genuine = generate_api_key()
+        verified_api_keys.add(genuine)
+        forged = [generate_api_key() for _ in range(4)]
+        forged.append(genuine[:15] + "x" * (len(genuine) - 15))
+        results = [(await limiter.check(request(token=key))).allowed for key in forged]
+        assert results == [True, True, False, False, False]
+        assert (await limiter.check(request(token=genuine))).allowed
+    
+    async def test_backend_failure_lets_requests_through(self):
+        class Broken:
+            async def acquire(self, buckets):
+                raise ConnectionError("redis down")
+        limiter = RateLimiter(Broken())
+        assert await limiter.check(request()) is None
+
+
+class TestRateLimitMiddleware:
+    """Test suite for the ASGI middleware."""
+    
+    async def test_rejects_with_retry_after(self):
+        limiter = RateLimiter(MemoryBackend(), requests=2, window=60, exempt_paths=["/health"])
+        app = RateLimitMiddleware(ok_app, limiter)
+        status, headers, _ = await call(app, request())
+        assert status == 200
+        assert headers["x-ratelimit-limit"] == "2" and headers["x-ratelimit-remaining"] == "1"
+        await call(app, request())
+        status, headers, body = await call(app, request())
+        assert status == 429
+        assert int(headers["retry-after"]) == 30
+        assert json.loads(body)["code"] == "RATE_LIMITED"
+        status, headers, _ = await call(app, request("/health"))
+        assert status == 200 and "x-ratelimit-limit" not in headers
+    
+    async def test_disabled(self):
+        app = RateLimitMiddleware(ok_app, RateLimiter(MemoryBackend(), requests=1, enabled=False))
+        assert [(await call(app, request()))[0] for _ in range(3)] == [200, 200, 200]
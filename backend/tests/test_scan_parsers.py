@@ -0,0 +1,326 @@
+"""
+ANPTOP Backend - Tests for Scan Output Parsing and Ingestion
+"""
+
+import io
+import pytest
+import sys
+import os
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from datetime import datetime
+from types import SimpleNamespace
+
+from sqlalchemy import JSON, Column, Index, MetaData, Table, insert, select, update
+from sqlalchemy.dialects.postgresql import ARRAY
+from sqlalchemy.exc import IntegrityError
+from sqlalchemy.ext.asyncio import create_async_engine, async_sessionmaker
+
+from app.core import scan_ingest
+from app.core.config import settings
+from app.core.scan_parsers import parse_scan_output, parse_nuclei_output, HostRecord, PortRecord
+from app.core.scan_ingest import TargetIngester, VulnerabilityIngester, _host_identifiers, _severity
+from app.models.target import Target, TargetStatus
+from app.models.user import UserRole
+from app.models.vulnerability import Severity, Vulnerability, VulnerabilityStatus
+
+
+NMAP_XML = b"""<?xml version="1.0" encoding="UTF-8"?>
+<!DOCTYPE nmaprun>
+<nmaprun scanner="nmap" args="nmap -sV -oX - 10.0.0.0/30">
+<scaninfo type="syn" protocol="tcp" numservices="1000"/>
+<host><status state="up" reason="arp-response"/>
+<address addr="10.0.0.1" addrtype="ipv4"/>
+<address addr="AA:BB:CC:DD:EE:FF" addrtype="mac" vendor="Acme"/>
+<hostnames><hostname name="gw.example.com" type="PTR"/></hostnames>
+<ports>
+<port protocol="tcp" portid="22"><state state="open"/><service name="ssh" product="OpenSSH" version="8.9p1" extrainfo="Ubuntu"/></port>
+<port protocol="tcp" portid="25"><state state="closed"/></port>
+<port protocol="udp" portid="53"><state state="open"/><service name="domain"/></port>
+</ports>
+<os><osmatch name="Linux 5.X" accuracy="96"/></os>
+</host>
+<host><status state="down" reason="no-response"/>
+<address addr="10.0.0.2" addrtype="ipv4"/>
+</host>
+<runstats><finished time="1"/></runstats>
+</nmaprun>
+"""
+
+MASSCAN_JSON = b"""[
+{   "ip": "10.0.0.1",   "timestamp": "1700000000", "ports": [ {"port": 80, "proto": "tcp", "status": "open", "reason": "syn-ack", "ttl": 64} ] }
+,
+{   "ip": "10.0.0.1",   "timestamp": "1700000001", "ports": [ {"port": 80, "proto": "tcp", "service": {"name": "http", "banner": "nginx"} } ] }
+,
+{   "ip": "10.0.0.9",   "timestamp": "1700000002", "ports": [ {"port": 443, "proto": "tcp", "status": "open"} ] }
+]
+"""
+
+NUCLEI_JSONL = b"""{"template-id":"git-config","info":{"name":"Git Config File","severity":"medium","reference":["https://example.com/ref"],"classification":{"cve-id":null,"cwe-id":["cwe-200"],"cvss-score":5.3,"cvss-metrics":"CVSS:3.1/AV:N/AC:L/PR:N/UI:N/S:U/C:L/I:N/A:N"}},"type":"http","host":"https://app.example.com","matched-at":"https://app.example.com/.git/config","ip":"10.0.0.7","timestamp":"2024-01-01T00:00:00Z","curl-command":"curl -X GET https://app.example.com/.git/config"}
+[INF] not json
+{"templateID":"tech-detect","info":{"name":"Tech Detect","severity":"unknown"},"matcher_name":"nginx","host":"10.0.0.7:8080","matched":"http://10.0.0.7:8080"}
+"""
+
+
+def bare(table, metadata):
+    """A copy of a model table without foreign keys, to create it on its own."""
+    return Table(
+        table.name,
+        metadata,
+        *[
+            Column(c.name, JSON() if isinstance(c.type, ARRAY) else c.type, primary_key=c.primary_key)
+            for c in table.columns
+        ],
+        *[Index(i.name, *[c.name for c in i.columns], unique=i.unique) for i in table.indexes],
+    )
+
+
+@pytest.fixture
+async def db():
+    engine = create_async_engine("sqlite+aiosqlite:///:memory:")
+    metadata = MetaData()
+    bare(Target.__table__, metadata)
+    bare(Vulnerability.__table__, metadata)
+    async with engine.begin() as conn:
+        await conn.run_sync(metadata.create_all)
+    async with async_sessionmaker(engine, expire_on_commit=False)() as session:
+        yield session
+    await engine.dispose()
+
+
+def parse(data: bytes, scan_format=None):
+    return list(parse_scan_output(io.BytesIO(data), scan_format))
+
+
+class TestScanParsers:
+    """Test suite for the streaming scan output parsers."""
+    
+    def test_nmap_xml(self):
+        """Open ports, host details and OS are read; down hosts are skipped."""
+        hosts = parse(NMAP_XML)
+        assert len(hosts) == 1
+        host = hosts[0]
+        assert host.address == "10.0.0.1"
+        assert host.hostname == "gw.example.com"
+        assert host.mac_address == "AA:BB:CC:DD:EE:FF"
+        assert host.operating_system == "Linux 5.X"
+        assert [(p.port, p.protocol) for p in host.ports] == [(22, "tcp"), (53, "udp")]
+        assert host.ports[0].product == "OpenSSH" and host.ports[0].version == "8.9p1"
+    
+    def test_evidence_wrapper_is_skipped(self):
+        """Executor evidence files are parsed from their stdout section only."""
+        wrapped = (
+            b"# Command: nmap -oX - 10.0.0.1\n# Timestamp: 2024-01-01T00:00:00\n# STDOUT:\n"
+            + NMAP_XML
+            + b"\n# STDERR:\nwarning\n# Return Code: 0\n"
+        )
+        assert [h.address for h in parse(wrapped)] == ["10.0.0.1"]
+    
+    def test_masscan_json(self):
+        """Both masscan -oJ array lines and banner records are read."""
+        hosts = parse(MASSCAN_JSON)
+        assert [h.address for h in hosts] == ["10.0.0.1", "10.0.0.1", "10.0.0.9"]
+        assert hosts[1].ports[0].name == "http"
+        assert hosts[1].ports[0].banner == "nginx"
+    
+    def test_masscan_ndjson(self):
+        """masscan -oD output (one object per line) is read too."""
+        data = b'{"ip": "10.0.0.5", "ports": [{"port": 3389, "proto": "tcp"}]}\n'
+        hosts = parse(data, "masscan_json")
+        assert hosts[0].address == "10.0.0.5" and hosts[0].ports[0].port == 3389
+    
+    def test_rustscan(self):
+        """Plain and greppable rustscan lines are read; banner text is ignored."""
+        data = b".----. .-. .-.\nOpen 10.0.0.3:22\nOpen [fe80::1]:8080\n10.0.0.4 -> [80,443]\n"
+        hosts = parse(data)
+        assert [(h.address, [p.port for p in h.ports]) for h in hosts] == [
+            ("10.0.0.3", [22]),
+            ("fe80::1", [8080]),
+            ("10.0.0.4", [80, 443]),
+        ]
+    
+    def test_unknown_format(self):
+        """Unknown formats are rejected."""
+        with pytest.raises(ValueError):
+            parse(b"anything", "nessus")
+
+
+class TestTargetIngester:
+    """Test suite for batching of parsed hosts."""
+    
+    def test_batches_merge_repeated_hosts(self):
+        """Records for the same host within a batch are merged."""
+        ingester = TargetIngester(db=None, engagement_id=1, batch_size=settings.SCAN_INGEST_BATCH_SIZE)
+        records = iter(parse(MASSCAN_JSON))
+        batch = ingester._next_batch(records)
+        assert list(batch) == ["10.0.0.1", "10.0.0.9"]
+        assert [p.port for p in batch["10.0.0.1"].ports] == [80, 80]
+        assert ingester._next_batch(records) == {}
+    
+    def test_batches_are_bounded(self):
+        """A batch holds at most batch_size hosts plus ports."""
+        ingester = TargetIngester(db=None, engagement_id=1, batch_size=10)
+        records = iter(
+            HostRecord(address=f"10.0.0.{i}", ports=[PortRecord(port=80)]) for i in range(12)
+        )
+        sizes = []
+        while True:
+            batch = ingester._next_batch(records)
+            if not batch:
+                break
+            sizes.append(len(batch))
+        assert sizes == [5, 5, 2]
+    
+    async def test_host_created_concurrently_is_merged(self, db, monkeypatch):
+        """A host inserted by another ingest after the lookup is merged instead of failing."""
+        # The model's ARRAY columns become JSON on SQLite
+        targets = bare(Target.__table__, MetaData())
+        monkeypatch.setattr(scan_ingest, "Target", SimpleNamespace(__table__=targets))
+        c = targets.c
+        await db.execute(insert(targets), [{
+            "engagement_id": 1, "identifier": "10.0.0.1", "ports": [22], "protocols": ["tcp"],
+            "status": TargetStatus.PENDING, "created_at": datetime(2024, 1, 1),
+        }])
+        ingester = TargetIngester(db, engagement_id=1)
+        lookup = ingester._existing_targets
+        calls = []
+        
+        async def stale_lookup(identifiers):
+            calls.append(identifiers)
+            return {} if len(calls) == 1 else await lookup(identifiers)
+        
+        monkeypatch.setattr(ingester, "_existing_targets", stale_lookup)
+        hosts = {
+            "10.0.0.1": HostRecord(address="10.0.0.1", ports=[PortRecord(port=80)]),
+            "10.0.0.2": HostRecord(address="10.0.0.2", ports=[PortRecord(port=443)]),
+        }
+        ids = await ingester._upsert_targets(hosts)
+        rows = (await db.execute(select(c.id, c.identifier, c.ports, c.status).order_by(c.id))).all()
+        assert [(r.identifier, r.ports, r.status) for r in rows] == [
+            ("10.0.0.1", [22, 80], TargetStatus.DISCOVERED),
+            ("10.0.0.2", [443], TargetStatus.DISCOVERED),
+        ]
+        assert ids == {r.identifier: r.id for r in rows}
+        assert (ingester.stats.targets_created, ingester.stats.targets_updated) == (1, 1)
+
+
+class TestNucleiIngestion:
+    """Test suite for nuclei JSONL parsing and finding batching."""
+    
+    def test_parse_jsonl(self):
+        """Findings are read from v3 and v2 style records; other lines are skipped."""
+        findings = list(parse_nuclei_output(io.BytesIO(NUCLEI_JSONL)))
+        assert [f.template_id for f in findings] == ["git-config", "tech-detect"]
+        git = findings[0]
+        assert git.severity == "medium"
+        assert git.cwe_id == "cwe-200" and git.cve_id is None
+        assert git.cvss_score == 5.3
+        assert git.proof_of_concept.startswith("curl")
+        assert findings[1].matcher_name == "nginx"
+        assert _severity(findings[1].severity) == Severity.INFO
+    
+    def test_fingerprint_is_stable(self):
+        """The fingerprint ignores run-specific fields such as timestamp and IP."""
+        first = next(parse_nuclei_output(io.BytesIO(NUCLEI_JSONL)))
+        rerun = NUCLEI_JSONL.replace(b"2024-01-01", b"2025-06-30").replace(b'"10.0.0.7"', b'"10.0.0.8"')
+        second = next(parse_nuclei_output(io.BytesIO(rerun)))
+        assert first.fingerprint == second.fingerprint
+        other = next(parse_nuclei_output(io.BytesIO(NUCLEI_JSONL.replace(b".git/config", b".git/HEAD"))))
+        assert other.fingerprint != first.fingerprint
+    
+    def test_batches_dedupe_fingerprints(self):
+        """Repeated findings within a batch collapse to one row."""
+        ingester = VulnerabilityIngester(db=None, engagement_id=1, batch_size=10)
+        findings = list(parse_nuclei_output(io.BytesIO(NUCLEI_JSONL * 3)))
+        batch = ingester._next_batch(iter(findings))
+        assert len(batch) == 2
+    
+    def test_host_identifiers(self):
+        """Findings are matched to targets by URL, host name or IP."""
+        findings = list(parse_nuclei_output(io.BytesIO(NUCLEI_JSONL)))
+        assert _host_identifiers(findings[0]) == [
+            "https://app.example.com", "app.example.com", "10.0.0.7",
+        ]
+        assert _host_identifiers(findings[1]) == ["10.0.0.7:8080", "10.0.0.7"]
+    
+    async def test_reingest_upserts(self, db):
+        """Re-ingesting refreshes findings in place and keeps their triage status."""
+        c = Vulnerability.__table__.c
+        first = await VulnerabilityIngester(db, engagement_id=1).ingest(parse_nuclei_output(io.BytesIO(NUCLEI_JSONL)))
+        assert (first.vulnerabilities_created, first.vulnerabilities_updated) == (2, 0)
+        await db.execute(update(Vulnerability.__table__).values(status=VulnerabilityStatus.CONFIRMED))
+        await db.commit()
+        
+        rerun = NUCLEI_JSONL.replace(b"Git Config File", b"Git Config Exposure")
+        second = await VulnerabilityIngester(db, engagement_id=1).ingest(parse_nuclei_output(io.BytesIO(rerun)))
+        assert (second.vulnerabilities_created, second.vulnerabilities_updated) == (0, 2)
+        rows = (await db.execute(select(c.name, c.status).order_by(c.id))).all()
+        assert [tuple(row) for row in rows] == [
+            ("Git Config Exposure", VulnerabilityStatus.CONFIRMED),
+            ("Tech Detect", VulnerabilityStatus.CONFIRMED),
+        ]
+    
+    async def test_fingerprint_unique_per_engagement(self, db):
+        """A fingerprint occurs once per engagement; manual findings without one are not limited."""
+        table = Vulnerability.__table__
+        row = {"engagement_id": 1, "fingerprint": None, "name": "x", "severity": Severity.LOW, "description": "x"}
+        await db.execute(insert(table), [
+            row, row, {**row, "fingerprint": "f"}, {**row, "engagement_id": 2, "fingerprint": "f"},
+        ])
+        with pytest.raises(IntegrityError):
+            await db.execute(insert(table), [{**row, "fingerprint": "f"}])
+
+
+class TestIngestEndpoint:
+    """Test suite for ingesting a past execution's output."""
+    
+    async def test_other_engagement_execution_is_not_found(self, tmp_path, monkeypatch):
+        from fastapi import HTTPException
+        from app.api.endpoints import targets
+        from app.core.access import EngagementACL
+        from app.models.tool_execution import ToolExecution
+        
+        async def load(db, engagement_id):
+            return 1, frozenset()
+        
+        async def get_engagement(db, engagement_id):
+            return SimpleNamespace(id=engagement_id, target_scope=[], blacklisted_ips=[])
+        
+        async def get_execution(db, execution_id):
+            return SimpleNamespace(engagement_id=8, output_file=str(output))
+        
+        output = tmp_path / "nmap.xml"
+        output.write_bytes(NMAP_XML)
+        monkeypatch.setattr(targets, "engagement_acl", EngagementACL(load=load))
+        monkeypatch.setattr(targets.Engagement, "get_by_id", get_engagement)
+        monkeypatch.setattr(ToolExecution, "get_by_execution_id", get_execution)
+        owner = SimpleNamespace(id=1, role=UserRole.SENIOR, has_permission=lambda permission: True)
+        with pytest.raises(HTTPException) as missing:
+            await targets.ingest_scan_results(
+                engagement_id=7, scan_format=None, execution_id="e", file=None, current_user=owner, db=None,
+            )
+        assert missing.value.status_code == 404
+    
+    async def test_nuclei_ingest_checks_engagement(self, tmp_path, monkeypatch):
+        from fastapi import HTTPException
+        from app.api.endpoints import vulnerabilities
+        from app.core.access import EngagementACL
+        from app.models.tool_execution import ToolExecution
+        
+        async def load(db, engagement_id):
+            return (1, frozenset()) if engagement_id == 7 else None
+        
+        async def get_execution(db, execution_id):
+            return SimpleNamespace(engagement_id=8, output_file=str(output))
+        
+        output = tmp_path / "nuclei.jsonl"
+        output.write_bytes(NUCLEI_JSONL)
+        monkeypatch.setattr(vulnerabilities, "engagement_acl", EngagementACL(load=load))
+        monkeypatch.setattr(ToolExecution, "get_by_execution_id", get_execution)
+        admin = SimpleNamespace(id=2, role=UserRole.ADMIN)
+        for engagement_id in (7, 9):
+            with pytest.raises(HTTPException) as missing:
+                await vulnerabilities.ingest_nuclei_results(
+                    engagement_id=engagement_id, execution_id="e", file=None, current_user=admin, db=None,
+                )
+            assert missing.value.status_code == 404
@@ -0,0 +1,172 @@
+"""
+ANPTOP Backend - Tests for Engagement Scope Matching
+"""
+
+import ipaddress
+import random
+import time
+import pytest
+import sys
+import os
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from app.core.config import settings
+from app.core.scope import ScopeIndex, ScopeCache, parse_ip_entry
+from app.core.security import verify_scope_boundaries
+from app.core.target_planner import iter_scope_hosts, parse_ports, plan_shards, split_intervals
+
+
+class TestScopeIndex:
+    """Test suite for the compiled scope index."""
+    
+    def test_prefix_is_not_scope(self):
+        """10.1 in scope must not put 10.10.x.x in scope."""
+        index = ScopeIndex(["10.1.0.0/16"])
+        assert index.contains("10.1.200.3")
+        assert not index.contains("10.10.0.1")
+        assert not index.contains("10.1")
+    
+    def test_entry_forms(self):
+        """Addresses, CIDRs, ranges and octet wildcards all parse to intervals."""
+        assert parse_ip_entry("192.168.1.7") == (4, (3232235783, 3232235783))
+        assert parse_ip_entry("10.0.0.5/24")[1] == parse_ip_entry("10.0.0.0-10.0.0.255")[1]
+        assert parse_ip_entry("10.0.0.10-20")[1] == parse_ip_entry("10.0.0.10-10.0.0.20")[1]
+        assert parse_ip_entry("10.0.*")[1] == parse_ip_entry("10.0.0.0/16")[1]
+        assert parse_ip_entry("example.com") is None
+        assert parse_ip_entry("10.0.0.20-10") is None
+    
+    def test_blacklist_is_subtracted(self):
+        """Blacklisted addresses and networks are carved out of the scope."""
+        index = ScopeIndex(["10.0.0.0/24"], ["10.0.0.1", "10.0.0.128/25"])
+        assert index.contains("10.0.0.2")
+        assert not index.contains("10.0.0.1")
+        assert not index.contains("10.0.0.200")
+        assert index.intervals(4) == [
+            (int(ipaddress.ip_address("10.0.0.0")), int(ipaddress.ip_address("10.0.0.0"))),
+            (int(ipaddress.ip_address("10.0.0.2")), int(ipaddress.ip_address("10.0.0.127"))),
+        ]
+    
+    def test_network_targets(self):
+        """A network target is in scope only if the scope covers all of it."""
+        index = ScopeIndex(["10.0.0.0/23"], ["10.0.1.255"])
+        assert index.contains("10.0.0.0/24")
+        assert not index.contains("10.0.1.0/24")
+        assert not index.contains("10.0.0.0/22")
+    
+    def test_ipv6(self):
+        """IPv6 scope entries and bracketed targets are matched."""
+        index = ScopeIndex(["2001:db8::/32"], ["2001:db8::dead"])
+        assert index.contains("2001:db8::1")
+        assert index.contains("[2001:db8::1]:443")
+        assert not index.contains("2001:db8::dead")
+        assert not index.contains("2001:db9::1")
+    
+    def test_domains(self):
+        """Names match exactly, wildcards match below, and blacklisted names win."""
+        index = ScopeIndex(
+            ["example.com", "*.corp.example.com", ".shop.test"],
+            ["vpn.corp.example.com"],
+        )
+        assert index.contains("example.com")
+        assert index.contains("https://Example.com:8443/login")
+        assert not index.contains("www.example.com")
+        assert index.contains("git.corp.example.com")
+        assert not index.contains("corp.example.com")
+        assert not index.contains("vpn.corp.example.com")
+        assert index.contains("shop.test") and index.contains("a.b.shop.test")
+        assert not index.contains("notexample.com")
+    
+    def test_check_many_matches_contains(self):
+        """The bulk paths agree with single lookups."""
+        index = ScopeIndex(["10.0.0.0/8", "172.16.0.0/12", "app.example.com"], ["10.9.0.0/16"])
+        targets = ["10.9.1.1", "10.8.1.1", "172.20.0.1", "192.168.0.1", "app.example.com", "10.0.0.1:22"]
+        assert index.check_many(targets) == [index.contains(t) for t in targets]
+        addresses = [int(ipaddress.ip_address(t)) for t in targets[:4]]
+        assert index.check_addresses(addresses) == [False, True, True, False]
+    
+    def test_bulk_check_is_fast(self):
+        """A million addresses against a large scope check in well under a few seconds."""
+        rng = random.Random(7)
+        scope = [f"10.{rng.randrange(256)}.{rng.randrange(256)}.0/24" for _ in range(2000)]
+        index = ScopeIndex(scope, ["10.0.0.0/16"])
+        addresses = [rng.randrange(0x0A000000, 0x0B000000) for _ in range(1_000_000)]
+        started = time.perf_counter()
+        results = index.check_addresses(addresses)
+        elapsed = time.perf_counter() - started
+        assert len(results) == len(addresses)
+        assert results[:200] == [index.contains_address(a) for a in addresses[:200]]
+        assert elapsed < 5
+
+
+class TestScopeCache:
+    """Test suite for per-engagement scope caching."""
+    
+    def test_reuses_and_rebuilds(self):
+        """The index is reused until the scope changes or is invalidated."""
+        cache = ScopeCache(max_entries=2)
+        first = cache.get(1, ["10.0.0.0/24"])
+        assert cache.get(1, ["10.0.0.0/24"]) is first
+        assert cache.get(1, ["10.0.1.0/24"]) is not first
+        cache.invalidate(1)
+        assert len(cache) == 0
+    
+    def test_is_bounded(self):
+        """Least recently used engagements are evicted."""
+        cache = ScopeCache(max_entries=2)
+        for engagement_id in range(3):
+            cache.get(engagement_id, ["10.0.0.1"])
+        assert len(cache) == 2
+    
+    def test_verify_scope_boundaries(self, monkeypatch):
+        """The security helper applies the blacklist and honours SCOPE_VALIDATION."""
+        assert verify_scope_boundaries(99, "10.0.0.5", ["10.0.0.0/24"], ["10.0.0.5"]) is False
+        assert verify_scope_boundaries(99, "10.0.0.6", ["10.0.0.0/24"], ["10.0.0.5"]) is True
+        monkeypatch.setattr(settings, "SCOPE_VALIDATION", False)
+        assert verify_scope_boundaries(99, "8.8.8.8", ["10.0.0.0/24"]) is True
+
+
+class TestTargetPlanner:
+    """Test suite for lazy scope expansion and shard planning."""
+    
+    def test_hosts_are_generated_lazily(self):
+        """Enumeration skips the blacklist and does not materialise the scope."""
+        index = ScopeIndex(["10.0.0.0/8"], ["10.0.0.1"])
+        hosts = iter_scope_hosts(index)
+        assert [next(hosts) for _ in range(3)] == ["10.0.0.0", "10.0.0.2", "10.0.0.3"]
+    
+    def test_shards_are_balanced(self):
+        """Shards differ by at most one host and cover the scope exactly once."""
+        index = ScopeIndex(["10.0.0.0/24", "10.0.5.0/28", "10.0.9.7"], ["10.0.0.128/26"])
+        shards = plan_shards(index, shard_count=7)
+        sizes = [shard.host_count for shard in shards]
+        assert len(shards) == 7 and max(sizes) - min(sizes) <= 1
+        hosts = [h for shard in shards for h in shard.hosts()]
+        assert hosts == list(iter_scope_hosts(index))
+        assert shards[0].networks() == ["10.0.0.0/28", "10.0.0.16/29", "10.0.0.24/30", "10.0.0.28/32"]
+    
+    def test_large_scope_plans_without_enumeration(self):
+        """A /8 is planned from interval boundaries alone."""
+        shards = plan_shards(ScopeIndex(["10.0.0.0/8"]), shard_count=4, max_hosts=1 << 20)
+        assert len(shards) == 16
+        assert all(shard.networks() == [f"10.{16 * i}.0.0/12"] for i, shard in enumerate(shards))
+    
+    def test_port_shards(self):
+        """Each host shard is crossed with balanced slices of the port list."""
+        assert parse_ports("443,80,8000-8100,81") == [(80, 81), (443, 443), (8000, 8100)]
+        with pytest.raises(ValueError):
+            parse_ports("70000")
+        shards = plan_shards(ScopeIndex(["10.0.0.0/30"]), shard_count=2, ports="1-1000", port_shards=4)
+        assert len(shards) == 8
+        assert [s.port_spec for s in shards[:4]] == ["1-250", "251-500", "501-750", "751-1000"]
+    
+    def test_shard_limit(self):
+        """Plans over the shard limit are refused before any shard is built."""
+        index = ScopeIndex(["10.0.0.0/30"])
+        assert len(plan_shards(index, shard_count=2, ports="1-1000", port_shards=4, max_shards=8)) == 8
+        with pytest.raises(ValueError):
+            plan_shards(ScopeIndex(["10.0.0.0/8"]), shard_count=1, max_hosts=1, max_shards=1000)
+    
+    def test_split_never_exceeds_size(self):
+        """Asking for more parts than items yields one item per part."""
+        assert split_intervals([(1, 3)], 10) == [[(1, 1)], [(2, 2)], [(3, 3)]]
+        assert split_intervals([], 4) == []
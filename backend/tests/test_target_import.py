@@ -0,0 +1,89 @@
+"""
+ANPTOP Backend - Tests for Bulk Target Import
+"""
+
+import io
+import json
+import pytest
+import sys
+import os
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from app.core.target_import import (
+    TargetImporter, TargetImportRow, detect_import_format, iter_import_rows, STAGING,
+)
+from app.models.target import TargetType
+
+
+def rows(data: bytes, import_format=None):
+    return list(iter_import_rows(io.BytesIO(data), import_format))
+
+
+class TestImportRows:
+    """Test suite for reading inventory files."""
+    
+    def test_detect_format(self):
+        """The format is sniffed from the first non-blank byte."""
+        assert detect_import_format(b"\xef\xbb\xbf  [{}]") == "json"
+        assert detect_import_format(b'{"identifier": "a"}') == "ndjson"
+        assert detect_import_format(b"identifier,hostname") == "csv"
+    
+    def test_json_array_is_streamed(self):
+        """JSON array elements are read incrementally, across chunk boundaries."""
+        items = [{"identifier": f"10.0.0.{i}", "notes": "x" * 50} for i in range(3000)]
+        parsed = rows(json.dumps(items, indent=1).encode())
+        assert [n for n, _ in parsed] == list(range(1, 3001))
+        assert parsed[-1][1] == items[-1]
+    
+    def test_malformed_json_array(self):
+        """A truncated array stops the import with an error."""
+        with pytest.raises(ValueError):
+            rows(b'[{"identifier": "a"}, {"identifier": ')
+    
+    def test_ndjson_bad_lines_are_row_errors(self):
+        """An unreadable NDJSON line becomes that row's error."""
+        parsed = rows(b'{"identifier": "a"}\n\n{oops\n{"identifier": "b"}\n')
+        assert [n for n, _ in parsed] == [1, 2, 3]
+        assert isinstance(parsed[1][1], ValueError)
+    
+    def test_csv_rows(self):
+        """CSV cells are validated; blanks fall back to defaults and lists split on ';'."""
+        parsed = rows(b"identifier,target_type,ports,tags,unknown\n10.0.0.1,,22;443,a; b,x\n")
+        row = TargetImportRow.model_validate(parsed[0][1])
+        assert row.target_type == TargetType.HOST
+        assert row.ports == [22, 443]
+        assert row.tags == ["a", "b"]
+        assert row.hostname is None
+
+
+class TestTargetImporter:
+    """Test suite for batch validation ahead of the database merge."""
+    
+    def test_invalid_and_duplicate_rows(self):
+        """Invalid rows are reported, and the last row per identifier wins."""
+        importer = TargetImporter(db=None, engagement_id=1)
+        valid, results = importer._validate([
+            (1, {"identifier": "10.0.0.1", "hostname": "old"}),
+            (2, {"identifier": "10.0.0.1", "hostname": "new"}),
+            (3, {"identifier": "10.0.0.2", "ports": ["http"]}),
+            (4, ValueError("Invalid JSON")),
+            (5, ["not", "an", "object"]),
+        ])
+        assert list(valid) == ["10.0.0.1"]
+        assert valid["10.0.0.1"][0] == 2 and valid["10.0.0.1"][1].hostname == "new"
+        assert [(r["row"], r["status"]) for r in results] == [
+            (1, "duplicate"), (3, "invalid"), (4, "invalid"), (5, "invalid"),
+        ]
+        assert "ports" in results[1]["error"]
+        assert importer.stats.invalid == 3 and importer.stats.duplicates == 1
+    
+    def test_staging_rows(self):
+        """Staged rows carry the engagement, scope result and enum name; omitted fields stay NULL."""
+        importer = TargetImporter(db=None, engagement_id=7)
+        valid, _ = importer._validate([(1, {"identifier": "app.example.com", "target_type": "domain"})])
+        staged = importer._staging_rows(valid, {"app.example.com": False}, copy=False)
+        assert staged[0]["engagement_id"] == 7
+        assert staged[0]["is_in_scope"] is False
+        assert staged[0]["target_type"] == "DOMAIN"
+        assert staged[0]["ports"] is None
+        assert set(staged[0]) == {c.name for c in STAGING.columns}
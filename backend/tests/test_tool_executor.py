@@ -0,0 +1,616 @@
+"""
+ANPTOP Backend - Tests for the Security Tool Executor
+"""
+
+import asyncio
+import hashlib
+import pytest
+import sys
+import os
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from types import SimpleNamespace
+
+from app.core.config import settings
+from app.core.tools_config import SecurityTool, ToolCategory, tool_manager
+from app.core.tool_executor import ToolExecutor, ToolExecutionResult, OutputPreview
+from app.core.execution_stream import ExecutionStream
+from app.core.evidence_writer import EvidenceWriter
+from app.core.tool_scheduler import ToolScheduler, SchedulerFull
+from app.core.result_cache import ResultCache, normalize_command
+from app.core.tool_probe import ToolProbe, command_requirements
+from app.core.scope import ScopeIndex
+from app.core.target_planner import ShardPlan, plan_shards
+from app.models.user import UserRole
+
+
+@pytest.fixture
+def executor(tmp_path, monkeypatch):
+    """Executor writing evidence into a temporary directory."""
+    monkeypatch.setattr(settings, "EVIDENCE_STORAGE_PATH", str(tmp_path))
+    monkeypatch.setattr(settings, "TOOL_HISTORY_PERSIST", False)
+    return ToolExecutor()
+
+
+@pytest.fixture
+def echo_tool(monkeypatch):
+    """Register a throwaway tool that writes to stdout and stderr."""
+    tool = SecurityTool(
+        name="Echo",
+        category=ToolCategory.DISCOVERY,
+        description="Test tool",
+        command_template="python3 -c \"import sys; sys.stdout.write('A' * {size}); sys.stderr.write('warn')\"",
+        timeout_seconds=30,
+    )
+    monkeypatch.setitem(tool_manager.tools, "echo_test", tool)
+    return "echo_test"
+
+
+class TestOutputPreview:
+    """Test suite for the bounded output preview."""
+    
+    def test_small_output_is_kept_whole(self):
+        """Output below the limit is returned unchanged."""
+        preview = OutputPreview(16)
+        preview.feed(b"hello ")
+        preview.feed(b"world")
+        assert preview.text() == "hello world"
+        assert not preview.truncated
+    
+    def test_large_output_keeps_head_and_tail(self):
+        """Output above the limit keeps only head and tail bytes."""
+        preview = OutputPreview(8)
+        for _ in range(100):
+            preview.feed(b"0123456789")
+        assert preview.total_bytes == 1000
+        assert preview.truncated
+        assert len(preview.head) == 4 and len(preview.tail) == 4
+        assert preview.text().startswith("0123")
+        assert preview.text().endswith("6789")
+
+
+class TestStreamingExecution:
+    """Test suite for streaming output capture."""
+    
+    async def test_output_streamed_to_evidence_file(self, executor, echo_tool):
+        """Full output lands on disk while the result holds a preview."""
+        executor.preview_bytes = 64
+        result = await executor.execute_tool(echo_tool, {"size": "100000"})
+        
+        assert result.status == "success"
+        assert result.stdout_bytes == 100000
+        assert result.stderr_bytes == 4
+        assert result.output_truncated
+        assert len(result.stdout) < 200
+        
+        with open(result.output_file, "rb") as f:
+            content = f.read()
+        assert b"# STDOUT:\n" + b"A" * 100000 + b"\n# STDERR:" in content
+        assert b"# STDERR:\nwarn" in content
+        assert b"# Return Code: 0" in content
+        assert result.hash_sha256 == hashlib.sha256(content).hexdigest()
+    
+    async def test_md5_computed_when_enabled(self, executor, echo_tool):
+        """The optional MD5 digest matches the evidence file."""
+        executor.hash_md5 = True
+        result = await executor.execute_tool(echo_tool, {"size": "1000"})
+        with open(result.output_file, "rb") as f:
+            content = f.read()
+        assert result.hash_md5 == hashlib.md5(content).hexdigest()
+        assert result.hash_sha256 == hashlib.sha256(content).hexdigest()
+    
+    async def test_evidence_writer_hashes_incrementally(self, tmp_path):
+        """Digests cover exactly the bytes written, including copied files."""
+        spool = tmp_path / "spool"
+        spool.write_bytes(b"spooled" * 1000)
+        async with EvidenceWriter(str(tmp_path / "out"), md5=True) as writer:
+            await writer.write(b"head\n")
+            await writer.copy_from(str(spool), chunk_size=100)
+            await writer.write(b"")
+        content = (tmp_path / "out").read_bytes()
+        assert content == b"head\n" + b"spooled" * 1000
+        assert writer.size == len(content)
+        assert writer.sha256 == hashlib.sha256(content).hexdigest()
+        assert writer.md5 == hashlib.md5(content).hexdigest()
+        assert len(writer.sha256) == 64
+    
+    async def test_history_is_bounded(self, executor, echo_tool):
+        """Only the most recent results are kept in memory."""
+        executor.execution_history = type(executor.execution_history)(maxlen=2)
+        results = [
+            await executor.execute_tool(echo_tool, {"size": "1"}, engagement_id=7)
+            for _ in range(3)
+        ]
+        assert list(executor.execution_history) == results[1:]
+        assert all(r.engagement_id == 7 for r in results)
+        assert results[0].timestamp <= results[2].timestamp
+    
+    async def test_cancelled_execution_kills_process(self, executor, monkeypatch):
+        """Cancelling a run kills its process group instead of leaving it untracked."""
+        tool = SecurityTool(
+            name="Sleep",
+            category=ToolCategory.DISCOVERY,
+            description="Test tool",
+            command_template="python3 -c \"import time; time.sleep({seconds})\"",
+            timeout_seconds=60,
+        )
+        monkeypatch.setitem(tool_manager.tools, "sleep_test", tool)
+        running = asyncio.ensure_future(executor.execute_tool("sleep_test", {"seconds": "30"}))
+        for _ in range(100):
+            if executor._processes:
+                break
+            await asyncio.sleep(0.05)
+        (_, process), = executor._processes.values()
+        
+        running.cancel()
+        with pytest.raises(asyncio.CancelledError):
+            await running
+        assert process.returncode is not None
+        with pytest.raises(ProcessLookupError):
+            os.kill(process.pid, 0)
+        assert executor._processes == {}
+    
+    async def test_stream_ends_when_run_is_aborted(self, executor, echo_tool, monkeypatch):
+        """Subscribers get an end event when execute_tool is cancelled or raises."""
+        started = asyncio.Event()
+        
+        async def stuck(*args, **kwargs):
+            started.set()
+            await asyncio.Event().wait()
+        
+        monkeypatch.setattr(executor, "_scheduled_run", stuck)
+        running = asyncio.ensure_future(executor.execute_tool(echo_tool, {"size": "1"}, execution_id="gone"))
+        await started.wait()
+        events = asyncio.ensure_future(_collect(executor.streams.get("gone").subscribe()))
+        await asyncio.sleep(0)
+        running.cancel()
+        with pytest.raises(asyncio.CancelledError):
+            await running
+        assert (await asyncio.wait_for(events, 5))[-1] == {
+            "event": "end", "execution_id": "gone", "status": "cancelled",
+        }
+        assert "gone" not in executor.streams.running()
+        
+        async def broken(*args, **kwargs):
+            raise RuntimeError("scheduler error")
+        
+        monkeypatch.setattr(executor, "_scheduled_run", broken)
+        with pytest.raises(RuntimeError):
+            await executor.execute_tool(echo_tool, {"size": "1"}, execution_id="broken")
+        assert executor.streams.get("broken").summary == {"status": "failed"}
+
+
+async def _collect(events):
+    return [event async for event in events]
+
+
+class TestExecutionStream:
+    """Test suite for live output streams."""
+    
+    async def test_lines_fan_out_to_subscribers(self):
+        """Every subscriber sees complete lines and the end event."""
+        stream = ExecutionStream("exec-1", "echo_test")
+        first, second = stream.subscribe(), stream.subscribe()
+        # Prime both generators so they are registered
+        first_task = asyncio.ensure_future(first.__anext__())
+        second_task = asyncio.ensure_future(second.__anext__())
+        await asyncio.sleep(0)
+        
+        stream.feed("stdout", b"line one\nline t")
+        stream.feed("stdout", b"wo\n")
+        stream.close(status="success", return_code=0)
+        
+        assert (await first_task)["line"] == "line one"
+        assert (await second_task)["line"] == "line one"
+        rest = [event async for event in first]
+        assert [e["event"] for e in rest] == ["stdout", "end"]
+        assert rest[0]["line"] == "line two"
+    
+    async def test_slow_subscriber_drops_oldest(self):
+        """A lagging subscriber loses its oldest lines instead of blocking."""
+        stream = ExecutionStream("exec-2", "echo_test", buffer_size=3, backlog_lines=0)
+        events = stream.subscribe()
+        first = asyncio.ensure_future(events.__anext__())
+        await asyncio.sleep(0)
+        stream.feed("stdout", b"".join(b"%d\n" % i for i in range(10)))
+        stream.close(status="success")
+        
+        assert await first == {"event": "dropped", "count": 9}
+        rest = [event async for event in events]
+        assert [e["event"] for e in rest] == ["stdout", "end"]
+        assert rest[0]["line"] == "9"
+    
+    async def test_late_subscriber_gets_backlog(self):
+        """Subscribing after the run still replays the recent output."""
+        stream = ExecutionStream("exec-3", "echo_test")
+        stream.feed("stderr", b"warn\n")
+        stream.close(status="failed", return_code=1)
+        events = [event async for event in stream.subscribe()]
+        assert events[0] == {"event": "stderr", "seq": 1, "line": "warn"}
+        assert events[-1]["return_code"] == 1
+
+
+def _tool(category=ToolCategory.DISCOVERY, risk_level=1):
+    return SecurityTool(
+        name="Sched",
+        category=category,
+        description="Test tool",
+        command_template="true",
+        risk_level=risk_level,
+    )
+
+
+def _scheduler(**overrides):
+    options = dict(
+        max_concurrent=2,
+        category_limits={},
+        default_category_limit=2,
+        tool_limits={},
+        default_tool_limit=2,
+        max_queue=10,
+    )
+    options.update(overrides)
+    return ToolScheduler(**options)
+
+
+class TestToolScheduler:
+    """Test suite for execution slot scheduling."""
+    
+    async def _hold(self, scheduler, key, tool, order, release, **kwargs):
+        async with scheduler.slot(key, tool, **kwargs):
+            order.append(key)
+            await release.wait()
+    
+    async def test_global_budget_is_enforced(self):
+        """No more than max_concurrent executions hold a slot."""
+        scheduler = _scheduler(max_concurrent=2, default_tool_limit=5, default_category_limit=5)
+        order, release = [], asyncio.Event()
+        tasks = [
+            asyncio.create_task(self._hold(scheduler, f"t{i}", _tool(), order, release))
+            for i in range(4)
+        ]
+        await asyncio.sleep(0.01)
+        assert len(order) == 2
+        assert scheduler.queue_depth == 2
+        assert scheduler.stats()["running"] == 2
+        release.set()
+        await asyncio.gather(*tasks)
+        assert len(order) == 4
+        assert scheduler.stats()["running"] == 0
+    
+    async def test_tool_limit_lets_other_tools_through(self):
+        """A saturated tool does not block a different eligible tool."""
+        scheduler = _scheduler(max_concurrent=4, tool_limits={"masscan": 1})
+        order, release = [], asyncio.Event()
+        tasks = [
+            asyncio.create_task(self._hold(scheduler, key, _tool(), order, release))
+            for key in ("masscan", "masscan", "nmap")
+        ]
+        await asyncio.sleep(0.01)
+        assert order == ["masscan", "nmap"]
+        release.set()
+        await asyncio.gather(*tasks)
+    
+    async def test_lower_priority_value_runs_first(self):
+        """Low-risk tools are granted a freed slot before high-risk ones."""
+        scheduler = _scheduler(max_concurrent=1)
+        order, gate = [], asyncio.Event()
+        blocker = asyncio.create_task(self._hold(scheduler, "blocker", _tool(), order, gate))
+        await asyncio.sleep(0)
+        done = asyncio.Event()
+        done.set()
+        risky = asyncio.create_task(self._hold(scheduler, "exploit", _tool(risk_level=5), order, done))
+        safe = asyncio.create_task(self._hold(scheduler, "ping", _tool(risk_level=1), order, done))
+        await asyncio.sleep(0)
+        gate.set()
+        await asyncio.gather(blocker, risky, safe)
+        assert order == ["blocker", "ping", "exploit"]
+    
+    async def test_engagements_share_fairly(self):
+        """Ties go to the engagement with fewer running executions."""
+        scheduler = _scheduler(max_concurrent=2, default_tool_limit=5, default_category_limit=5)
+        order, gate_a, gate_b, done = [], asyncio.Event(), asyncio.Event(), asyncio.Event()
+        done.set()
+        busy = asyncio.create_task(self._hold(scheduler, "a1", _tool(), order, gate_a, engagement_id=1))
+        other = asyncio.create_task(self._hold(scheduler, "b1", _tool(), order, gate_b, engagement_id=2))
+        await asyncio.sleep(0)
+        # a2 arrives first, but engagement 1 already holds a slot
+        later_a = asyncio.create_task(self._hold(scheduler, "a2", _tool(), order, gate_a, engagement_id=1))
+        await asyncio.sleep(0)
+        later_b = asyncio.create_task(self._hold(scheduler, "b2", _tool(), order, done, engagement_id=2))
+        await asyncio.sleep(0)
+        gate_b.set()
+        await asyncio.gather(other, later_b)
+        gate_a.set()
+        await asyncio.gather(busy, later_a)
+        assert order == ["a1", "b1", "b2", "a2"]
+    
+    async def test_full_queue_rejects(self):
+        """Requests beyond max_queue are refused instead of queued."""
+        scheduler = _scheduler(max_concurrent=1, max_queue=1)
+        order, release = [], asyncio.Event()
+        running = asyncio.create_task(self._hold(scheduler, "a", _tool(), order, release))
+        queued = asyncio.create_task(self._hold(scheduler, "b", _tool(), order, release))
+        await asyncio.sleep(0)
+        with pytest.raises(SchedulerFull):
+            async with scheduler.slot("c", _tool()):
+                pass
+        release.set()
+        await asyncio.gather(running, queued)
+    
+    async def test_cancelled_waiter_leaves_queue(self):
+        """Cancelling a queued execution frees its place in the queue."""
+        scheduler = _scheduler(max_concurrent=1)
+        order, release = [], asyncio.Event()
+        running = asyncio.create_task(self._hold(scheduler, "a", _tool(), order, release))
+        queued = asyncio.create_task(self._hold(scheduler, "b", _tool(), order, release))
+        await asyncio.sleep(0)
+        queued.cancel()
+        await asyncio.sleep(0)
+        assert scheduler.queue_depth == 0
+        release.set()
+        await running
+        assert scheduler.stats()["running"] == 0
+    
+    async def test_executor_reports_rejection(self, executor, echo_tool):
+        """A full queue surfaces as a rejected result, not an exception."""
+        executor.scheduler = _scheduler(max_queue=0)
+        result = await executor.execute_tool(echo_tool, {"size": "1"})
+        assert result.status == "rejected"
+        assert "queue is full" in result.stderr
+
+
+@pytest.fixture
+def counting_tool(monkeypatch, tmp_path):
+    """Register a cacheable tool that records every real run."""
+    runs = tmp_path / "runs.txt"
+    tool = SecurityTool(
+        name="Counter",
+        category=ToolCategory.DISCOVERY,
+        description="Test tool",
+        command_template=(
+            f"python3 -c \"import time; open('{runs}', 'a').write('x'); "
+            "time.sleep(0.2); print('{target}')\""
+        ),
+        cache_ttl_seconds=60,
+    )
+    monkeypatch.setitem(tool_manager.tools, "counter_test", tool)
+    return "counter_test", runs
+
+
+class TestResultCache:
+    """Test suite for the tool result cache."""
+    
+    async def test_concurrent_identical_runs_share_one_process(self, executor, counting_tool):
+        """Identical requests in flight are coalesced into a single run."""
+        key, runs = counting_tool
+        results = await asyncio.gather(*[
+            executor.execute_tool(key, {"target": "10.0.0.1"}) for _ in range(3)
+        ])
+        assert runs.read_text() == "x"
+        assert len({r.execution_id for r in results}) == 3
+        assert len({r.output_file for r in results}) == 1
+        assert sum(r.cached for r in results) == 2
+    
+    async def test_hit_returns_stored_evidence(self, executor, counting_tool):
+        """A repeat run reuses the evidence file and hash."""
+        key, runs = counting_tool
+        first = await executor.execute_tool(key, {"target": "10.0.0.1"})
+        second = await executor.execute_tool(key, {"target": "10.0.0.1"})
+        other = await executor.execute_tool(key, {"target": "10.0.0.2"})
+        assert runs.read_text() == "xx"
+        assert second.cached and not other.cached
+        assert second.output_file == first.output_file
+        assert second.hash_sha256 == first.hash_sha256
+    
+    async def test_hit_refused_while_kill_switch_active(self, executor, counting_tool, monkeypatch):
+        """The kill switch also stops cached results from being handed out."""
+        key, runs = counting_tool
+        await executor.execute_tool(key, {"target": "10.0.0.1"})
+        monkeypatch.setattr(sys.modules["app.core.tool_executor"], "kill_switch", SimpleNamespace(active=True))
+        result = await executor.execute_tool(key, {"target": "10.0.0.1"})
+        assert result.status == "killed" and not result.cached
+        assert runs.read_text() == "x"
+    
+    async def test_catalog_reload_clears_cache(self, executor, counting_tool, monkeypatch):
+        """Reloading the tool catalog drops results of the old definitions."""
+        from app.api.endpoints import tools
+        key, runs = counting_tool
+        await executor.execute_tool(key, {"target": "10.0.0.1"})
+        
+        async def audit_log(**kwargs):
+            pass
+        
+        monkeypatch.setattr(tools, "tool_executor", executor)
+        monkeypatch.setattr(tools, "audit_log", audit_log)
+        monkeypatch.setattr(tools.tool_manager, "reload", lambda: SimpleNamespace(fingerprint="f", from_cache=False))
+        await tools.reload_tool_catalog(current_user=SimpleNamespace(id=1, role=UserRole.ADMIN), db=None)
+        assert executor.result_cache.stats()["entries"] == 0
+        await executor.execute_tool(key, {"target": "10.0.0.1"})
+        assert runs.read_text() == "xx"
+    
+    async def test_hits_stay_within_an_engagement(self, executor, counting_tool):
+        """Evidence from one engagement is never reused for another."""
+        key, runs = counting_tool
+        first = await executor.execute_tool(key, {"target": "10.0.0.1"}, engagement_id=1)
+        repeat = await executor.execute_tool(key, {"target": "10.0.0.1"}, engagement_id=1)
+        other = await executor.execute_tool(key, {"target": "10.0.0.1"}, engagement_id=2)
+        assert runs.read_text() == "xx"
+        assert repeat.cached and repeat.output_file == first.output_file
+        assert not other.cached and other.output_file != first.output_file
+    
+    def test_high_risk_tools_are_not_cacheable(self):
+        """Only low-risk recon categories are eligible."""
+        cache = ResultCache(max_bytes=1024)
+        recon = _tool(ToolCategory.SCANNING).model_copy(update={"cache_ttl_seconds": 60})
+        exploit = _tool(ToolCategory.EXPLOITATION).model_copy(update={"cache_ttl_seconds": 60})
+        risky = recon.model_copy(update={"risk_level": 4})
+        assert cache.cacheable(recon)
+        assert not cache.cacheable(exploit)
+        assert not cache.cacheable(risky)
+        assert not cache.cacheable(_tool(ToolCategory.SCANNING))
+    
+    def test_lru_eviction_by_bytes(self):
+        """Least recently used entries go first once the byte budget is exceeded."""
+        cache = ResultCache(max_bytes=10)
+        result = lambda text: ToolExecutionResult(
+            tool_name="t", command="c", return_code=0, stdout=text,
+            stderr="", duration_seconds=0, status="success",
+        )
+        cache.put(("t", "a"), result("aaaa"), 60)
+        cache.put(("t", "b"), result("bbbb"), 60)
+        assert cache.get(("t", "a")) is not None
+        cache.put(("t", "c"), result("cccc"), 60)
+        assert cache.get(("t", "b")) is None
+        assert cache.get(("t", "a")) is not None
+        assert cache.total_bytes == 8
+    
+    def test_command_normalization(self):
+        """Quoting and spacing differences map to the same key."""
+        assert normalize_command("nmap  -sV   '10.0.0.1'") == normalize_command("nmap -sV 10.0.0.1")
+
+
+class TestToolProbe:
+    """Test suite for the binary availability probe."""
+    
+    @pytest.fixture(autouse=True)
+    def restore_availability(self, monkeypatch):
+        """Probes publish to the shared tool manager; undo that afterwards."""
+        monkeypatch.setattr(tool_manager, "availability", tool_manager.availability)
+    
+    @staticmethod
+    def tool(template, **kwargs):
+        return SecurityTool(
+            name="Probe", category=ToolCategory.DISCOVERY, description="Test tool",
+            command_template=template, **kwargs,
+        )
+    
+    def test_command_requirements(self):
+        """The executable (and interpreter script) is taken from the template."""
+        assert command_requirements(self.tool("nmap -sV {target}")) == ("nmap", None)
+        assert command_requirements(self.tool("python3 /opt/sqlmap/sqlmap.py -u {url}")) == (
+            "python3", "/opt/sqlmap/sqlmap.py"
+        )
+        assert command_requirements(self.tool("curl {url} | jq .")) == ("curl", None)
+        assert command_requirements(self.tool("python3 {script} {target}")) == ("python3", None)
+        assert command_requirements(self.tool("nmap", path="/opt/nmap/nmap")) == ("/opt/nmap/nmap", None)
+    
+    async def test_probe_all_reports_availability_and_version(self):
+        """Missing executables are unavailable; found ones report a version."""
+        probe = ToolProbe(ttl_seconds=60, concurrency=2)
+        results = await probe.probe_all({
+            "present": self.tool("python3 -c pass"),
+            "launched": self.tool("python3 /nonexistent/tool.py"),
+            "missing": self.tool("anptop-missing-binary --scan"),
+        })
+        
+        assert results["present"].available and results["present"].path
+        assert results["present"].version is None  # interpreter version is not the tool's
+        assert not results["launched"].available
+        assert "tool.py" in results["launched"].reason
+        assert not results["missing"].available
+        assert tool_manager.availability["missing"] == {"available": False, "version": None}
+    
+    async def test_version_detected(self, tmp_path):
+        """With version detection on, a tool's own executable is asked for its version."""
+        binary = tmp_path / "mytool"
+        binary.write_text("#!/bin/sh\necho \"mytool v2.4.1 (build 7)\"\n")
+        binary.chmod(0o755)
+        probe = ToolProbe(ttl_seconds=60, concurrency=1, detect_versions=True)
+        results = await probe.probe_all({"mytool": self.tool("mytool {target}", path=str(binary))})
+        assert results["mytool"].available
+        assert results["mytool"].version == "2.4.1"
+    
+    async def test_results_cached_for_ttl(self, monkeypatch):
+        """Executables are resolved once per TTL and shared between tools."""
+        import app.core.tool_probe as tool_probe
+        calls = []
+        real_which = tool_probe.shutil.which
+        monkeypatch.setattr(tool_probe.shutil, "which", lambda exe: calls.append(exe) or real_which(exe))
+        probe = ToolProbe(ttl_seconds=60, concurrency=4, detect_versions=False)
+        
+        await probe.check("a", self.tool("python3 -c 1"))
+        await probe.check("b", self.tool("python3 -c 2"))
+        await probe.check("a", self.tool("python3 -c 1"))
+        assert calls == ["python3"]
+        
+        probe.ttl_seconds = 0
+        await probe.check("a", self.tool("python3 -c 1"))
+        assert calls == ["python3", "python3"]
+    
+    async def test_unavailable_tool_rejected_before_spawn(self, executor, monkeypatch):
+        """A missing binary fails fast without queueing or spawning a process."""
+        async def no_spawn(*args, **kwargs):
+            raise AssertionError("process spawned")
+        monkeypatch.setattr(asyncio, "create_subprocess_exec", no_spawn)
+        monkeypatch.setitem(tool_manager.tools, "missing_test", self.tool("anptop-missing-binary {target}"))
+        
+        result = await executor.execute_tool("missing_test", {"target": "x"})
+        assert result.status == "unavailable"
+        assert "anptop-missing-binary" in result.stderr
+        assert executor.scheduler.stats()["running"] == 0
+    
+    async def test_version_timeout_kills_process_group(self, tmp_path):
+        """A tool that ignores --version is killed with everything it started."""
+        marker = tmp_path / "marker"
+        binary = tmp_path / "busy-tool"
+        binary.write_text(f"#!/bin/sh\n(sleep 0.5; touch {marker}) &\nsleep 30\n")
+        binary.chmod(0o755)
+        probe = ToolProbe(ttl_seconds=60, concurrency=1, detect_versions=True, version_timeout=0.2)
+        assert await probe._read_version(str(binary)) is None
+        await asyncio.sleep(0.8)
+        assert not marker.exists()
+
+
+
+class TestShardedExecution:
+    """Test suite for running a plan's shards and resuming it."""
+    
+    @pytest.fixture
+    def targets_tool(self, monkeypatch):
+        tool = SecurityTool(
+            name="Targets",
+            category=ToolCategory.DISCOVERY,
+            description="Test tool",
+            command_template="python3 -c \"import sys; sys.exit(1 if '10.0.0.8/30' in sys.argv else 0)\" {target}",
+            timeout_seconds=30,
+        )
+        monkeypatch.setitem(tool_manager.tools, "targets_test", tool)
+        return "targets_test"
+    
+    def plan(self, tool_name):
+        shards = plan_shards(ScopeIndex(["10.0.0.0/28"]), shard_count=4)
+        return ShardPlan(plan_id="plan-test", tool_name=tool_name, parameters={}, shards=shards)
+    
+    async def test_shards_run_and_resume(self, executor, targets_tool):
+        """Each shard runs once; a resumed plan re-runs only the failed shard."""
+        plan = await executor.execute_sharded(self.plan(targets_tool))
+        assert [s.status for s in plan.shards] == ["success", "success", "failed", "success"]
+        assert sorted(r.command.split()[-1] for r in executor.execution_history) == [
+            "10.0.0.0/30", "10.0.0.12/30", "10.0.0.4/30", "10.0.0.8/30",
+        ]
+        
+        saved = await executor.load_plan("plan-test")
+        assert [s.status for s in saved.shards] == [s.status for s in plan.shards]
+        
+        resumed = await executor.execute_sharded(saved)
+        assert [s.attempts for s in resumed.shards] == [1, 1, 2, 1]
+        assert not executor.is_plan_running("plan-test")
+    
+    async def test_shards_beyond_queue_room_wait(self, executor, targets_tool, monkeypatch):
+        """A plan larger than the scheduler queue runs in waves instead of being rejected."""
+        monkeypatch.setattr(settings, "SCAN_SHARD_SAVE_INTERVAL", 60)
+        executor.scheduler.max_concurrent = 1
+        executor.scheduler.max_queue = 1
+        saves = []
+        save_plan = executor._save_plan
+        
+        async def counted(plan):
+            saves.append([s.status for s in plan.shards])
+            await save_plan(plan)
+        
+        monkeypatch.setattr(executor, "_save_plan", counted)
+        plan = await executor.execute_sharded(self.plan(targets_tool))
+        assert [s.status for s in plan.shards] == ["success", "success", "failed", "success"]
+        assert len(saves) <= 3
+        assert "running" not in saves[0] and saves[-1] == [s.status for s in plan.shards]
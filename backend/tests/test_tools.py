@@ -2,6 +2,7 @@
 ANPTOP Backend - Tests for Security Tools Configuration
 """
 
+import json
 import pytest
 import sys
 import os
@@ -24,7 +25,9 @@ from app.core.tools_config import (
     tool_manager,
     ToolCategory,
     OSType,
+    SecurityTool,
 )
+from app.core.tool_catalog import load_catalog, CatalogError
 
 
 class TestToolsConfiguration:
@@ -239,3 +242,223 @@ class TestToolApprovalRequirements:
                 tool = ALL_SECURITY_TOOLS[tool_name]
                 assert tool.requires_approval is True, \
                     f"Tool {tool_name} should require approval"
+
+
+class TestCommandTemplates:
+    """Test suite for compiled command templates."""
+    
+    def test_all_templates_compile(self):
+        """Every configured template compiles at load time."""
+        for name, tool in ALL_SECURITY_TOOLS.items():
+            assert tool_manager.compile_command(tool) is not None, \
+                f"Tool {name} template should compile"
+    
+    def test_simple_template_runs_without_shell(self):
+        """Plain templates render to argv with one token per argument."""
+        prepared = tool_manager.prepare_command("nmap_service", {"target": "10.0.0.1"})
+        assert prepared.shell is None
+        assert prepared.argv == ["nmap", "-sV", "10.0.0.1"]
+        assert tool_manager.build_command("nmap_service", {"target": "10.0.0.1"}) == "nmap -sV 10.0.0.1"
+    
+    def test_parameter_stays_single_argument(self):
+        """Values with spaces or shell syntax are not split or interpreted."""
+        prepared = tool_manager.prepare_command("metasploit", {"command": "use x; run"})
+        assert prepared.argv == ["msfconsole", "-q", "-x", "use x; run"]
+        prepared = tool_manager.prepare_command("nmap_service", {"target": "a; rm -rf /"})
+        assert prepared.argv[-1] == "a; rm -rf /"
+    
+    def test_placeholders_within_tokens(self):
+        """Several placeholders inside one token are all substituted."""
+        prepared = tool_manager.prepare_command(
+            "unicornscan", {"target": "10.0.0.1", "ports": "1-1024"}
+        )
+        assert prepared.argv == ["unicornscan", "10.0.0.1:1-1024", "-T5"]
+    
+    def test_list_parameter_expands(self):
+        """A list value becomes one argument per item, or a comma list inside a token."""
+        prepared = tool_manager.prepare_command("nmap_service", {"target": ["10.0.0.0/24", "10.0.2.0/23"]})
+        assert prepared.argv == ["nmap", "-sV", "10.0.0.0/24", "10.0.2.0/23"]
+        prepared = tool_manager.prepare_command(
+            "unicornscan", {"target": ["10.0.0.1", "10.0.0.2"], "ports": "80"}
+        )
+        assert prepared.argv[1] == "10.0.0.1,10.0.0.2:80"
+    
+    def test_shell_only_for_operators(self):
+        """Templates with unquoted operators keep using the shell."""
+        shell_tools = {
+            name for name, tool in ALL_SECURITY_TOOLS.items()
+            if tool_manager.compile_command(tool).shell
+        }
+        assert shell_tools == {"azure_powershell", "powerup"}
+
+
+class TestToolIndex:
+    """Test suite for precomputed tool indexes."""
+    
+    def test_index_is_reused_until_registry_changes(self, monkeypatch):
+        """The index is rebuilt only after the registry is modified."""
+        index = tool_manager.index
+        assert tool_manager.index is index
+        monkeypatch.setitem(tool_manager.tools, "index_test", ALL_SECURITY_TOOLS["nmap"])
+        rebuilt = tool_manager.index
+        assert rebuilt is not index
+        assert "index_test" in rebuilt.by_category[ToolCategory.DISCOVERY]
+        assert rebuilt.summary_payload.etag != index.summary_payload.etag
+    
+    def test_indexes_match_registry(self):
+        """Inverted indexes agree with a full scan of the registry."""
+        index = tool_manager.index
+        for category in ToolCategory:
+            expected = {k for k, t in ALL_SECURITY_TOOLS.items() if t.category == category}
+            assert set(index.by_category[category]) == expected
+        assert set(index.high_risk) == {
+            k for k, t in ALL_SECURITY_TOOLS.items() if t.risk_level >= 4
+        }
+        assert set(tool_manager.get_tools_by_os(OSType.WINDOWS)) == {
+            k for k, t in ALL_SECURITY_TOOLS.items()
+            if t.os_type in (OSType.WINDOWS, OSType.CROSS_PLATFORM)
+        }
+    
+    def test_indexes_are_read_only(self):
+        """Callers cannot mutate the shared indexes."""
+        with pytest.raises(TypeError):
+            tool_manager.get_high_risk_tools()["x"] = None
+    
+    def test_filtered_listing_payload(self):
+        """Filtered listings are serialized once per filter combination."""
+        payload = tool_manager.index.list_payload(ToolCategory.SCANNING, None, 1)
+        assert tool_manager.index.list_payload(ToolCategory.SCANNING, None, 1) is payload
+        tools = json.loads(payload.body)
+        assert tools and all(t["category"] == "scanning" and t["risk_level"] == 1 for t in tools)
+
+
+CATALOG = """
+version: 1
+merge:
+  - file: extra.yaml
+    mode: {mode}
+sections:
+  scanning:
+    portscan:
+      name: Port Scan
+      category: scanning
+      description: Scan ports
+      os_type: linux
+      command_template: portscan {{target}}
+"""
+
+EXTRA = """
+sections:
+  scanning:
+    portscan:
+      name: Port Scan (overlay)
+      category: scanning
+      description: Scan ports
+      os_type: linux
+      command_template: portscan -v {target}
+  discovery:
+    pinger:
+      name: Pinger
+      category: discovery
+      description: Ping hosts
+      os_type: cross_platform
+      command_template: ping {target}
+      risk_level: 2
+"""
+
+
+def write_catalog(directory, mode="add_missing", extra=EXTRA):
+    (directory / "tools.yaml").write_text(CATALOG.format(mode=mode))
+    (directory / "extra.yaml").write_text(extra)
+    return str(directory / "tools.yaml")
+
+
+class TestToolCatalog:
+    """Test suite for the YAML tool catalog and its compiled cache."""
+    
+    def test_add_missing_keeps_existing_definitions(self, tmp_path):
+        """Overlay tools are added, but existing keys are not replaced."""
+        catalog = load_catalog(write_catalog(tmp_path), SecurityTool)
+        assert catalog.tools["portscan"].name == "Port Scan"
+        assert catalog.tools["pinger"].os_type == OSType.CROSS_PLATFORM
+        assert list(catalog.sections) == ["scanning", "discovery"]
+    
+    def test_override_replaces_existing_definitions(self, tmp_path):
+        """Override overlays win over the main catalog."""
+        catalog = load_catalog(write_catalog(tmp_path, mode="override"), SecurityTool)
+        assert catalog.tools["portscan"].name == "Port Scan (overlay)"
+    
+    def test_cache_round_trip(self, tmp_path):
+        """Tools built from the cache equal the validated ones."""
+        path = write_catalog(tmp_path)
+        cache = str(tmp_path / "cache" / "catalog.json")
+        compiled = load_catalog(path, SecurityTool, cache)
+        cached = load_catalog(path, SecurityTool, cache)
+        assert not compiled.from_cache and cached.from_cache
+        assert cached.tools == compiled.tools
+        assert cached.tools["pinger"].category is ToolCategory.DISCOVERY
+    
+    def test_cache_writable_by_others_is_ignored(self, tmp_path):
+        """A cache in a group- or world-writable place is recompiled, not trusted."""
+        path = write_catalog(tmp_path)
+        cache = tmp_path / "cache" / "catalog.json"
+        load_catalog(path, SecurityTool, str(cache))
+        cache.chmod(0o666)
+        assert not load_catalog(path, SecurityTool, str(cache)).from_cache
+        cache.chmod(0o600)
+        cache.parent.chmod(0o777)
+        assert not load_catalog(path, SecurityTool, str(cache)).from_cache
+        cache.parent.chmod(0o700)
+        assert load_catalog(path, SecurityTool, str(cache)).from_cache
+    
+    def test_cache_entries_are_validated(self, tmp_path):
+        """A cache entry the model rejects forces a recompile."""
+        path = write_catalog(tmp_path)
+        cache = tmp_path / "catalog.json"
+        load_catalog(path, SecurityTool, str(cache))
+        payload = json.loads(cache.read_text())
+        payload["sections"]["discovery"]["pinger"]["risk_level"] = 9
+        cache.write_text(json.dumps(payload))
+        catalog = load_catalog(path, SecurityTool, str(cache))
+        assert not catalog.from_cache
+        assert catalog.tools["pinger"].risk_level == 2
+    
+    def test_cache_invalidated_by_overlay_change(self, tmp_path):
+        """Editing an overlay file forces a recompile."""
+        path = write_catalog(tmp_path)
+        cache = str(tmp_path / "catalog.json")
+        load_catalog(path, SecurityTool, cache)
+        (tmp_path / "extra.yaml").write_text(EXTRA.replace("Pinger", "Pinger 2"))
+        catalog = load_catalog(path, SecurityTool, cache)
+        assert not catalog.from_cache
+        assert catalog.tools["pinger"].name == "Pinger 2"
+    
+    def test_invalid_entry_rejected(self, tmp_path):
+        """A tool failing validation is reported by section and key."""
+        path = write_catalog(tmp_path, extra=EXTRA.replace("risk_level: 2", "risk_level: 9"))
+        with pytest.raises(CatalogError, match="discovery.pinger"):
+            load_catalog(path, SecurityTool)
+    
+    def test_reload_swaps_registry_in_place(self, tmp_path, monkeypatch):
+        """Reload replaces the shared registry, or leaves it untouched on error."""
+        import app.core.tools_config as tools_config
+        registry = tool_manager.tools
+        before = dict(registry)
+        
+        monkeypatch.setattr(tools_config, "CATALOG_PATH", write_catalog(tmp_path))
+        monkeypatch.setattr(tools_config, "CATALOG_CACHE_PATH", "")
+        try:
+            tool_manager.reload()
+            assert tool_manager.tools is registry is ALL_SECURITY_TOOLS
+            assert set(registry) == {"portscan", "pinger"}
+            assert set(tool_manager.index.by_category[ToolCategory.DISCOVERY]) == {"pinger"}
+            assert tool_manager.prepare_command("portscan", {"target": "a b"}).argv == ["portscan", "a b"]
+            
+            (tmp_path / "tools.yaml").write_text("sections: [")
+            with pytest.raises(CatalogError):
+                tool_manager.reload()
+            assert set(registry) == {"portscan", "pinger"}
+        finally:
+            monkeypatch.undo()
+            tool_manager.reload()
+        assert registry == before